@@ -37,6 +37,8 @@ class SimulationRequest(BaseModel):
     analysis_date: Optional[date] = Field(None, description="Analysis start date (defaults to today)")
     period_type: str = Field("QUARTERLY", description="Period frequency")
     debug_mode: bool = Field(False, description="Use deterministic seed for reproducible results")
+    seed: Optional[int] = Field(None, ge=0, description="Root seed for reproducible results")
+    correlation_model: str = Field("CHOLESKY", description="CHOLESKY or FACTOR (large pools)")
     
     @validator("period_type")
     def validate_period_type(cls, v):
@@ -44,6 +46,13 @@ class SimulationRequest(BaseModel):
         if v not in allowed:
             raise ValueError(f"period_type must be one of {allowed}")
         return v
+    
+    @validator("correlation_model")
+    def validate_correlation_model(cls, v):
+        allowed = ["CHOLESKY", "FACTOR"]
+        if v not in allowed:
+            raise ValueError(f"correlation_model must be one of {allowed}")
+        return v
 
 
 class DealSimulationRequest(BaseModel):
@@ -53,6 +62,8 @@ class DealSimulationRequest(BaseModel):
     num_simulations: int = Field(1000, ge=100, le=10000)
     analysis_date: Optional[date] = None
     period_type: str = Field("QUARTERLY")
+    seed: Optional[int] = Field(None, ge=0, description="Root seed for reproducible results")
+    correlation_model: str = Field("CHOLESKY", description="CHOLESKY or FACTOR (large pools)")
     
     @validator("asset_allocations")
     def validate_allocations(cls, v):
@@ -68,6 +79,51 @@ class DealSimulationRequest(BaseModel):
         if v not in allowed:
             raise ValueError(f"period_type must be one of {allowed}")
         return v
+    
+    @validator("correlation_model")
+    def validate_correlation_model(cls, v):
+        allowed = ["CHOLESKY", "FACTOR"]
+        if v not in allowed:
+            raise ValueError(f"correlation_model must be one of {allowed}")
+        return v
+
+
+class MultiDealSimulationRequest(BaseModel):
+    """Request model for simulating several deals on shared rating paths"""
+    portfolio_id: str = Field(..., description="Base portfolio identifier")
+    deal_allocations: Dict[str, Dict[str, float]] = Field(
+        ..., description="Deal ID to (asset ID to par amount) mapping"
+    )
+    num_simulations: int = Field(1000, ge=100, le=10000)
+    analysis_date: Optional[date] = None
+    period_type: str = Field("QUARTERLY")
+    seed: Optional[int] = Field(None, ge=0, description="Root seed for reproducible results")
+    correlation_model: str = Field("CHOLESKY", description="CHOLESKY or FACTOR (large pools)")
+    
+    @validator("deal_allocations")
+    def validate_deal_allocations(cls, v):
+        if not v:
+            raise ValueError("Deal allocations cannot be empty")
+        for deal_id, allocations in v.items():
+            if not allocations:
+                raise ValueError(f"Asset allocations for deal {deal_id} cannot be empty")
+            if any(amount <= 0 for amount in allocations.values()):
+                raise ValueError("All allocation amounts must be positive")
+        return v
+    
+    @validator("period_type")
+    def validate_period_type(cls, v):
+        allowed = ["QUARTERLY", "SEMI-ANNUALLY", "ANNUALLY"]
+        if v not in allowed:
+            raise ValueError(f"period_type must be one of {allowed}")
+        return v
+    
+    @validator("correlation_model")
+    def validate_correlation_model(cls, v):
+        allowed = ["CHOLESKY", "FACTOR"]
+        if v not in allowed:
+            raise ValueError(f"correlation_model must be one of {allowed}")
+        return v
 
 
 class ExportRequest(BaseModel):
@@ -124,7 +180,9 @@ async def run_portfolio_simulation(
             num_simulations=request.num_simulations,
             analysis_date=request.analysis_date,
             period_type=request.period_type,
-            debug_mode=request.debug_mode
+            debug_mode=request.debug_mode,
+            seed=request.seed,
+            correlation_model=request.correlation_model
         )
         
         return {
@@ -171,7 +229,9 @@ async def run_deal_simulation(
             asset_allocations=request.asset_allocations,
             num_simulations=request.num_simulations,
             analysis_date=request.analysis_date,
-            period_type=request.period_type
+            period_type=request.period_type,
+            seed=request.seed,
+            correlation_model=request.correlation_model
         )
         
         return {
@@ -191,6 +251,49 @@ async def run_deal_simulation(
         raise HTTPException(status_code=500, detail=f"Deal simulation failed: {str(e)}")
 
 
+@router.post("/simulate/deals", response_model=Dict[str, Any])
+async def run_multi_deal_simulation(
+    request: MultiDealSimulationRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Run credit migration simulation for several deals at once
+    
+    Rating paths are simulated once for the union of all deals' collateral
+    and projected onto each deal, so obligors held by several deals migrate
+    identically everywhere.
+    
+    **Features:**
+    - Cross-deal consistent rating paths
+    - Per-deal statistics from a single simulation
+    - Cost roughly independent of the number of deals
+    """
+    try:
+        service = CreditMigrationService(db)
+        
+        results = service.run_multi_deal_simulation(
+            portfolio_id=request.portfolio_id,
+            deal_allocations=request.deal_allocations,
+            num_simulations=request.num_simulations,
+            analysis_date=request.analysis_date,
+            period_type=request.period_type,
+            seed=request.seed,
+            correlation_model=request.correlation_model
+        )
+        
+        return {
+            "success": True,
+            "message": "Multi-deal simulation completed successfully",
+            "data": results
+        }
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Multi-deal simulation failed: {str(e)}")
+
+
 @router.post("/export", response_model=Dict[str, Any])
 async def export_simulation_results(
     request: ExportRequest,
@@ -31,9 +31,9 @@ def get_integration_service():
     """Data integration service dependency"""
     return DataIntegrationService()
 
-def get_risk_service():
+def get_risk_service(db: Session = Depends(get_db)):
     """Risk analytics service dependency"""
-    return RiskAnalyticsService()
+    return RiskAnalyticsService(db)
 
 @router.get("/{deal_id}/metrics", response_model=RiskMetricsResponse)
 async def get_risk_metrics(
@@ -148,6 +148,8 @@ async def calculate_value_at_risk(
             "var_percentage": var_result["var_percentage"]
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"VaR calculation failed: {str(e)}")
 
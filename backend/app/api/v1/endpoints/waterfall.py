@@ -25,9 +25,9 @@ def get_db():
     with db_config.get_db_session('postgresql') as session:
         yield session
 
-def get_waterfall_service():
+def get_waterfall_service(db: Session = Depends(get_db)):
     """Waterfall calculation service dependency"""
-    return WaterfallService()
+    return WaterfallService(db)
 
 @router.post("/calculate", response_model=WaterfallCalculationResponse)
 async def calculate_waterfall(
@@ -150,6 +150,8 @@ async def run_stress_test(
             }
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stress testing failed: {str(e)}")
 
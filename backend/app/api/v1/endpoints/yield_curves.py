@@ -295,6 +295,13 @@ async def update_yield_curve(
         if 'rates' in update_fields:
             rates_data = update_fields.pop('rates')
             
+            # Look the curve up before deleting its rates, so the shared cache
+            # never holds a curve loaded from the uncommitted deletes
+            existing_curve = service.load_yield_curve(
+                curve_model.curve_name,
+                curve_model.analysis_date
+            )
+            
             # Delete existing rates
             service.session.query(YieldCurveRateModel).filter_by(
                 curve_id=curve_id
@@ -308,25 +315,22 @@ async def update_yield_curve(
             # Recreate yield curve with new rates
             rate_dict = {rate.maturity_month: rate.spot_rate for rate in rates_data}
             
-            # Load existing curve and update with new rates
-            existing_curve = service.load_yield_curve(
-                curve_model.curve_name,
-                curve_model.analysis_date
-            )
-            
+            # Rebuild the curve with the new rates (loaded curves are shared and read-only)
             if existing_curve:
-                existing_curve.setup(
+                updated_curve = YieldCurve(session=service.session)
+                updated_curve.setup(
                     curve_model.curve_name,
                     update_fields.get('analysis_date', curve_model.analysis_date),
                     rate_dict
                 )
-                existing_curve.save_to_database(
+                updated_curve.save_to_database(
                     curve_model.curve_type,
                     curve_model.currency,
                     update_fields.get('description', curve_model.description)
                 )
         
         # Update other fields
+        previous_key = (curve_model.curve_name, curve_model.analysis_date)
         for field, value in update_fields.items():
             if hasattr(curve_model, field):
                 setattr(curve_model, field, value)
@@ -336,6 +340,11 @@ async def update_yield_curve(
         
         service.session.commit()
         
+        # Only committed changes may evict the shared cached curve
+        service.invalidate_cached_curve(*previous_key)
+        if (curve_model.curve_name, curve_model.analysis_date) != previous_key:
+            service.invalidate_cached_curve(curve_model.curve_name, curve_model.analysis_date)
+        
         # Return updated curve
         return await get_yield_curve(curve_id=curve_id, service=service)
         
@@ -375,6 +384,7 @@ async def delete_yield_curve(
         curve_model.updated_date = date.today()
         
         service.session.commit()
+        service.invalidate_cached_curve(curve_model.curve_name, curve_model.analysis_date)
         
     except HTTPException:
         raise
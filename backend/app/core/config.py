@@ -98,6 +98,15 @@ class Settings(BaseSettings):
     cache_default_timeout: int = 3600
     cache_long_timeout: int = 86400
     correlation_cache_timeout: int = 21600
+    yield_curve_cache_size: int = 64
+    waterfall_program_cache_size: int = 128
+    shared_array_dir: str = "data/shared_arrays"
+    
+    # Risk Analytics Configuration
+    var_simulation_paths: int = 10000
+    var_batch_size: int = 10000
+    var_num_workers: int = 1
+    var_random_seed: Optional[int] = None
     
     # Logging Configuration
     log_level: str = "INFO"
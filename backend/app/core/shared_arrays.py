@@ -0,0 +1,174 @@
+"""
+Shared Reference Arrays
+Publishes large read-only reference arrays (correlation matrix, transition
+matrices, rating scales) once as memory-mapped .npy files under the data
+directory. Every API worker process attaches to the same pages zero-copy
+instead of loading its own copy, and publishing a new version swaps the
+arrays atomically for all workers.
+"""
+
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from pathlib import Path
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """One published version of a named array (array is a read-only memory map)"""
+    name: str
+    version: int
+    array: np.ndarray
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class SharedArrayRegistry:
+    """
+    Versioned read-only arrays shared between processes through memory maps
+
+    Each name has a directory holding v<version>.npy (and .json metadata)
+    files plus a CURRENT file naming the live version. Version files are
+    never rewritten; publish() writes the new files first and then replaces
+    CURRENT in one rename, so readers see either the old or the new version.
+    Arrays already attached stay valid after a swap.
+    """
+
+    CURRENT_FILE = "CURRENT"
+
+    def __init__(self, root: str, keep_versions: int = 2):
+        self.root = Path(root)
+        self.keep_versions = keep_versions
+        self._attached: Dict[str, SharedArray] = {}
+        self._lock = threading.Lock()
+
+    def _directory(self, name: str) -> Path:
+        if not name or os.sep in name or (os.altsep and os.altsep in name) or name.startswith('.'):
+            raise ValueError(f"Invalid shared array name: {name!r}")
+        return self.root / name
+
+    @staticmethod
+    def _write_atomic(path: Path, write) -> None:
+        """Write through a temporary file in the same directory, then rename over path"""
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                write(handle)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def current_version(self, name: str) -> Optional[int]:
+        """Live version of name, or None if it was never published"""
+        try:
+            return int((self._directory(name) / self.CURRENT_FILE).read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def publish(self, name: str, array: np.ndarray, version: Optional[int] = None,
+                metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Publish array as the live version of name
+
+        version defaults to the current version + 1 and must be greater than
+        the current version. Returns the published version.
+        """
+        directory = self._directory(name)
+        directory.mkdir(parents=True, exist_ok=True)
+        current = self.current_version(name)
+        if version is None:
+            version = (current or 0) + 1
+        elif current is not None and version <= current:
+            raise ValueError(f"Version {version} of {name} is not newer than the live version {current}")
+
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise ValueError("Shared arrays cannot hold Python objects")
+
+        self._write_atomic(directory / f"v{version}.npy", lambda handle: np.save(handle, array))
+        self._write_atomic(directory / f"v{version}.json",
+                           lambda handle: handle.write(json.dumps(metadata or {}).encode('utf-8')))
+        self._write_atomic(directory / self.CURRENT_FILE, lambda handle: handle.write(str(version).encode()))
+        logger.info(f"Published shared array {name} v{version} {array.shape} {array.dtype}")
+
+        self._prune(name)
+        return version
+
+    def attach(self, name: str) -> Optional[SharedArray]:
+        """
+        Live version of name mapped read-only, or None if it was never published
+
+        The mapping is reused until a newer version is published.
+        """
+        version = self.current_version(name)
+        if version is None:
+            return None
+
+        with self._lock:
+            attached = self._attached.get(name)
+            if attached is not None and attached.version == version:
+                return attached
+
+        directory = self._directory(name)
+        try:
+            array = np.load(directory / f"v{version}.npy", mmap_mode='r', allow_pickle=False)
+            metadata_path = directory / f"v{version}.json"
+            metadata = json.loads(metadata_path.read_text()) if metadata_path.exists() else {}
+        except FileNotFoundError:
+            # Pruned by a concurrent publish; the next call sees the newer version
+            logger.warning(f"Shared array {name} v{version} disappeared while attaching")
+            return None
+
+        shared = SharedArray(name, version, array, metadata)
+        with self._lock:
+            attached = self._attached.get(name)
+            if attached is None or attached.version < version:
+                self._attached[name] = shared
+            else:
+                shared = attached
+        return shared
+
+    def names(self) -> List[str]:
+        """Names with a published version"""
+        if not self.root.exists():
+            return []
+        return sorted(path.name for path in self.root.iterdir()
+                      if (path / self.CURRENT_FILE).exists())
+
+    def detach(self, name: Optional[str] = None) -> None:
+        """Forget this process's mapping of name, or of every name when None"""
+        with self._lock:
+            if name is None:
+                self._attached.clear()
+            else:
+                self._attached.pop(name, None)
+
+    def _prune(self, name: str) -> None:
+        """Remove all but the newest keep_versions versions"""
+        directory = self._directory(name)
+        versions = sorted(int(path.stem[1:]) for path in directory.glob("v*.npy") if path.stem[1:].isdigit())
+        for version in versions[:-self.keep_versions]:
+            for suffix in (".npy", ".json"):
+                try:
+                    (directory / f"v{version}{suffix}").unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    # Still mapped by a worker on platforms that lock mapped files
+                    logger.debug(f"Keeping {name} v{version}{suffix}: {e}")
+
+
+shared_array_registry = SharedArrayRegistry(settings.shared_array_dir)
@@ -8,7 +8,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 from .core.config import settings
-from .core.database import DatabaseManager
+from .core.database import DatabaseManager, SessionLocal
+from .models.yield_curve import YieldCurveService
 from .core.security import configure_production_security
 from .core.monitoring import configure_monitoring
 from .api.v1.api import api_router
@@ -53,6 +54,17 @@ async def startup_event():
         logger.info("✅ Database tables created/verified")
     except Exception as e:
         logger.error(f"❌ Database table creation failed: {e}")
+    
+    # Warm the yield curve cache with the active curves
+    try:
+        db = SessionLocal()
+        try:
+            curve_count = YieldCurveService(db).warm_cache()
+        finally:
+            db.close()
+        logger.info(f"✅ Yield curve cache warmed with {curve_count} curves")
+    except Exception as e:
+        logger.error(f"❌ Yield curve cache warm-up failed: {e}")
 
 
 @app.on_event("shutdown") 
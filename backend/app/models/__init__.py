@@ -11,6 +11,7 @@ from .waterfall import WaterfallConfiguration, WaterfallStep, PaymentPriority
 from .waterfall_config import WaterfallTemplate, PaymentRule, WaterfallModification, PaymentOverride
 from .waterfall_types import WaterfallType, BaseWaterfallStrategy, WaterfallStrategyFactory
 from .dynamic_waterfall import DynamicWaterfallStrategy
+from .waterfall_program import WaterfallProgram, WaterfallProgramCache, waterfall_program_cache
 from .mag_waterfall import MagWaterfallStrategy, MagWaterfallType, MagWaterfallConfiguration, MagPerformanceMetrics
 from .clo_deal_engine import CLODealEngine
 from .portfolio_optimization import PortfolioOptimizationEngine, OptimizationInputs, OptimizationResult
@@ -20,6 +21,9 @@ from .oc_trigger import OCTrigger, OCTriggerCalculator, OCTriggerResult
 from .ic_trigger import ICTrigger, ICTriggerCalculator, ICTriggerResult
 from .trigger_aware_waterfall import TriggerAwareWaterfallStrategy
 from .fee import Fee, FeeCalculation, FeeCalculator, FeeType
+from .correlation_matrix import (
+    DenseCorrelationMatrix, CorrelationMatrixArtifact, CorrelationMatrixCache, correlation_matrix_cache
+)
 from .collateral_pool import (
     CollateralPool, CollateralPoolAsset, CollateralPoolAccount, ConcentrationTestResult,
     CollateralPoolForCLO, AssetCashFlowForDeal,
@@ -76,6 +80,9 @@ __all__ = [
     'BaseWaterfallStrategy',
     'WaterfallStrategyFactory',
     'DynamicWaterfallStrategy',
+    'WaterfallProgram',
+    'WaterfallProgramCache',
+    'waterfall_program_cache',
     
     # Magnetar Waterfall
     'MagWaterfallStrategy',
@@ -111,6 +118,12 @@ __all__ = [
     'FeeCalculator',
     'FeeType',
     
+    # Correlation Matrix
+    'DenseCorrelationMatrix',
+    'CorrelationMatrixArtifact',
+    'CorrelationMatrixCache',
+    'correlation_matrix_cache',
+    
     # Collateral Pool System
     'CollateralPool',
     'CollateralPoolAsset',
@@ -7,6 +7,7 @@ from sqlalchemy import Column, String, Integer, Numeric, Date, Boolean, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import date, datetime
+from dateutil.relativedelta import relativedelta
 from decimal import Decimal
 from typing import Optional, Dict, List, Any, Union, TYPE_CHECKING
 from enum import Enum
@@ -397,11 +398,15 @@ class Asset(Base):
         Integrates with YieldCurve system for market-based pricing
         """
         if not yield_curve_service:
+            # Curves come from the process-wide cache; the session is only used on a miss
             from ..models.yield_curve import YieldCurveService
-            from sqlalchemy.orm import Session
-            from ..core.database import get_db
-            session = next(get_db())
-            yield_curve_service = YieldCurveService(session)
+            from ..core.database import SessionLocal
+            session = SessionLocal()
+            try:
+                return self.update_fair_value(YieldCurveService(session), curve_name,
+                                              credit_spread_bps, pricing_date)
+            finally:
+                session.close()
         
         if not pricing_date:
             pricing_date = date.today()
@@ -452,8 +457,9 @@ class Asset(Base):
     
     def _select_default_discount_curve(self) -> str:
         """Select appropriate discount curve based on asset characteristics"""
-        # Treasury curve for government securities
-        if self.sector and 'GOVERNMENT' in self.sector.upper():
+        # Treasury curve for government securities (sector is not a mapped column)
+        sector = getattr(self, 'sector', None)
+        if sector and 'GOVERNMENT' in sector.upper():
             return 'USD_TREASURY'
         
         # Credit curves based on rating
@@ -537,11 +543,7 @@ class Asset(Base):
                         if next_payment <= current_date:
                             next_payment = date(current_date.year + 1, 6, 15)
                 else:
-                    next_payment = date(current_date.year, current_date.month + payment_months, current_date.day)
-                    if current_date.month + payment_months > 12:
-                        next_payment = date(current_date.year + 1, 
-                                          (current_date.month + payment_months) - 12, 
-                                          current_date.day)
+                    next_payment = current_date + relativedelta(months=payment_months)
                 
                 if next_payment > self.maturity:
                     break
@@ -564,13 +566,7 @@ class Asset(Base):
                 payment_months = 3  # Quarterly
                 
                 while current_date < self.maturity:
-                    next_payment = date(current_date.year, 
-                                      current_date.month + payment_months, 
-                                      current_date.day)
-                    if current_date.month + payment_months > 12:
-                        next_payment = date(current_date.year + 1,
-                                          (current_date.month + payment_months) - 12,
-                                          current_date.day)
+                    next_payment = current_date + relativedelta(months=payment_months)
                     
                     if next_payment > self.maturity:
                         break
@@ -9,15 +9,16 @@ from datetime import date, datetime
 from enum import Enum
 from dataclasses import dataclass
 import logging
+import numpy as np
 from sqlalchemy.orm import Session
 
 from .clo_deal import CLODeal
-from .liability import Liability, LiabilityCalculator
+from .liability import Liability, LiabilityCalculator, LiabilityRiskCalculator
 from .asset import Asset
 from .waterfall_types import WaterfallStep
 from .dynamic_waterfall import DynamicWaterfallStrategy
 from .accounts import AccountsCalculator, AccountsService, CashType as AccountsCashType
-from .reinvestment import Reinvest, ReinvestmentService, ReinvestInfo as ReinvestmentModelInfo, PaymentDates as ReinvestmentPaymentDates
+from .reinvestment import Reinvest, ReinvestmentBook, ReinvestmentService, ReinvestInfo as ReinvestmentModelInfo, PaymentDates as ReinvestmentPaymentDates
 from .incentive_fee import IncentiveFeeStructure
 from ..services.incentive_fee import IncentiveFee, IncentiveFeeService
 
@@ -171,6 +172,7 @@ class CLODealEngine:
         # Enhanced reinvestment management
         self.reinvestment_service: Optional[ReinvestmentService] = None
         self.reinvestment_periods: Dict[int, Reinvest] = {}  # period -> Reinvest instance
+        self.reinvestment_book = ReinvestmentBook()  # Aggregated cash flows of all reinvestment periods
         self.enable_reinvestment = False
         
         # Enhanced incentive fee management
@@ -310,8 +312,9 @@ class CLODealEngine:
         # Add reinvestment amount
         reinvest.add_reinvestment(reinvestment_amount)
         
-        # Store reinvestment period
+        # Store reinvestment period; its cash flows are tracked in the book from here on
         self.reinvestment_periods[period] = reinvest
+        self.reinvestment_book.add_vintage(period, reinvest)
         
         return reinvest
     
@@ -701,20 +704,9 @@ class CLODealEngine:
         if not self.enable_reinvestment:
             return
         
-        reinvestment_proceeds = {"INTEREST": 0.0, "PRINCIPAL": 0.0}
-        
-        # Process existing reinvestment periods
-        for reinvest_period, reinvest in self.reinvestment_periods.items():
-            if reinvest_period <= period:
-                # Get proceeds from this reinvestment period
-                interest_proceeds = reinvest.get_proceeds("INTEREST")
-                principal_proceeds = reinvest.get_proceeds("PRINCIPAL")
-                
-                reinvestment_proceeds["INTEREST"] += interest_proceeds
-                reinvestment_proceeds["PRINCIPAL"] += principal_proceeds
-                
-                # Roll forward the reinvestment period
-                reinvest.roll_forward()
+        # Proceeds of all existing reinvestment periods, then roll them forward
+        reinvestment_proceeds = self.reinvestment_book.proceeds(period)
+        self.reinvestment_book.roll_forward(period)
         
         # Add reinvestment proceeds to deal accounts
         if reinvestment_proceeds["INTEREST"] > 0:
@@ -750,7 +742,7 @@ class CLODealEngine:
             return 0.0
         
         # Get principal collections for the period
-        principal_collections = float(self.principal_proceeds.get(period, Decimal('0')))
+        principal_collections = float(self.principal_proceeds[period]) if period < len(self.principal_proceeds) else 0.0
         
         # Apply reinvestment strategy
         if self._is_reinvestment_period(period):
@@ -799,11 +791,10 @@ class CLODealEngine:
         if not self.enable_reinvestment:
             return total_proceeds
         
-        for reinvest_period, reinvest in self.reinvestment_periods.items():
-            # Use default liquidation price from reinvestment parameters
-            liquidation_price = self.reinvestment_parameters.get('liquidation_price', 0.70)
-            proceeds = reinvest.liquidate(liquidation_price)
-            total_proceeds += Decimal(str(proceeds))
+        # Use default liquidation price from reinvestment parameters
+        liquidation_price = self.reinvestment_parameters.get('liquidation_price', 0.70)
+        proceeds = self.reinvestment_book.liquidate(liquidation_price)
+        total_proceeds += Decimal(str(proceeds))
         
         return total_proceeds
     
@@ -846,26 +837,24 @@ class CLODealEngine:
         if not self.enable_reinvestment:
             return summary
         
+        book = self.reinvestment_book
+        balances = book.current_balances()
+        reinvested = book.reinvested_amounts()
+        
         for period, reinvest in self.reinvestment_periods.items():
-            # Get reinvestment cash flows
-            cash_flows = reinvest.get_collat_cf()
-            
+            row = book.vintage_rows[period]
             period_summary = {
                 'period': period,
                 'reinvest_id': getattr(reinvest, 'reinvest_id', None),
-                'last_period': reinvest.last_period,
+                'last_period': int(book.last_periods[row]),
                 'current_balances': {
-                    'performing': float(reinvest.prin_ball_ex_defaults()),
-                    'defaults': float(reinvest.prin_ball_defaults()),
-                    'mv_defaults': float(reinvest.mv_defaults())
+                    'performing': float(balances['performing'][row]),
+                    'defaults': float(balances['defaults'][row]),
+                    'mv_defaults': float(balances['mv_defaults'][row])
                 }
             }
             
-            # Calculate totals
-            if len(cash_flows) > 1:  # Skip header row
-                total_reinvested = sum(row[0] for row in cash_flows[1:] if len(row) > 0 and isinstance(row[0], (int, float)))
-                summary['total_reinvested_amount'] += total_reinvested
-            
+            summary['total_reinvested_amount'] += float(reinvested[row])
             summary['total_current_balance'] += period_summary['current_balances']['performing']
             summary['periods'].append(period_summary)
         
@@ -940,22 +929,52 @@ class CLODealEngine:
         """
         Calculate risk measures for all liabilities
         Converted from VBA CalcRiskMeasures()
+        
+        All tranches are measured together on the union of their payment
+        dates, with one zero rate lookup for the whole grid.
         """
+        analysis_date = self.clo_inputs.get("Analysis Date", date.today())
+        
+        tranches = []
         for name, liability in self.liabilities.items():
-            calculator = self.liability_calculators[name]
-            risk_measures = calculator.calculate_risk_measures(
-                self.yield_curve, 
-                self.clo_inputs.get("Analysis Date", date.today())
-            )
-            
-            # Update liability with calculated risk measures
-            if risk_measures:
-                liability.calculated_yield = risk_measures.get('calculated_yield')
-                liability.calculated_dm = risk_measures.get('calculated_dm')
-                liability.calculated_price = risk_measures.get('calculated_price')
-                liability.weighted_average_life = risk_measures.get('weighted_average_life')
-                liability.macaulay_duration = risk_measures.get('macaulay_duration')
-                liability.modified_duration = risk_measures.get('modified_duration')
+            if not liability.current_balance or liability.current_balance <= 0:
+                continue
+            payment_dates, cash_flows, principal_paid = self.liability_calculators[name].get_risk_cash_flows()
+            if payment_dates:
+                tranches.append((liability, payment_dates, cash_flows, principal_paid))
+        
+        if not tranches:
+            return
+        
+        grid = sorted({d for _, payment_dates, _, _ in tranches for d in payment_dates})
+        date_index = {d: k for k, d in enumerate(grid)}
+        cash_flow_matrix = np.zeros((len(tranches), len(grid)))
+        principal_matrix = np.zeros((len(tranches), len(grid)))
+        for row, (_, payment_dates, cash_flows, principal_paid) in enumerate(tranches):
+            columns = [date_index[d] for d in payment_dates]
+            np.add.at(cash_flow_matrix[row], columns, cash_flows)
+            np.add.at(principal_matrix[row], columns, principal_paid)
+        
+        risk_calculator = LiabilityRiskCalculator(analysis_date, grid)
+        measures = risk_calculator.calculate(
+            cash_flow_matrix, principal_matrix,
+            current_balance=[float(liability.current_balance) for liability, *_ in tranches],
+            original_balance=[float(liability.original_balance) for liability, *_ in tranches],
+            zero_rates=risk_calculator.zero_rates(self.yield_curve),
+            price=[float(liability.input_price or Decimal('1.0')) for liability, *_ in tranches],
+            discount_margin=[float(liability.input_discount_margin or Decimal('0')) for liability, *_ in tranches],
+            final_days=[(payment_dates[-1] - analysis_date).days for _, payment_dates, _, _ in tranches]
+        )
+        
+        # Update liabilities with calculated risk measures
+        for row, (liability, *_) in enumerate(tranches):
+            risk_measures = LiabilityRiskCalculator.to_decimals(measures, row)
+            liability.calculated_yield = risk_measures['calculated_yield']
+            liability.calculated_dm = risk_measures['calculated_dm']
+            liability.calculated_price = risk_measures['calculated_price']
+            liability.weighted_average_life = risk_measures['weighted_average_life']
+            liability.macaulay_duration = risk_measures['macaulay_duration']
+            liability.modified_duration = risk_measures['modified_duration']
     
     # Private helper methods
     def _months_between_dates(self, start_date: date, end_date: date) -> int:
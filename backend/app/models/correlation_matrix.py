@@ -0,0 +1,214 @@
+"""
+Dense Asset Correlation Matrix
+Stores the migrated pairwise asset correlations as one versioned dense array
+with an asset-id index. The same serialized blob is persisted in PostgreSQL,
+cached under a single Redis key and shared between worker processes as a
+memory-mapped array, so pair lookups, sub-matrix extraction and full-matrix
+loads are plain array indexing
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Any
+from datetime import datetime
+import io
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, JSON, func
+from sqlalchemy.orm import Session
+
+from ..core.database import Base
+from ..core.config import settings
+from ..core.shared_arrays import SharedArray
+
+
+class DenseCorrelationMatrix:
+    """
+    Symmetric asset correlation matrix with an asset-id index
+
+    Pairs absent from the source data are NaN; the diagonal is 1.0. The
+    value array is read-only because instances are shared between callers.
+    """
+
+    def __init__(self, asset_ids: Sequence[str], values: np.ndarray, version: int = 0):
+        values = np.asarray(values)
+        if values.ndim != 2 or values.shape != (len(asset_ids), len(asset_ids)):
+            raise ValueError(f"Matrix shape {values.shape} does not match {len(asset_ids)} asset ids")
+
+        self.asset_ids: List[str] = [str(asset_id) for asset_id in asset_ids]
+        self.index: Dict[str, int] = {asset_id: i for i, asset_id in enumerate(self.asset_ids)}
+        self.values = values
+        self.values.setflags(write=False)
+        self.version = version
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[str, str, Any]], dtype: Any = np.float64,
+                   version: int = 0) -> "DenseCorrelationMatrix":
+        """Build the matrix from (asset1_id, asset2_id, correlation) rows"""
+        rows = list(pairs)
+        first = np.array([str(row[0]) for row in rows], dtype=str)
+        second = np.array([str(row[1]) for row in rows], dtype=str)
+        correlations = np.array([float(row[2]) for row in rows], dtype=np.float64)
+
+        asset_ids = np.unique(np.concatenate([first, second]))
+        i = np.searchsorted(asset_ids, first)
+        j = np.searchsorted(asset_ids, second)
+
+        values = np.full((len(asset_ids), len(asset_ids)), np.nan, dtype=dtype)
+        # Mirror first so pairs stored in both directions keep their own value
+        values[j, i] = correlations
+        values[i, j] = correlations
+        np.fill_diagonal(values, 1.0)
+        return cls(asset_ids.tolist(), values, version)
+
+    @classmethod
+    def from_shared(cls, shared: SharedArray) -> "DenseCorrelationMatrix":
+        """Wrap a memory-mapped array published with an asset_ids metadata entry"""
+        return cls(shared.metadata['asset_ids'], shared.array, shared.version)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DenseCorrelationMatrix":
+        """Load a matrix serialized by to_bytes"""
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            return cls(archive['asset_ids'].tolist(), archive['values'], int(archive['version']))
+
+    def to_bytes(self) -> bytes:
+        """Serialize values, asset ids and version as an uncompressed .npz blob"""
+        buffer = io.BytesIO()
+        np.savez(buffer, values=self.values, asset_ids=np.array(self.asset_ids, dtype=str),
+                 version=np.int64(self.version))
+        return buffer.getvalue()
+
+    @property
+    def size(self) -> int:
+        """Number of assets"""
+        return len(self.asset_ids)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    @property
+    def pair_count(self) -> int:
+        """Number of populated (asset1, asset2) entries, diagonal included"""
+        return int(np.count_nonzero(~np.isnan(self.values)))
+
+    def positions(self, asset_ids: Sequence[str]) -> np.ndarray:
+        """Row index of each asset id, -1 for assets not in the matrix"""
+        return np.array([self.index.get(str(asset_id), -1) for asset_id in asset_ids], dtype=np.int64)
+
+    def get(self, asset1_id: str, asset2_id: str) -> Optional[float]:
+        """Correlation between two assets, or None when the pair is unknown"""
+        i = self.index.get(str(asset1_id))
+        j = self.index.get(str(asset2_id))
+        if i is None or j is None:
+            return None
+        value = self.values[i, j]
+        return None if np.isnan(value) else float(value)
+
+    def submatrix(self, asset_ids: Sequence[str], missing: float = np.nan) -> np.ndarray:
+        """
+        Correlation matrix restricted to asset_ids, in that order
+
+        Rows and columns of unknown assets and unknown pairs are filled with
+        missing; the diagonal is always 1.0.
+        """
+        positions = self.positions(asset_ids)
+        known = positions >= 0
+        result = self.values[np.ix_(np.where(known, positions, 0), np.where(known, positions, 0))]
+        result[~known, :] = missing
+        result[:, ~known] = missing
+        if not np.isnan(missing):
+            result[np.isnan(result)] = missing
+        np.fill_diagonal(result, 1.0)
+        return result
+
+
+class CorrelationMatrixArtifact(Base):
+    """
+    Versioned dense correlation matrix persisted as a single blob
+
+    matrix_data holds DenseCorrelationMatrix.to_bytes() (bytea in PostgreSQL);
+    the remaining columns describe the blob without loading it.
+    """
+    __tablename__ = 'correlation_matrix_artifacts'
+
+    version = Column(Integer, primary_key=True)
+    asset_count = Column(Integer, nullable=False)
+    pair_count = Column(Integer, nullable=False)
+    dtype = Column(String(10), nullable=False)
+    asset_ids = Column(JSON, nullable=False)
+    matrix_data = Column(LargeBinary, nullable=False)
+    source_rows = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def from_matrix(cls, matrix: DenseCorrelationMatrix,
+                    source_rows: Optional[int] = None) -> "CorrelationMatrixArtifact":
+        return cls(
+            version=matrix.version,
+            asset_count=matrix.size,
+            pair_count=matrix.pair_count,
+            dtype=str(matrix.dtype),
+            asset_ids=matrix.asset_ids,
+            matrix_data=matrix.to_bytes(),
+            source_rows=source_rows
+        )
+
+    @staticmethod
+    def next_version(session: Session) -> int:
+        current = session.query(func.max(CorrelationMatrixArtifact.version)).scalar()
+        return (current or 0) + 1
+
+    @staticmethod
+    def load(session: Session, version: Optional[int] = None) -> Optional[DenseCorrelationMatrix]:
+        """Matrix stored under version, or the latest version when None"""
+        query = session.query(CorrelationMatrixArtifact.matrix_data)
+        if version is not None:
+            query = query.filter(CorrelationMatrixArtifact.version == version)
+        else:
+            query = query.order_by(CorrelationMatrixArtifact.version.desc())
+        row = query.first()
+        return DenseCorrelationMatrix.from_bytes(row[0]) if row else None
+
+
+class CorrelationMatrixCache:
+    """
+    In-process copy of the current correlation matrix
+
+    The copy expires after ttl seconds so a version built by another
+    process is picked up; put() replaces it immediately.
+    """
+
+    def __init__(self, ttl: float = 21600):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._matrix: Optional[DenseCorrelationMatrix] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[DenseCorrelationMatrix]:
+        """Cached matrix, or None when empty or expired"""
+        with self._lock:
+            if self._matrix is None or time.monotonic() - self._loaded_at > self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._matrix
+
+    def put(self, matrix: DenseCorrelationMatrix) -> None:
+        with self._lock:
+            self._matrix = matrix
+            self._loaded_at = time.monotonic()
+
+    def clear(self) -> None:
+        """Drop the cached matrix and reset statistics"""
+        with self._lock:
+            self._matrix = None
+            self._loaded_at = 0.0
+            self.hits = 0
+            self.misses = 0
+
+
+correlation_matrix_cache = CorrelationMatrixCache(settings.correlation_cache_timeout)
@@ -8,7 +8,8 @@ and transition matrices.
 
 Key Features:
 - Monte Carlo simulation of credit rating migrations
-- Asset correlation modeling using Cholesky decomposition
+- Asset correlation modeling using Cholesky decomposition or a multi-factor copula
+- Sobol, antithetic and importance sampling with standard errors
 - Rating transition matrices with periodic adjustments
 - Statistical output generation and analysis
 - Support for multiple deal structures and time periods
@@ -19,18 +20,20 @@ Date: 2025-01-12
 
 from typing import List, Dict, Optional, Tuple, Any, Union
 from datetime import date, datetime, timedelta
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from enum import IntEnum
 import numpy as np
-from scipy.stats import norm
+from scipy.stats import norm, qmc
 from scipy.linalg import cholesky
 import pandas as pd
 import logging
-import random
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 from ..utils.math_utils import MathUtils
-from ..utils.matrix_utils import MatrixUtils
+from ..utils.matrix_utils import MatrixUtils, FactorCorrelationModel
+from ..utils.statistics_utils import StreamingStatistics, MonteCarloEstimator
+from ..services.transition_matrix_service import TransitionMatrixService
 
 logger = logging.getLogger(__name__)
 
@@ -116,13 +119,174 @@ class SimHistory:
     rating_hist_bal: List[RatingHistBal] = field(default_factory=list)
 
 
+# Field layouts used by the vectorized simulation kernel. Histories are held as
+# (simulations x periods x fields) arrays whose last axis follows these tuples.
+HIST_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(RatingHist))
+HIST_BAL_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(RatingHistBal))
+
+# Integer rating codes: 1-17 match SPRating, 18 is default and 19 is matured
+MATURED_CODE = 19
+NUM_RATING_CODES = MATURED_CODE + 1
+
+RATING_CODES: Dict[str, int] = {
+    "AAA": 1, "AA+": 2, "AA": 3, "AA-": 4,
+    "A+": 5, "A": 6, "A-": 7,
+    "BBB+": 8, "BBB": 9, "BBB-": 10,
+    "BB+": 11, "BB": 12, "BB-": 13,
+    "B+": 14, "B": 15, "B-": 16,
+    "CCC": 17, "D": int(SPRating.DEFAULT), "M": MATURED_CODE
+}
+
+# Rating code -> RatingHist count column (-1 for unused code 0)
+_HIST_COUNT_COLUMNS = np.array([-1] + [
+    HIST_FIELDS.index(name) for name in (
+        "num_aaa", "num_aa_plus", "num_aa", "num_aa_minus",
+        "num_a_plus", "num_a", "num_a_minus",
+        "num_bbb_plus", "num_bbb", "num_bbb_minus",
+        "num_bb_plus", "num_bb", "num_bb_minus",
+        "num_b_plus", "num_b", "num_b_minus",
+        "num_ccc_assets", "num_defaults", "num_matures"
+    )
+])
+
+# Rating code -> RatingHistBal balance column (bal_aaa ... bal_mature are in code order)
+_HIST_BAL_COLUMNS = np.arange(-1, MATURED_CODE)
+
+# Streaming statistics cover count fields followed by balance fields
+STAT_FIELDS: Tuple[str, ...] = HIST_FIELDS + HIST_BAL_FIELDS
+
+# Root seed used when debug mode asks for reproducible runs
+DEBUG_SEED = 12
+
+# Random-number schemes for vectorized runs
+SAMPLING_METHODS: Tuple[str, ...] = ("PSEUDO", "SOBOL", "ANTITHETIC", "IMPORTANCE")
+
+# Largest dimension supported by scipy's Sobol direction numbers
+SOBOL_MAX_DIMENSION = 21201
+
+# Fewest independent Sobol scrambles per run, so their spread gives a standard error
+SOBOL_MIN_SCRAMBLES = 2
+
+# Tail fields reported with standard errors and effective sample sizes
+SAMPLING_FIELDS: Tuple[str, ...] = (
+    "num_defaults", "num_period_defaults", "bal_defaults", "cdr"
+)
+
+# Holdings of one deal projected from shared paths: (asset columns, par amounts, number of periods)
+DealProjection = Tuple[Union[slice, np.ndarray], np.ndarray, int]
+
+# Pairwise correlation levels used for pool-derived correlation structures
+DIFFERENT_BASE_CORRELATION = 0.2
+SAME_INDUSTRY_BASE_CORRELATION = 0.4
+SAME_ISSUER_BASE_CORRELATION = 0.7
+
+
+def _run_simulation_chunk(tran_matrix: np.ndarray, corr_matrix: Optional[np.ndarray],
+                          factor_model: Optional[FactorCorrelationModel],
+                          schedule: Tuple[np.ndarray, ...], deals: List[DealProjection],
+                          num_periods: int, num_sims: int,
+                          seed_sequence: np.random.SeedSequence, retain_paths: bool,
+                          sampling: str, importance_shift: float, sobol_scramble_size: int
+                          ) -> List[Tuple[StreamingStatistics, np.ndarray, np.ndarray, MonteCarloEstimator]]:
+    """Process pool entry point: simulate one chunk of paths with its own seed stream"""
+    engine = CreditMigration()
+    engine.tran_matrix = tran_matrix
+    engine._build_tran_search_grid()
+    engine.corr_matrix = corr_matrix
+    engine.factor_model = factor_model
+    engine.num_assets = len(schedule[0])
+    engine.sampling = sampling
+    engine.importance_shift = importance_shift
+    engine.sobol_scramble_size = sobol_scramble_size
+    return engine._simulate_chunk(schedule, deals, num_periods, num_sims, seed_sequence, retain_paths)
+
+
+class _ShockSampler:
+    """
+    Per-batch source of correlated uniforms for the engine's sampling method
+    
+    The systematic normals (every Cholesky input, or the factor draws of a
+    factor model) can come from independently scrambled Sobol sequences of
+    engine.sobol_scramble_size points each (stacked in order), be mirrored into
+    antithetic pairs (path i and i + batch/2) or have their first component
+    shifted for importance sampling (by importance_shift / sqrt(periods),
+    so the path-level tilt does not grow with the horizon), which
+    accumulates each path's log-likelihood ratio. Factor-model idiosyncratic noise is pseudo-random
+    (mirrored for antithetic pairs).
+    """
+    
+    def __init__(self, engine: "CreditMigration", batch_size: int, num_periods: int,
+                 rng: np.random.Generator):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.rng = rng
+        self.sampling = engine.sampling
+        if engine.factor_model is not None:
+            self.num_systematic = engine.factor_model.num_factors
+        else:
+            self.num_systematic = engine.num_assets
+        self.log_weights = np.zeros(batch_size)
+        # Spread the shift so the whole path's tilt (and weight variance) is horizon independent
+        self.period_shift = engine.importance_shift / np.sqrt(max(num_periods, 1))
+        
+        self._sobol_normals = None
+        if self.sampling == "SOBOL" and num_periods > 0:
+            dimension = num_periods * self.num_systematic
+            if dimension > SOBOL_MAX_DIMENSION:
+                raise ValueError(
+                    f"Sobol dimension {dimension} exceeds {SOBOL_MAX_DIMENSION}; "
+                    "use a factor correlation model or fewer periods"
+                )
+            scramble_size = engine.sobol_scramble_size
+            if scramble_size < 1 or scramble_size & (scramble_size - 1) or batch_size % scramble_size:
+                raise ValueError(
+                    f"Sobol batch of {batch_size} is not a whole number of power-of-two "
+                    f"scrambles of {scramble_size} points"
+                )
+            exponent = scramble_size.bit_length() - 1
+            points = np.concatenate([
+                qmc.Sobol(d=dimension, scramble=True, seed=rng).random_base2(exponent)
+                for _ in range(batch_size // scramble_size)
+            ])
+            points = np.clip(points, np.finfo(float).eps, 1 - np.finfo(float).eps)
+            self._sobol_normals = norm.ppf(points).reshape(batch_size, num_periods, self.num_systematic)
+    
+    def _normals(self, num_columns: int) -> np.ndarray:
+        if self.sampling == "ANTITHETIC":
+            half = self.rng.standard_normal((self.batch_size // 2, num_columns))
+            return np.concatenate([half, -half])
+        return self.rng.standard_normal((self.batch_size, num_columns))
+    
+    def next_uniforms(self, period: int) -> np.ndarray:
+        """Correlated uniforms for every path of the batch in the given period"""
+        if self._sobol_normals is not None:
+            systematic = self._sobol_normals[:, period - 1]
+        else:
+            systematic = self._normals(self.num_systematic)
+        
+        if self.sampling == "IMPORTANCE" and self.num_systematic > 0:
+            shift = self.period_shift
+            systematic[:, 0] += shift
+            self.log_weights += shift * shift / 2 - shift * systematic[:, 0]
+        
+        factor_model = self.engine.factor_model
+        if factor_model is None:
+            correlated = systematic @ self.engine.corr_matrix.T
+        else:
+            correlated = factor_model.transform(systematic, self._normals(factor_model.num_assets))
+        return norm.cdf(correlated)
+
+
 class CreditMigration:
     """Credit Migration Monte Carlo simulation engine"""
     
     def __init__(self):
         """Initialize credit migration engine"""
         self.tran_matrix: Optional[np.ndarray] = None  # Transition matrix with z-thresholds
+        self.transition_service: Optional[TransitionMatrixService] = None
         self.corr_matrix: Optional[np.ndarray] = None  # Cholesky decomposition of correlation matrix
+        self.factor_model: Optional[FactorCorrelationModel] = None  # Used instead of corr_matrix in FACTOR mode
+        self.correlation_model: str = "CHOLESKY"
         self.asset_order: List[str] = []  # Order of assets in correlation matrix
         self.num_assets: int = 0
         self.num_periods: int = 0
@@ -131,6 +295,21 @@ class CreditMigration:
         self.rating_hist_bal: List[RatingHistBal] = []
         self.sim_hist: List[SimHistory] = []
         self.sim_count: int = 0
+        self.hist_counts: Optional[np.ndarray] = None  # (sims x periods x HIST_FIELDS)
+        self.hist_balances: Optional[np.ndarray] = None  # (sims x periods x HIST_BAL_FIELDS)
+        self.retain_paths: bool = True  # Keep every path; otherwise only streaming statistics
+        self.statistics: Optional[StreamingStatistics] = None  # (periods x STAT_FIELDS)
+        self.num_sims: int = 0
+        self.deal_results: Dict[str, "CreditMigration"] = {}  # Per-deal results of a universe run
+        self.sampling: str = "PSEUDO"  # One of SAMPLING_METHODS
+        self.importance_shift: float = 0.0  # Mean shift of the systematic factor for IMPORTANCE
+        self.sobol_scramble_size: int = 1  # Points per independent Sobol scramble, a power of two
+        self.estimator: Optional[MonteCarloEstimator] = None  # (periods x STAT_FIELDS)
+        self._tran_search_grid: Optional[np.ndarray] = None
+        self._tran_row_offset: float = 0.0
+        self._tran_low: float = 0.0
+        self.seed: Optional[int] = None  # Root seed for SeedSequence-derived streams
+        self.rng: np.random.Generator = np.random.default_rng()
         self.period_type: str = "QUARTERLY"
         self.math_utils = MathUtils()
         self.matrix_utils = MatrixUtils()
@@ -139,53 +318,116 @@ class CreditMigration:
         """Clean up simulation data"""
         self.tran_matrix = None
         self.corr_matrix = None
+        self.factor_model = None
         self.asset_order.clear()
         self.rating_hist.clear()
         self.rating_hist_bal.clear()
         self.sim_hist.clear()
         self.sim_count = 0
+        self.hist_counts = None
+        self.hist_balances = None
+        self.statistics = None
+        self.num_sims = 0
+        self.deal_results = {}
+        self.estimator = None
+        self._tran_search_grid = None
     
     def setup(self, num_sims: int, debug_mode: bool = False, 
              collateral_pool: Optional[Any] = None, 
-             period: str = "QUARTERLY") -> None:
-        """Setup credit migration simulation"""
+             period: str = "QUARTERLY",
+             seed: Optional[int] = None,
+             retain_paths: bool = True,
+             correlation_model: str = "CHOLESKY",
+             num_factors: Optional[int] = None,
+             sampling: str = "PSEUDO",
+             importance_shift: float = 1.0) -> None:
+        """
+        Setup credit migration simulation
+        
+        A root seed makes runs reproducible; debug mode falls back to DEBUG_SEED.
+        Without one, fresh OS entropy is used. With retain_paths=False only the
+        bounded-memory streaming statistics are kept, not every simulated path.
+        
+        correlation_model="FACTOR" replaces the full Cholesky factor with a
+        multi-factor copula (see _setup_correlation_matrix), which keeps large
+        pools tractable.
+        
+        sampling selects the random numbers of vectorized runs: PSEUDO,
+        SOBOL (scrambled Sobol systematic draws), ANTITHETIC (mirrored path pairs) or IMPORTANCE (first
+        systematic factor shifted towards downgrades for positive
+        importance_shift; with a Cholesky matrix this is the first
+        independent normal). Each reports standard errors and
+        effective sample sizes via get_sampling_diagnostics.
+        
+        SOBOL splits the paths into independent scrambles of equal
+        power-of-two size (the largest dividing num_sims that fits
+        batch_size and leaves at least SOBOL_MIN_SCRAMBLES of them), drawn
+        with random_base2 so every scramble keeps the sequence's balance
+        properties. The spread of the scramble means gives the standard
+        errors, so they are finite even when the run fits in one chunk;
+        a num_sims with a large power-of-two factor (e.g. 4096) keeps the
+        scrambles large.
+        """
+        sampling = sampling.upper()
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"Unknown sampling method: {sampling}")
+        self.sampling = sampling
+        self.importance_shift = importance_shift if sampling == "IMPORTANCE" else 0.0
+        
         self.period_type = period
         self._setup_transition_matrix(period)
-        self._setup_correlation_matrix(collateral_pool)
+        self._setup_correlation_matrix(collateral_pool, correlation_model, num_factors)
         
-        if debug_mode:
+        if seed is not None:
+            self._set_randomize_seed(seed)
+        elif debug_mode:
             self._set_randomize_seed()
+        else:
+            self.seed = None
+            self.rng = np.random.default_rng()
         
-        self.sim_hist = [SimHistory() for _ in range(num_sims)]
+        self.retain_paths = retain_paths
+        self.num_sims = num_sims
+        self.sim_hist = [SimHistory() for _ in range(num_sims)] if retain_paths else []
         self.sim_count = 0
+        self.hist_counts = None
+        self.hist_balances = None
+        self.statistics = None
+        self.estimator = None
+        self.deal_results = {}
     
     def _setup_transition_matrix(self, period: str = "QUARTERLY") -> None:
-        """Setup transition matrix based on period frequency"""
+        """
+        Setup transition matrix based on period frequency
+        
+        Period matrices come from the shared TransitionMatrixService, which
+        derives the annual generator once and caches the cumulative
+        thresholds for every month step. Annual periods use the annual
+        matrix as given.
+        """
         # Default annual S&P transition matrix (example values)
         annual_matrix = self._get_default_annual_transition_matrix()
         
-        if period.upper() == "ANNUALLY":
-            quarterly_matrix = annual_matrix
-        elif period.upper() == "SEMI-ANNUALLY":
-            # Convert annual to semi-annual
-            semi_matrix = self.matrix_utils.matrix_sqrt(annual_matrix)
-            quarterly_matrix = self.matrix_utils.matrix_qom(semi_matrix)
-        else:
-            # Convert annual to quarterly
-            semi_matrix = self.matrix_utils.matrix_sqrt(annual_matrix)
-            semi_matrix = self.matrix_utils.matrix_qom(semi_matrix)
-            quarterly_matrix = self.matrix_utils.matrix_sqrt(semi_matrix)
-            quarterly_matrix = self.matrix_utils.matrix_qom(quarterly_matrix)
-        
-        # Convert to cumulative matrix
-        num_ratings = quarterly_matrix.shape[0]
-        cumulative_matrix = np.zeros_like(quarterly_matrix)
-        
-        for i in range(num_ratings):
-            for j in range(num_ratings):
-                cumulative_matrix[i, j] = np.sum(quarterly_matrix[i, :j+1])
+        self.transition_service = TransitionMatrixService.for_matrix(annual_matrix)
+        self.tran_matrix = self.transition_service.get_cumulative_matrix(
+            self.math_utils.get_months(period))
+        self._build_tran_search_grid()
+    
+    def _build_tran_search_grid(self) -> None:
+        """
+        Flatten the cumulative transition rows into one sorted search grid.
         
-        self.tran_matrix = cumulative_matrix
+        Each row is replaced by its running maximum (so the first column whose
+        running maximum exceeds z is the first column whose threshold exceeds z,
+        matching _get_next_rating) and shifted into its own disjoint band, which
+        lets a single searchsorted call resolve every asset's next rating.
+        """
+        running_max = np.maximum.accumulate(self.tran_matrix, axis=1)
+        low = min(float(running_max.min()), 0.0)
+        self._tran_row_offset = max(float(running_max.max()), 1.0) - low + 1.0
+        row_shift = np.arange(running_max.shape[0])[:, None] * self._tran_row_offset
+        self._tran_search_grid = (running_max - low + row_shift).ravel()
+        self._tran_low = low
     
     def _get_default_annual_transition_matrix(self) -> np.ndarray:
         """Get default S&P annual transition matrix"""
@@ -215,19 +457,60 @@ class CreditMigration:
         
         return matrix
     
-    def _setup_correlation_matrix(self, collateral_pool: Optional[Any] = None) -> None:
-        """Setup asset correlation matrix"""
+    def _setup_correlation_matrix(self, collateral_pool: Optional[Any] = None,
+                                  correlation_model: str = "CHOLESKY",
+                                  num_factors: Optional[int] = None) -> None:
+        """
+        Setup asset correlation matrix
+        
+        CHOLESKY factors the full pairwise matrix. FACTOR uses a multi-factor
+        copula instead: with num_factors it is a low-rank approximation of the
+        pairwise matrix, otherwise it is built directly from the pool's
+        industries and issuers without forming the N x N matrix.
+        """
+        correlation_model = correlation_model.upper()
+        if correlation_model not in ("CHOLESKY", "FACTOR"):
+            raise ValueError(f"Unknown correlation model: {correlation_model}")
+        self.correlation_model = correlation_model
+        self.corr_matrix = None
+        self.factor_model = None
+        
+        if collateral_pool is None:
+            self.asset_order = [f"ASSET_{i}" for i in range(10)]
+        else:
+            self.asset_order = collateral_pool.get_asset_ids()
+        self.num_assets = len(self.asset_order)
+        
+        if correlation_model == "FACTOR" and collateral_pool is not None and num_factors is None:
+            self.factor_model = self._create_factor_model_from_pool(collateral_pool)
+            return
+        
         if collateral_pool is None:
             # Use default correlation matrix
             correlation_matrix = self._create_default_correlation_matrix()
-            self.asset_order = [f"ASSET_{i}" for i in range(correlation_matrix.shape[0])]
         else:
             # Create correlation matrix from collateral pool
             correlation_matrix = self._create_correlation_matrix_from_pool(collateral_pool)
-            self.asset_order = collateral_pool.get_asset_ids()
         
-        # Perform Cholesky decomposition
-        self.corr_matrix = cholesky(correlation_matrix, lower=True)
+        if correlation_model == "FACTOR":
+            self.factor_model = FactorCorrelationModel.from_correlation_matrix(
+                correlation_matrix, num_factors or 1
+            )
+        else:
+            # Perform Cholesky decomposition
+            self.corr_matrix = cholesky(correlation_matrix, lower=True)
+    
+    def set_factor_model(self, factor_model: FactorCorrelationModel, asset_order: List[str]) -> None:
+        """
+        Use an externally built factor model, e.g. a low-rank approximation of
+        the migrated asset correlation matrix, for the given asset order.
+        """
+        if factor_model.num_assets != len(asset_order):
+            raise ValueError("Factor model size does not match the asset order")
+        self.correlation_model = "FACTOR"
+        self.corr_matrix = None
+        self.factor_model = factor_model
+        self.asset_order = list(asset_order)
         self.num_assets = len(self.asset_order)
     
     def _create_default_correlation_matrix(self) -> np.ndarray:
@@ -250,11 +533,11 @@ class CreditMigration:
         correlation_matrix = np.eye(num_assets)
         
         # Default correlation table values
-        same_issuer_base = 0.7
+        same_issuer_base = SAME_ISSUER_BASE_CORRELATION
         same_issuer_rating_adj = 0.05
-        same_industry_base = 0.4
+        same_industry_base = SAME_INDUSTRY_BASE_CORRELATION
         same_industry_rating_adj = 0.03
-        different_base = 0.2
+        different_base = DIFFERENT_BASE_CORRELATION
         different_rating_adj = 0.02
         
         for i, asset_i in enumerate(asset_ids):
@@ -284,6 +567,21 @@ class CreditMigration:
         
         return correlation_matrix
     
+    def _create_factor_model_from_pool(self, collateral_pool: Any) -> FactorCorrelationModel:
+        """
+        Global + industry + issuer factor model from collateral pool attributes
+        
+        Reproduces the base levels of _create_correlation_matrix_from_pool
+        (different / same industry / same issuer); the rating-distance
+        adjustments have no factor representation and are not applied.
+        """
+        assets = [collateral_pool.get_asset(asset_id) for asset_id in collateral_pool.get_asset_ids()]
+        return FactorCorrelationModel.from_groups(
+            [[asset.sp_industry for asset in assets], [asset.issuer_id for asset in assets]],
+            DIFFERENT_BASE_CORRELATION,
+            [SAME_INDUSTRY_BASE_CORRELATION, SAME_ISSUER_BASE_CORRELATION]
+        )
+    
     def _get_rating_rank(self, rating: str) -> int:
         """Get numerical rank for rating"""
         rating_map = {
@@ -296,15 +594,18 @@ class CreditMigration:
         }
         return rating_map.get(rating, 18)
     
-    def _set_randomize_seed(self) -> None:
-        """Set random seed for reproducible results"""
-        random.seed(12)
-        np.random.seed(12)
+    def _set_randomize_seed(self, seed: int = DEBUG_SEED) -> None:
+        """Set root seed for reproducible results without touching global random state"""
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
     
     def _get_correlated_random(self) -> np.ndarray:
         """Generate correlated random numbers"""
+        if self.factor_model is not None:
+            return norm.cdf(self.factor_model.sample(self.rng, 1)[0])
+        
         # Generate independent standard normal random variables
-        random_vector = np.random.standard_normal(self.num_assets)
+        random_vector = self.rng.standard_normal(self.num_assets)
         
         # Apply correlation through Cholesky decomposition
         correlated_random = self.corr_matrix @ random_vector
@@ -318,6 +619,9 @@ class CreditMigration:
                           deal_collateral: Optional[Dict[str, float]] = None,
                           period: str = "QUARTERLY") -> None:
         """Run rating migration simulation for a single path"""
+        if self.sampling != "PSEUDO":
+            raise ValueError(f"{self.sampling} sampling is only available for vectorized runs")
+        
         self.analysis_date = analysis_date
         
         # Determine period months
@@ -402,11 +706,558 @@ class CreditMigration:
         self._calc_rating_hist_bal(analysis_date, collateral_pool, deal_collateral)
         
         # Store simulation results
-        if self.sim_count < len(self.sim_hist):
-            self.sim_hist[self.sim_count].rating_hist = self.rating_hist.copy()
-            self.sim_hist[self.sim_count].rating_hist_bal = self.rating_hist_bal.copy()
+        if self.sim_count < self.num_sims:
+            self._accumulate_statistics(*self._history_to_arrays(self.rating_hist, self.rating_hist_bal))
+            if self.retain_paths:
+                self.sim_hist[self.sim_count].rating_hist = self.rating_hist.copy()
+                self.sim_hist[self.sim_count].rating_hist_bal = self.rating_hist_bal.copy()
             self.sim_count += 1
     
+    def run_vectorized_simulation(self, analysis_date: date, collateral_pool: Any,
+                                  deal_collateral: Optional[Dict[str, float]] = None,
+                                  period: str = "QUARTERLY",
+                                  num_sims: Optional[int] = None,
+                                  batch_size: int = 1000,
+                                  num_workers: int = 1) -> None:
+        """
+        Run all rating migration paths at once on integer rating codes.
+        
+        Produces the same RatingHist/RatingHistBal statistics as calling
+        run_rating_history once per simulation, but draws correlated normals
+        for a whole batch of simulations per period and resolves transitions
+        with searchsorted against the cumulative rows. Balance buckets are
+        taken from the simulated paths directly, so ratings are not written
+        back to the collateral pool.
+        
+        Simulations are split into chunks of batch_size, each drawing from its
+        own Generator spawned from the root seed, so results for a given seed
+        and batch_size do not depend on num_workers. With num_workers > 1 the
+        chunks run on a process pool.
+        
+        Results are stored in hist_counts/hist_balances.
+        """
+        self._check_ready()
+        
+        if num_sims is None:
+            num_sims = self.num_sims
+        
+        month_step = self.math_utils.get_months(period)
+        
+        if deal_collateral is None:
+            last_maturity = collateral_pool.get_last_maturity_date()
+        else:
+            last_maturity = max(
+                collateral_pool.get_asset_maturity(asset_id)
+                for asset_id in deal_collateral.keys()
+            )
+        
+        num_periods = self._calculate_num_periods(analysis_date, last_maturity, month_step)
+        self.num_periods = num_periods
+        
+        # Deterministic per-asset inputs, gathered once instead of per simulation
+        included = np.array([
+            self._should_include_asset(asset_id, deal_collateral) for asset_id in self.asset_order
+        ], dtype=bool)
+        schedule, par_amounts = self._get_simulation_schedule(
+            analysis_date, collateral_pool, deal_collateral, included, num_periods, month_step
+        )
+        
+        deals = [(slice(None), par_amounts, num_periods)]
+        result, = self._run_chunks(schedule, deals, num_periods, num_sims, batch_size, num_workers)
+        self._set_results(analysis_date, num_periods, num_sims, result)
+    
+    def run_universe_simulation(self, analysis_date: date, collateral_pool: Any,
+                                deal_holdings: Dict[str, Dict[str, float]],
+                                period: str = "QUARTERLY",
+                                num_sims: Optional[int] = None,
+                                batch_size: int = 1000,
+                                num_workers: int = 1) -> Dict[str, "CreditMigration"]:
+        """
+        Simulate rating paths once for the union of all deals' collateral and
+        project them onto every deal.
+        
+        deal_holdings maps deal id -> {asset_id: par_amount}, i.e. the rows of
+        a sparse deal x asset holdings matrix. Correlated draws and rating
+        transitions are computed once per period for the whole universe; each
+        deal only buckets its own columns, so obligors shared between deals
+        follow the same path in every deal. For a given seed and batch_size a
+        deal's histories match run_vectorized_simulation with its collateral.
+        
+        Returns (and keeps in deal_results) one results engine per deal that
+        supports get_simulation_results and export_to_dataframe.
+        """
+        self._check_ready()
+        
+        if not deal_holdings:
+            raise ValueError("At least one deal is required for a universe simulation")
+        for deal_id, holdings in deal_holdings.items():
+            if not holdings:
+                raise ValueError(f"Deal {deal_id} has no holdings")
+        
+        if num_sims is None:
+            num_sims = self.num_sims
+        
+        month_step = self.math_utils.get_months(period)
+        
+        deal_periods = {
+            deal_id: self._calculate_num_periods(
+                analysis_date,
+                max(collateral_pool.get_asset_maturity(asset_id) for asset_id in holdings.keys()),
+                month_step
+            )
+            for deal_id, holdings in deal_holdings.items()
+        }
+        num_periods = max(deal_periods.values())
+        self.num_periods = num_periods
+        
+        universe = set().union(*(holdings.keys() for holdings in deal_holdings.values()))
+        included = np.array([asset_id in universe for asset_id in self.asset_order], dtype=bool)
+        schedule, _ = self._get_simulation_schedule(
+            analysis_date, collateral_pool, None, included, num_periods, month_step
+        )
+        
+        # Sparse holdings: each deal keeps only its asset columns and par amounts
+        asset_index = {asset_id: i for i, asset_id in enumerate(self.asset_order)}
+        deals = []
+        for deal_id, holdings in deal_holdings.items():
+            columns = np.array(sorted(
+                asset_index[asset_id] for asset_id in holdings if asset_id in asset_index
+            ), dtype=np.int64)
+            par_amounts = np.array([holdings[self.asset_order[i]] for i in columns], dtype=float)
+            deals.append((columns, par_amounts, deal_periods[deal_id]))
+        
+        results = self._run_chunks(schedule, deals, num_periods, num_sims, batch_size, num_workers)
+        
+        self.deal_results = {}
+        for deal_id, result in zip(deal_holdings.keys(), results):
+            deal_engine = CreditMigration()
+            deal_engine.period_type = self.period_type
+            deal_engine.seed = self.seed
+            deal_engine.retain_paths = self.retain_paths
+            deal_engine.sampling = self.sampling
+            deal_engine._set_results(analysis_date, deal_periods[deal_id], num_sims, result)
+            self.deal_results[deal_id] = deal_engine
+        
+        return self.deal_results
+    
+    def _check_ready(self) -> None:
+        """Ensure transition and correlation inputs exist before simulating"""
+        if self.tran_matrix is None or (self.corr_matrix is None and self.factor_model is None):
+            raise ValueError("Credit migration must be set up before running simulations")
+        
+        if self._tran_search_grid is None:
+            self._build_tran_search_grid()
+    
+    def _get_simulation_schedule(self, analysis_date: date, collateral_pool: Any,
+                                 deal_collateral: Optional[Dict[str, float]],
+                                 included: np.ndarray, num_periods: int, month_step: int
+                                 ) -> Tuple[Tuple[np.ndarray, ...], np.ndarray]:
+        """Collect the per-asset inputs shared by every simulation path"""
+        initial_codes, known_rating = self._get_initial_rating_codes(collateral_pool, included)
+        maturity_period, balances, default_balances, scheduled_principal, par_amounts = (
+            self._get_period_schedule(analysis_date, collateral_pool, deal_collateral,
+                                      included, num_periods, month_step)
+        )
+        schedule = (initial_codes, known_rating, included, maturity_period,
+                    balances, default_balances, scheduled_principal)
+        return schedule, par_amounts
+    
+    def _run_chunks(self, schedule: Tuple[np.ndarray, ...], deals: List[DealProjection],
+                    num_periods: int, num_sims: int, batch_size: int, num_workers: int
+                    ) -> List[Tuple[StreamingStatistics, np.ndarray, np.ndarray, MonteCarloEstimator]]:
+        """
+        Simulate every chunk and merge the results of each deal in chunk order,
+        so they do not depend on the worker count.
+        
+        Returns per deal its statistics with all paths (or only the final path
+        when paths are not retained) and its sampling estimator.
+        """
+        batch_size = max(1, batch_size)
+        if self.sampling == "SOBOL":
+            self.sobol_scramble_size = self._sobol_scramble_size(num_sims, batch_size)
+            # Chunks hold whole scrambles
+            batch_size = max(1, batch_size // self.sobol_scramble_size) * self.sobol_scramble_size
+        chunk_starts = list(range(0, num_sims, batch_size))
+        chunk_sizes = [min(batch_size, num_sims - start) for start in chunk_starts]
+        if self.sampling == "ANTITHETIC" and any(size % 2 for size in chunk_sizes):
+            raise ValueError("Antithetic sampling needs an even number of simulations in every batch")
+        seed_sequences = np.random.SeedSequence(self.seed).spawn(len(chunk_starts))
+        
+        if num_workers > 1 and len(chunk_starts) > 1:
+            executor = ProcessPoolExecutor(max_workers=num_workers)
+            chunk_results = executor.map(
+                _run_simulation_chunk,
+                [self.tran_matrix] * len(chunk_starts),
+                [self.corr_matrix] * len(chunk_starts),
+                [self.factor_model] * len(chunk_starts),
+                [schedule] * len(chunk_starts),
+                [deals] * len(chunk_starts),
+                [num_periods] * len(chunk_starts),
+                chunk_sizes,
+                seed_sequences,
+                [self.retain_paths] * len(chunk_starts),
+                [self.sampling] * len(chunk_starts),
+                [self.importance_shift] * len(chunk_starts),
+                [self.sobol_scramble_size] * len(chunk_starts)
+            )
+        else:
+            executor = None
+            chunk_results = (
+                self._simulate_chunk(schedule, deals, num_periods, size, seed_sequence, self.retain_paths)
+                for size, seed_sequence in zip(chunk_sizes, seed_sequences)
+            )
+        
+        statistics: List[Optional[StreamingStatistics]] = [None] * len(deals)
+        estimators: List[Optional[MonteCarloEstimator]] = [None] * len(deals)
+        counts: List[List[np.ndarray]] = [[] for _ in deals]
+        balances: List[List[np.ndarray]] = [[] for _ in deals]
+        try:
+            for chunk in chunk_results:
+                for d, (chunk_stats, chunk_counts, chunk_balances, chunk_estimator) in enumerate(chunk):
+                    if statistics[d] is None:
+                        statistics[d] = chunk_stats
+                        estimators[d] = chunk_estimator
+                    else:
+                        statistics[d].merge(chunk_stats)
+                        estimators[d].merge(chunk_estimator)
+                    if self.retain_paths:
+                        counts[d].append(chunk_counts)
+                        balances[d].append(chunk_balances)
+                    else:
+                        counts[d] = [chunk_counts]
+                        balances[d] = [chunk_balances]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        return [
+            (deal_stats, np.concatenate(deal_counts), np.concatenate(deal_balances), deal_estimator)
+            for deal_stats, deal_counts, deal_balances, deal_estimator
+            in zip(statistics, counts, balances, estimators)
+        ]
+    
+    def _set_results(self, analysis_date: date, num_periods: int, num_sims: int,
+                     result: Tuple[StreamingStatistics, np.ndarray, np.ndarray, MonteCarloEstimator]
+                     ) -> None:
+        """Store merged chunk results as this engine's simulation output"""
+        statistics, counts, balances, estimator = result
+        self.analysis_date = analysis_date
+        self.num_periods = num_periods
+        self.statistics = statistics
+        self.estimator = estimator
+        self.sim_count = num_sims
+        
+        if self.retain_paths:
+            self.hist_counts = counts
+            self.hist_balances = balances
+        
+        # Keep the final path in rating_hist/rating_hist_bal like run_rating_history
+        if counts.shape[0] > 0:
+            self.rating_hist = self._to_rating_hist(counts[-1])
+            self.rating_hist_bal = self._to_rating_hist_bal(balances[-1])
+    
+    def _simulate_chunk(self, schedule: Tuple[np.ndarray, ...], deals: List[DealProjection],
+                        num_periods: int, num_sims: int, seed_sequence: np.random.SeedSequence,
+                        retain_paths: bool
+                        ) -> List[Tuple[StreamingStatistics, np.ndarray, np.ndarray, MonteCarloEstimator]]:
+        """
+        Simulate one chunk of paths from its own seed stream.
+        
+        Returns each deal's streaming statistics and sampling estimator
+        together with its paths, or only its final path when paths are not
+        retained.
+        """
+        histories, log_weights = self._simulate_batch(num_sims, num_periods, schedule, deals,
+                                                      rng=np.random.default_rng(seed_sequence))
+        
+        results = []
+        for counts, balance_hist in histories:
+            values = np.concatenate([counts, balance_hist], axis=2)
+            statistics = StreamingStatistics(values.shape[1:])
+            statistics.update(values)
+            estimator = self._estimate(values, log_weights)
+            if retain_paths:
+                results.append((statistics, counts, balance_hist, estimator))
+            else:
+                results.append((statistics, counts[-1:], balance_hist[-1:], estimator))
+        return results
+    
+    @staticmethod
+    def _sobol_scramble_size(num_sims: int, batch_size: int) -> int:
+        """
+        Largest power of two that divides num_sims into at least
+        SOBOL_MIN_SCRAMBLES scrambles and fits in one batch.
+        """
+        if num_sims < SOBOL_MIN_SCRAMBLES:
+            raise ValueError(
+                f"Sobol sampling needs at least {SOBOL_MIN_SCRAMBLES} simulations for its standard errors"
+            )
+        size = num_sims & -num_sims
+        while size > 1 and (size > batch_size or num_sims // size < SOBOL_MIN_SCRAMBLES):
+            size //= 2
+        return size
+    
+    def _estimate(self, values: np.ndarray, log_weights: np.ndarray) -> MonteCarloEstimator:
+        """Feed one chunk's paths to an estimator using the replicates of the sampling method"""
+        estimator = MonteCarloEstimator(values.shape[1:])
+        if self.sampling == "IMPORTANCE":
+            estimator.update(values, weights=np.exp(log_weights))
+        elif self.sampling == "ANTITHETIC":
+            half = values.shape[0] // 2
+            estimator.update(values, replicates=(values[:half] + values[half:]) / 2)
+        elif self.sampling == "SOBOL":
+            # Each scramble is one independent randomization of the Sobol sequence
+            scrambles = values.reshape(-1, self.sobol_scramble_size, *values.shape[1:])
+            estimator.update(values, replicates=scrambles.mean(axis=1))
+        else:
+            estimator.update(values)
+        return estimator
+    
+    def _accumulate_statistics(self, counts: np.ndarray, balances: np.ndarray) -> None:
+        """Fold (sims x periods x fields) histories into the streaming statistics"""
+        values = np.concatenate([counts, balances], axis=2)
+        if self.statistics is None:
+            self.statistics = StreamingStatistics(values.shape[1:])
+        self.statistics.update(values)
+    
+    def _history_to_arrays(self, rating_hist: List[RatingHist],
+                           rating_hist_bal: List[RatingHistBal]) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert one path's records to (1 x periods x fields) count and balance arrays"""
+        counts = np.array(
+            [[getattr(hist, name) for name in HIST_FIELDS] for hist in rating_hist], dtype=np.int64
+        ).reshape(1, len(rating_hist), len(HIST_FIELDS))
+        balances = np.array(
+            [[getattr(hist_bal, name) for name in HIST_BAL_FIELDS] for hist_bal in rating_hist_bal],
+            dtype=float
+        ).reshape(1, len(rating_hist_bal), len(HIST_BAL_FIELDS))
+        return counts, balances
+    
+    def _get_initial_rating_codes(self, collateral_pool: Any,
+                                  included: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Get starting rating codes and whether each rating is a recognised bucket"""
+        codes = np.full(len(self.asset_order), int(SPRating.DEFAULT), dtype=np.int64)
+        known = np.zeros(len(self.asset_order), dtype=bool)
+        
+        for i, asset_id in enumerate(self.asset_order):
+            if not included[i]:
+                continue
+            if collateral_pool.is_defaulted(asset_id):
+                rating = "D"
+            else:
+                rating = collateral_pool.get_sp_rating(asset_id)
+                if rating in ["CCC+", "CCC-", "CC", "C"]:
+                    rating = "CCC"
+            
+            if rating in RATING_CODES:
+                codes[i] = RATING_CODES[rating]
+                known[i] = True
+        
+        return codes, known
+    
+    def _get_period_schedule(self, analysis_date: date, collateral_pool: Any,
+                             deal_collateral: Optional[Dict[str, float]],
+                             included: np.ndarray, num_periods: int, month_step: int
+                             ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Collect maturity periods and balance schedules shared by every simulation path"""
+        num_assets = len(self.asset_order)
+        maturity_period = np.full(num_assets, num_periods + 1, dtype=np.int64)
+        balances = np.zeros((num_periods + 1, num_assets))
+        default_balances = np.zeros((num_periods + 1, num_assets))
+        scheduled_principal = np.zeros((num_periods + 1, num_assets))
+        par_amounts = np.zeros(num_assets)
+        
+        period_dates = [
+            analysis_date + timedelta(days=p * month_step * 30) for p in range(num_periods + 1)
+        ]
+        
+        for i, asset_id in enumerate(self.asset_order):
+            if not included[i]:
+                continue
+            
+            if deal_collateral is None:
+                par_amounts[i] = 1000000.0  # Default par amount
+            else:
+                par_amounts[i] = deal_collateral.get(asset_id, 0.0)
+            
+            maturity = collateral_pool.get_asset_maturity(asset_id)
+            for p in range(1, num_periods + 1):
+                current_date = period_dates[p]
+                if maturity_period[i] > num_periods and current_date > maturity:
+                    maturity_period[i] = p
+                
+                balance = collateral_pool.get_beginning_balance(asset_id, current_date)
+                balances[p, i] = balance
+                if balance == 0:
+                    # Balance used when the asset defaults on the payment date
+                    default_balances[p, i] = collateral_pool.get_beginning_balance(
+                        asset_id, current_date - timedelta(days=1)
+                    )
+                else:
+                    default_balances[p, i] = balance
+                
+                scheduled_principal[p, i] = collateral_pool.get_scheduled_principal(
+                    asset_id, analysis_date, current_date
+                )
+        
+        return maturity_period, balances, default_balances, scheduled_principal, par_amounts
+    
+    def _next_rating_codes(self, codes: np.ndarray, uniform_random: np.ndarray) -> np.ndarray:
+        """Vectorized _get_next_rating on integer rating codes"""
+        num_ratings = self.tran_matrix.shape[1]
+        rows = codes - 1
+        targets = uniform_random - self._tran_low + rows * self._tran_row_offset
+        positions = np.searchsorted(self._tran_search_grid, targets, side="right") - rows * num_ratings
+        return np.minimum(positions, num_ratings - 1) + 1
+    
+    def _simulate_batch(self, batch_size: int, num_periods: int,
+                        schedule: Tuple[np.ndarray, ...], deals: List[DealProjection],
+                        rng: Optional[np.random.Generator] = None
+                        ) -> Tuple[List[Tuple[np.ndarray, np.ndarray]], np.ndarray]:
+        """
+        Simulate one batch of paths for every included asset and bucket them
+        per deal, returning each deal's (sims x periods x fields) histories
+        and the paths' log-likelihood ratios (zero unless importance sampling).
+        """
+        shocks = _ShockSampler(self, batch_size, num_periods, rng if rng is not None else self.rng)
+        (initial_codes, known_rating, included, maturity_period,
+         balances, default_balances, scheduled_principal) = schedule
+        default_code = int(SPRating.DEFAULT)
+        upgrades_col = HIST_FIELDS.index("upgrades")
+        downgrades_col = HIST_FIELDS.index("downgrades")
+        bal_defaults_col = HIST_BAL_FIELDS.index("bal_defaults")
+        bal_mature_col = HIST_BAL_FIELDS.index("bal_mature")
+        
+        histories = [
+            (np.zeros((batch_size, deal_periods + 1, len(HIST_FIELDS)), dtype=np.int64),
+             np.zeros((batch_size, deal_periods + 1, len(HIST_BAL_FIELDS))))
+            for _, _, deal_periods in deals
+        ]
+        
+        codes = np.broadcast_to(initial_codes, (batch_size, initial_codes.size)).copy()
+        # Defaulted assets are no longer migrated; unrecognised ratings still are
+        active = np.broadcast_to(
+            included & ~((initial_codes == default_code) & known_rating),
+            codes.shape
+        ).copy()
+        sim_offsets = np.arange(batch_size)[:, None] * NUM_RATING_CODES
+        
+        # Period 0: starting distribution (identical across simulations)
+        start_mask = included & known_rating
+        for (columns, par_amounts, _), (counts, balance_hist) in zip(deals, histories):
+            deal_start = start_mask[columns]
+            start_codes = initial_codes[columns][deal_start]
+            start_counts = np.bincount(start_codes, minlength=NUM_RATING_CODES)
+            start_balances = np.bincount(start_codes, weights=par_amounts[deal_start],
+                                         minlength=NUM_RATING_CODES)
+            counts[:, 0, _HIST_COUNT_COLUMNS[1:]] = start_counts[1:]
+            balance_hist[:, 0, _HIST_BAL_COLUMNS[1:]] = start_balances[1:]
+        
+        matured_balances = [scheduled_principal[:, columns].sum(axis=1) for columns, _, _ in deals]
+        
+        for period in range(1, num_periods + 1):
+            uniform_random = shocks.next_uniforms(period)
+            
+            processed = active
+            maturing = processed & (maturity_period == period)
+            migrating = processed & ~maturing
+            
+            next_codes = np.where(migrating, self._next_rating_codes(codes, uniform_random), codes)
+            upgraded = migrating & (next_codes < codes)
+            downgraded = migrating & (next_codes > codes)
+            
+            codes = next_codes
+            codes[maturing] = MATURED_CODE
+            period_balance = np.where(codes == default_code, default_balances[period], balances[period])
+            
+            for (columns, _, deal_periods), (counts, balance_hist), matured_balance in zip(
+                    deals, histories, matured_balances):
+                if period > deal_periods:
+                    continue
+                
+                deal_processed = processed[:, columns]
+                deal_migrating = migrating[:, columns]
+                deal_codes = codes[:, columns] + sim_offsets
+                
+                counts[:, period, upgrades_col] = upgraded[:, columns].sum(axis=1)
+                counts[:, period, downgrades_col] = downgraded[:, columns].sum(axis=1)
+                
+                period_counts = np.bincount(
+                    deal_codes[deal_processed], minlength=batch_size * NUM_RATING_CODES
+                ).reshape(batch_size, NUM_RATING_CODES)
+                counts[:, period, _HIST_COUNT_COLUMNS[1:]] = period_counts[:, 1:]
+                
+                # Balances of migrated assets, bucketed by their new rating
+                period_balances = np.bincount(
+                    deal_codes[deal_migrating], weights=period_balance[:, columns][deal_migrating],
+                    minlength=batch_size * NUM_RATING_CODES
+                ).reshape(batch_size, NUM_RATING_CODES)
+                balance_hist[:, period, _HIST_BAL_COLUMNS[1:MATURED_CODE]] = period_balances[:, 1:MATURED_CODE]
+                balance_hist[:, period, bal_defaults_col] += balance_hist[:, period - 1, bal_defaults_col]
+                balance_hist[:, period, bal_mature_col] = matured_balance[period]
+            
+            active = processed & (codes < default_code)
+        
+        for (columns, par_amounts, _), (counts, balance_hist) in zip(deals, histories):
+            self._finalize_histories(counts, balance_hist, par_amounts[included[columns]].sum())
+        
+        return histories, shocks.log_weights
+    
+    def _finalize_histories(self, counts: np.ndarray, balance_hist: np.ndarray,
+                            original_balance: float) -> None:
+        """Derive period defaults and CDR once a batch of paths is complete"""
+        num_periods = counts.shape[1] - 1
+        num_defaults_col = HIST_FIELDS.index("num_defaults")
+        period_defaults_col = HIST_FIELDS.index("num_period_defaults")
+        bal_defaults_col = HIST_BAL_FIELDS.index("bal_defaults")
+        bal_mature_col = HIST_BAL_FIELDS.index("bal_mature")
+        cdr_col = HIST_BAL_FIELDS.index("cdr")
+        
+        counts[:, 1:, period_defaults_col] = np.diff(counts[:, :, num_defaults_col], axis=1)
+        
+        # CDR, stopping a path once its remaining balance is exhausted
+        if num_periods > 0:
+            bal_defaults = balance_hist[:, :, bal_defaults_col]
+            remaining = (original_balance
+                         - balance_hist[:, :-1, bal_mature_col]
+                         - bal_defaults[:, :-1])
+            exhausted = remaining <= 0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cdr = np.where(exhausted, 0.0, 4 * np.diff(bal_defaults, axis=1) / remaining)
+            balance_hist[:, 1:, cdr_col] = cdr
+            
+            stopped = np.cumsum(exhausted, axis=1) > 0
+            after_stop = np.zeros_like(stopped)
+            after_stop[:, 1:] = stopped[:, :-1]
+            balance_hist[:, 1:, :][after_stop] = 0.0
+    
+    def _to_rating_hist(self, count_rows: np.ndarray) -> List[RatingHist]:
+        """Convert a (periods x HIST_FIELDS) count array to RatingHist records"""
+        return [
+            RatingHist(**dict(zip(HIST_FIELDS, (int(value) for value in row))))
+            for row in count_rows
+        ]
+    
+    def _to_rating_hist_bal(self, balance_rows: np.ndarray) -> List[RatingHistBal]:
+        """Convert a (periods x HIST_BAL_FIELDS) balance array to RatingHistBal records"""
+        return [
+            RatingHistBal(**dict(zip(HIST_BAL_FIELDS, (float(value) for value in row))))
+            for row in balance_rows
+        ]
+    
+    def _get_history_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get simulation histories as (sims x periods x fields) count and balance arrays"""
+        if self.hist_counts is not None:
+            return self.hist_counts, self.hist_balances
+        
+        completed = self.sim_hist[:self.sim_count]
+        if not completed:
+            return (np.zeros((0, 0, len(HIST_FIELDS)), dtype=np.int64),
+                    np.zeros((0, 0, len(HIST_BAL_FIELDS))))
+        
+        paths = [self._history_to_arrays(sim.rating_hist, sim.rating_hist_bal) for sim in completed]
+        return (np.concatenate([counts for counts, _ in paths]),
+                np.concatenate([balances for _, balances in paths]))
+    
     def _calculate_num_periods(self, start_date: date, end_date: date, month_step: int) -> int:
         """Calculate number of periods between dates"""
         current_date = start_date
@@ -612,20 +1463,14 @@ class CreditMigration:
                 break
     
     def get_simulation_results(self) -> Dict[str, Any]:
-        """Get comprehensive simulation results"""
-        if not self.sim_hist:
-            return {}
-        
-        num_sims = len(self.sim_hist)
-        num_periods = len(self.sim_hist[0].rating_hist)
+        """
+        Get comprehensive simulation results
         
-        results = {
-            "num_simulations": num_sims,
-            "num_periods": num_periods,
-            "period_type": self.period_type,
-            "analysis_date": self.analysis_date,
-            "statistics": {}
-        }
+        Statistics are exact when paths are retained; otherwise they come from
+        the streaming accumulator (exact min/max/mean/std, sketched median).
+        """
+        if self.sim_count == 0:
+            return {}
         
         # Calculate statistics for each metric across all simulations
         metrics = [
@@ -635,46 +1480,119 @@ class CreditMigration:
             "num_bb", "num_bb_minus", "num_b_plus", "num_b",
             "num_b_minus", "num_ccc_assets", "num_defaults", "num_matures"
         ]
+        columns = [HIST_FIELDS.index(metric) for metric in metrics]
+        
+        if self.retain_paths:
+            counts, _ = self._get_history_arrays()
+            values = counts[:, :, columns]
+            minimums = values.min(axis=0)
+            maximums = values.max(axis=0)
+            means = values.mean(axis=0)
+            medians = np.median(values, axis=0)
+            stds = values.std(axis=0)
+        else:
+            minimums = self.statistics.minimum[:, columns].astype(np.int64)
+            maximums = self.statistics.maximum[:, columns].astype(np.int64)
+            means = self.statistics.mean[:, columns]
+            medians = np.round(self.statistics.median()[:, columns])  # Counts are integers
+            stds = self.statistics.std[:, columns]
+        
+        num_periods = means.shape[0]
+        results = {
+            "num_simulations": self.sim_count,
+            "num_periods": num_periods,
+            "period_type": self.period_type,
+            "analysis_date": self.analysis_date,
+            "statistics": {}
+        }
         
         for period in range(num_periods):
             period_stats = {}
             
-            for metric in metrics:
-                values = [getattr(sim.rating_hist[period], metric) for sim in self.sim_hist]
-                
+            for k, metric in enumerate(metrics):
                 period_stats[metric] = {
-                    "min": min(values),
-                    "max": max(values),
-                    "mean": np.mean(values),
-                    "median": np.median(values),
-                    "std": np.std(values)
+                    "min": minimums[period, k].item(),
+                    "max": maximums[period, k].item(),
+                    "mean": means[period, k],
+                    "median": medians[period, k],
+                    "std": stds[period, k]
                 }
             
             results["statistics"][f"period_{period}"] = period_stats
         
+        if self.estimator is not None:
+            results["sampling"] = self.get_sampling_diagnostics()
+        
         return results
     
+    def get_sampling_diagnostics(self) -> Dict[str, Any]:
+        """
+        Estimates of the tail default fields with standard errors and
+        effective sample sizes (plain Monte Carlo paths for the same error).
+        
+        Means are under the target measure, i.e. likelihood-ratio weighted
+        for importance sampling. Sobol standard errors come from the spread
+        of the independent scrambles (see setup).
+        """
+        if self.estimator is None:
+            return {}
+        
+        columns = [STAT_FIELDS.index(name) for name in SAMPLING_FIELDS]
+        means = self.estimator.mean[:, columns]
+        standard_errors = self.estimator.standard_error[:, columns]
+        effective_sizes = self.estimator.effective_sample_size[:, columns]
+        
+        return {
+            "method": self.sampling,
+            "num_simulations": self.estimator.num_paths,
+            "weight_effective_sample_size": self.estimator.weight_effective_sample_size,
+            "fields": {
+                name: {
+                    "mean": means[:, k].tolist(),
+                    "standard_error": standard_errors[:, k].tolist(),
+                    "effective_sample_size": effective_sizes[:, k].tolist()
+                }
+                for k, name in enumerate(SAMPLING_FIELDS)
+            }
+        }
+
+    def get_rating_distribution(self, ratings: List[str], num_periods: int) -> np.ndarray:
+        """
+        Expected number of assets in each rating for periods 0..num_periods
+
+        Computed directly from powers of the period transition matrix, without
+        simulating paths and ignoring correlation and maturities. Columns follow
+        the SPRating codes (AAA first, D last).
+        """
+        if self.transition_service is None:
+            raise ValueError("Call setup() before requesting rating distributions")
+
+        initial = np.zeros(self.transition_service.num_ratings)
+        for rating in ratings:
+            initial[self._convert_rating_to_enum(rating) - 1] += 1.0
+        return self.transition_service.get_rating_distribution(
+            initial, num_periods, self.math_utils.get_months(self.period_type))
+
     def export_to_dataframe(self) -> pd.DataFrame:
-        """Export simulation results to DataFrame"""
-        if not self.sim_hist:
+        """Export simulation results to DataFrame (requires retained paths)"""
+        if self.sim_count == 0 or not self.retain_paths:
             return pd.DataFrame()
         
-        rows = []
-        
-        for sim_idx, sim in enumerate(self.sim_hist):
-            for period_idx, (hist, hist_bal) in enumerate(zip(sim.rating_hist, sim.rating_hist_bal)):
-                row = {
-                    "simulation": sim_idx,
-                    "period": period_idx,
-                    "upgrades": hist.upgrades,
-                    "downgrades": hist.downgrades,
-                    "num_aaa": hist.num_aaa,
-                    "bal_aaa": hist_bal.bal_aaa,
-                    "num_defaults": hist.num_defaults,
-                    "bal_defaults": hist_bal.bal_defaults,
-                    "cdr": hist_bal.cdr
-                    # Add more fields as needed
-                }
-                rows.append(row)
+        counts, balances = self._get_history_arrays()
+        if counts.size == 0:
+            return pd.DataFrame()
+        
+        num_sims, num_periods = counts.shape[:2]
         
-        return pd.DataFrame(rows)
\ No newline at end of file
+        return pd.DataFrame({
+            "simulation": np.repeat(np.arange(num_sims), num_periods),
+            "period": np.tile(np.arange(num_periods), num_sims),
+            "upgrades": counts[:, :, HIST_FIELDS.index("upgrades")].ravel(),
+            "downgrades": counts[:, :, HIST_FIELDS.index("downgrades")].ravel(),
+            "num_aaa": counts[:, :, HIST_FIELDS.index("num_aaa")].ravel(),
+            "bal_aaa": balances[:, :, HIST_BAL_FIELDS.index("bal_aaa")].ravel(),
+            "num_defaults": counts[:, :, HIST_FIELDS.index("num_defaults")].ravel(),
+            "bal_defaults": balances[:, :, HIST_BAL_FIELDS.index("bal_defaults")].ravel(),
+            "cdr": balances[:, :, HIST_BAL_FIELDS.index("cdr")].ravel()
+            # Add more fields as needed
+        })
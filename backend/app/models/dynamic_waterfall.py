@@ -3,7 +3,7 @@ Dynamic Waterfall System - Handles Variable Tranche Structures
 Supports CLO deals with different numbers and types of tranches
 """
 
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Dict, List, Optional, Tuple, Any, Union, TYPE_CHECKING
 from decimal import Decimal
 from datetime import date
 from enum import Enum
@@ -18,6 +18,9 @@ from ..core.database import Base
 from .waterfall_types import BaseWaterfallStrategy, WaterfallStep, PaymentPhase
 from .clo_deal import CLOTranche
 
+if TYPE_CHECKING:
+    from .waterfall_program import CompiledMapping
+
 
 class TrancheType(str, Enum):
     """Standard tranche classifications"""
@@ -130,32 +133,71 @@ class DynamicWaterfallStrategy(BaseWaterfallStrategy):
     """
     Dynamic waterfall strategy that adapts to actual tranche structure
     Builds payment sequence based on tranche mappings and structure definition
+    
+    The structure and mappings are compiled into a shared WaterfallProgram
+    (see waterfall_program), so constructing a strategy for another period
+    in the same effective-date window does not query them again.
     """
     
+    # Trigger checks by compiled TriggerRef value
+    _TRIGGER_CHECKS = {
+        'ALWAYS': lambda self: True,
+        'NOT_IN_DEFAULT': lambda self: not self._is_deal_in_default(),
+        'DEFERRAL': lambda self: self._check_deferral_triggers(),
+        'COVERAGE_TESTS': lambda self: (self.calculator._check_overcollateralization_tests() and
+                                        self.calculator._check_interest_coverage_tests()),
+        'SUBORDINATED_PRINCIPAL': lambda self: self._check_subordinated_principal_triggers(),
+    }
+    
     def __init__(self, calculator, structure_name: str = "STANDARD_US_CLO"):
         super().__init__(calculator)
-        self.structure = self._load_structure(structure_name)
-        self.tranche_mappings = self._load_tranche_mappings()
-        self.payment_sequence_cache = None
+        from .waterfall_program import waterfall_program_cache
+        self.structure_name = structure_name
+        self.program = waterfall_program_cache.get_program(
+            self.session, self.deal_id, structure_name, self.payment_date
+        )
+    
+    @property
+    def tranche_mappings(self) -> Dict[str, "CompiledMapping"]:
+        """Compiled mappings active on the payment date, by tranche id"""
+        return self.program.mappings
     
     def get_payment_sequence(self) -> List[WaterfallStep]:
         """Build dynamic payment sequence based on actual tranches"""
-        if self.payment_sequence_cache:
-            return self.payment_sequence_cache
-        
-        sequence = []
-        
-        if not self.structure:
-            # Fallback to traditional sequence
-            return self._get_fallback_sequence()
-        
-        # Build sequence from structure definition
-        for category in self.structure.get_payment_sequence():
-            category_steps = self._get_steps_for_category(category)
-            sequence.extend(category_steps)
-        
-        self.payment_sequence_cache = sequence
-        return sequence
+        return self.program.sequence
+    
+    def process_waterfall(self, execution):
+        """
+        Execute the compiled program
+        
+        Target tranches come from the program and are fetched through the
+        session identity map, and the phase is determined once per run.
+        Trigger and amount hooks are still called per step so subclass
+        overlays apply unchanged.
+        """
+        phase = self.get_payment_phase()
+        phase_label = phase.value if phase else 'UNKNOWN'
+        step_index = self.program.step_index
+        make_payment = self.calculator._make_payment
+        
+        for step in self.get_payment_sequence():
+            if not self._should_process_step(step, phase):
+                continue
+            
+            op = step_index.get(step)
+            if op is not None:
+                tranche = self.session.get(CLOTranche, op.tranche_id) if op.tranche_id else None
+            else:
+                # Steps added outside the compiled program
+                tranche = self._get_target_tranche(step)
+            
+            if self.check_payment_triggers(step, tranche):
+                amount = self.calculate_payment_amount(step, tranche)
+                make_payment(
+                    execution, step.value, amount,
+                    target_tranche_id=tranche.tranche_id if tranche else None,
+                    notes=f"{step.value} payment in {phase_label} phase"
+                )
     
     def check_payment_triggers(self, step: WaterfallStep, tranche: Optional[CLOTranche] = None) -> bool:
         """Dynamic trigger checking based on tranche characteristics"""
@@ -164,53 +206,33 @@ class DynamicWaterfallStrategy(BaseWaterfallStrategy):
             # Non-tranche payments (fees, reserves) usually always pay
             return True
         
-        # Get tranche mapping
-        mapping = self._get_tranche_mapping(tranche.tranche_id)
+        mapping = self.program.mappings.get(tranche.tranche_id)
         if not mapping:
             return super().check_payment_triggers(step, tranche)
         
-        # Check category-specific triggers
-        category = mapping.payment_category
-        
-        if category == PaymentCategory.SENIOR_INTEREST.value:
-            # Senior interest usually always pays unless in default
-            return not self._is_deal_in_default()
-        
-        elif category in [PaymentCategory.MEZZ_INTEREST.value, PaymentCategory.SUBORDINATED_INTEREST.value]:
-            # Subordinated interest may be deferrable
-            if mapping.is_deferrable:
-                return self._check_deferral_triggers()
-            return True
-        
-        elif category in [PaymentCategory.SENIOR_PRINCIPAL.value, PaymentCategory.MEZZ_PRINCIPAL.value]:
-            # Principal payments require coverage tests
-            return (self.calculator._check_overcollateralization_tests() and
-                   self.calculator._check_interest_coverage_tests())
-        
-        elif category == PaymentCategory.SUBORDINATED_PRINCIPAL.value:
-            # Subordinated principal may have additional restrictions
-            return self._check_subordinated_principal_triggers()
-        
-        return True
+        return self._TRIGGER_CHECKS[mapping.trigger.value](self)
     
     def calculate_payment_amount(self, step: WaterfallStep, tranche: Optional[CLOTranche] = None) -> Decimal:
         """Dynamic payment calculation based on tranche type and rules"""
+        from .waterfall_program import AmountFormula, amount_for_step
         
         if not tranche:
             # Non-tranche payments
             return self._calculate_non_tranche_payment(step)
         
-        mapping = self._get_tranche_mapping(tranche.tranche_id)
-        if not mapping:
-            return super().calculate_payment_amount(step, tranche)
-        
-        # Get category rules
-        category_rules = self.structure.get_category_rules().get(mapping.payment_category, {})
+        mapping = self.program.mappings.get(tranche.tranche_id)
+        op = self.program.step_index.get(step)
+        if op is not None and op.tranche_id == tranche.tranche_id:
+            formula = op.amount
+        else:
+            formula = amount_for_step(step, tranche.tranche_id, mapping)
         
-        if 'INTEREST' in step.value:
-            return self._calculate_tranche_interest(tranche, mapping, category_rules)
-        elif 'PRINCIPAL' in step.value:
-            return self._calculate_tranche_principal(tranche, mapping, category_rules)
+        if formula == AmountFormula.BASE:
+            return super().calculate_payment_amount(step, tranche)
+        elif formula == AmountFormula.INTEREST:
+            return self._calculate_tranche_interest(tranche, mapping, mapping.rules)
+        elif formula == AmountFormula.PRINCIPAL:
+            return self._calculate_tranche_principal(tranche, mapping, mapping.rules)
         
         return Decimal('0')
     
@@ -225,85 +247,11 @@ class DynamicWaterfallStrategy(BaseWaterfallStrategy):
         
         return base_phase
     
-    def _load_structure(self, structure_name: str) -> Optional[WaterfallStructure]:
-        """Load waterfall structure definition"""
-        return self.calculator.session.query(WaterfallStructure).filter_by(
-            structure_name=structure_name,
-            is_active=True
-        ).first()
-    
-    def _load_tranche_mappings(self) -> Dict[str, TrancheMapping]:
-        """Load tranche mappings for the deal"""
-        mappings = self.calculator.session.query(TrancheMapping).filter(
-            TrancheMapping.deal_id == self.deal_id,
-            TrancheMapping.effective_date <= self.payment_date
-        ).filter(
-            (TrancheMapping.expiration_date.is_(None)) |
-            (TrancheMapping.expiration_date >= self.payment_date)
-        ).all()
-        
-        return {mapping.tranche_id: mapping for mapping in mappings}
-    
-    def _get_steps_for_category(self, category: str) -> List[WaterfallStep]:
-        """Get waterfall steps for payment category"""
-        steps = []
-        
-        # Get tranches for this category
-        category_mappings = [m for m in self.tranche_mappings.values() 
-                           if m.payment_category == category]
-        
-        # Sort by priority rank
-        category_mappings.sort(key=lambda m: m.category_rank)
-        
-        if category == PaymentCategory.EXPENSES.value:
-            steps = [WaterfallStep.TRUSTEE_FEES, WaterfallStep.ADMIN_FEES, WaterfallStep.SENIOR_MGMT_FEES]
-        
-        elif category == PaymentCategory.SENIOR_INTEREST.value:
-            for mapping in category_mappings:
-                if mapping.interest_step:
-                    steps.append(WaterfallStep(mapping.interest_step))
-        
-        elif category == PaymentCategory.MEZZ_INTEREST.value:
-            for mapping in category_mappings:
-                if mapping.interest_step:
-                    steps.append(WaterfallStep(mapping.interest_step))
-        
-        elif category == PaymentCategory.SUBORDINATED_INTEREST.value:
-            for mapping in category_mappings:
-                if mapping.interest_step:
-                    steps.append(WaterfallStep(mapping.interest_step))
-        
-        elif category == PaymentCategory.RESERVES.value:
-            steps = [WaterfallStep.INTEREST_RESERVE]
-        
-        elif category == PaymentCategory.SENIOR_PRINCIPAL.value:
-            for mapping in category_mappings:
-                if mapping.principal_step:
-                    steps.append(WaterfallStep(mapping.principal_step))
-        
-        elif category == PaymentCategory.MEZZ_PRINCIPAL.value:
-            for mapping in category_mappings:
-                if mapping.principal_step:
-                    steps.append(WaterfallStep(mapping.principal_step))
-        
-        elif category == PaymentCategory.SUBORDINATED_PRINCIPAL.value:
-            for mapping in category_mappings:
-                if mapping.principal_step:
-                    steps.append(WaterfallStep(mapping.principal_step))
-        
-        elif category == PaymentCategory.MANAGEMENT_FEES.value:
-            steps = [WaterfallStep.JUNIOR_MGMT_FEES, WaterfallStep.INCENTIVE_MGMT_FEES]
-        
-        elif category == PaymentCategory.RESIDUAL.value:
-            steps = [WaterfallStep.RESIDUAL_EQUITY]
-        
-        return steps
-    
-    def _get_tranche_mapping(self, tranche_id: str) -> Optional[TrancheMapping]:
-        """Get mapping for specific tranche"""
-        return self.tranche_mappings.get(tranche_id)
-    
-    def _calculate_tranche_interest(self, tranche: CLOTranche, mapping: TrancheMapping, 
+    def _get_tranche_mapping(self, tranche_id: str) -> Optional["CompiledMapping"]:
+        """Get compiled mapping for specific tranche"""
+        return self.program.mappings.get(tranche_id)
+    
+    def _calculate_tranche_interest(self, tranche: CLOTranche, mapping: "CompiledMapping", 
                                   rules: Dict[str, Any]) -> Decimal:
         """Calculate interest payment for tranche with category rules"""
         base_interest = self.calculator._calculate_interest_due(tranche)
@@ -323,7 +271,7 @@ class DynamicWaterfallStrategy(BaseWaterfallStrategy):
         
         return base_interest
     
-    def _calculate_tranche_principal(self, tranche: CLOTranche, mapping: TrancheMapping,
+    def _calculate_tranche_principal(self, tranche: CLOTranche, mapping: "CompiledMapping",
                                    rules: Dict[str, Any]) -> Decimal:
         """Calculate principal payment for tranche with category rules"""
         
@@ -356,12 +304,6 @@ class DynamicWaterfallStrategy(BaseWaterfallStrategy):
         
         return Decimal('0')
     
-    def _get_fallback_sequence(self) -> List[WaterfallStep]:
-        """Fallback sequence when structure not defined"""
-        from .waterfall_types import TraditionalWaterfall
-        traditional = TraditionalWaterfall(self.calculator)
-        return traditional.get_payment_sequence()
-    
     def _is_deal_in_default(self) -> bool:
         """Check if deal is in default"""
         # Implementation would check default triggers
@@ -377,7 +319,7 @@ class DynamicWaterfallStrategy(BaseWaterfallStrategy):
         # Implementation would check subordinated payment conditions
         return True
     
-    def _should_pik_interest(self, tranche: CLOTranche, mapping: TrancheMapping) -> bool:
+    def _should_pik_interest(self, tranche: CLOTranche, mapping: "CompiledMapping") -> bool:
         """Determine if interest should be PIK'd"""
         if not mapping.is_pik_eligible:
             return False
@@ -393,8 +335,7 @@ class DynamicWaterfallStrategy(BaseWaterfallStrategy):
     
     def _has_income_notes(self) -> bool:
         """Check if deal has income notes"""
-        return any(m.tranche_type == TrancheType.INCOME_NOTES.value 
-                  for m in self.tranche_mappings.values())
+        return self.program.has_income_notes
     
     def _calculate_reserve_funding(self) -> Decimal:
         """Calculate reserve funding requirement"""
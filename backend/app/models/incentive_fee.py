@@ -26,6 +26,7 @@ from sqlalchemy.orm import relationship, Session
 from sqlalchemy.ext.declarative import declarative_base
 
 from ..core.database import Base
+from ..utils.financial_utils import FinancialUtils
 
 
 class IncentiveFeeStructureModel(Base):
@@ -511,63 +512,14 @@ class IncentiveFee:
         """
         Calculate XIRR equivalent to Excel's Application.Xirr function
         
-        Uses Newton-Raphson method to find the IRR that makes NPV = 0
+        Solves for the rate that makes NPV = 0 (actual/365.25 from the first
+        date); None if there is no sign change or no convergence.
         """
         if len(cash_flows) != len(dates) or len(cash_flows) < 2:
             return None
         
-        # Need at least one positive and one negative cash flow
-        has_positive = any(cf > 0 for cf in cash_flows)
-        has_negative = any(cf < 0 for cf in cash_flows)
-        if not (has_positive and has_negative):
-            return None
-        
-        # Convert dates to days from first date
-        base_date = dates[0]
-        days_diff = [(d - base_date).days for d in dates]
-        
-        # Newton-Raphson iteration
-        guess = 0.1  # 10% initial guess
-        max_iterations = 100
-        tolerance = 1e-10
-        
-        for iteration in range(max_iterations):
-            # Calculate NPV and its derivative
-            npv = 0.0
-            npv_derivative = 0.0
-            
-            for i, (cf, days) in enumerate(zip(cash_flows, days_diff)):
-                years = days / 365.25
-                if years == 0:
-                    npv += cf
-                else:
-                    factor = (1 + guess) ** years
-                    npv += cf / factor
-                    # Derivative: d/dx[cf/(1+x)^years] = -cf * years * (1+x)^(-years-1)
-                    npv_derivative -= cf * years / (factor * (1 + guess))
-            
-            # Check convergence
-            if abs(npv) < tolerance:
-                return guess
-            
-            # Newton-Raphson update
-            if abs(npv_derivative) < tolerance:
-                break
-            
-            new_guess = guess - npv / npv_derivative
-            
-            # Ensure guess stays reasonable
-            if new_guess < -0.99:  # Prevent rates below -99%
-                new_guess = -0.99
-            elif new_guess > 10:  # Prevent unreasonably high rates
-                new_guess = 10.0
-            
-            if abs(new_guess - guess) < tolerance:
-                return new_guess
-            
-            guess = new_guess
-        
-        return None  # Failed to converge
+        rates, converged = FinancialUtils.xirr_batch([cash_flows], [dates], days_per_year=365.25)
+        return float(rates[0]) if converged[0] else None
     
     def save_to_database(self, deal_id: str, fee_structure_name: str = "Default") -> int:
         """Save incentive fee structure to database"""
@@ -13,7 +13,9 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from ..core.database import Base
+from ..utils.financial_utils import FinancialUtils
 from .clo_deal import CLODeal
+from .yield_curve import YieldCurveScenarios
 
 
 class DayCountConvention(str, Enum):
@@ -331,82 +333,43 @@ class LiabilityCalculator:
     
     def calculate_risk_measures(self, yield_curve, analysis_date: date) -> Dict[str, Decimal]:
         """
-        Calculate risk measures (yield, duration, WAL)
+        Calculate risk measures (yield, DM, duration, WAL)
         Equivalent to VBA CalcRiskMeasures() method
         """
         if not self.liability.current_balance or self.liability.current_balance <= 0:
             return {}
         
-        # Prepare cash flow arrays
-        total_cash_flows = []
-        payment_dates = []
-        discount_rates = []
-        
-        total_principal_paid = Decimal('0')
-        weighted_principal = Decimal('0')
-        
-        for i in range(1, self.last_calculated_period + 1):
-            cash_flow = self._get_cash_flow(i)
-            if not cash_flow:
-                continue
-            
-            # Total cash flow for period
-            total_cf = (
-                (cash_flow.interest_paid or Decimal('0')) +
-                (cash_flow.principal_paid or Decimal('0')) +
-                (cash_flow.deferred_interest_paid or Decimal('0')) +
-                (cash_flow.deferred_principal_paid or Decimal('0'))
-            )
-            
-            total_cash_flows.append(float(total_cf))
-            payment_dates.append(cash_flow.payment_date)
-            
-            # Get discount rate from yield curve
-            discount_rate = yield_curve.zero_rate(analysis_date, cash_flow.payment_date)
-            discount_rates.append(float(discount_rate))
-            
-            # WAL calculation
-            days_to_payment = (cash_flow.payment_date - analysis_date).days
-            weighted_principal += days_to_payment * (cash_flow.principal_paid or Decimal('0'))
-            total_principal_paid += (cash_flow.principal_paid or Decimal('0'))
-        
-        # Calculate metrics using financial math functions
-        current_price = self.liability.input_price or Decimal('1.0')
-        discount_margin = self.liability.input_discount_margin or Decimal('0')
-        
-        # Price calculation with discount margin
-        calculated_price = self._calculate_present_value(
-            total_cash_flows, payment_dates, discount_rates, 
-            analysis_date, discount_margin
-        )
-        calculated_price /= float(self.liability.current_balance)
+        payment_dates, total_cash_flows, principal_paid = self.get_risk_cash_flows()
+        if not payment_dates:
+            return {}
         
-        # Yield calculation
-        calculated_yield = self._calculate_yield(
-            float(current_price * self.liability.current_balance),
-            total_cash_flows, payment_dates
+        risk_calculator = LiabilityRiskCalculator(analysis_date, payment_dates)
+        measures = risk_calculator.calculate(
+            total_cash_flows, principal_paid,
+            current_balance=float(self.liability.current_balance),
+            original_balance=float(self.liability.original_balance),
+            zero_rates=risk_calculator.zero_rates(yield_curve),
+            price=float(self.liability.input_price or Decimal('1.0')),
+            discount_margin=float(self.liability.input_discount_margin or Decimal('0'))
         )
-        
-        # WAL calculation
-        remaining_balance = self.liability.current_balance - total_principal_paid
-        final_payment_days = (payment_dates[-1] - analysis_date).days if payment_dates else 0
-        weighted_principal += remaining_balance * final_payment_days
-        weighted_average_life = weighted_principal / self.liability.original_balance / Decimal('365')
-        
-        # Duration calculations
-        macaulay_duration = self._calculate_macaulay_duration(
-            total_cash_flows, payment_dates, analysis_date, calculated_yield
+        return LiabilityRiskCalculator.to_decimals(measures)
+    
+    def get_risk_cash_flows(self) -> Tuple[List[date], np.ndarray, np.ndarray]:
+        """Payment dates, total cash flows and principal paid for calculated periods"""
+        cash_flows = sorted(
+            (cf for cf in self.liability.cash_flows if 1 <= cf.period_number <= self.last_calculated_period),
+            key=lambda cf: cf.period_number
         )
         
-        modified_duration = macaulay_duration / (1 + calculated_yield / 4) if calculated_yield > 0 else Decimal('0')
-        
-        return {
-            'calculated_yield': Decimal(str(calculated_yield)),
-            'calculated_price': Decimal(str(calculated_price)),
-            'weighted_average_life': weighted_average_life,
-            'macaulay_duration': Decimal(str(macaulay_duration)),
-            'modified_duration': Decimal(str(modified_duration))
-        }
+        total_cash_flows = np.array([
+            float((cf.interest_paid or Decimal('0')) +
+                  (cf.principal_paid or Decimal('0')) +
+                  (cf.deferred_interest_paid or Decimal('0')) +
+                  (cf.deferred_principal_paid or Decimal('0')))
+            for cf in cash_flows
+        ])
+        principal_paid = np.array([float(cf.principal_paid or Decimal('0')) for cf in cash_flows])
+        return [cf.payment_date for cf in cash_flows], total_cash_flows, principal_paid
     
     def get_current_balance(self, period: int) -> Decimal:
         """Get current balance including PIK balance"""
@@ -475,54 +438,159 @@ class LiabilityCalculator:
             return Decimal(str(days)) / Decimal('365.25')
         
         return Decimal(str(days)) / Decimal('360')  # Default
+
+
+class LiabilityRiskCalculator:
+    """
+    Vectorized risk measures for many tranches and rate scenarios
+    
+    Cash flows of all tranches sit on one payment date grid, as
+    (tranches x dates) or (scenarios x tranches x dates) arrays. Zero rates
+    for the grid come from one curve call and price, yield, DM, WAL and
+    durations are computed for every row at once, with yield and DM solved
+    by a vectorized bracketed Newton iteration.
+    
+    Conventions follow VBA CalcRiskMeasures: quarterly compounding on
+    actual/365.25 year fractions from the analysis date.
+    """
+    
+    COMPOUNDING = 4
     
-    def _calculate_present_value(self, cash_flows: List[float], dates: List[date], 
-                               rates: List[float], analysis_date: date, 
-                               spread: Decimal) -> float:
-        """Calculate present value with spread adjustment"""
-        pv = 0.0
-        
-        for cf, payment_date, rate in zip(cash_flows, dates, rates):
-            years = (payment_date - analysis_date).days / 365.25
-            discount_rate = rate + float(spread)
-            discount_factor = (1 + discount_rate / 4) ** (years * 4)
-            pv += cf / discount_factor
-        
-        return pv
-    
-    def _calculate_yield(self, price: float, cash_flows: List[float], 
-                        dates: List[date]) -> float:
-        """Calculate yield to maturity using Newton-Raphson method"""
-        # Simplified yield calculation - production would use more sophisticated method
-        if not cash_flows or price <= 0:
-            return 0.0
-        
-        # Initial guess
-        total_cf = sum(cash_flows)
-        if total_cf <= price:
-            return 0.0
-        
-        # Simple approximation
-        return (total_cf / price - 1) / (len(cash_flows) / 4)
-    
-    def _calculate_macaulay_duration(self, cash_flows: List[float], dates: List[date],
-                                   analysis_date: date, yield_rate: float) -> float:
-        """Calculate Macaulay duration"""
-        if not cash_flows or yield_rate <= 0:
-            return 0.0
-        
-        weighted_time = 0.0
-        present_value = 0.0
-        
-        for cf, payment_date in zip(cash_flows, dates):
-            years = (payment_date - analysis_date).days / 365.25
-            discount_factor = (1 + yield_rate / 4) ** (years * 4)
-            pv = cf / discount_factor
+    def __init__(self, analysis_date: date, payment_dates: List[date]):
+        self.analysis_date = analysis_date
+        self.payment_dates = list(payment_dates)
+        self.days = np.array([(d - analysis_date).days for d in self.payment_dates], dtype=float)
+        self.years = self.days / 365.25
+    
+    def zero_rates(self, yield_curve) -> np.ndarray:
+        """
+        Zero rates for the date grid in one curve call
+        
+        Returns (dates,) for a YieldCurve and (scenarios x dates) for
+        YieldCurveScenarios. Curves without a vectorized zero_rates are
+        queried date by date.
+        """
+        if isinstance(yield_curve, YieldCurveScenarios):
+            return yield_curve.zero_rates(self.payment_dates)
+        if hasattr(yield_curve, 'zero_rates'):
+            return np.asarray(yield_curve.zero_rates(self.analysis_date, self.payment_dates), dtype=float)
+        return np.array([float(yield_curve.zero_rate(self.analysis_date, d)) for d in self.payment_dates])
+    
+    def calculate(self, cash_flows: np.ndarray, principal_paid: np.ndarray,
+                  current_balance: np.ndarray, original_balance: np.ndarray,
+                  zero_rates: np.ndarray, price: np.ndarray = 1.0,
+                  discount_margin: np.ndarray = 0.0,
+                  final_days: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Risk measures for every tranche (and scenario)
+        
+        Args:
+            cash_flows: Total cash flow per payment date, (..., dates)
+            principal_paid: Principal paid per payment date, (..., dates)
+            current_balance, original_balance, price, discount_margin: Per
+                tranche values broadcast against the leading dimensions
+            zero_rates: (dates,) or (scenarios x dates); scenario rates add a
+                leading scenario axis to tranche-only cash flows
+            final_days: Days to each tranche's last payment date for WAL,
+                default the last grid date
+        
+        Returns:
+            Arrays over the leading dimensions for calculated_price,
+            calculated_yield, calculated_dm, weighted_average_life,
+            macaulay_duration and modified_duration. Yields and DMs that
+            cannot be solved are NaN.
+        """
+        cash_flows = np.asarray(cash_flows, dtype=float)
+        principal_paid = np.asarray(principal_paid, dtype=float)
+        zero_rates = np.asarray(zero_rates, dtype=float)
+        if zero_rates.ndim == 2:
+            zero_rates = zero_rates[:, None, :]
+        
+        shape = np.broadcast_shapes(cash_flows.shape, principal_paid.shape, zero_rates.shape)
+        lead = shape[:-1]
+        cash_flows = np.broadcast_to(cash_flows, shape)
+        principal_paid = np.broadcast_to(principal_paid, shape)
+        zero_rates = np.broadcast_to(zero_rates, shape)
+        current_balance = np.broadcast_to(np.asarray(current_balance, dtype=float), lead)
+        original_balance = np.broadcast_to(np.asarray(original_balance, dtype=float), lead)
+        target = np.broadcast_to(np.asarray(price, dtype=float), lead) * current_balance
+        discount_margin = np.broadcast_to(np.asarray(discount_margin, dtype=float), lead)
+        final_days = np.broadcast_to(self.days[-1] if final_days is None else
+                                     np.asarray(final_days, dtype=float), lead)
+        
+        m = self.COMPOUNDING
+        exponent = -m * self.years
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Price with discount margin
+            present_value = (cash_flows * (1 + (zero_rates + discount_margin[..., None]) / m) ** exponent).sum(axis=-1)
+            calculated_price = present_value / current_balance
+            
+            # Yield and DM that reprice to the input price
+            calculated_yield = self._solve_yields(cash_flows, target)
+            calculated_dm = self._solve_discount_margins(cash_flows, zero_rates, target)
             
-            weighted_time += years * pv
-            present_value += pv
+            # WAL, with the balance still outstanding repaid on the last date
+            remaining_balance = current_balance - principal_paid.sum(axis=-1)
+            weighted_principal = (self.days * principal_paid).sum(axis=-1) + remaining_balance * final_days
+            weighted_average_life = np.where(original_balance > 0, weighted_principal / original_balance / 365, 0.0)
+            
+            # Durations at the solved yield
+            discounted = cash_flows * (1 + calculated_yield[..., None] / m) ** exponent
+            yield_value = discounted.sum(axis=-1)
+            macaulay_duration = np.where(yield_value > 0, (discounted * self.years).sum(axis=-1) / yield_value, np.nan)
+            modified_duration = macaulay_duration / (1 + calculated_yield / m)
         
-        return weighted_time / present_value if present_value > 0 else 0.0
+        return {
+            'calculated_yield': calculated_yield,
+            'calculated_dm': calculated_dm,
+            'calculated_price': calculated_price,
+            'weighted_average_life': weighted_average_life,
+            'macaulay_duration': macaulay_duration,
+            'modified_duration': modified_duration
+        }
+    
+    def _solve_yields(self, cash_flows: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """Quarterly-compounded yields pricing each row to its target value"""
+        rows = cash_flows.reshape(-1, cash_flows.shape[-1])
+        amounts = np.column_stack([-target.reshape(-1), rows])
+        times = np.concatenate([[0.0], self.years])
+        
+        annual_rates, converged = FinancialUtils.xirr_batch(amounts, times, guess=0.05)
+        # (1 + y / 4) ^ 4 = 1 + annual rate
+        yields = self.COMPOUNDING * np.expm1(np.log1p(annual_rates) / self.COMPOUNDING)
+        return np.where(converged, yields, np.nan).reshape(target.shape)
+    
+    def _solve_discount_margins(self, cash_flows: np.ndarray, zero_rates: np.ndarray,
+                                target: np.ndarray) -> np.ndarray:
+        """Spreads over the zero curve pricing each row to its target value"""
+        m = self.COMPOUNDING
+        exponent = -m * self.years
+        rows = cash_flows.reshape(-1, cash_flows.shape[-1])
+        rates = zero_rates.reshape(-1, zero_rates.shape[-1])
+        targets = target.reshape(-1)
+        
+        def price_error(margin: np.ndarray, index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            base = 1 + (rates[index] + margin[:, None]) / m
+            discounted = rows[index] * base ** exponent
+            return (discounted.sum(axis=1) - targets[index],
+                    (discounted * exponent / (m * base)).sum(axis=1))
+        
+        # Keep 1 + (zero + margin) / 4 positive across the bracket
+        lo = np.maximum(-0.5, -m - rates.min(axis=1) + 1e-6)
+        margins, _ = FinancialUtils.bracketed_newton(
+            price_error, lo, np.full(len(targets), 2.0), np.zeros(len(targets)),
+            np.abs(targets) * 1e-12
+        )
+        return margins.reshape(target.shape)
+    
+    @staticmethod
+    def to_decimals(measures: Dict[str, np.ndarray], index: Any = ()) -> Dict[str, Decimal]:
+        """One row of calculate() as Decimals; unsolved measures become 0"""
+        result = {}
+        for name, values in measures.items():
+            value = float(np.asarray(values)[index])
+            result[name] = Decimal(str(value)) if np.isfinite(value) else Decimal('0')
+        return result
 
 
 def generate_output_report(liability: Liability, calculator: LiabilityCalculator) -> List[List[Any]]:
@@ -11,6 +11,7 @@ from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional, Dict, List, Any, Tuple
 from enum import Enum
 from dataclasses import dataclass
+import numpy as np
 
 from ..core.database import Base
 
@@ -93,6 +94,11 @@ class OCTriggerCalculator:
     Handles overcollateralization ratio calculations and cure mechanisms
     """
     
+    # Result attributes captured per period into period_array columns
+    ARRAY_FIELDS = ('numerator', 'denominator', 'calculated_ratio', 'pass_fail',
+                    'interest_cure_amount', 'principal_cure_amount', 'prior_interest_cure',
+                    'prior_principal_cure', 'interest_cure_paid', 'principal_cure_paid')
+
     def __init__(self, name: str, threshold: Decimal):
         """
         Initialize OC trigger calculator
@@ -106,6 +112,7 @@ class OCTriggerCalculator:
         self.period_results: Dict[int, OCTriggerResult] = {}
         self.current_period = 1
         self.last_period_calculated = 0
+        self.period_array = np.zeros((0, len(self.ARRAY_FIELDS)))
         
     def setup_deal(self, num_payments: int):
         """
@@ -119,6 +126,7 @@ class OCTriggerCalculator:
             self.period_results[period] = OCTriggerResult()
             
         self.current_period = 1
+        self.period_array = np.zeros((num_payments, len(self.ARRAY_FIELDS)))
         
     def calculate(self, numerator: Decimal, denominator: Decimal) -> bool:
         """
@@ -331,6 +339,38 @@ class OCTriggerCalculator:
             return self.period_results[self.current_period]
         return OCTriggerResult()
     
+    def capture_period(self) -> None:
+        """
+        Copy the current period result into its period_array row
+        
+        Called once the period's cures have been applied, so the row holds
+        the final state. The array grows if the run outlasts setup_deal.
+        """
+        row = self.current_period - 1
+        if row >= len(self.period_array):
+            grown = np.zeros((max(row + 1, 2 * len(self.period_array)), len(self.ARRAY_FIELDS)))
+            grown[:len(self.period_array)] = self.period_array
+            self.period_array = grown
+        
+        result = self.get_current_result()
+        self.period_array[row] = [float(getattr(result, field)) for field in self.ARRAY_FIELDS]
+    
+    def get_period_array(self, end_period: Optional[int] = None) -> np.ndarray:
+        """
+        Get captured results as a periods x ARRAY_FIELDS array
+        
+        Args:
+            end_period: Last period to include, defaults to the current period
+            
+        Returns:
+            Read-only view of rows for periods 1..end_period
+        """
+        if end_period is None:
+            end_period = self.current_period
+        view = self.period_array[:min(end_period, len(self.period_array))]
+        view.flags.writeable = False
+        return view
+    
     def get_output(self) -> List[List[Any]]:
         """
         Generate output array for reporting
@@ -9,11 +9,12 @@ from typing import Dict, List, Optional, Any, Tuple, Union
 from decimal import Decimal
 from datetime import date, datetime, timedelta
 from enum import Enum
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from collections import defaultdict
 import logging
+import numpy as np
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-import statistics
 
 from .rating_system import (
     RatingDistributionHistory, 
@@ -96,10 +97,110 @@ class RatingHistogramBalance:
     cdr: Decimal = field(default_factory=lambda: Decimal('0'))  # Cumulative Default Rate
 
 
+# Field layouts for the dense simulation tensors
+HISTOGRAM_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(RatingHistogram))
+BALANCE_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(RatingHistogramBalance))
+
+# Rating -> (histogram field, balance field); CCC variants are normalized first
+_RATING_FIELDS: Dict[str, Tuple[str, str]] = {
+    "AAA": ("num_aaa", "bal_aaa"),
+    "AA+": ("num_aa_plus", "bal_aa_plus"),
+    "AA": ("num_aa", "bal_aa"),
+    "AA-": ("num_aa_minus", "bal_aa_minus"),
+    "A+": ("num_a_plus", "bal_a_plus"),
+    "A": ("num_a", "bal_a"),
+    "A-": ("num_a_minus", "bal_a_minus"),
+    "BBB+": ("num_bbb_plus", "bal_bbb_plus"),
+    "BBB": ("num_bbb", "bal_bbb"),
+    "BBB-": ("num_bbb_minus", "bal_bbb_minus"),
+    "BB+": ("num_bb_plus", "bal_bb_plus"),
+    "BB": ("num_bb", "bal_bb"),
+    "BB-": ("num_bb_minus", "bal_bb_minus"),
+    "B+": ("num_b_plus", "bal_b_plus"),
+    "B": ("num_b", "bal_b"),
+    "B-": ("num_b_minus", "bal_b_minus"),
+    "CCC": ("num_ccc_assets", "bal_ccc"),
+    "M": ("num_matures", "bal_mature")
+}
+_RATING_COLUMNS: Dict[str, Tuple[int, int]] = {
+    rating: (HISTOGRAM_FIELDS.index(count_field), BALANCE_FIELDS.index(balance_field))
+    for rating, (count_field, balance_field) in _RATING_FIELDS.items()
+}
+
+# VBA GetSimDataPoint field codes -> (tensor, column)
+_VBA_FIELD_ALIASES: Dict[str, Tuple[str, str]] = {
+    "UPGRADES": ("counts", "upgrades"),
+    "DOWNGRADES": ("counts", "downgrades"),
+    "NUMAAA": ("counts", "num_aaa"),
+    "NUMAA": ("counts", "num_aa"),
+    "NUMA": ("counts", "num_a"),
+    "NUMBBB": ("counts", "num_bbb"),
+    "NUMBB": ("counts", "num_bb"),
+    "NUMB": ("counts", "num_b"),
+    "NUMCCC": ("counts", "num_ccc_assets"),
+    "NUMPERDEF": ("counts", "num_period_defaults"),
+    "NUMDEF": ("counts", "num_defaults"),
+    "NUMMAT": ("counts", "num_matures"),
+    "NUMPERF": ("counts", "num_performing"),
+    "BALAAA": ("balances", "bal_aaa"),
+    "BALAA": ("balances", "bal_aa"),
+    "BALA": ("balances", "bal_a"),
+    "BALBBB": ("balances", "bal_bbb"),
+    "BALBB": ("balances", "bal_bb"),
+    "BALB": ("balances", "bal_b"),
+    "BALCCC": ("balances", "bal_ccc"),
+    "BALPERDEF": ("balances", "bal_period_defaults"),
+    "BALDEF": ("balances", "bal_defaults"),
+    "BALMAT": ("balances", "bal_mature"),
+    "BALPERF": ("balances", "bal_performing"),
+    "CDR": ("balances", "cdr")
+}
+
+# Rating buckets persisted to rating_distribution_history, in VBA order
+_DISTRIBUTION_BUCKETS: Tuple[Tuple[str, str, str], ...] = tuple(
+    (rating, count_field, balance_field)
+    for rating, (count_field, balance_field) in _RATING_FIELDS.items() if rating != "M"
+) + (("D", "num_defaults", "bal_defaults"), ("M", "num_matures", "bal_mature"))
+
+
+def _to_decimal(value: Any) -> Decimal:
+    """Convert a tensor element to Decimal at the API boundary"""
+    return Decimal(str(value.item() if hasattr(value, "item") else value))
+
+
+class _SimulationDataView:
+    """
+    Read-only view giving simulation_data[sim_index][period_index] access to
+    (RatingHistogram, RatingHistogramBalance) snapshots built from the tensors.
+    """
+    
+    def __init__(self, item: "RatingMigrationItem", sim_index: Optional[int] = None):
+        self._item = item
+        self._sim_index = sim_index
+    
+    def __len__(self) -> int:
+        if self._sim_index is None:
+            return self._item.num_simulations
+        return len(self._item.payment_dates)
+    
+    def __getitem__(self, index: int):
+        if self._sim_index is None:
+            if not 0 <= index < self._item.num_simulations:
+                raise KeyError(index)
+            return _SimulationDataView(self._item, index)
+        if not 0 <= index < len(self._item.payment_dates):
+            raise KeyError(index)
+        return self._item._get_histograms(self._sim_index, index)
+
+
 class RatingMigrationItem:
     """
     Python implementation of VBA RatingMigrationItem.cls
     Tracks rating migration history for a single deal across multiple simulations
+    
+    Histories are held in dense (simulations x periods x fields) arrays:
+    counts for RatingHistogram fields and balances for RatingHistogramBalance
+    fields. Statistics and time series are array reductions over them.
     """
     
     def __init__(self, deal_name: str, analysis_date: date, maturity_date: date, 
@@ -117,10 +218,30 @@ class RatingMigrationItem:
         self.date_to_index: Dict[date, int] = {}
         self._build_payment_schedule()
         
-        # Simulation data storage
-        # Format: simulation_data[sim_index][period_index] = (RatingHistogram, RatingHistogramBalance)
-        self.simulation_data: Dict[int, Dict[int, Tuple[RatingHistogram, RatingHistogramBalance]]] = {}
-        self._initialize_simulation_data()
+        # Simulation data storage: (simulations x periods x fields)
+        self.counts: np.ndarray = np.zeros(
+            (num_simulations, len(self.payment_dates), len(HISTOGRAM_FIELDS)), dtype=np.int64
+        )
+        self.balances: np.ndarray = np.zeros(
+            (num_simulations, len(self.payment_dates), len(BALANCE_FIELDS))
+        )
+    
+    @property
+    def simulation_data(self) -> _SimulationDataView:
+        """Read-only simulation_data[sim_index][period_index] view of the tensors"""
+        return _SimulationDataView(self)
+    
+    def _get_histograms(self, sim_index: int, period_index: int
+                        ) -> Tuple[RatingHistogram, RatingHistogramBalance]:
+        """Build histogram snapshots for one simulation and period"""
+        rating_hist = RatingHistogram(**{
+            name: int(value) for name, value in zip(HISTOGRAM_FIELDS, self.counts[sim_index, period_index])
+        })
+        rating_hist_bal = RatingHistogramBalance(**{
+            name: _to_decimal(value)
+            for name, value in zip(BALANCE_FIELDS, self.balances[sim_index, period_index])
+        })
+        return rating_hist, rating_hist_bal
     
     def _get_months_per_period(self, frequency: PeriodFrequency) -> int:
         """Convert period frequency to months"""
@@ -158,15 +279,24 @@ class RatingMigrationItem:
         day = min(base_date.day, [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month-1])
         return date(year, month, day)
     
-    def _initialize_simulation_data(self):
-        """Initialize simulation data structures"""
-        for sim_index in range(self.num_simulations):
-            self.simulation_data[sim_index] = {}
-            for period_index in range(len(self.payment_dates)):
-                self.simulation_data[sim_index][period_index] = (
-                    RatingHistogram(),
-                    RatingHistogramBalance()
-                )
+    def _get_indices(self, simulation: int, calculation_date: date) -> Optional[Tuple[int, int]]:
+        """Resolve a 1-based simulation number and payment date to tensor indices"""
+        period_index = self.date_to_index.get(calculation_date)
+        if period_index is None:
+            return None
+        
+        sim_index = simulation - 1  # VBA uses 1-based indexing
+        if sim_index < 0 or sim_index >= self.num_simulations:
+            return None
+        
+        return sim_index, period_index
+    
+    @staticmethod
+    def _normalize_rating(rating: str) -> str:
+        """Normalize CCC variants"""
+        if rating in ["CCC+", "CCC", "CCC-", "CC", "C"]:
+            return "CCC"
+        return rating
     
     def add_rating_and_balance(self, simulation: int, calculation_date: date, 
                               rating: str, balance: Decimal):
@@ -183,49 +313,26 @@ class RatingMigrationItem:
         Add rating count to histogram
         """
         try:
-            period_index = self.date_to_index.get(calculation_date)
-            if period_index is None:
+            if calculation_date not in self.date_to_index:
                 logger.warning(f"Date {calculation_date} not found in payment schedule")
                 return
             
-            sim_index = simulation - 1  # VBA uses 1-based indexing
-            if sim_index < 0 or sim_index >= self.num_simulations:
+            indices = self._get_indices(simulation, calculation_date)
+            if indices is None:
                 logger.warning(f"Invalid simulation number: {simulation}")
                 return
             
-            rating_hist, _ = self.simulation_data[sim_index][period_index]
-            
-            # Normalize CCC variants
-            if rating in ["CCC+", "CCC", "CCC-", "CC", "C"]:
-                rating = "CCC"
-            
-            # Map ratings to histogram fields
-            rating_mapping = {
-                "AAA": "num_aaa",
-                "AA+": "num_aa_plus", 
-                "AA": "num_aa",
-                "AA-": "num_aa_minus",
-                "A+": "num_a_plus",
-                "A": "num_a", 
-                "A-": "num_a_minus",
-                "BBB+": "num_bbb_plus",
-                "BBB": "num_bbb",
-                "BBB-": "num_bbb_minus",
-                "BB+": "num_bb_plus",
-                "BB": "num_bb",
-                "BB-": "num_bb_minus",
-                "B+": "num_b_plus",
-                "B": "num_b",
-                "B-": "num_b_minus",
-                "CCC": "num_ccc_assets",
-                "D": "num_period_defaults" if period_index > 0 else "num_defaults",
-                "M": "num_matures"
-            }
+            sim_index, period_index = indices
+            rating = self._normalize_rating(rating)
+            
+            if rating == "D":
+                column = _PERIOD_DEFAULTS_COLUMN if period_index > 0 else _DEFAULTS_COLUMN
+            elif rating in _RATING_COLUMNS:
+                column = _RATING_COLUMNS[rating][0]
+            else:
+                return
             
-            field_name = rating_mapping.get(rating)
-            if field_name:
-                current_value = getattr(rating_hist, field_name)
-                setattr(rating_hist, field_name, current_value + 1)
+            self.counts[sim_index, period_index, column] += 1
                 
         except Exception as e:
             logger.error(f"Error adding rating: {e}")
@@ -236,66 +343,43 @@ class RatingMigrationItem:
         Add balance amount to histogram balance
         """
         try:
-            period_index = self.date_to_index.get(calculation_date)
-            if period_index is None:
-                return
-            
-            sim_index = simulation - 1
-            if sim_index < 0 or sim_index >= self.num_simulations:
+            indices = self._get_indices(simulation, calculation_date)
+            if indices is None:
                 return
             
-            _, rating_hist_bal = self.simulation_data[sim_index][period_index]
+            sim_index, period_index = indices
+            period_balances = self.balances[sim_index, period_index]
             
             # Get previous performing balance for CDR calculation
-            last_performing_balance = Decimal('0')
+            last_performing_balance = 0.0
             if period_index > 0:
-                _, prev_bal = self.simulation_data[sim_index][period_index - 1]
-                last_performing_balance = prev_bal.bal_performing
-            
-            # Normalize CCC variants
-            if rating in ["CCC+", "CCC", "CCC-", "CC", "C"]:
-                rating = "CCC"
-            
-            # Map ratings to balance fields
-            balance_mapping = {
-                "AAA": "bal_aaa",
-                "AA+": "bal_aa_plus",
-                "AA": "bal_aa", 
-                "AA-": "bal_aa_minus",
-                "A+": "bal_a_plus",
-                "A": "bal_a",
-                "A-": "bal_a_minus", 
-                "BBB+": "bal_bbb_plus",
-                "BBB": "bal_bbb",
-                "BBB-": "bal_bbb_minus",
-                "BB+": "bal_bb_plus",
-                "BB": "bal_bb",
-                "BB-": "bal_bb_minus",
-                "B+": "bal_b_plus",
-                "B": "bal_b",
-                "B-": "bal_b_minus",
-                "CCC": "bal_ccc",
-                "D": "bal_period_defaults" if period_index > 0 else "bal_defaults",
-                "M": "bal_mature"
-            }
+                last_performing_balance = self.balances[sim_index, period_index - 1, _PERFORMING_COLUMN]
+            
+            rating = self._normalize_rating(rating)
             
-            field_name = balance_mapping.get(rating)
-            if field_name:
-                current_value = getattr(rating_hist_bal, field_name)
-                setattr(rating_hist_bal, field_name, current_value + balance)
+            if rating == "D":
+                column = _BAL_PERIOD_DEFAULTS_COLUMN if period_index > 0 else _BAL_DEFAULTS_COLUMN
+            elif rating in _RATING_COLUMNS:
+                column = _RATING_COLUMNS[rating][1]
+            else:
+                column = None
+            
+            if column is not None:
+                period_balances[column] += float(balance)
                 
                 # Add to performing balance if not default/mature
                 if rating not in ["D", "M"]:
-                    rating_hist_bal.bal_performing += balance
+                    period_balances[_PERFORMING_COLUMN] += float(balance)
             
             # Calculate CDR (Cumulative Default Rate)
             if last_performing_balance > 0:
-                rating_hist_bal.cdr = rating_hist_bal.bal_period_defaults / last_performing_balance
+                cdr = period_balances[_BAL_PERIOD_DEFAULTS_COLUMN] / last_performing_balance
                 # Annualize based on frequency
                 if self.num_months == 3:
-                    rating_hist_bal.cdr *= Decimal('4')
+                    cdr *= 4
                 elif self.num_months == 6:
-                    rating_hist_bal.cdr *= Decimal('2')
+                    cdr *= 2
+                period_balances[_CDR_COLUMN] = cdr
                 
         except Exception as e:
             logger.error(f"Error adding balance: {e}")
@@ -306,16 +390,11 @@ class RatingMigrationItem:
         Record an upgrade event
         """
         try:
-            period_index = self.date_to_index.get(calculation_date)
-            if period_index is None:
-                return
-            
-            sim_index = simulation - 1
-            if sim_index < 0 or sim_index >= self.num_simulations:
+            indices = self._get_indices(simulation, calculation_date)
+            if indices is None:
                 return
             
-            rating_hist, _ = self.simulation_data[sim_index][period_index]
-            rating_hist.upgrades += 1
+            self.counts[indices + (_UPGRADES_COLUMN,)] += 1
             
         except Exception as e:
             logger.error(f"Error adding upgrade: {e}")
@@ -326,16 +405,11 @@ class RatingMigrationItem:
         Record a downgrade event
         """
         try:
-            period_index = self.date_to_index.get(calculation_date)
-            if period_index is None:
-                return
-            
-            sim_index = simulation - 1
-            if sim_index < 0 or sim_index >= self.num_simulations:
+            indices = self._get_indices(simulation, calculation_date)
+            if indices is None:
                 return
             
-            rating_hist, _ = self.simulation_data[sim_index][period_index]
-            rating_hist.downgrades += 1
+            self.counts[indices + (_DOWNGRADES_COLUMN,)] += 1
             
         except Exception as e:
             logger.error(f"Error adding downgrade: {e}")
@@ -350,110 +424,93 @@ class RatingMigrationItem:
             if sim_index < 0 or sim_index >= self.num_simulations:
                 return
             
-            for period_index in range(1, len(self.payment_dates)):
-                rating_hist, rating_hist_bal = self.simulation_data[sim_index][period_index]
-                prev_rating_hist, prev_rating_hist_bal = self.simulation_data[sim_index][period_index - 1]
-                
-                # Update cumulative defaults
-                rating_hist_bal.bal_defaults = (
-                    rating_hist_bal.bal_period_defaults + prev_rating_hist_bal.bal_defaults
-                )
-                rating_hist.num_defaults = (
-                    rating_hist.num_period_defaults + prev_rating_hist.num_defaults
-                )
+            # Cumulative defaults = period 0 defaults plus running period defaults
+            counts = self.counts[sim_index]
+            counts[1:, _DEFAULTS_COLUMN] = (
+                counts[0, _DEFAULTS_COLUMN] + np.cumsum(counts[1:, _PERIOD_DEFAULTS_COLUMN])
+            )
+            balances = self.balances[sim_index]
+            balances[1:, _BAL_DEFAULTS_COLUMN] = (
+                balances[0, _BAL_DEFAULTS_COLUMN] + np.cumsum(balances[1:, _BAL_PERIOD_DEFAULTS_COLUMN])
+            )
                 
         except Exception as e:
             logger.error(f"Error updating defaults: {e}")
     
+    def _resolve_field(self, field: str) -> Optional[Tuple[np.ndarray, int, bool]]:
+        """Resolve a field name or VBA field code to (tensor, column, is_count)"""
+        field_lower = field.lower()
+        if field_lower in HISTOGRAM_FIELDS:
+            return self.counts, HISTOGRAM_FIELDS.index(field_lower), True
+        if field_lower in BALANCE_FIELDS:
+            return self.balances, BALANCE_FIELDS.index(field_lower), False
+        
+        alias = _VBA_FIELD_ALIASES.get(field.upper())
+        if alias is None:
+            return None
+        tensor_name, column_name = alias
+        if tensor_name == "counts":
+            return self.counts, HISTOGRAM_FIELDS.index(column_name), True
+        return self.balances, BALANCE_FIELDS.index(column_name), False
+    
+    def get_field_array(self, field: str) -> np.ndarray:
+        """Get a field for every simulation and period as a (simulations x periods) array"""
+        resolved = self._resolve_field(field)
+        if resolved is None:
+            return np.zeros((self.num_simulations, len(self.payment_dates)))
+        tensor, column, _ = resolved
+        return tensor[:, :, column]
+    
     def get_simulation_data_point(self, simulation: int, calculation_date: date, field: str) -> Decimal:
         """
         VBA: GetSimDataPoint method
         Get specific data point for a simulation and date
         """
         try:
-            period_index = self.date_to_index.get(calculation_date)
-            if period_index is None:
-                return Decimal('0')
-            
-            sim_index = simulation - 1
-            if sim_index < 0 or sim_index >= self.num_simulations:
+            indices = self._get_indices(simulation, calculation_date)
+            resolved = self._resolve_field(field)
+            if indices is None or resolved is None:
                 return Decimal('0')
             
-            rating_hist, rating_hist_bal = self.simulation_data[sim_index][period_index]
-            field_upper = field.upper()
-            
-            # Map field names to data
-            if hasattr(rating_hist, field_upper.lower()):
-                return Decimal(str(getattr(rating_hist, field_upper.lower())))
-            elif hasattr(rating_hist_bal, field_upper.lower()):
-                return getattr(rating_hist_bal, field_upper.lower())
-            
-            # Handle specific field mappings
-            field_mappings = {
-                "UPGRADES": rating_hist.upgrades,
-                "DOWNGRADES": rating_hist.downgrades, 
-                "NUMAAA": rating_hist.num_aaa,
-                "NUMAA": rating_hist.num_aa,
-                "NUMA": rating_hist.num_a,
-                "NUMBBB": rating_hist.num_bbb,
-                "NUMBB": rating_hist.num_bb,
-                "NUMB": rating_hist.num_b,
-                "NUMCCC": rating_hist.num_ccc_assets,
-                "NUMPERDEF": rating_hist.num_period_defaults,
-                "NUMDEF": rating_hist.num_defaults,
-                "NUMMAT": rating_hist.num_matures,
-                "NUMPERF": rating_hist.num_performing,
-                "BALAAA": rating_hist_bal.bal_aaa,
-                "BALAA": rating_hist_bal.bal_aa,
-                "BALA": rating_hist_bal.bal_a,
-                "BALBBB": rating_hist_bal.bal_bbb,
-                "BALBB": rating_hist_bal.bal_bb,
-                "BALB": rating_hist_bal.bal_b,
-                "BALCCC": rating_hist_bal.bal_ccc,
-                "BALPERDEF": rating_hist_bal.bal_period_defaults,
-                "BALDEF": rating_hist_bal.bal_defaults,
-                "BALMAT": rating_hist_bal.bal_mature,
-                "BALPERF": rating_hist_bal.bal_performing,
-                "CDR": rating_hist_bal.cdr
-            }
-            
-            return Decimal(str(field_mappings.get(field_upper, 0)))
+            tensor, column, _ = resolved
+            return _to_decimal(tensor[indices + (column,)])
             
         except Exception as e:
             logger.error(f"Error getting simulation data point: {e}")
             return Decimal('0')
     
+    def get_statistic_series(self, statistic: str, field: str) -> np.ndarray:
+        """Statistical measure across all simulations for every payment date at once"""
+        values = self.get_field_array(field).astype(float)
+        if self.num_simulations == 0:
+            return np.zeros(len(self.payment_dates))
+        
+        stat_upper = statistic.upper()
+        if stat_upper == "MIN":
+            return values.min(axis=0)
+        elif stat_upper == "MAX":
+            return values.max(axis=0)
+        elif stat_upper == "AVERAGE":
+            return values.mean(axis=0)
+        elif stat_upper == "MEDIAN":
+            return np.median(values, axis=0)
+        elif stat_upper == "STDDEV":
+            if self.num_simulations > 1:
+                return values.std(axis=0, ddof=1)
+            return np.zeros(len(self.payment_dates))
+        return np.zeros(len(self.payment_dates))
+    
     def get_statistic_data(self, statistic: str, field: str, calculation_date: date) -> Decimal:
         """
         VBA: GeStatData method
         Get statistical measure across all simulations for a date/field
         """
         try:
-            # Get data for all simulations
-            data_points = []
-            for sim in range(1, self.num_simulations + 1):
-                value = self.get_simulation_data_point(sim, calculation_date, field)
-                data_points.append(float(value))
-            
-            if not data_points:
+            period_index = self.date_to_index.get(calculation_date)
+            if period_index is None or self.num_simulations == 0:
                 return Decimal('0')
             
-            # Calculate statistic
-            stat_upper = statistic.upper()
-            if stat_upper == "MIN":
-                result = min(data_points)
-            elif stat_upper == "MAX":
-                result = max(data_points)
-            elif stat_upper == "AVERAGE":
-                result = sum(data_points) / len(data_points)
-            elif stat_upper == "MEDIAN":
-                result = statistics.median(data_points)
-            elif stat_upper == "STDDEV":
-                result = statistics.stdev(data_points) if len(data_points) > 1 else 0
-            else:
-                result = 0
-            
-            return Decimal(str(result))
+            return _to_decimal(self.get_statistic_series(statistic, field)[period_index])
             
         except Exception as e:
             logger.error(f"Error calculating statistic: {e}")
@@ -465,74 +522,61 @@ class RatingMigrationItem:
         Get time series data for a specific simulation and field
         """
         try:
-            time_series = []
-            for payment_date in self.payment_dates:
-                value = self.get_simulation_data_point(simulation, payment_date, field)
-                time_series.append(value)
-            return time_series
+            sim_index = simulation - 1
+            if sim_index < 0 or sim_index >= self.num_simulations:
+                return [Decimal('0')] * len(self.payment_dates)
+            return [_to_decimal(value) for value in self.get_field_array(field)[sim_index]]
             
         except Exception as e:
             logger.error(f"Error getting simulation time series: {e}")
             return [Decimal('0')] * len(self.payment_dates)
     
     def save_to_database(self):
-        """Save migration data to database"""
+        """Save migration data to database in one bulk write per table"""
         try:
+            counts, balances = self.counts, self.balances
+            column = HISTOGRAM_FIELDS.index
+            bal_column = BALANCE_FIELDS.index
+            
+            stats_rows = []
+            distribution_rows = []
             for sim_index in range(self.num_simulations):
                 simulation_number = sim_index + 1
                 
                 for period_index, payment_date in enumerate(self.payment_dates):
-                    rating_hist, rating_hist_bal = self.simulation_data[sim_index][period_index]
-                    
-                    # Save portfolio migration stats
-                    stats = PortfolioMigrationStats(
-                        deal_id=self.deal_name,
-                        calculation_date=payment_date,
-                        simulation_number=simulation_number,
-                        total_upgrades=rating_hist.upgrades,
-                        total_downgrades=rating_hist.downgrades,
-                        total_defaults=rating_hist.num_defaults,
-                        period_defaults=rating_hist.num_period_defaults,
-                        period_default_dollar_volume=rating_hist_bal.bal_period_defaults,
-                        performing_balance=rating_hist_bal.bal_performing,
-                        cumulative_default_rate=rating_hist_bal.cdr
-                    )
-                    self.session.add(stats)
+                    period_counts = counts[sim_index, period_index]
+                    period_balances = balances[sim_index, period_index]
                     
-                    # Save rating distribution
-                    rating_distributions = [
-                        ("AAA", rating_hist.num_aaa, rating_hist_bal.bal_aaa),
-                        ("AA+", rating_hist.num_aa_plus, rating_hist_bal.bal_aa_plus),
-                        ("AA", rating_hist.num_aa, rating_hist_bal.bal_aa),
-                        ("AA-", rating_hist.num_aa_minus, rating_hist_bal.bal_aa_minus),
-                        ("A+", rating_hist.num_a_plus, rating_hist_bal.bal_a_plus),
-                        ("A", rating_hist.num_a, rating_hist_bal.bal_a),
-                        ("A-", rating_hist.num_a_minus, rating_hist_bal.bal_a_minus),
-                        ("BBB+", rating_hist.num_bbb_plus, rating_hist_bal.bal_bbb_plus),
-                        ("BBB", rating_hist.num_bbb, rating_hist_bal.bal_bbb),
-                        ("BBB-", rating_hist.num_bbb_minus, rating_hist_bal.bal_bbb_minus),
-                        ("BB+", rating_hist.num_bb_plus, rating_hist_bal.bal_bb_plus),
-                        ("BB", rating_hist.num_bb, rating_hist_bal.bal_bb),
-                        ("BB-", rating_hist.num_bb_minus, rating_hist_bal.bal_bb_minus),
-                        ("B+", rating_hist.num_b_plus, rating_hist_bal.bal_b_plus),
-                        ("B", rating_hist.num_b, rating_hist_bal.bal_b),
-                        ("B-", rating_hist.num_b_minus, rating_hist_bal.bal_b_minus),
-                        ("CCC", rating_hist.num_ccc_assets, rating_hist_bal.bal_ccc),
-                        ("D", rating_hist.num_defaults, rating_hist_bal.bal_defaults),
-                        ("M", rating_hist.num_matures, rating_hist_bal.bal_mature)
-                    ]
-                    
-                    for rating_bucket, asset_count, balance_amount in rating_distributions:
-                        if asset_count > 0 or balance_amount > 0:
-                            distribution = RatingDistributionHistory(
-                                deal_id=self.deal_name,
-                                calculation_date=payment_date,
-                                simulation_number=simulation_number,
-                                rating_bucket=rating_bucket,
-                                asset_count=asset_count,
-                                balance_amount=balance_amount
-                            )
-                            self.session.add(distribution)
+                    stats_rows.append({
+                        "deal_id": self.deal_name,
+                        "calculation_date": payment_date,
+                        "simulation_number": simulation_number,
+                        "total_upgrades": int(period_counts[_UPGRADES_COLUMN]),
+                        "total_downgrades": int(period_counts[_DOWNGRADES_COLUMN]),
+                        "total_defaults": int(period_counts[_DEFAULTS_COLUMN]),
+                        "period_defaults": int(period_counts[_PERIOD_DEFAULTS_COLUMN]),
+                        "period_default_dollar_volume": _to_decimal(period_balances[_BAL_PERIOD_DEFAULTS_COLUMN]),
+                        "performing_balance": _to_decimal(period_balances[_PERFORMING_COLUMN]),
+                        "cumulative_default_rate": _to_decimal(period_balances[_CDR_COLUMN])
+                    })
+            
+            # Rating distribution rows only for non-empty buckets
+            bucket_counts = counts[:, :, [column(count_field) for _, count_field, _ in _DISTRIBUTION_BUCKETS]]
+            bucket_balances = balances[:, :, [bal_column(bal_field) for _, _, bal_field in _DISTRIBUTION_BUCKETS]]
+            for sim_index, period_index, bucket in np.argwhere((bucket_counts > 0) | (bucket_balances > 0)):
+                distribution_rows.append({
+                    "deal_id": self.deal_name,
+                    "calculation_date": self.payment_dates[period_index],
+                    "simulation_number": int(sim_index) + 1,
+                    "rating_bucket": _DISTRIBUTION_BUCKETS[bucket][0],
+                    "asset_count": int(bucket_counts[sim_index, period_index, bucket]),
+                    "balance_amount": _to_decimal(bucket_balances[sim_index, period_index, bucket])
+                })
+            
+            if stats_rows:
+                self.session.execute(insert(PortfolioMigrationStats), stats_rows)
+            if distribution_rows:
+                self.session.execute(insert(RatingDistributionHistory), distribution_rows)
             
             self.session.commit()
             
@@ -541,6 +585,16 @@ class RatingMigrationItem:
             self.session.rollback()
 
 
+_UPGRADES_COLUMN = HISTOGRAM_FIELDS.index("upgrades")
+_DOWNGRADES_COLUMN = HISTOGRAM_FIELDS.index("downgrades")
+_DEFAULTS_COLUMN = HISTOGRAM_FIELDS.index("num_defaults")
+_PERIOD_DEFAULTS_COLUMN = HISTOGRAM_FIELDS.index("num_period_defaults")
+_BAL_DEFAULTS_COLUMN = BALANCE_FIELDS.index("bal_defaults")
+_BAL_PERIOD_DEFAULTS_COLUMN = BALANCE_FIELDS.index("bal_period_defaults")
+_PERFORMING_COLUMN = BALANCE_FIELDS.index("bal_performing")
+_CDR_COLUMN = BALANCE_FIELDS.index("cdr")
+
+
 class RatingMigrationOutput:
     """
     Python implementation of VBA RatingMigrationOutput.cls
@@ -657,12 +711,17 @@ class RatingMigrationOutput:
             header = ["Period"] + self.deal_names
             output.append(header)
             
+            # One array reduction per deal covers every payment date
+            averages = [
+                self.deal_migration_items[deal_name].get_statistic_series("AVERAGE", field)
+                for deal_name in self.deal_names
+            ]
+            
             # Data rows
-            for payment_date in self.payment_dates:
+            for period_index, payment_date in enumerate(self.payment_dates):
                 row = [payment_date]
-                for deal_name in self.deal_names:
-                    migration_item = self.deal_migration_items[deal_name]
-                    avg_value = migration_item.get_statistic_data("AVERAGE", field, payment_date)
+                for deal_averages in averages:
+                    avg_value = _to_decimal(deal_averages[period_index])
                     
                     # Format specific fields
                     if field.upper() == "CDR":
@@ -681,27 +740,26 @@ class RatingMigrationOutput:
             logger.error(f"Error getting average time series: {e}")
             return []
     
+    def _get_total_defaults_at_maturity(self) -> np.ndarray:
+        """Cumulative default balance at maturity summed across deals, per simulation"""
+        totals = np.zeros(self.num_simulations)
+        period_index = self.date_to_index.get(self.maturity_date)
+        if period_index is None:
+            return totals
+        
+        for deal_name in self.deal_names:
+            totals += self.deal_migration_items[deal_name].get_field_array("BALDEF")[:, period_index]
+        return totals
+    
     def _get_simulation_min_defaults(self) -> int:
         """
         VBA: GetSimMinDefaults method
         Find simulation with minimum total defaults
         """
         try:
-            min_defaults = None
-            min_simulation = 1
-            
-            for sim in range(1, self.num_simulations + 1):
-                total_defaults = Decimal('0')
-                for deal_name in self.deal_names:
-                    migration_item = self.deal_migration_items[deal_name]
-                    defaults = migration_item.get_simulation_data_point(sim, self.maturity_date, "BALDEF")
-                    total_defaults += defaults
-                
-                if min_defaults is None or total_defaults < min_defaults:
-                    min_defaults = total_defaults
-                    min_simulation = sim
-            
-            return min_simulation
+            if self.num_simulations == 0:
+                return 1
+            return int(np.argmin(self._get_total_defaults_at_maturity())) + 1
             
         except Exception as e:
             logger.error(f"Error finding min defaults simulation: {e}")
@@ -713,21 +771,9 @@ class RatingMigrationOutput:
         Find simulation with maximum total defaults
         """
         try:
-            max_defaults = None
-            max_simulation = 1
-            
-            for sim in range(1, self.num_simulations + 1):
-                total_defaults = Decimal('0')
-                for deal_name in self.deal_names:
-                    migration_item = self.deal_migration_items[deal_name]
-                    defaults = migration_item.get_simulation_data_point(sim, self.maturity_date, "BALDEF")
-                    total_defaults += defaults
-                
-                if max_defaults is None or total_defaults > max_defaults:
-                    max_defaults = total_defaults
-                    max_simulation = sim
-            
-            return max_simulation
+            if self.num_simulations == 0:
+                return 1
+            return int(np.argmax(self._get_total_defaults_at_maturity())) + 1
             
         except Exception as e:
             logger.error(f"Error finding max defaults simulation: {e}")
@@ -739,19 +785,10 @@ class RatingMigrationOutput:
         Find simulation with median total defaults
         """
         try:
-            simulation_defaults = {}
-            
-            for sim in range(1, self.num_simulations + 1):
-                total_defaults = Decimal('0')
-                for deal_name in self.deal_names:
-                    migration_item = self.deal_migration_items[deal_name]
-                    defaults = migration_item.get_simulation_data_point(sim, self.maturity_date, "BALDEF")
-                    total_defaults += defaults
-                
-                simulation_defaults[float(total_defaults)] = sim
+            total_defaults = self._get_total_defaults_at_maturity()
             
-            # Sort by defaults amount
-            sorted_defaults = sorted(simulation_defaults.keys())
+            # Distinct default amounts, each mapped to the last simulation producing it
+            sorted_defaults = np.unique(total_defaults)
             
             # Get median
             if self.num_simulations == 1:
@@ -762,8 +799,8 @@ class RatingMigrationOutput:
                 median_index = self.num_simulations // 2
             
             if median_index < len(sorted_defaults):
-                median_defaults = sorted_defaults[median_index]
-                return simulation_defaults[median_defaults]
+                matches = np.flatnonzero(total_defaults == sorted_defaults[median_index])
+                return int(matches[-1]) + 1
             
             return 1
             
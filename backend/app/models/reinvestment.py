@@ -20,6 +20,7 @@ from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, List, Optional, Tuple, Any, Union
 from dateutil.relativedelta import relativedelta
 from calendar import monthrange
+import numpy as np
 
 from sqlalchemy import Column, Integer, String, Date, DateTime, DECIMAL, Boolean, Text, ForeignKey, Index, text
 from sqlalchemy.orm import relationship, Session
@@ -208,40 +209,59 @@ class SimpleCashflow:
     """
     VBA SimpleCashflow equivalent implementation
     Maintains cash flow data structure used by Reinvest class
+    
+    Amounts live in one preallocated float array (one row per field, one
+    column per period) so Reinvest can read and accumulate whole period
+    ranges; the VBA property methods remain for single-period access.
     """
     
+    # Row order of the amounts array
+    AMOUNT_FIELDS = (
+        'beg_balance', 'end_balance', 'default_bal', 'mv_default_bal',
+        'interest', 'sched_principal', 'unsched_principal', 'default',
+        'mv_default', 'recoveries', 'net_loss', 'sold', 'total'
+    )
+    FIELD_INDEX = {name: row for row, name in enumerate(AMOUNT_FIELDS)}
+    
     def __init__(self, max_periods: int = 100):
         """Initialize SimpleCashflow with VBA-equivalent arrays"""
         # VBA arrays (1-based indexing in comments, 0-based in Python)
         self._max_periods = max_periods
-        self._payment_dates: List[Optional[date]] = [None] * (max_periods + 1)
-        self._acc_beg_dates: List[Optional[date]] = [None] * (max_periods + 1)
-        self._acc_end_dates: List[Optional[date]] = [None] * (max_periods + 1)
-        
-        # Balance arrays
-        self._beg_balance: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._end_balance: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._default_bal: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._mv_default_bal: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        
-        # Cash flow component arrays
-        self._interest: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._sched_principal: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._unsched_principal: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._default: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._mv_default: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._recoveries: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._net_loss: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._sold: List[Decimal] = [Decimal('0')] * (max_periods + 1)
-        self._total: List[Decimal] = [Decimal('0')] * (max_periods + 1)
+        self._payment_dates = np.full(max_periods + 1, None, dtype=object)
+        self._acc_beg_dates = np.full(max_periods + 1, None, dtype=object)
+        self._acc_end_dates = np.full(max_periods + 1, None, dtype=object)
+        
+        # Payment date ordinal, year, month and day for vectorized day counts
+        # (ordinal 0 marks an unset date)
+        self.payment_date_parts = np.zeros((4, max_periods + 1), dtype=np.int64)
+        
+        # Balance and cash flow component arrays
+        self.amounts = np.zeros((len(self.AMOUNT_FIELDS), max_periods + 1))
         
         self._count = 0
     
+    @classmethod
+    def rows(cls, *fields: str) -> List[int]:
+        """Row indices of the named fields in the amounts array"""
+        return [cls.FIELD_INDEX[field] for field in fields]
+    
+    def column(self, field: str) -> np.ndarray:
+        """Per-period array for one field (a view, indexed by period)"""
+        return self.amounts[self.FIELD_INDEX[field]]
+    
+    def _amount(self, field: str, period: int, value: Optional[Decimal]) -> Decimal:
+        """Shared getter/setter behind the VBA amount properties"""
+        values = self.amounts[self.FIELD_INDEX[field]]
+        if value is not None:
+            values[period] = float(value)
+        return Decimal(repr(float(values[period]))) if period <= len(values) - 1 else Decimal('0')
+    
     # VBA-equivalent property methods
     def PaymentDate(self, period: int, value: date = None) -> Optional[date]:
         """VBA: PaymentDate property"""
         if value is not None:
             self._payment_dates[period] = value
+            self.payment_date_parts[:, period] = (value.toordinal(), value.year, value.month, value.day)
             self._count = max(self._count, period)
         return self._payment_dates[period] if period <= len(self._payment_dates) - 1 else None
     
@@ -259,81 +279,55 @@ class SimpleCashflow:
     
     def BegBalance(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: BegBalance property"""
-        if value is not None:
-            self._beg_balance[period] = value
-        return self._beg_balance[period] if period <= len(self._beg_balance) - 1 else Decimal('0')
+        return self._amount('beg_balance', period, value)
     
     def EndBalance(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: EndBalance property"""
-        if value is not None:
-            self._end_balance[period] = value  
-        return self._end_balance[period] if period <= len(self._end_balance) - 1 else Decimal('0')
+        return self._amount('end_balance', period, value)
     
     def DefaultBal(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: DefaultBal property"""
-        if value is not None:
-            self._default_bal[period] = value
-        return self._default_bal[period] if period <= len(self._default_bal) - 1 else Decimal('0')
+        return self._amount('default_bal', period, value)
     
     def MVDefaultBal(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: MVDefaultBal property"""
-        if value is not None:
-            self._mv_default_bal[period] = value
-        return self._mv_default_bal[period] if period <= len(self._mv_default_bal) - 1 else Decimal('0')
+        return self._amount('mv_default_bal', period, value)
     
     def Interest(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: Interest property"""
-        if value is not None:
-            self._interest[period] = value
-        return self._interest[period] if period <= len(self._interest) - 1 else Decimal('0')
+        return self._amount('interest', period, value)
     
     def SchedPrincipal(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: SchedPrincipal property"""
-        if value is not None:
-            self._sched_principal[period] = value
-        return self._sched_principal[period] if period <= len(self._sched_principal) - 1 else Decimal('0')
+        return self._amount('sched_principal', period, value)
     
     def UnSchedPrincipal(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: UnSchedPrincipal property"""
-        if value is not None:
-            self._unsched_principal[period] = value
-        return self._unsched_principal[period] if period <= len(self._unsched_principal) - 1 else Decimal('0')
+        return self._amount('unsched_principal', period, value)
     
     def Default(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: Default property"""
-        if value is not None:
-            self._default[period] = value
-        return self._default[period] if period <= len(self._default) - 1 else Decimal('0')
+        return self._amount('default', period, value)
     
     def MVDefault(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: MVDefault property"""
-        if value is not None:
-            self._mv_default[period] = value
-        return self._mv_default[period] if period <= len(self._mv_default) - 1 else Decimal('0')
+        return self._amount('mv_default', period, value)
     
     def Recoveries(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: Recoveries property"""
-        if value is not None:
-            self._recoveries[period] = value
-        return self._recoveries[period] if period <= len(self._recoveries) - 1 else Decimal('0')
+        return self._amount('recoveries', period, value)
     
     def Netloss(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: Netloss property"""
-        if value is not None:
-            self._net_loss[period] = value
-        return self._net_loss[period] if period <= len(self._net_loss) - 1 else Decimal('0')
+        return self._amount('net_loss', period, value)
     
     def Sold(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: Sold property"""
-        if value is not None:
-            self._sold[period] = value
-        return self._sold[period] if period <= len(self._sold) - 1 else Decimal('0')
+        return self._amount('sold', period, value)
     
     def Total(self, period: int, value: Decimal = None) -> Decimal:
         """VBA: Total property"""
-        if value is not None:
-            self._total[period] = value
-        return self._total[period] if period <= len(self._total) - 1 else Decimal('0')
+        return self._amount('total', period, value)
     
     @property
     def Count(self) -> int:
@@ -492,6 +486,17 @@ class Reinvest:
         
         return 0.0
     
+    # deal_cf rows written by AddReinvestment, in the order of its period vectors
+    REINVESTMENT_ROWS = SimpleCashflow.rows(
+        'beg_balance', 'mv_default_bal', 'default_bal', 'default', 'mv_default',
+        'interest', 'sched_principal', 'unsched_principal', 'recoveries', 'net_loss'
+    )
+    PRINCIPAL_PROCEEDS_ROWS = SimpleCashflow.rows('sched_principal', 'unsched_principal', 'recoveries')
+    COLLAT_CF_ROWS = SimpleCashflow.rows(
+        'beg_balance', 'default_bal', 'mv_default_bal', 'default', 'mv_default', 'interest',
+        'sched_principal', 'unsched_principal', 'recoveries', 'net_loss', 'sold'
+    )
+    
     def add_reinvestment(self, i_amount: float) -> None:
         """
         EXACT VBA AddReinvestment() method implementation
@@ -501,248 +506,143 @@ class Reinvest:
         This is the core reinvestment modeling method that projects cash flows
         for a reinvestment amount using prepayment/default/severity assumptions.
         
-        The method implements exact VBA logic including:
+        The VBA period loop is evaluated as vector operations over the
+        reinvestment term, with the same results:
         - Array handling for prepayment/default/severity vectors
-        - Period-by-period cash flow calculations
-        - Recovery lag modeling
+        - Balance rollforward as a cumulative survival product
+        - Recovery lag modeling as a shift of the default vectors
         - Interest rate calculations with floors
-        - Balance rollforward logic
+        - Early exit at the end of the deal schedule or a zero balance
         """
         if not self._is_setup or not self.deal_cf or not self.reinvest_info:
             raise RuntimeError("Reinvest must be setup before adding reinvestment")
         
-        # VBA variable declarations - exact names
-        l_beg_bal = 0.0                    # VBA: lBegBal
-        l_default_bal = 0.0                # VBA: lDefaultBal
-        l_mv_default_bal = 0.0             # VBA: lMVDefaultBal
-        l_end_default_bal = 0.0            # VBA: lEndDefaultBal
-        l_end_mv_default_bal = 0.0         # VBA: lEndMVDefaultBal
-        l_default = 0.0                    # VBA: lDefault
-        l_mv_default = 0.0                 # VBA: lMVDefault
-        l_interest = 0.0                   # VBA: lInterest
-        l_sched_prin = 0.0                 # VBA: lSchedprin
-        l_unsched_prin = 0.0               # VBA: lUnschedprin
-        l_recoveries = 0.0                 # VBA: lRecoveries
-        l_net_loss = 0.0                   # VBA: lNetLoss
-        l_end_bal = 0.0                    # VBA: lEndBal
-        l_num_of_payments = 0              # VBA: lNumofPayments
-        l_period_lag = 0                   # VBA: lPeriodLag
-        l_coupon = 0.0                     # VBA: lCoupon
-        l_libor_rate = 0.0                 # VBA: lLIborRate
-        l_sold = 0.0                       # VBA: lSold
-        l_period_prepay = 0.0              # VBA: lPeriodPrepay
-        l_period_default = 0.0             # VBA: lPeriodDefault
-        l_period_sev = 0.0                 # VBA: lPeriodSev
+        info = self.reinvest_info
         
         # VBA: lNumofPayments = clsReinvestInfo.Maturity / clsMoBetPay
-        l_num_of_payments = self.reinvest_info.Maturity // self.months_between_payments
-        
+        l_num_of_payments = info.Maturity // self.months_between_payments
         # VBA: lPeriodLag = clsReinvestInfo.Lag / clsMoBetPay
-        l_period_lag = self.reinvest_info.Lag // self.months_between_payments
+        l_period_lag = info.Lag // self.months_between_payments
+        
+        # VBA: If clsPeriod + i + 1 > clsDealCF.Count ... Then Exit For
+        n = min(l_num_of_payments, max(1, self.deal_cf.Count - self.period))
+        if n <= 0:
+            return
+        
+        # Period rates from the payment dates clsPeriod .. clsPeriod + n
+        years, fractions = self._period_fractions(self.period, n)
+        period_prepay = self._assumption_vector(info.Prepayment, n) * years
+        period_default = self._assumption_vector(info.Default, n) * years
+        period_sev = self._assumption_vector(info.Severity, n)
+        
+        # VBA: If i = lNumofPayments Then lSchedprin = (lBegBal - lDefault)
+        # Every balance left after the final period's defaults is scheduled principal
+        final = n == l_num_of_payments
+        survival = (1 - period_default) * (1 - period_prepay)
+        if final:
+            survival[-1] = 0.0
+        
+        # VBA: lBegBal = iAmount / clsReinvestInfo.ReinvestPrice, then lBegBal = lEndBal
+        l_beg_bal = (i_amount / info.ReinvestPrice) * np.concatenate(([1.0], np.cumprod(survival[:-1])))
+        l_default = l_beg_bal * period_default
+        l_sched_prin = np.zeros(n)
+        if final:
+            l_sched_prin[-1] = l_beg_bal[-1] - l_default[-1]
+        l_unsched_prin = (l_beg_bal - l_default - l_sched_prin) * period_prepay
+        l_end_bal = l_beg_bal - l_default - l_sched_prin - l_unsched_prin
+        
+        # VBA: ... Or lEndBal = 0 Then Exit For
+        paid_down = np.flatnonzero(l_end_bal[:-1] == 0)
+        if len(paid_down):
+            n = paid_down[0] + 1
+            final = False
+            l_beg_bal, l_default = l_beg_bal[:n], l_default[:n]
+            l_sched_prin, l_unsched_prin = l_sched_prin[:n], l_unsched_prin[:n]
+            period_sev, years, fractions = period_sev[:n], years[:n], fractions[:n]
+        
+        # VBA: lMVDefault = lDefault * (1 - lPeriodSev)
+        l_mv_default = l_default * (1 - period_sev)
+        
+        # VBA: lLIborRate = clsYieldCurve.SpotRate(clsDealCF.PaymentDate(clsPeriod + i - 1), clsMoBetPay)
+        if self.yield_curve:
+            l_libor_rate = np.array([
+                self.yield_curve.spot_rate(self.deal_cf.PaymentDate(self.period + i), self.months_between_payments)
+                for i in range(n)
+            ], dtype=float)
+        else:
+            l_libor_rate = np.full(n, 0.05)  # Default 5% if no yield curve
+        
+        # VBA: If lLIborRate > clsReinvestInfo.Floor Then lCoupon = lLIborRate + Spread Else Spread + Floor
+        l_coupon = np.where(l_libor_rate > info.Floor, l_libor_rate + info.Spread, info.Spread + info.Floor)
+        # VBA: lInterest = DateFraction(..., US30_360) * lCoupon * (lBegBal - lDefault)
+        l_interest = fractions * l_coupon * (l_beg_bal - l_default)
+        
+        # VBA: If i - lPeriodLag > 0 Then lRecoveries = lMVDefaultArr(i - lPeriodLag)
+        l_recoveries = np.zeros(n)
+        l_net_loss = np.zeros(n)
+        if 0 <= l_period_lag < n:
+            l_recoveries[l_period_lag:] = l_mv_default[:n - l_period_lag]
+            l_net_loss[l_period_lag:] = l_default[:n - l_period_lag] - l_mv_default[:n - l_period_lag]
+        
+        # VBA: lEndDefaultBal = lDefaultBal + lDefault - lRecoveries - lNetLoss
+        # VBA: lEndMVDefaultBal = lMVDefaultBal + lMVDefault - lRecoveries
+        l_end_default_bal = np.cumsum(l_default - l_recoveries - l_net_loss)
+        l_end_mv_default_bal = np.cumsum(l_mv_default - l_recoveries)
+        l_default_bal = np.concatenate(([0.0], l_end_default_bal[:-1]))
+        l_mv_default_bal = np.concatenate(([0.0], l_end_mv_default_bal[:-1]))
+        
+        if final:
+            # VBA: lNetLoss = lNetLoss + lEndDefaultBal
+            l_net_loss[-1] += l_end_default_bal[-1]
+            # VBA: If clsLastperiod < i + clsPeriod Then clsLastperiod = i + clsPeriod
+            self.last_period = max(self.last_period, n + self.period)
+        
+        # VBA: clsDealCF.<Field>(clsPeriod + i) = clsDealCF.<Field>(clsPeriod + i) + l<Field>
+        # (lSold is never set by AddReinvestment)
+        self.deal_cf.amounts[self.REINVESTMENT_ROWS, self.period + 1:self.period + n + 1] += np.vstack([
+            l_beg_bal, l_mv_default_bal, l_default_bal, l_default, l_mv_default,
+            l_interest, l_sched_prin, l_unsched_prin, l_recoveries, l_net_loss
+        ])
+    
+    def _assumption_vector(self, assumption: Union[float, List[float]], n: int) -> np.ndarray:
+        """
+        Per-period values of a prepayment/default/severity assumption
         
-        # VBA: ReDim lDefaultArr(lNumofPayments)
-        # VBA: ReDim lMVDefaultArr(lNumofPayments)
-        l_default_arr = [0.0] * (l_num_of_payments + 1)    # VBA: lDefaultArr
-        l_mv_default_arr = [0.0] * (l_num_of_payments + 1) # VBA: lMVDefaultArr
+        VBA: If IsArray(...) Then take element i, or the last element once i
+        passes UBound; otherwise the scalar applies to every period.
+        """
+        if isinstance(assumption, list):
+            vector = np.asarray(assumption[:n], dtype=float)
+            if len(vector) < n:
+                vector = np.concatenate((vector, np.full(n - len(vector), float(assumption[-1]))))
+            return vector
+        return np.full(n, float(assumption))
+    
+    def _period_fractions(self, start_period: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Year fractions for the n periods after start_period
         
-        # VBA: lBegBal = iAmount / clsReinvestInfo.ReinvestPrice
-        l_beg_bal = i_amount / self.reinvest_info.ReinvestPrice
+        Vector form of the year fraction in _convert_annual_rates (actual/365.25)
+        and of _date_fraction_us30_360, both zero where a date is missing or
+        the period is empty.
         
-        # VBA: For i = 1 To lNumofPayments
-        for i in range(1, l_num_of_payments + 1):
-            
-            # VBA prepayment rate handling - exact logic
-            # VBA: If IsArray(clsReinvestInfo.Prepayment) Then
-            if isinstance(self.reinvest_info.Prepayment, list):
-                # VBA: If UBound(clsReinvestInfo.Prepayment) < i Then
-                if len(self.reinvest_info.Prepayment) < i:
-                    # VBA: lPeriodPrepay = UBound(clsReinvestInfo.Prepayment)
-                    l_period_prepay = self.reinvest_info.Prepayment[-1]  # Last element
-                else:
-                    # VBA: lPeriodPrepay = clsReinvestInfo.Prepayment(i)
-                    l_period_prepay = self.reinvest_info.Prepayment[i-1]  # Adjust for 0-based indexing
-            else:
-                # VBA: lPeriodPrepay = clsReinvestInfo.Prepayment
-                l_period_prepay = self.reinvest_info.Prepayment
-            
-            # VBA default rate handling - exact logic
-            # VBA: If IsArray(clsReinvestInfo.Default) Then
-            if isinstance(self.reinvest_info.Default, list):
-                # VBA: If UBound(clsReinvestInfo.Default) < i Then
-                if len(self.reinvest_info.Default) < i:
-                    # VBA: lPeriodDefault = UBound(clsReinvestInfo.Default)
-                    l_period_default = self.reinvest_info.Default[-1]  # Last element
-                else:
-                    # VBA: lPeriodDefault = clsReinvestInfo.Default(i)
-                    l_period_default = self.reinvest_info.Default[i-1]  # Adjust for 0-based indexing
-            else:
-                # VBA: lPeriodDefault = clsReinvestInfo.Default
-                l_period_default = self.reinvest_info.Default
-            
-            # VBA severity handling - exact logic
-            # VBA: If IsArray(clsReinvestInfo.Severity) Then
-            if isinstance(self.reinvest_info.Severity, list):
-                # VBA: If UBound(clsReinvestInfo.Severity) < i Then
-                if len(self.reinvest_info.Severity) < i:
-                    # VBA: lPeriodSev = UBound(clsReinvestInfo.Severity)
-                    l_period_sev = self.reinvest_info.Severity[-1]  # Last element
-                else:
-                    # VBA: lPeriodSev = clsReinvestInfo.Severity(i)
-                    l_period_sev = self.reinvest_info.Severity[i-1]  # Adjust for 0-based indexing
-            else:
-                # VBA: lPeriodSev = clsReinvestInfo.Severity
-                l_period_sev = self.reinvest_info.Severity
-            
-            # VBA default calculation - exact implementation
-            # VBA: lDefault = lBegBal * ConvertAnnualRates(lPeriodDefault, clsDealCF.PaymentDate(clsPeriod + i - 1), clsDealCF.PaymentDate(clsPeriod + i))
-            start_date = self.deal_cf.PaymentDate(self.period + i - 1)
-            end_date = self.deal_cf.PaymentDate(self.period + i)
-            period_default_rate = self._convert_annual_rates(l_period_default, start_date, end_date)
-            l_default = l_beg_bal * period_default_rate
-            l_default_arr[i] = l_default
-            
-            # VBA: lMVDefault = lDefault * (1 - lPeriodSev)
-            l_mv_default = l_default * (1 - l_period_sev)
-            l_mv_default_arr[i] = l_mv_default
-            
-            # VBA yield curve integration - exact implementation
-            # VBA: lLIborRate = clsYieldCurve.SpotRate(clsDealCF.PaymentDate(clsPeriod + i - 1), clsMoBetPay)
-            if self.yield_curve:
-                l_libor_rate = self.yield_curve.spot_rate(start_date, self.months_between_payments)
-            else:
-                l_libor_rate = 0.05  # Default 5% if no yield curve
-            
-            # VBA floor and spread logic - exact implementation
-            # VBA: If lLIborRate > clsReinvestInfo.Floor Then
-            if l_libor_rate > self.reinvest_info.Floor:
-                # VBA: lCoupon = lLIborRate + clsReinvestInfo.Spread
-                l_coupon = l_libor_rate + self.reinvest_info.Spread
-            else:
-                # VBA: lCoupon = clsReinvestInfo.Spread + clsReinvestInfo.Floor
-                l_coupon = self.reinvest_info.Spread + self.reinvest_info.Floor
-            
-            # VBA interest calculation - exact implementation
-            # VBA: lInterest = DateFraction(clsDealCF.PaymentDate(clsPeriod + i - 1), clsDealCF.PaymentDate(clsPeriod + i), US30_360) * lCoupon * (lBegBal - lDefault)
-            day_count_fraction = self._date_fraction_us30_360(start_date, end_date)
-            l_interest = day_count_fraction * l_coupon * (l_beg_bal - l_default)
-            
-            # VBA scheduled principal logic - exact implementation
-            # VBA: If i = lNumofPayments Then
-            if i == l_num_of_payments:
-                # VBA: lSchedprin = (lBegBal - lDefault)
-                l_sched_prin = l_beg_bal - l_default
-            else:
-                l_sched_prin = 0.0
-            
-            # VBA unscheduled principal calculation - exact implementation  
-            # VBA: lUnschedprin = (lBegBal - lDefault - lSchedprin) * ConvertAnnualRates(lPeriodPrepay, clsDealCF.PaymentDate(clsPeriod + i - 1), clsDealCF.PaymentDate(clsPeriod + i))
-            period_prepay_rate = self._convert_annual_rates(l_period_prepay, start_date, end_date)
-            l_unsched_prin = (l_beg_bal - l_default - l_sched_prin) * period_prepay_rate
-            
-            # VBA recovery logic with lag - exact implementation
-            # VBA: If i - lPeriodLag > 0 Then
-            if i - l_period_lag > 0:
-                # VBA: lRecoveries = lMVDefaultArr(i - lPeriodLag)
-                l_recoveries = l_mv_default_arr[i - l_period_lag]
-                # VBA: lNetLoss = lDefaultArr(i - lPeriodLag) - lMVDefaultArr(i - lPeriodLag)
-                l_net_loss = l_default_arr[i - l_period_lag] - l_mv_default_arr[i - l_period_lag]
-            else:
-                l_recoveries = 0.0
-                l_net_loss = 0.0
-            
-            # VBA ending balance calculations - exact implementation
-            # VBA: lEndBal = lBegBal - lDefault - lSchedprin - lUnschedprin
-            l_end_bal = l_beg_bal - l_default - l_sched_prin - l_unsched_prin
-            
-            # VBA: lEndDefaultBal = lDefaultBal + lDefault - lRecoveries - lNetLoss
-            l_end_default_bal = l_default_bal + l_default - l_recoveries - l_net_loss
-            
-            # VBA: lEndMVDefaultBal = lMVDefaultBal + lMVDefault - lRecoveries
-            l_end_mv_default_bal = l_mv_default_bal + l_mv_default - l_recoveries
-            
-            # VBA final period logic - exact implementation
-            # VBA: If i = lNumofPayments Then
-            if i == l_num_of_payments:
-                # VBA: lNetLoss = lNetLoss + lEndDefaultBal
-                l_net_loss = l_net_loss + l_end_default_bal
-                # VBA: lEndDefaultBal = 0
-                l_end_default_bal = 0
-                # VBA: lEndMVDefaultBal = 0
-                l_end_mv_default_bal = 0
-                # VBA: If clsLastperiod < i + clsPeriod Then clsLastperiod = i + clsPeriod
-                if self.last_period < i + self.period:
-                    self.last_period = i + self.period
-            
-            # VBA cash flow aggregation - exact implementation
-            period_index = self.period + i
-            
-            # VBA: clsDealCF.BegBalance(clsPeriod + i) = clsDealCF.BegBalance(clsPeriod + i) + lBegBal
-            current_beg_bal = self.deal_cf.BegBalance(period_index)
-            self.deal_cf.BegBalance(period_index, current_beg_bal + Decimal(str(l_beg_bal)))
-            
-            # VBA: clsDealCF.MVDefaultBal(clsPeriod + i) = clsDealCF.MVDefaultBal(clsPeriod + i) + lMVDefaultBal
-            current_mv_default_bal = self.deal_cf.MVDefaultBal(period_index)
-            self.deal_cf.MVDefaultBal(period_index, current_mv_default_bal + Decimal(str(l_mv_default_bal)))
-            
-            # VBA: clsDealCF.DefaultBal(clsPeriod + i) = clsDealCF.DefaultBal(clsPeriod + i) + lDefaultBal
-            current_default_bal = self.deal_cf.DefaultBal(period_index)
-            self.deal_cf.DefaultBal(period_index, current_default_bal + Decimal(str(l_default_bal)))
-            
-            # VBA: clsDealCF.Default(clsPeriod + i) = clsDealCF.Default(clsPeriod + i) + lDefault
-            current_default = self.deal_cf.Default(period_index)
-            self.deal_cf.Default(period_index, current_default + Decimal(str(l_default)))
-            
-            # VBA: clsDealCF.MVDefault(clsPeriod + i) = clsDealCF.MVDefault(clsPeriod + i) + lMVDefault
-            current_mv_default = self.deal_cf.MVDefault(period_index)
-            self.deal_cf.MVDefault(period_index, current_mv_default + Decimal(str(l_mv_default)))
-            
-            # VBA: clsDealCF.Interest(clsPeriod + i) = clsDealCF.Interest(clsPeriod + i) + lInterest
-            current_interest = self.deal_cf.Interest(period_index)
-            self.deal_cf.Interest(period_index, current_interest + Decimal(str(l_interest)))
-            
-            # VBA: clsDealCF.SchedPrincipal(clsPeriod + i) = clsDealCF.SchedPrincipal(clsPeriod + i) + lSchedprin
-            current_sched_prin = self.deal_cf.SchedPrincipal(period_index)
-            self.deal_cf.SchedPrincipal(period_index, current_sched_prin + Decimal(str(l_sched_prin)))
-            
-            # VBA: clsDealCF.UnSchedPrincipal(clsPeriod + i) = clsDealCF.UnSchedPrincipal(clsPeriod + i) + lUnschedprin
-            current_unsched_prin = self.deal_cf.UnSchedPrincipal(period_index)
-            self.deal_cf.UnSchedPrincipal(period_index, current_unsched_prin + Decimal(str(l_unsched_prin)))
-            
-            # VBA: clsDealCF.Recoveries(clsPeriod + i) = clsDealCF.Recoveries(clsPeriod + i) + lRecoveries
-            current_recoveries = self.deal_cf.Recoveries(period_index)
-            self.deal_cf.Recoveries(period_index, current_recoveries + Decimal(str(l_recoveries)))
-            
-            # VBA: clsDealCF.Netloss(clsPeriod + i) = clsDealCF.Netloss(clsPeriod + i) + lNetLoss
-            current_net_loss = self.deal_cf.Netloss(period_index)
-            self.deal_cf.Netloss(period_index, current_net_loss + Decimal(str(l_net_loss)))
-            
-            # VBA: clsDealCF.Sold(clsPeriod + i) = clsDealCF.Sold(clsPeriod + i) + lSold
-            current_sold = self.deal_cf.Sold(period_index)
-            self.deal_cf.Sold(period_index, current_sold + Decimal(str(l_sold)))
-            
-            # VBA balance rollforward - exact implementation
-            # VBA: lBegBal = lEndBal
-            l_beg_bal = l_end_bal
-            # VBA: lDefaultBal = lEndDefaultBal
-            l_default_bal = l_end_default_bal
-            # VBA: lMVDefaultBal = lEndMVDefaultBal
-            l_mv_default_bal = l_end_mv_default_bal
-            
-            # VBA variable reset - exact implementation
-            l_default = 0.0
-            l_mv_default = 0.0
-            l_interest = 0.0
-            l_sched_prin = 0.0
-            l_unsched_prin = 0.0
-            l_recoveries = 0.0
-            l_net_loss = 0.0
-            l_sold = 0.0
-            
-            # VBA exit condition - exact implementation
-            # VBA: If clsPeriod + i + 1 > clsDealCF.Count Or lEndBal = 0 Then
-            if self.period + i + 1 > self.deal_cf.Count or l_end_bal == 0:
-                # VBA: Exit For
-                break
+        Returns:
+            Tuple of (actual/365.25 fractions, US 30/360 fractions)
+        """
+        parts = self.deal_cf.payment_date_parts[:, start_period:start_period + n + 1]
+        if parts.shape[1] < n + 1:
+            parts = np.pad(parts, ((0, 0), (0, n + 1 - parts.shape[1])))
+        ordinal, year, month, day = parts
+        valid = (ordinal[:-1] > 0) & (ordinal[1:] > ordinal[:-1])
+        
+        years = np.where(valid, (ordinal[1:] - ordinal[:-1]) / 365.25, 0.0)
+        
+        d1 = np.where(day[:-1] == 31, 30, day[:-1])
+        d2 = np.where((day[1:] == 31) & (d1 >= 30), 30, day[1:])
+        days = (year[1:] - year[:-1]) * 360 + (month[1:] - month[:-1]) * 30 + (d2 - d1)
+        fractions = np.where(valid, days / 360.0, 0.0)
+        
+        return years, fractions
     
     def get_proceeds(self, i_proceeds: str) -> float:
         """
@@ -752,18 +652,17 @@ class Reinvest:
         Returns proceeds for current period by type
         """
         l_numerator = 0.0  # VBA: lNumerator
+        if self.period >= self.deal_cf.amounts.shape[1]:
+            return l_numerator
         
         # VBA: If iProceeds = "INTEREST" Then
         if i_proceeds == "INTEREST":
             # VBA: lNumerator = lNumerator + clsDealCF.Interest(clsPeriod)
-            l_numerator = l_numerator + float(self.deal_cf.Interest(self.period))
+            l_numerator = l_numerator + float(self.deal_cf.column('interest')[self.period])
         # VBA: ElseIf iProceeds = "PRINCIPAL" Then
         elif i_proceeds == "PRINCIPAL":
             # VBA: lNumerator = lNumerator + clsDealCF.SchedPrincipal(clsPeriod) + clsDealCF.UnSchedPrincipal(clsPeriod) + clsDealCF.Recoveries(clsPeriod)
-            l_numerator = (l_numerator + 
-                          float(self.deal_cf.SchedPrincipal(self.period)) + 
-                          float(self.deal_cf.UnSchedPrincipal(self.period)) + 
-                          float(self.deal_cf.Recoveries(self.period)))
+            l_numerator = l_numerator + float(self.deal_cf.amounts[self.PRINCIPAL_PROCEEDS_ROWS, self.period].sum())
         
         # VBA: GetProceeds = lNumerator
         return l_numerator
@@ -804,21 +703,7 @@ class Reinvest:
         l_output.append(header)
         
         # VBA: For i = 1 To clsLastperiod
-        for i in range(1, self.last_period + 1):
-            row = [
-                float(self.deal_cf.BegBalance(i)),        # VBA: lOutput(i, 0)
-                float(self.deal_cf.DefaultBal(i)),        # VBA: lOutput(i, 1)
-                float(self.deal_cf.MVDefaultBal(i)),      # VBA: lOutput(i, 2)
-                float(self.deal_cf.Default(i)),           # VBA: lOutput(i, 3)
-                float(self.deal_cf.MVDefault(i)),         # VBA: lOutput(i, 4)
-                float(self.deal_cf.Interest(i)),          # VBA: lOutput(i, 5)
-                float(self.deal_cf.SchedPrincipal(i)),    # VBA: lOutput(i, 6)
-                float(self.deal_cf.UnSchedPrincipal(i)),  # VBA: lOutput(i, 7)
-                float(self.deal_cf.Recoveries(i)),        # VBA: lOutput(i, 8)
-                float(self.deal_cf.Netloss(i)),           # VBA: lOutput(i, 9)
-                float(self.deal_cf.Sold(i))               # VBA: lOutput(i, 10)
-            ]
-            l_output.append(row)
+        l_output.extend(self.deal_cf.amounts[self.COLLAT_CF_ROWS, 1:self.last_period + 1].T.tolist())
         
         # VBA: GetCollatCF = lOutput
         return l_output
@@ -1011,6 +896,186 @@ class Reinvest:
         return period_model.reinvest_id
 
 
+class ReinvestmentBook:
+    """
+    Aggregated reinvestment cash flows for a deal
+    
+    Every reinvestment (vintage) is one row of a (vintage x deal period)
+    array per SimpleCashflow field, shifted so that column t holds the
+    vintage's cash flows for deal period t. Each vintage keeps its own
+    current column, the equivalent of its Reinvest clsPeriod, so period
+    proceeds, rollforward and liquidation are evaluated for all vintages
+    at once instead of per Reinvest object.
+    """
+    
+    PROCEEDS_FIELDS = ('interest', 'sched_principal', 'unsched_principal', 'recoveries')
+    
+    def __init__(self, num_periods: int = 0, vintage_capacity: int = 8):
+        """
+        Initialize an empty book
+        
+        Args:
+            num_periods: Initial number of deal period columns (grown as needed)
+            vintage_capacity: Initial number of vintage rows (doubled when full)
+        """
+        self.amounts = np.zeros((len(SimpleCashflow.AMOUNT_FIELDS), vintage_capacity, num_periods + 1))
+        self.vintage_periods = np.zeros(vintage_capacity, dtype=np.int64)   # Deal period of each vintage
+        self.current_columns = np.zeros(vintage_capacity, dtype=np.int64)   # Deal period of each clsPeriod
+        self.last_periods = np.zeros(vintage_capacity, dtype=np.int64)      # Each vintage's clsLastperiod
+        self.vintage_rows: Dict[int, int] = {}                              # Deal period -> vintage row
+        self.count = 0
+    
+    def field(self, name: str) -> np.ndarray:
+        """(vintage x deal period) array for one SimpleCashflow field"""
+        return self.amounts[SimpleCashflow.FIELD_INDEX[name], :self.count]
+    
+    def add_vintage(self, period: int, reinvest: Reinvest) -> int:
+        """
+        Add the projected cash flows of a reinvestment made in a deal period
+        
+        A second reinvestment for the same period replaces the first, as
+        CLODealEngine.reinvestment_periods does.
+        
+        Args:
+            period: Deal period the reinvestment is made in
+            reinvest: Reinvest object after add_reinvestment
+            
+        Returns:
+            Vintage row index
+        """
+        flows = reinvest.deal_cf.amounts
+        row = self.vintage_rows.get(period)
+        if row is None:
+            row = self.count
+            self.count += 1
+        self._reserve(self.count, period + flows.shape[1])
+        
+        self.amounts[:, row] = 0.0
+        self.amounts[:, row, period:period + flows.shape[1]] = flows
+        self.vintage_periods[row] = period
+        self.current_columns[row] = period + reinvest.period
+        self.last_periods[row] = reinvest.last_period
+        self.vintage_rows[period] = row
+        return row
+    
+    def proceeds(self, period: Optional[int] = None) -> Dict[str, float]:
+        """
+        Interest and principal proceeds summed over vintages at their current period
+        
+        Equivalent to calling Reinvest.get_proceeds on every vintage.
+        
+        Args:
+            period: Only include vintages made in or before this deal period
+            
+        Returns:
+            Dictionary with "INTEREST" and "PRINCIPAL" proceeds
+        """
+        interest, sched, unsched, recoveries = self._current_values(self.PROCEEDS_FIELDS, self._active(period))
+        return {
+            "INTEREST": float(interest.sum()),
+            "PRINCIPAL": float((sched + unsched + recoveries).sum())
+        }
+    
+    def roll_forward(self, period: Optional[int] = None) -> None:
+        """Advance the vintages made in or before period (VBA Rollfoward)"""
+        self.current_columns[:self.count][self._active(period)] += 1
+    
+    def liquidate(self, liquidation_price: float) -> float:
+        """
+        Liquidate every vintage at its current period
+        
+        Vector form of Reinvest.liquidate: performing balances are sold at
+        the liquidation price, defaulted positions at market value, and all
+        later cash flows are removed.
+        
+        Returns:
+            Total sale proceeds
+        """
+        if self.count == 0:
+            return 0.0
+        
+        active = np.ones(self.count, dtype=bool)
+        (beg_balance, default, unsched, sched, default_bal, recoveries, net_loss,
+         mv_default_bal, mv_default) = self._current_values(
+            ('beg_balance', 'default', 'unsched_principal', 'sched_principal', 'default_bal',
+             'recoveries', 'net_loss', 'mv_default_bal', 'mv_default'), active)
+        
+        end_bal = beg_balance - default - unsched - sched
+        end_default_bal = default_bal + default - recoveries - net_loss
+        end_mv_default_bal = mv_default_bal + mv_default - recoveries
+        
+        sold = end_bal * liquidation_price + end_mv_default_bal
+        loss = (1 - liquidation_price) * end_bal + (end_default_bal - end_mv_default_bal)
+        
+        # Zero every field except Sold after each vintage's current period
+        columns = self.current_columns[:self.count]
+        self._reserve(self.count, int(columns.max()) + 1)
+        future = np.arange(self.amounts.shape[2])[None, :] > columns[:, None]
+        for name in SimpleCashflow.AMOUNT_FIELDS:
+            if name != 'sold':
+                self.field(name)[future] = 0.0
+        
+        rows = np.arange(self.count)
+        self.field('net_loss')[rows, columns] += loss
+        self.field('sold')[rows, columns] += sold
+        self.last_periods[:self.count] = columns - self.vintage_periods[:self.count]
+        
+        return float(sold.sum())
+    
+    def current_balances(self) -> Dict[str, np.ndarray]:
+        """
+        Per-vintage balances for the next period
+        
+        Vector form of Reinvest.prin_ball_ex_defaults, prin_ball_defaults and mv_defaults.
+        """
+        active = np.ones(self.count, dtype=bool)
+        performing, defaults, mv_defaults = self._current_values(
+            ('beg_balance', 'default_bal', 'mv_default_bal'), active, offset=1)
+        return {'performing': performing, 'defaults': defaults, 'mv_defaults': mv_defaults}
+    
+    def reinvested_amounts(self) -> np.ndarray:
+        """Per-vintage sum of beginning performing balances through each vintage's last period"""
+        columns = np.arange(self.amounts.shape[2])[None, :]
+        start = self.vintage_periods[:self.count, None]
+        window = (columns > start) & (columns <= start + self.last_periods[:self.count, None])
+        return (self.field('beg_balance') * window).sum(axis=1)
+    
+    def _active(self, period: Optional[int]) -> np.ndarray:
+        """Mask of vintages made in or before period (all vintages if None)"""
+        if period is None:
+            return np.ones(self.count, dtype=bool)
+        return self.vintage_periods[:self.count] <= period
+    
+    def _current_values(self, fields: Tuple[str, ...], active: np.ndarray, offset: int = 0) -> np.ndarray:
+        """(field x vintage) values at each active vintage's current column + offset"""
+        rows = np.flatnonzero(active)
+        columns = self.current_columns[rows] + offset
+        inside = columns < self.amounts.shape[2]
+        values = np.zeros((len(fields), len(rows)))
+        values[:, inside] = self.amounts[np.array(SimpleCashflow.rows(*fields))[:, None],
+                                         rows[inside][None, :], columns[inside][None, :]]
+        return values
+    
+    def _reserve(self, vintages: int, periods: int) -> None:
+        """Grow the arrays to hold at least this many vintages and period columns"""
+        capacity, columns = self.amounts.shape[1], self.amounts.shape[2]
+        if vintages <= capacity and periods <= columns:
+            return
+        
+        new_capacity = max(capacity, 1)
+        while new_capacity < vintages:
+            new_capacity *= 2
+        new_columns = max(columns, periods)
+        
+        amounts = np.zeros((self.amounts.shape[0], new_capacity, new_columns))
+        amounts[:, :capacity, :columns] = self.amounts
+        self.amounts = amounts
+        for name in ('vintage_periods', 'current_columns', 'last_periods'):
+            grown = np.zeros(new_capacity, dtype=np.int64)
+            grown[:capacity] = getattr(self, name)
+            setattr(self, name, grown)
+
+
 class ReinvestmentService:
     """Service class for reinvestment operations"""
     
@@ -80,7 +80,7 @@ class TriggerAwareWaterfallStrategy(DynamicWaterfallStrategy):
             'total_ic_cure_needed': float(self.current_trigger_results.total_ic_cure_needed)
         }
         
-        # Save trigger results to database
+        # Save trigger results to database (deferred to end_run in a run-scoped service)
         self.trigger_service.save_trigger_results_to_db(self.deal_id, period)
         
         # Rollforward triggers for next period
@@ -3,7 +3,7 @@ CLO Waterfall Logic - Payment Priority and Distribution Rules
 Converts VBA waterfall calculations to Python with sophisticated payment sequencing
 """
 
-from sqlalchemy import Column, String, Integer, Numeric, Date, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Numeric, Date, Boolean, DateTime, ForeignKey, Text, insert
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import date, datetime
@@ -178,24 +178,108 @@ class WaterfallPayment(Base):
     execution = relationship("WaterfallExecution", back_populates="payments")
 
 
+class WaterfallLedger:
+    """
+    Columnar in-memory record of waterfall payments
+    
+    Used by WaterfallCalculator in in-memory mode so scenario and projection
+    runs do not create a WaterfallPayment object per step. Each column is a
+    plain list; amounts stay Decimal. Rows are only turned into ORM payments
+    when an execution is persisted. execution is the run the rows belong to.
+    """
+    
+    AMOUNT_COLUMNS = ('amount_due', 'amount_paid', 'amount_deferred')
+    TEXT_COLUMNS = ('payment_step', 'target_tranche_id', 'target_account', 'payment_notes')
+    
+    def __init__(self):
+        self.execution: Optional["WaterfallExecution"] = None
+        self._columns: Dict[str, List[Any]] = {name: [] for name in self.TEXT_COLUMNS + self.AMOUNT_COLUMNS}
+    
+    def __len__(self) -> int:
+        return len(self._columns['payment_step'])
+    
+    def record(self, step: str, amount_due: Decimal, amount_paid: Decimal, amount_deferred: Decimal,
+               target_tranche_id: Optional[str] = None, target_account: Optional[str] = None,
+               notes: Optional[str] = None) -> None:
+        """Append one payment row"""
+        columns = self._columns
+        columns['payment_step'].append(getattr(step, 'value', step))
+        columns['target_tranche_id'].append(target_tranche_id)
+        columns['target_account'].append(target_account)
+        columns['payment_notes'].append(notes)
+        columns['amount_due'].append(amount_due)
+        columns['amount_paid'].append(amount_paid)
+        columns['amount_deferred'].append(amount_deferred)
+    
+    def column(self, name: str) -> Tuple[Any, ...]:
+        """Recorded values of one column"""
+        return tuple(self._columns[name])
+    
+    def total(self, name: str) -> Decimal:
+        """Sum of an amount column"""
+        return sum(self._columns[name], Decimal('0'))
+    
+    def paid_by_step(self) -> Dict[str, Decimal]:
+        """Amount paid per payment step"""
+        paid: Dict[str, Decimal] = {}
+        for step, amount in zip(self._columns['payment_step'], self._columns['amount_paid']):
+            paid[step] = paid.get(step, Decimal('0')) + amount
+        return paid
+    
+    def to_rows(self, execution_id: Optional[int], priority_of) -> List[Dict[str, Any]]:
+        """Payment rows in step order, ready for a bulk insert"""
+        names = list(self._columns)
+        rows = []
+        for row, values in enumerate(zip(*self._columns.values())):
+            payment = dict(zip(names, values))
+            rows.append({
+                'execution_id': execution_id,
+                'step_sequence': row + 1,
+                'payment_priority': priority_of(payment['payment_step']),
+                **payment
+            })
+        return rows
+    
+    def start(self, execution: "WaterfallExecution") -> None:
+        """Drop all rows and record the payments of execution from now on"""
+        self.clear()
+        self.execution = execution
+    
+    def clear(self) -> None:
+        """Drop all rows"""
+        for values in self._columns.values():
+            values.clear()
+        self.execution = None
+
+
 class WaterfallCalculator:
     """
     Core waterfall calculation engine
     Processes payment priorities and distributes available cash
     """
     
-    def __init__(self, deal_id: str, payment_date: date, session):
+    def __init__(self, deal_id: str, payment_date: date, session, in_memory: bool = False):
+        """
+        Args:
+            in_memory: Record payments in a WaterfallLedger instead of ORM rows
+                and do not save executions; call persist_execution to save one
+        """
         self.deal_id = deal_id
         self.payment_date = payment_date
         self.session = session
         self.config = self._load_configuration()
         self.available_cash = Decimal('0')
         self.payments: List[Dict] = []
+        self.in_memory = in_memory
+        self.ledger: Optional[WaterfallLedger] = WaterfallLedger() if in_memory else None
         
     def execute_waterfall(self, collection_amount: Decimal, beginning_cash: Decimal = Decimal('0')) -> WaterfallExecution:
         """
         Execute complete waterfall for payment date
         Returns WaterfallExecution record with all payments
+        
+        In in-memory mode the payments are in self.ledger and the execution
+        is returned unsaved.
         """
         self.available_cash = collection_amount + beginning_cash
         total_available = self.available_cash
@@ -210,6 +294,8 @@ class WaterfallCalculator:
             total_available=total_available,
             execution_status='PENDING'
         )
+        if self.ledger is not None:
+            self.ledger.start(execution)
         
         try:
             # Execute waterfall steps in priority order
@@ -226,18 +312,44 @@ class WaterfallCalculator:
             execution.execution_status = 'COMPLETED'
             
             # Save to database
-            self.session.add(execution)
-            self.session.commit()
+            self._save_execution(execution)
             
             return execution
             
         except Exception as e:
             execution.execution_status = 'FAILED'
             execution.execution_notes = str(e)
-            self.session.add(execution)
-            self.session.commit()
+            self._save_execution(execution)
             raise
     
+    def persist_execution(self, execution: WaterfallExecution) -> WaterfallExecution:
+        """
+        Save an in-memory execution and bulk insert its ledger payments
+        
+        The execution is flushed for its id and the ledger rows are written
+        with one executemany INSERT, without creating WaterfallPayment objects.
+        Only the latest execution can be persisted: the ledger is refilled by
+        every run, so earlier executions no longer have their payments.
+        """
+        if self.ledger is not None and self.ledger.execution is not execution:
+            raise ValueError("Execution is not the latest run of this calculator; its ledger was replaced")
+        self.session.add(execution)
+        if self.ledger is not None and len(self.ledger):
+            self.session.flush()
+            self.session.execute(
+                insert(WaterfallPayment),
+                self.ledger.to_rows(execution.execution_id, self._get_payment_priority)
+            )
+        self.session.commit()
+        return execution
+    
+    def _save_execution(self, execution: WaterfallExecution) -> None:
+        """Save a finished execution unless running in memory"""
+        if self.in_memory:
+            return
+        self.session.add(execution)
+        self.session.commit()
+    
     def _process_senior_expenses(self, execution: WaterfallExecution):
         """Process senior fees and expenses (first priority)"""
         
@@ -438,6 +550,27 @@ class WaterfallCalculator:
         amount_paid = min(amount_due, self.available_cash)
         amount_deferred = amount_due - amount_paid
         
+        if self.ledger is not None:
+            self.ledger.record(step, amount_due, amount_paid, amount_deferred,
+                               target_tranche_id, target_account, notes)
+        else:
+            self._record_payment(execution, step, amount_due, amount_paid, amount_deferred,
+                                 target_tranche_id, target_account, notes)
+        
+        # Reduce available cash
+        self.available_cash -= amount_paid
+        
+        # Ensure no negative cash
+        if self.available_cash < 0:
+            self.available_cash = Decimal('0')
+    
+    def _record_payment(self, execution: WaterfallExecution, step: str, amount_due: Decimal,
+                        amount_paid: Decimal, amount_deferred: Decimal,
+                        target_tranche_id: Optional[str] = None,
+                        target_account: Optional[str] = None,
+                        notes: Optional[str] = None):
+        """Append a WaterfallPayment to the execution"""
+        
         # Create payment record
         payment = WaterfallPayment(
             execution_id=execution.execution_id,
@@ -453,32 +586,17 @@ class WaterfallCalculator:
         )
         
         execution.payments.append(payment)
-        
-        # Reduce available cash
-        self.available_cash -= amount_paid
-        
-        # Ensure no negative cash
-        if self.available_cash < 0:
-            self.available_cash = Decimal('0')
     
     def _defer_payment(self, execution: WaterfallExecution, step: str, amount_due: Decimal,
                       target_tranche_id: Optional[str] = None,
                       notes: Optional[str] = None):
         """Record deferred payment (no cash disbursed)"""
         
-        payment = WaterfallPayment(
-            execution_id=execution.execution_id,
-            payment_step=step,
-            step_sequence=len(execution.payments) + 1,
-            payment_priority=self._get_payment_priority(step),
-            amount_due=amount_due,
-            amount_paid=Decimal('0'),
-            amount_deferred=amount_due,
-            target_tranche_id=target_tranche_id,
-            payment_notes=notes
-        )
-        
-        execution.payments.append(payment)
+        if self.ledger is not None:
+            self.ledger.record(step, amount_due, Decimal('0'), amount_due, target_tranche_id, notes=notes)
+        else:
+            self._record_payment(execution, step, amount_due, Decimal('0'), amount_due,
+                                 target_tranche_id, notes=notes)
     
     def _calculate_trustee_fee(self) -> Decimal:
         """Calculate quarterly trustee fee"""
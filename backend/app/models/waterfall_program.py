@@ -0,0 +1,427 @@
+"""
+Compiled Waterfall Programs
+Flattens a deal's waterfall structure and tranche mappings into an immutable
+step program that is compiled once per effective-date window and shared
+process-wide, so per-period waterfall execution does not query mappings,
+structures or tranches again
+"""
+
+from typing import Dict, List, Optional, Tuple, Any, Mapping
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from enum import Enum
+from types import MappingProxyType
+import threading
+import weakref
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from ..core.config import settings
+from .waterfall import WaterfallStep
+from .clo_deal import CLOTranche
+from .dynamic_waterfall import TrancheMapping, WaterfallStructure, PaymentCategory, TrancheType
+
+
+class TriggerRef(str, Enum):
+    """Trigger check applied to a tranche payment"""
+    ALWAYS = "ALWAYS"                         # Pays unconditionally
+    NOT_IN_DEFAULT = "NOT_IN_DEFAULT"         # Blocked only when the deal is in default
+    DEFERRAL = "DEFERRAL"                     # Deferrable interest
+    COVERAGE_TESTS = "COVERAGE_TESTS"         # OC and IC tests must pass
+    SUBORDINATED_PRINCIPAL = "SUBORDINATED_PRINCIPAL"
+    BASE = "BASE"                             # Unmapped tranche, strategy default
+
+
+class AmountFormula(str, Enum):
+    """Payment amount calculation applied to a step"""
+    NON_TRANCHE = "NON_TRANCHE"   # Fees and reserves
+    INTEREST = "INTEREST"         # Tranche interest with category rules
+    PRINCIPAL = "PRINCIPAL"       # Tranche principal with category rules
+    ZERO = "ZERO"
+    BASE = "BASE"                 # Unmapped tranche, strategy default
+
+
+# Fixed steps emitted for non-tranche categories
+_CATEGORY_STEPS = {
+    PaymentCategory.EXPENSES.value: (WaterfallStep.TRUSTEE_FEES, WaterfallStep.ADMIN_FEES,
+                                     WaterfallStep.SENIOR_MGMT_FEES),
+    PaymentCategory.RESERVES.value: (WaterfallStep.INTEREST_RESERVE,),
+    PaymentCategory.MANAGEMENT_FEES.value: (WaterfallStep.JUNIOR_MGMT_FEES, WaterfallStep.INCENTIVE_MGMT_FEES),
+    PaymentCategory.RESIDUAL.value: (WaterfallStep.RESIDUAL_EQUITY,),
+}
+
+_INTEREST_CATEGORIES = (PaymentCategory.SENIOR_INTEREST.value, PaymentCategory.MEZZ_INTEREST.value,
+                        PaymentCategory.SUBORDINATED_INTEREST.value)
+_PRINCIPAL_CATEGORIES = (PaymentCategory.SENIOR_PRINCIPAL.value, PaymentCategory.MEZZ_PRINCIPAL.value,
+                         PaymentCategory.SUBORDINATED_PRINCIPAL.value)
+
+# Step class letters resolved to tranches, in BaseWaterfallStrategy._get_target_tranche order
+_CLASS_LETTERS = ('A', 'B', 'C', 'D', 'E')
+
+
+@dataclass(frozen=True)
+class CompiledMapping:
+    """Immutable snapshot of a tranche mapping with its resolved trigger and rules"""
+    tranche_id: str
+    tranche_type: str
+    payment_category: str
+    category_rank: int
+    interest_step: Optional[str]
+    principal_step: Optional[str]
+    is_deferrable: bool
+    is_pik_eligible: bool
+    supports_turbo: bool
+    trigger: TriggerRef
+    rules: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    """One instruction of a waterfall program"""
+    step: WaterfallStep
+    tranche_id: Optional[str]
+    trigger: TriggerRef
+    amount: AmountFormula
+
+
+@dataclass(frozen=True)
+class WaterfallProgram:
+    """
+    Flat step program for one deal and structure
+
+    Valid for payment dates in [valid_from, valid_to); None leaves that side
+    of the window open. Programs are shared between strategies and threads
+    and must not be modified.
+    """
+    deal_id: str
+    structure_name: str
+    valid_from: Optional[date]
+    valid_to: Optional[date]
+    steps: Tuple[CompiledStep, ...]
+    mappings: Mapping[str, CompiledMapping]
+    step_index: Mapping[WaterfallStep, CompiledStep]
+    structure_found: bool
+    has_income_notes: bool
+
+    @property
+    def sequence(self) -> List[WaterfallStep]:
+        """Payment steps in program order"""
+        return [op.step for op in self.steps]
+
+    def covers(self, payment_date: date) -> bool:
+        """Check whether payment_date falls inside the program's window"""
+        return ((self.valid_from is None or self.valid_from <= payment_date) and
+                (self.valid_to is None or payment_date < self.valid_to))
+
+
+def trigger_for_category(category: str, is_deferrable: bool) -> TriggerRef:
+    """Trigger check for a mapping's payment category"""
+    if category == PaymentCategory.SENIOR_INTEREST.value:
+        return TriggerRef.NOT_IN_DEFAULT
+    if category in (PaymentCategory.MEZZ_INTEREST.value, PaymentCategory.SUBORDINATED_INTEREST.value):
+        return TriggerRef.DEFERRAL if is_deferrable else TriggerRef.ALWAYS
+    if category in (PaymentCategory.SENIOR_PRINCIPAL.value, PaymentCategory.MEZZ_PRINCIPAL.value):
+        return TriggerRef.COVERAGE_TESTS
+    if category == PaymentCategory.SUBORDINATED_PRINCIPAL.value:
+        return TriggerRef.SUBORDINATED_PRINCIPAL
+    return TriggerRef.ALWAYS
+
+
+def amount_for_step(step: WaterfallStep, tranche_id: Optional[str],
+                    mapping: Optional[CompiledMapping]) -> AmountFormula:
+    """Amount formula for a step paying tranche_id"""
+    if tranche_id is None:
+        return AmountFormula.NON_TRANCHE
+    if mapping is None:
+        return AmountFormula.BASE
+    if 'INTEREST' in step.value:
+        return AmountFormula.INTEREST
+    if 'PRINCIPAL' in step.value:
+        return AmountFormula.PRINCIPAL
+    return AmountFormula.ZERO
+
+
+def _class_letter(step: WaterfallStep) -> Optional[str]:
+    """Tranche class paid by a step, if any"""
+    for letter in _CLASS_LETTERS:
+        if f'CLASS_{letter}' in step.value:
+            return letter
+    return None
+
+
+def _validity_window(mappings: List[TrancheMapping], payment_date: date) -> Tuple[Optional[date], Optional[date]]:
+    """Dates between which the set of active mappings does not change"""
+    starts, ends = [], []
+    for mapping in mappings:
+        if mapping.effective_date <= payment_date:
+            starts.append(mapping.effective_date)
+        else:
+            ends.append(mapping.effective_date)
+        if mapping.expiration_date is not None:
+            day_after = mapping.expiration_date + timedelta(days=1)
+            (starts if day_after <= payment_date else ends).append(day_after)
+    return max(starts, default=None), min(ends, default=None)
+
+
+def compile_waterfall_program(session: Session, deal_id: str, structure_name: str,
+                              payment_date: date) -> WaterfallProgram:
+    """
+    Compile the waterfall program in force for a deal on payment_date
+
+    Loads the structure, all of the deal's mappings and the deal's tranches
+    once, selects the mappings active on payment_date, expands the structure's
+    payment sequence into steps and resolves every class step to its tranche
+    the same way BaseWaterfallStrategy._get_target_tranche does.
+    """
+    structure = session.query(WaterfallStructure).filter_by(
+        structure_name=structure_name,
+        is_active=True
+    ).first()
+    all_mappings = session.query(TrancheMapping).filter(TrancheMapping.deal_id == deal_id).all()
+    tranche_names = session.query(CLOTranche.tranche_id, CLOTranche.tranche_name).filter(
+        CLOTranche.deal_id == deal_id
+    ).all()
+
+    active = [m for m in all_mappings
+              if m.effective_date <= payment_date and
+              (m.expiration_date is None or m.expiration_date >= payment_date)]
+    category_rules = structure.get_category_rules() if structure else {}
+
+    mappings: Dict[str, CompiledMapping] = {}
+    for mapping in active:
+        mappings[mapping.tranche_id] = CompiledMapping(
+            tranche_id=mapping.tranche_id,
+            tranche_type=mapping.tranche_type,
+            payment_category=mapping.payment_category,
+            category_rank=mapping.category_rank or 1,
+            interest_step=mapping.interest_step,
+            principal_step=mapping.principal_step,
+            is_deferrable=bool(mapping.is_deferrable),
+            is_pik_eligible=bool(mapping.is_pik_eligible),
+            supports_turbo=bool(mapping.supports_turbo),
+            trigger=trigger_for_category(mapping.payment_category, bool(mapping.is_deferrable)),
+            rules=MappingProxyType(dict(category_rules.get(mapping.payment_category, {})))
+        )
+
+    if structure:
+        sequence = []
+        for category in structure.get_payment_sequence():
+            sequence.extend(_steps_for_category(category, mappings))
+    else:
+        # Fallback to traditional sequence
+        from .waterfall_types import TraditionalWaterfall
+        sequence = list(TraditionalWaterfall.PAYMENT_SEQUENCE)
+
+    # First tranche of each class, matching ilike('%Class X%')
+    class_tranches: Dict[str, str] = {}
+    for tranche_id, tranche_name in tranche_names:
+        name = (tranche_name or '').lower()
+        for letter in _CLASS_LETTERS:
+            if letter not in class_tranches and f'class {letter.lower()}' in name:
+                class_tranches[letter] = tranche_id
+
+    steps = []
+    for step in sequence:
+        letter = _class_letter(step)
+        tranche_id = class_tranches.get(letter) if letter else None
+        mapping = mappings.get(tranche_id) if tranche_id else None
+        if tranche_id is None:
+            trigger = TriggerRef.ALWAYS
+        else:
+            trigger = mapping.trigger if mapping else TriggerRef.BASE
+        steps.append(CompiledStep(step, tranche_id, trigger, amount_for_step(step, tranche_id, mapping)))
+
+    valid_from, valid_to = _validity_window(all_mappings, payment_date)
+    return WaterfallProgram(
+        deal_id=deal_id,
+        structure_name=structure_name,
+        valid_from=valid_from,
+        valid_to=valid_to,
+        steps=tuple(steps),
+        mappings=MappingProxyType(mappings),
+        step_index=MappingProxyType({op.step: op for op in reversed(steps)}),
+        structure_found=structure is not None,
+        has_income_notes=any(m.tranche_type == TrancheType.INCOME_NOTES.value for m in mappings.values())
+    )
+
+
+def _steps_for_category(category: str, mappings: Dict[str, CompiledMapping]) -> List[WaterfallStep]:
+    """Waterfall steps for one payment category"""
+    if category in _CATEGORY_STEPS:
+        return list(_CATEGORY_STEPS[category])
+
+    if category in _INTEREST_CATEGORIES:
+        attribute = 'interest_step'
+    elif category in _PRINCIPAL_CATEGORIES:
+        attribute = 'principal_step'
+    else:
+        return []
+
+    category_mappings = sorted((m for m in mappings.values() if m.payment_category == category),
+                               key=lambda m: m.category_rank)
+    return [WaterfallStep(getattr(m, attribute)) for m in category_mappings if getattr(m, attribute)]
+
+
+class WaterfallProgramCache:
+    """
+    Process-wide LRU cache of compiled waterfall programs
+
+    Programs are keyed by (deal id, structure name) separately for each
+    database engine, with one entry per effective-date window. Inserting,
+    updating or deleting mappings, structures or tranches (other than
+    balance updates) drops the affected entries when the session's
+    transaction commits or rolls back. Until then the session bypasses the
+    cache for those deals, so programs compiled from uncommitted rows are
+    never shared.
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._programs: "weakref.WeakKeyDictionary[Any, OrderedDict]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bind(session: Optional[Session]) -> Any:
+        """Engine identifying the session's database (None disables caching)"""
+        if session is None:
+            return None
+        try:
+            return WaterfallProgramCache._engine(session.get_bind())
+        except Exception:
+            return None
+
+    @staticmethod
+    def _engine(bind: Any) -> Any:
+        """Engine of an Engine or Connection, so both key the same programs"""
+        return getattr(bind, 'engine', bind)
+
+    def get_program(self, session: Session, deal_id: str, structure_name: str,
+                    payment_date: date) -> WaterfallProgram:
+        """Cached program in force on payment_date, compiling it on a miss"""
+        program = self.get(session, deal_id, structure_name, payment_date)
+        if program is None:
+            program = compile_waterfall_program(session, deal_id, structure_name, payment_date)
+            self.put(session, program)
+        return program
+
+    @staticmethod
+    def _has_pending_changes(session: Session, bind: Any, deal_id: str) -> bool:
+        """Whether the session flushed uncommitted changes affecting the deal's programs"""
+        pending = session.info.get(_PENDING_INVALIDATIONS, ())
+        return (bind, deal_id) in pending or (bind, None) in pending
+
+    def get(self, session: Session, deal_id: str, structure_name: str,
+            payment_date: date) -> Optional[WaterfallProgram]:
+        """Cached program covering payment_date, or None"""
+        bind = self._bind(session)
+        key = (deal_id, structure_name)
+        if bind is not None and self._has_pending_changes(session, bind, deal_id):
+            bind = None
+        with self._lock:
+            programs = self._programs.get(bind) if bind is not None else None
+            windows = programs.get(key) if programs is not None else None
+            program = next((p for p in windows if p.covers(payment_date)), None) if windows else None
+            if program is None:
+                self.misses += 1
+                return None
+            programs.move_to_end(key)
+            self.hits += 1
+            return program
+
+    def put(self, session: Session, program: WaterfallProgram) -> None:
+        """Cache a program, evicting the least recently used deals beyond max_size"""
+        bind = self._bind(session)
+        if bind is None or self._has_pending_changes(session, bind, program.deal_id):
+            return
+        key = (program.deal_id, program.structure_name)
+        with self._lock:
+            programs = self._programs.get(bind)
+            if programs is None:
+                programs = self._programs[bind] = OrderedDict()
+            windows = [p for p in programs.get(key, []) if p.valid_from != program.valid_from]
+            programs[key] = windows + [program]
+            programs.move_to_end(key)
+            while len(programs) > self.max_size:
+                programs.popitem(last=False)
+
+    def invalidate(self, bind: Any, deal_id: Optional[str] = None, structure_name: Optional[str] = None) -> None:
+        """Drop programs for a deal and/or structure on one engine (all of them when both are None)"""
+        bind = self._bind(bind) if isinstance(bind, Session) else self._engine(bind)
+        if bind is None:
+            return
+        with self._lock:
+            programs = self._programs.get(bind)
+            if not programs:
+                return
+            for key in list(programs):
+                if ((deal_id is None or key[0] == deal_id) and
+                        (structure_name is None or key[1] == structure_name)):
+                    del programs[key]
+
+    def clear(self) -> None:
+        """Drop all cached programs and reset statistics"""
+        with self._lock:
+            self._programs = weakref.WeakKeyDictionary()
+            self.hits = 0
+            self.misses = 0
+
+
+waterfall_program_cache = WaterfallProgramCache(settings.waterfall_program_cache_size)
+
+
+# Session.info key holding (engine, deal id) pairs to invalidate when the
+# transaction ends; a deal id of None stands for every deal on the engine
+_PENDING_INVALIDATIONS = 'waterfall_program_invalidations'
+
+
+def _defer_invalidation(connection, target, deal_id: Optional[str] = None) -> None:
+    """Record an invalidation for the end of the flushing session's transaction"""
+    session = object_session(target)
+    bind = waterfall_program_cache._bind(session) if session is not None else None
+    if bind is None:
+        waterfall_program_cache.invalidate(connection.engine, deal_id=deal_id)
+        return
+    session.info.setdefault(_PENDING_INVALIDATIONS, set()).add((bind, deal_id))
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _apply_invalidations(session):
+    # Savepoints end inside the outer transaction, whose changes are still uncommitted
+    if session.in_nested_transaction():
+        return
+    for bind, deal_id in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        waterfall_program_cache.invalidate(bind, deal_id=deal_id)
+
+
+@event.listens_for(TrancheMapping, 'after_insert')
+@event.listens_for(TrancheMapping, 'after_update')
+@event.listens_for(TrancheMapping, 'after_delete')
+def _invalidate_mapping(mapper, connection, target):
+    _defer_invalidation(connection, target, target.deal_id)
+
+
+@event.listens_for(WaterfallStructure, 'after_insert')
+@event.listens_for(WaterfallStructure, 'after_update')
+@event.listens_for(WaterfallStructure, 'after_delete')
+def _invalidate_structure(mapper, connection, target):
+    # Structures can be renamed, so drop every program on the engine
+    _defer_invalidation(connection, target)
+
+
+@event.listens_for(CLOTranche, 'after_insert')
+@event.listens_for(CLOTranche, 'after_delete')
+def _invalidate_tranche(mapper, connection, target):
+    _defer_invalidation(connection, target, target.deal_id)
+
+
+@event.listens_for(CLOTranche, 'after_update')
+def _invalidate_renamed_tranche(mapper, connection, target):
+    # Balance updates during execution leave compiled programs alone
+    state = inspect(target)
+    if state.attrs.tranche_name.history.has_changes() or state.attrs.deal_id.history.has_changes():
+        _defer_invalidation(connection, target, target.deal_id)
@@ -125,40 +125,43 @@ class TraditionalWaterfall(BaseWaterfallStrategy):
     Standard CLO structure with OC/IC tests and sequential principal payments
     """
     
+    # Traditional waterfall sequence, also used by compiled waterfall programs
+    PAYMENT_SEQUENCE: Tuple[WaterfallStep, ...] = (
+        # Senior expenses
+        WaterfallStep.TRUSTEE_FEES,
+        WaterfallStep.ADMIN_FEES, 
+        WaterfallStep.SENIOR_MGMT_FEES,
+        
+        # Interest payments by seniority
+        WaterfallStep.CLASS_A_INTEREST,
+        WaterfallStep.CLASS_B_INTEREST,
+        WaterfallStep.CLASS_C_INTEREST,
+        WaterfallStep.CLASS_D_INTEREST,
+        
+        # Reserve funding
+        WaterfallStep.INTEREST_RESERVE,
+        
+        # Principal payments (sequential)
+        WaterfallStep.CLASS_A_PRINCIPAL,
+        WaterfallStep.CLASS_B_PRINCIPAL,
+        WaterfallStep.CLASS_C_PRINCIPAL,
+        WaterfallStep.CLASS_D_PRINCIPAL,
+        
+        # Junior fees
+        WaterfallStep.JUNIOR_MGMT_FEES,
+        WaterfallStep.INCENTIVE_MGMT_FEES,
+        
+        # Subordinated
+        WaterfallStep.CLASS_E_INTEREST,
+        WaterfallStep.CLASS_E_PRINCIPAL,
+        
+        # Residual
+        WaterfallStep.RESIDUAL_EQUITY,
+    )
+    
     def get_payment_sequence(self) -> List[WaterfallStep]:
         """Traditional waterfall sequence"""
-        return [
-            # Senior expenses
-            WaterfallStep.TRUSTEE_FEES,
-            WaterfallStep.ADMIN_FEES, 
-            WaterfallStep.SENIOR_MGMT_FEES,
-            
-            # Interest payments by seniority
-            WaterfallStep.CLASS_A_INTEREST,
-            WaterfallStep.CLASS_B_INTEREST,
-            WaterfallStep.CLASS_C_INTEREST,
-            WaterfallStep.CLASS_D_INTEREST,
-            
-            # Reserve funding
-            WaterfallStep.INTEREST_RESERVE,
-            
-            # Principal payments (sequential)
-            WaterfallStep.CLASS_A_PRINCIPAL,
-            WaterfallStep.CLASS_B_PRINCIPAL,
-            WaterfallStep.CLASS_C_PRINCIPAL,
-            WaterfallStep.CLASS_D_PRINCIPAL,
-            
-            # Junior fees
-            WaterfallStep.JUNIOR_MGMT_FEES,
-            WaterfallStep.INCENTIVE_MGMT_FEES,
-            
-            # Subordinated
-            WaterfallStep.CLASS_E_INTEREST,
-            WaterfallStep.CLASS_E_PRINCIPAL,
-            
-            # Residual
-            WaterfallStep.RESIDUAL_EQUITY
-        ]
+        return list(self.PAYMENT_SEQUENCE)
     
     def check_payment_triggers(self, step: WaterfallStep, tranche: Optional[CLOTranche] = None) -> bool:
         """Traditional trigger logic"""
@@ -384,8 +387,9 @@ class EnhancedWaterfallCalculator(WaterfallCalculator):
     Extends base calculator to support multiple waterfall types
     """
     
-    def __init__(self, deal_id: str, payment_date: date, session, waterfall_type: WaterfallType = WaterfallType.TRADITIONAL):
-        super().__init__(deal_id, payment_date, session)
+    def __init__(self, deal_id: str, payment_date: date, session, waterfall_type: WaterfallType = WaterfallType.TRADITIONAL,
+                 in_memory: bool = False):
+        super().__init__(deal_id, payment_date, session, in_memory=in_memory)
         self.waterfall_type = waterfall_type
         self.strategy = WaterfallStrategyFactory.create_strategy(waterfall_type, self)
     
@@ -395,6 +399,8 @@ class EnhancedWaterfallCalculator(WaterfallCalculator):
         
         # Create execution record
         execution = self._create_execution_record(collection_amount, beginning_cash)
+        if self.ledger is not None:
+            self.ledger.start(execution)
         
         try:
             # Use strategy-specific waterfall processing
@@ -405,16 +411,14 @@ class EnhancedWaterfallCalculator(WaterfallCalculator):
             execution.execution_status = 'COMPLETED'
             
             # Save to database
-            self.session.add(execution)
-            self.session.commit()
+            self._save_execution(execution)
             
             return execution
             
         except Exception as e:
             execution.execution_status = 'FAILED'
             execution.execution_notes = str(e)
-            self.session.add(execution)
-            self.session.commit()
+            self._save_execution(execution)
             raise
     
     def _create_execution_record(self, collection_amount: Decimal, beginning_cash: Decimal) -> WaterfallExecution:
@@ -17,13 +17,82 @@ import math
 from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, List, Optional, Tuple, Any, Union
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import threading
+import weakref
 from dateutil.relativedelta import relativedelta
+import numpy as np
 
 from sqlalchemy import Column, Integer, String, Date, DateTime, DECIMAL, Boolean, Text, ForeignKey, Index, text
 from sqlalchemy.orm import relationship, Session
 from sqlalchemy.ext.declarative import declarative_base
 
 from ..core.database import Base
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DateArray = Union[date, List[date], np.ndarray]
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_EPOCH_MONTH_INDEX = 1970 * 12
+# A month shorter than 29, 30 or 31 days always occurs within this many months
+_SHORT_MONTH_SEARCH = 50
+
+
+def _to_day_array(dates: DateArray) -> np.ndarray:
+    """Dates (date, list or datetime64 array) as a datetime64[D] array"""
+    return np.asarray(dates, dtype='datetime64[D]')
+
+
+def _month_index(days: np.ndarray) -> np.ndarray:
+    """Absolute month number (year * 12 + month - 1) of datetime64[D] dates"""
+    return days.astype('datetime64[M]').astype(np.int64) + _EPOCH_MONTH_INDEX
+
+
+def _day_of_month(days: np.ndarray) -> np.ndarray:
+    return (days - days.astype('datetime64[M]')).astype(np.int64) + 1
+
+
+def _days_in_month(month_index: np.ndarray) -> np.ndarray:
+    start = (np.asarray(month_index) - _EPOCH_MONTH_INDEX).astype('datetime64[M]')
+    return ((start + 1).astype('datetime64[D]') - start.astype('datetime64[D]')).astype(np.int64)
+
+
+def _month_day_ordinals(month_index: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Ordinals of day-of-month in each month, clipped to the month end like relativedelta"""
+    month_index = np.asarray(month_index)
+    start = (month_index - _EPOCH_MONTH_INDEX).astype('datetime64[M]').astype('datetime64[D]')
+    return start.astype(np.int64) + _EPOCH_ORDINAL + np.minimum(day, _days_in_month(month_index)) - 1
+
+
+def _zero_rate_brackets(start_days: np.ndarray, end_days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Whole-month spot rates bracketing each end date, as in VBA ZeroRate
+    
+    Returns the lower month count (the upper is one more) and the linear
+    interpolation weight of the end date between the two boundary dates.
+    """
+    start_month = _month_index(start_days)
+    start_day = _day_of_month(start_days)
+    end_ordinals = end_days.astype(np.int64) + _EPOCH_ORDINAL
+    
+    # VBA: lMonths = DateDiff("M", iStartDate, iEndDate)
+    # VBA: lLowDate = DateAdd("M", lMonths, iStartDate)
+    l_months = _month_index(end_days) - start_month
+    l_low_date = _month_day_ordinals(start_month + l_months, start_day)
+    
+    # VBA: If iEndDate > lLowDate Then interpolate up to lMonths + 1,
+    # otherwise down from lMonths - 1 (each boundary is one DateAdd("M") step)
+    forward = end_ordinals > l_low_date
+    low_months = np.where(forward, l_months, l_months - 1)
+    low_day = np.minimum(start_day, _days_in_month(start_month + l_months))
+    l_high_date = np.where(forward, _month_day_ordinals(start_month + l_months + 1, low_day), l_low_date)
+    l_low_date = np.where(forward, l_low_date, _month_day_ordinals(start_month + l_months - 1, low_day))
+    
+    return low_months, (end_ordinals - l_low_date) / (l_high_date - l_low_date)
 
 
 class YieldCurveModel(Base):
@@ -174,6 +243,12 @@ class YieldCurve:
         self._spot_rates: Dict[int, float] = {}
         self._is_setup: bool = False
         
+        # Monthly log-growth lookup tables built by setup()
+        self._log_growth_cumsum: Optional[np.ndarray] = None  # (31 days x months + 1)
+        self._first_month_index: int = 0
+        self._first_log_growth: float = 0.0
+        self._last_log_growth: float = 0.0
+        
         # If rate_dict provided, setup automatically
         if rate_dict:
             self.setup(name or "DEFAULT", analysis_date or date.today(), rate_dict)
@@ -273,8 +348,94 @@ class YieldCurve:
             self.last_date = self.analysis_date + relativedelta(months=len(l_forward_rate) - 1)
             self.last_forward = l_forward_rate[-1]
         
+        self._build_lookup_tables()
         self._is_setup = True
     
+    def _build_lookup_tables(self) -> None:
+        """
+        Precompute cumulative monthly log-growth for O(1) rate lookups
+        
+        SpotRate compounds the interpolated forward rate on monthly steps from
+        its start date. For every day of month, row day - 1 holds the running
+        sum of log(1 + forward) over the calendar months spanned by the forward
+        dates, so compounding over any run of months is a difference of two
+        entries. Outside the forward dates the rate is flat, as in the VBA.
+        """
+        forward_ordinals = np.array(sorted(self.forward_dict), dtype=np.int64)
+        forward_values = np.array([self.forward_dict[key] for key in forward_ordinals])
+        
+        first_month = _month_index(np.array(forward_ordinals[0] - _EPOCH_ORDINAL, dtype='datetime64[D]'))
+        last_month = _month_index(np.array(forward_ordinals[-1] - _EPOCH_ORDINAL, dtype='datetime64[D]'))
+        months = np.arange(int(first_month), int(last_month) + 1)
+        days = np.arange(1, 32)
+        
+        ordinals = _month_day_ordinals(months[None, :], days[:, None])
+        log_growth = np.log1p(np.interp(ordinals, forward_ordinals, forward_values))
+        
+        self._log_growth_cumsum = np.zeros((31, len(months) + 1))
+        np.cumsum(log_growth, axis=1, out=self._log_growth_cumsum[:, 1:])
+        self._first_month_index = int(first_month)
+        self._first_log_growth = float(np.log1p(forward_values[0]))
+        self._last_log_growth = float(np.log1p(forward_values[-1]))
+    
+    def _log_growth_between(self, day: np.ndarray, start_month: np.ndarray,
+                            end_month: np.ndarray) -> np.ndarray:
+        """Sum of log(1 + forward) on day-of-month dates for months in [start_month, end_month)"""
+        num_months = self._log_growth_cumsum.shape[1] - 1
+        first = self._first_month_index
+        low = np.clip(start_month - first, 0, num_months)
+        high = np.clip(end_month - first, 0, num_months)
+        
+        inside = self._log_growth_cumsum[day - 1, high] - self._log_growth_cumsum[day - 1, low]
+        before = np.clip(np.minimum(end_month, first) - start_month, 0, None)
+        after = np.clip(end_month - np.maximum(start_month, first + num_months), 0, None)
+        return inside + before * self._first_log_growth + after * self._last_log_growth
+    
+    def _compounded_log_growth(self, days: np.ndarray, months: np.ndarray) -> np.ndarray:
+        """
+        Log of the SpotRate compounding product for each start date
+        
+        The VBA steps the date with DateAdd("M", 1, ...) each month, so a day
+        29-31 is clipped at the first shorter month and stays clipped. The run
+        of months is split at those clips (at most three times), each piece
+        being a plain table lookup.
+        """
+        month = _month_index(days)
+        day = _day_of_month(days)
+        end = month + np.maximum(months, 0)
+        total = np.zeros(np.broadcast(month, end).shape)
+        month, day = np.broadcast_to(month, total.shape), np.broadcast_to(day, total.shape)
+        
+        while True:
+            clip = end.copy() if np.ndim(end) else np.array(end)
+            clipping = (day > 28) & (month + 1 < end)
+            if np.any(clipping):
+                candidates = month[clipping][:, None] + 1 + np.arange(_SHORT_MONTH_SEARCH)
+                short = _days_in_month(candidates) < day[clipping][:, None]
+                clip[clipping] = np.minimum(candidates[np.arange(len(candidates)), np.argmax(short, axis=1)],
+                                            end[clipping])
+            total += self._log_growth_between(day, month, clip)
+            if not np.any(clip < end):
+                return total
+            day = np.where(clip < end, np.minimum(day, _days_in_month(clip)), day)
+            month = clip
+    
+    def spot_rates(self, i_dates: DateArray, i_months: Union[int, np.ndarray]) -> np.ndarray:
+        """
+        Vectorized spot_rate for arrays of start dates and/or month counts
+        
+        Each rate costs a constant number of table lookups regardless of the
+        number of months or curve points.
+        """
+        if not self._is_setup:
+            raise RuntimeError("YieldCurve must be setup before calling spot_rates")
+        
+        months = np.asarray(i_months, dtype=np.int64)
+        log_growth = self._compounded_log_growth(_to_day_array(i_dates), months)
+        
+        # VBA: If iMonth > 0 Then lRate = lRate ^ (1 / iMonth); lRate = lRate - 1
+        return np.where(months > 0, np.expm1(log_growth / np.maximum(months, 1)), 0.0)
+    
     def spot_rate(self, i_date: date, i_month: int) -> float:
         """
         EXACT VBA SpotRate() method implementation
@@ -294,68 +455,9 @@ class YieldCurve:
         if not self._is_setup:
             raise RuntimeError("YieldCurve must be setup before calling spot_rate")
         
-        # VBA: lFowardDate = clsFowardDict.Keys
-        forward_dates = sorted(self.forward_dict.keys())
-        
-        # VBA: lRate = 1
-        l_rate = 1.0
-        
-        # VBA: j = 0 (implicit)
-        j = 0
-        current_date = i_date
-        
-        # VBA: Do While j < iMonth
-        while j < i_month:
-            current_date_int = int(current_date.toordinal())
-            
-            # VBA: If iDate <= CDate(lFowardDate(0)) Then
-            if current_date_int <= forward_dates[0]:
-                # VBA: lPreviousDate = lFowardDate(0)
-                # VBA: lNextDate = lFowardDate(0)  
-                # VBA: lRate = lRate * (1 + clsFowardDict(lNextDate))
-                l_rate = l_rate * (1 + self.forward_dict[forward_dates[0]])
-                
-            # VBA: ElseIf iDate <= CDate(lFowardDate(UBound(lFowardDate))) Then
-            elif current_date_int <= forward_dates[-1]:
-                # VBA: For i = LBound(lFowardDate) To UBound(lFowardDate) - 1
-                l_previous_date = forward_dates[0]
-                l_next_date = forward_dates[0]
-                
-                for i in range(len(forward_dates) - 1):
-                    # VBA: If lFowardDate(i + 1) >= CLng(iDate) And lFowardDate(i) < CLng(iDate) Then
-                    if forward_dates[i + 1] >= current_date_int and forward_dates[i] < current_date_int:
-                        l_previous_date = forward_dates[i]
-                        l_next_date = forward_dates[i + 1]
-                        break
-                
-                # VBA interpolation formula - exact implementation
-                # lRate = lRate * (1 + (clsFowardDict(lPreviousDate) + (clsFowardDict(lNextDate) - clsFowardDict(lPreviousDate)) * (iDate - lPreviousDate) / (lNextDate - lPreviousDate)))
-                if l_next_date != l_previous_date:
-                    weight = (current_date_int - l_previous_date) / (l_next_date - l_previous_date)
-                    interpolated_rate = (self.forward_dict[l_previous_date] + 
-                                       (self.forward_dict[l_next_date] - self.forward_dict[l_previous_date]) * weight)
-                else:
-                    interpolated_rate = self.forward_dict[l_previous_date]
-                
-                l_rate = l_rate * (1 + interpolated_rate)
-                
-            else:
-                # VBA: lRate = lRate * (1 + clsFowardDict(UBound(lFowardDate)))
-                l_rate = l_rate * (1 + self.forward_dict[forward_dates[-1]])
-            
-            # VBA: iDate = DateAdd("M", 1, iDate)
-            # VBA: j = j + 1
-            current_date = current_date + relativedelta(months=1)
-            j += 1
-        
-        # VBA: If iMonth > 0 Then lRate = lRate ^ (1 / iMonth)
-        # VBA: lRate = lRate - 1
-        # VBA: SpotRate = lRate
-        if i_month > 0:
-            l_rate = l_rate ** (1.0 / i_month)
-        l_rate = l_rate - 1
-        
-        return l_rate
+        # VBA: Do While j < iMonth ... lRate = lRate * (1 + forward) ... iDate = DateAdd("M", 1, iDate)
+        # The monthly compounding loop is answered from the setup() lookup tables
+        return float(self.spot_rates(i_date, i_month))
     
     def zero_rate(self, i_start_date: date, i_end_date: date) -> float:
         """
@@ -375,38 +477,54 @@ class YieldCurve:
         if not self._is_setup:
             raise RuntimeError("YieldCurve must be setup before calling zero_rate")
         
-        # VBA: lMonths = DateDiff("M", iStartDate, iEndDate)
-        l_months = (i_end_date.year - i_start_date.year) * 12 + (i_end_date.month - i_start_date.month)
+        return float(self.zero_rates(i_start_date, i_end_date))
+    
+    def zero_rates(self, i_start_dates: DateArray, i_end_dates: DateArray) -> np.ndarray:
+        """
+        Vectorized zero_rate for arrays of start and/or end dates
         
-        # VBA: lLowDate = DateAdd("M", lMonths, iStartDate)
-        l_low_date = i_start_date + relativedelta(months=l_months)
+        Follows the VBA ZeroRate interpolation between the whole-month spot
+        rates either side of each end date.
+        """
+        if not self._is_setup:
+            raise RuntimeError("YieldCurve must be setup before calling zero_rates")
         
-        # VBA interpolation logic - exact implementation
-        if i_end_date > l_low_date:
-            # VBA: lHighDate = DateAdd("M", 1, lLowDate)
-            # VBA: lLowRate = SpotRate(iStartDate, lMonths)
-            # VBA: lHighRate = SpotRate(iStartDate, lMonths + 1)
-            l_high_date = l_low_date + relativedelta(months=1)
-            l_low_rate = self.spot_rate(i_start_date, l_months)
-            l_high_rate = self.spot_rate(i_start_date, l_months + 1)
-        else:
-            # VBA: lHighDate = lLowDate
-            # VBA: lLowDate = DateAdd("M", -1, lHighDate)
-            # VBA: lLowRate = SpotRate(iStartDate, lMonths - 1)
-            # VBA: lHighRate = SpotRate(iStartDate, lMonths)
-            l_high_date = l_low_date
-            l_low_date = l_high_date - relativedelta(months=1)
-            l_low_rate = self.spot_rate(i_start_date, l_months - 1)
-            l_high_rate = self.spot_rate(i_start_date, l_months)
+        start_days = _to_day_array(i_start_dates)
+        low_months, time_weight = _zero_rate_brackets(start_days, _to_day_array(i_end_dates))
         
-        # VBA: ZeroRate = lLowRate + (lHighRate - lLowRate) * ((iEndDate - lLowDate) / (lHighDate - lLowDate))
-        if l_high_date != l_low_date:
-            time_weight = (i_end_date - l_low_date).days / (l_high_date - l_low_date).days
-            zero_rate = l_low_rate + (l_high_rate - l_low_rate) * time_weight
-        else:
-            zero_rate = l_low_rate
+        l_low_rate = self.spot_rates(start_days, low_months)
+        l_high_rate = self.spot_rates(start_days, low_months + 1)
         
-        return zero_rate
+        # VBA: ZeroRate = lLowRate + (lHighRate - lLowRate) * ((iEndDate - lLowDate) / (lHighDate - lLowDate))
+        return l_low_rate + (l_high_rate - l_low_rate) * time_weight
+    
+    def discount_factors(self, i_start_date: date, i_dates: DateArray,
+                         spread: float = 0.0) -> np.ndarray:
+        """
+        Discount factors (1 + zero rate + spread) ^ -(days / 365.25) from
+        i_start_date to each date, the convention used by present value and
+        fair value pricing.
+        """
+        dates = _to_day_array(i_dates)
+        years = (dates - np.datetime64(i_start_date, 'D')).astype(np.int64) / 365.25
+        return (1 + self.zero_rates(i_start_date, dates) + spread) ** -years
+    
+    def discount_factor(self, i_start_date: date, i_date: date, spread: float = 0.0) -> float:
+        """Discount factor from i_start_date to i_date"""
+        return float(self.discount_factors(i_start_date, i_date, spread))
+    
+    def apply_shocks(self, shocks: List["YieldCurveShock"]) -> "YieldCurveScenarios":
+        """Shocked spot, forward and discount grids for a batch of shocks, one row per shock"""
+        if not self._is_setup:
+            raise RuntimeError("YieldCurve must be setup before applying shocks")
+        if not shocks:
+            raise ValueError("At least one shock is required")
+        
+        months = np.arange(1, self.last_month + 1)
+        pillars = np.array(sorted(self.rate_dict))
+        base_spot = np.array([self._spot_rates[month] for month in months])
+        shifts = np.stack([shock.shifts(months, pillars) for shock in shocks])
+        return YieldCurveScenarios(self, shocks, base_spot[None, :] + shifts)
     
     def get_interpolated_spot_rates(self) -> Dict[int, float]:
         """Get all interpolated spot rates"""
@@ -469,9 +587,244 @@ class YieldCurve:
             self.session.add(forward_record)
         
         self.session.commit()
+        yield_curve_cache.invalidate(self.session, self.name, self.analysis_date)
         return curve.curve_id
 
 
+SHIFT_TYPES = ("PARALLEL", "TWIST", "BUTTERFLY", "KEY_RATE")
+
+
+@dataclass
+class YieldCurveShock:
+    """
+    Spot rate shock in basis points by maturity month
+    
+    PARALLEL moves every maturity by shift_bps. TWIST rotates the curve
+    about pivot_month so the last maturity moves by shift_bps (positive
+    steepens). BUTTERFLY moves pivot_month by shift_bps and both ends by
+    -shift_bps, linearly in between. KEY_RATE bumps the input maturity
+    pivot_month by shift_bps, fading linearly to zero at the neighbouring
+    input maturities, i.e. bumping that input rate before interpolation.
+    
+    TWIST and BUTTERFLY pivot on the middle input maturity by default.
+    """
+    shift_type: str
+    shift_bps: float
+    pivot_month: Optional[int] = None
+    name: Optional[str] = None
+    
+    def __post_init__(self):
+        self.shift_type = self.shift_type.upper()
+        if self.shift_type not in SHIFT_TYPES:
+            raise ValueError(f"Unknown shift type: {self.shift_type}")
+        if self.shift_type == "KEY_RATE" and self.pivot_month is None:
+            raise ValueError("KEY_RATE shocks require pivot_month")
+        if self.name is None:
+            pivot = f"_{self.pivot_month}M" if self.pivot_month is not None else ""
+            self.name = f"{self.shift_type}{pivot}_{self.shift_bps:+g}BP"
+    
+    def shifts(self, months: np.ndarray, pillars: np.ndarray) -> np.ndarray:
+        """Decimal spot rate shifts for each maturity month"""
+        size = self.shift_bps / 10000
+        if self.shift_type == "PARALLEL":
+            return np.full(len(months), size)
+        
+        last_month = int(months[-1])
+        pivot = self.pivot_month if self.pivot_month is not None else int(pillars[len(pillars) // 2])
+        
+        if self.shift_type == "TWIST":
+            return size * (months - pivot) / max(last_month - pivot, 1)
+        
+        if self.shift_type == "BUTTERFLY":
+            distance = np.where(months < pivot, (pivot - months) / max(pivot - 1, 1),
+                                (months - pivot) / max(last_month - pivot, 1))
+            return size * (1 - 2 * distance)
+        
+        # KEY_RATE
+        if pivot not in pillars:
+            raise ValueError(f"Key rate {pivot}M is not an input maturity of the curve")
+        return size * np.interp(months, pillars, (pillars == pivot).astype(float))
+
+
+class YieldCurveScenarios:
+    """
+    Shocked spot, forward and discount grids of one base curve
+    
+    Row k of every grid is scenario shocks[k] and column m - 1 is maturity
+    month m from the analysis date. Forward rates follow the VBA Setup
+    formula, so each row prices exactly like a YieldCurve set up from that
+    row's spot rates; zero rates and discount factors for arbitrary dates
+    use the ZeroRate interpolation from the analysis date.
+    """
+    
+    def __init__(self, base_curve: YieldCurve, shocks: List[YieldCurveShock], spot_rates: np.ndarray):
+        self.base_curve = base_curve
+        self.analysis_date = base_curve.analysis_date
+        self.shocks = list(shocks)
+        self.months = np.arange(1, spot_rates.shape[1] + 1)
+        self.spot_rates = spot_rates
+        
+        # VBA: lFowardRate(i) = ((1 + lSpotRate(i + 1)) ^ (i + 1)) / ((1 + lSpotRate(i)) ^ i) - 1,
+        # keyed DateAdd("M", i, analysis date) with lSpotRate(1) at month 0
+        spot_growth = np.zeros((spot_rates.shape[0], len(self.months) + 1))
+        spot_growth[:, 1:] = self.months * np.log1p(spot_rates)
+        self.forward_rates = np.expm1(np.diff(spot_growth, axis=1))
+        self.forward_dates = np.array([self.analysis_date + relativedelta(months=i) for i in range(len(self.months))],
+                                      dtype='datetime64[D]')
+        self._build_chain_log_growth()
+        
+        self.dates = np.array([self.analysis_date + relativedelta(months=int(month)) for month in self.months],
+                              dtype='datetime64[D]')
+        self.discount_grid = self.discount_factors(self.dates)
+    
+    @property
+    def num_scenarios(self) -> int:
+        return len(self.shocks)
+    
+    @property
+    def scenario_names(self) -> List[str]:
+        return [shock.name for shock in self.shocks]
+    
+    def _build_chain_log_growth(self) -> None:
+        """
+        Cumulative log(1 + forward) along the SpotRate date steps from the analysis date
+        
+        SpotRate steps with DateAdd("M", 1, ...) from its start date, which
+        drifts off the forward dates after a month-end clip, so forwards are
+        interpolated at the stepped dates. Steps past the last forward date
+        all use the last forward rate.
+        """
+        forward_ordinals = self.forward_dates.astype(np.int64)
+        chain = []
+        step_date = self.analysis_date
+        while np.datetime64(step_date, 'D').astype(np.int64) <= forward_ordinals[-1]:
+            chain.append(np.datetime64(step_date, 'D').astype(np.int64))
+            step_date = step_date + relativedelta(months=1)
+        chain = np.array(chain)
+        
+        if len(forward_ordinals) > 1:
+            left = np.clip(np.searchsorted(forward_ordinals, chain, side='right') - 1, 0, len(forward_ordinals) - 2)
+            weight = np.clip((chain - forward_ordinals[left]) /
+                             (forward_ordinals[left + 1] - forward_ordinals[left]), 0.0, 1.0)
+            chain_forwards = ((1 - weight) * self.forward_rates[:, left] +
+                              weight * self.forward_rates[:, left + 1])
+        else:
+            chain_forwards = np.repeat(self.forward_rates, len(chain), axis=1)
+        
+        self._chain_log_growth = np.zeros((self.forward_rates.shape[0], len(chain) + 1))
+        np.cumsum(np.log1p(chain_forwards), axis=1, out=self._chain_log_growth[:, 1:])
+        self._tail_log_growth = np.log1p(self.forward_rates[:, -1:])
+    
+    def _spot_by_months(self, months: np.ndarray) -> np.ndarray:
+        """SpotRate(analysis date, months) for every scenario (scenarios x len(months))"""
+        chain_months = self._chain_log_growth.shape[1] - 1
+        log_growth = (self._chain_log_growth[:, np.clip(months, 0, chain_months)] +
+                      np.maximum(months - chain_months, 0) * self._tail_log_growth)
+        return np.where(months > 0, np.expm1(log_growth / np.maximum(months, 1)), 0.0)
+    
+    def zero_rates(self, dates: DateArray) -> np.ndarray:
+        """Zero rates from the analysis date to each date (scenarios x dates)"""
+        days = np.atleast_1d(_to_day_array(dates))
+        low_months, time_weight = _zero_rate_brackets(np.datetime64(self.analysis_date, 'D'), days)
+        low_rate = self._spot_by_months(low_months)
+        high_rate = self._spot_by_months(low_months + 1)
+        return low_rate + (high_rate - low_rate) * time_weight
+    
+    def discount_factors(self, dates: DateArray, spread: float = 0.0) -> np.ndarray:
+        """Discount factors (1 + zero rate + spread) ^ -(days / 365.25) (scenarios x dates)"""
+        days = np.atleast_1d(_to_day_array(dates))
+        years = (days - np.datetime64(self.analysis_date, 'D')).astype(np.int64) / 365.25
+        return (1 + self.zero_rates(days) + spread) ** -years
+    
+    def present_values(self, dates: DateArray, amounts: np.ndarray, spread: float = 0.0) -> np.ndarray:
+        """Present value of one set of cash flows under every scenario"""
+        return self.discount_factors(dates, spread) @ np.asarray(amounts, dtype=float)
+    
+    def scenario_curve(self, index: int) -> YieldCurve:
+        """Stand-alone YieldCurve for one scenario"""
+        rate_dict = dict(zip(self.months.tolist(), self.spot_rates[index].tolist()))
+        return YieldCurve(f"{self.base_curve.name}:{self.shocks[index].name}", self.analysis_date, rate_dict)
+
+
+class YieldCurveCache:
+    """
+    Process-wide LRU cache of set-up YieldCurve objects
+    
+    Curves are keyed by (curve name, analysis date) separately for each
+    database engine, so different databases never share entries. Cached
+    curves are shared between callers and must be treated as read-only.
+    """
+    
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._curves: "weakref.WeakKeyDictionary[Any, OrderedDict]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _bind(session: Optional[Session]) -> Any:
+        """Engine identifying the session's database (None disables caching)"""
+        if session is None:
+            return None
+        try:
+            return session.get_bind()
+        except Exception:
+            return None
+    
+    def get(self, session: Session, curve_name: str, analysis_date: date) -> Optional[YieldCurve]:
+        """Cached curve for the session's database, or None"""
+        bind = self._bind(session)
+        with self._lock:
+            curves = self._curves.get(bind) if bind is not None else None
+            curve = curves.get((curve_name, analysis_date)) if curves is not None else None
+            if curve is None:
+                self.misses += 1
+                return None
+            curves.move_to_end((curve_name, analysis_date))
+            self.hits += 1
+            return curve
+    
+    def put(self, session: Session, curve: YieldCurve) -> None:
+        """Cache a set-up curve, evicting the least recently used beyond max_size"""
+        bind = self._bind(session)
+        if bind is None:
+            return
+        with self._lock:
+            curves = self._curves.get(bind)
+            if curves is None:
+                curves = self._curves[bind] = OrderedDict()
+            curves[(curve.name, curve.analysis_date)] = curve
+            curves.move_to_end((curve.name, curve.analysis_date))
+            while len(curves) > self.max_size:
+                curves.popitem(last=False)
+    
+    def invalidate(self, session: Session, curve_name: str, analysis_date: Optional[date] = None) -> None:
+        """Drop one curve, or every analysis date of curve_name when analysis_date is None"""
+        bind = self._bind(session)
+        if bind is None:
+            return
+        with self._lock:
+            curves = self._curves.get(bind)
+            if not curves:
+                return
+            if analysis_date is not None:
+                curves.pop((curve_name, analysis_date), None)
+            else:
+                for key in [key for key in curves if key[0] == curve_name]:
+                    del curves[key]
+    
+    def clear(self) -> None:
+        """Drop all cached curves and reset statistics"""
+        with self._lock:
+            self._curves = weakref.WeakKeyDictionary()
+            self.hits = 0
+            self.misses = 0
+
+
+yield_curve_cache = YieldCurveCache(settings.yield_curve_cache_size)
+
+
 class YieldCurveService:
     """Service class for yield curve operations"""
     
@@ -492,7 +845,16 @@ class YieldCurveService:
         return curve
     
     def load_yield_curve(self, curve_name: str, analysis_date: date) -> Optional[YieldCurve]:
-        """Load yield curve from database"""
+        """
+        Load yield curve from the process-wide cache, or from the database
+        
+        The returned curve may be shared with other callers and must not be
+        modified; build a new YieldCurve to change rates.
+        """
+        curve = yield_curve_cache.get(self.session, curve_name, analysis_date)
+        if curve is not None:
+            return curve
+        
         curve_model = self.session.query(YieldCurveModel).filter_by(
             curve_name=curve_name,
             analysis_date=analysis_date,
@@ -508,14 +870,85 @@ class YieldCurveService:
             if not rate_record.is_interpolated:  # Only original rates
                 rate_dict[rate_record.maturity_month] = float(rate_record.spot_rate)
         
-        # Create and setup yield curve
-        curve = YieldCurve(curve_name, analysis_date, rate_dict, self.session)
+        # Create and setup yield curve (detached from the session while cached)
+        curve = YieldCurve(curve_name, analysis_date, rate_dict)
         curve.curve_id = curve_model.curve_id
         curve.curve_type = curve_model.curve_type
         curve.currency = curve_model.currency
         
+        yield_curve_cache.put(self.session, curve)
         return curve
     
+    def invalidate_cached_curve(self, curve_name: str, analysis_date: Optional[date] = None) -> None:
+        """Drop a curve changed outside save_to_database from the shared cache"""
+        yield_curve_cache.invalidate(self.session, curve_name, analysis_date)
+    
+    def warm_cache(self, max_curves: Optional[int] = None) -> int:
+        """
+        Load the latest analysis date of every active curve into the cache
+        
+        Returns the number of curves loaded.
+        """
+        max_curves = yield_curve_cache.max_size if max_curves is None else max_curves
+        curve_models = self.session.query(YieldCurveModel).filter_by(is_active=True).order_by(
+            YieldCurveModel.analysis_date.desc()
+        ).all()
+        
+        loaded = set()
+        for curve_model in curve_models:
+            if len(loaded) >= max_curves:
+                break
+            if curve_model.curve_name in loaded:
+                continue
+            try:
+                if self.load_yield_curve(curve_model.curve_name, curve_model.analysis_date):
+                    loaded.add(curve_model.curve_name)
+            except ValueError as e:
+                logger.warning(f"Skipping yield curve {curve_model.curve_name}: {e}")
+        
+        return len(loaded)
+    
+    def generate_scenarios(self, curve_name: str, analysis_date: date,
+                           shocks: List[YieldCurveShock]) -> YieldCurveScenarios:
+        """Shocked grids of a stored curve for a batch of shocks"""
+        curve = self.load_yield_curve(curve_name, analysis_date)
+        if not curve:
+            raise ValueError(f"Yield curve {curve_name} not found")
+        return curve.apply_shocks(shocks)
+    
+    def key_rate_durations(self, cash_flows: List[Tuple[date, Decimal]], curve_name: str,
+                           analysis_date: date, bump_bps: float = 1.0,
+                           spread: float = 0.0) -> Dict[int, float]:
+        """
+        Key rate durations of a cash flow stream at each input maturity
+        
+        Central differences of present value under up and down KEY_RATE
+        bumps, all priced from one scenario array.
+        """
+        curve = self.load_yield_curve(curve_name, analysis_date)
+        if not curve:
+            raise ValueError(f"Yield curve {curve_name} not found")
+        
+        future_flows = [(cf_date, float(cf_amount)) for cf_date, cf_amount in cash_flows
+                        if cf_date > analysis_date]
+        if not future_flows:
+            raise ValueError("No cash flows after the analysis date")
+        
+        pillars = sorted(curve.rate_dict)
+        shocks = ([YieldCurveShock("PARALLEL", 0.0, name="BASE")] +
+                  [YieldCurveShock("KEY_RATE", bump, pillar) for bump in (bump_bps, -bump_bps)
+                   for pillar in pillars])
+        present_values = curve.apply_shocks(shocks).present_values(
+            [cf_date for cf_date, _ in future_flows], [amount for _, amount in future_flows], spread)
+        
+        base_value = present_values[0]
+        up_values = present_values[1:1 + len(pillars)]
+        down_values = present_values[1 + len(pillars):]
+        return {
+            pillar: float((down - up) / (2 * base_value * bump_bps / 10000))
+            for pillar, up, down in zip(pillars, up_values, down_values)
+        }
+    
     def get_available_curves(self, currency: str = None, curve_type: str = None) -> List[Dict[str, Any]]:
         """Get list of available yield curves"""
         query = self.session.query(YieldCurveModel).filter_by(is_active=True)
@@ -546,17 +979,16 @@ class YieldCurveService:
         if not curve:
             raise ValueError(f"Discount curve {discount_curve_name} not found")
         
+        future_flows = [(cf_date, cf_amount) for cf_date, cf_amount in cash_flows
+                        if cf_date > analysis_date]  # Skip past cash flows
+        if not future_flows:
+            return Decimal('0.00')
+        
+        # Discount all cash flow dates in one curve lookup
+        discount_factors = curve.discount_factors(analysis_date, [cf_date for cf_date, _ in future_flows])
+        
         pv = Decimal('0')
-        for cf_date, cf_amount in cash_flows:
-            if cf_date <= analysis_date:
-                continue  # Skip past cash flows
-            
-            # Calculate discount rate
-            discount_rate = curve.zero_rate(analysis_date, cf_date)
-            years_to_maturity = (cf_date - analysis_date).days / 365.25
-            
-            # Present value calculation
-            discount_factor = Decimal(str((1 + discount_rate) ** -years_to_maturity))
-            pv += cf_amount * discount_factor
+        for (_, cf_amount), discount_factor in zip(future_flows, discount_factors):
+            pv += cf_amount * Decimal(str(float(discount_factor)))
         
         return pv.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
\ No newline at end of file
@@ -41,7 +41,12 @@ class CreditMigrationService:
         num_simulations: int = 1000,
         analysis_date: Optional[date] = None,
         period_type: str = "QUARTERLY",
-        debug_mode: bool = False
+        debug_mode: bool = False,
+        seed: Optional[int] = None,
+        num_workers: int = 1,
+        retain_paths: bool = False,
+        correlation_model: str = "CHOLESKY",
+        sampling: str = "PSEUDO"
     ) -> Dict[str, Any]:
         """
         Run credit migration simulation for entire portfolio
@@ -52,6 +57,11 @@ class CreditMigrationService:
             analysis_date: Analysis start date (defaults to today)
             period_type: Period frequency (QUARTERLY, SEMI-ANNUALLY, ANNUALLY)
             debug_mode: Whether to use deterministic random seed
+            seed: Root seed for reproducible results (overrides debug_mode)
+            num_workers: Number of worker processes for simulation chunks
+            retain_paths: Keep every simulated path instead of streaming statistics only
+            correlation_model: CHOLESKY (full pairwise matrix) or FACTOR (industry/issuer factors for large pools)
+            sampling: PSEUDO, SOBOL, ANTITHETIC or IMPORTANCE random numbers
             
         Returns:
             Simulation results dictionary
@@ -78,22 +88,22 @@ class CreditMigrationService:
                 num_sims=num_simulations,
                 debug_mode=debug_mode,
                 collateral_pool=collateral_pool,
-                period=period_type
+                period=period_type,
+                seed=seed,
+                retain_paths=retain_paths,
+                correlation_model=correlation_model,
+                sampling=sampling
             )
             
-            # Run simulations
-            results = []
-            for sim_num in range(num_simulations):
-                logger.debug(f"Running simulation {sim_num + 1}/{num_simulations}")
-                
-                self.credit_migration.run_rating_history(
-                    analysis_date=analysis_date,
-                    collateral_pool=collateral_pool,
-                    period=period_type
-                )
-                
-                if sim_num % 100 == 0:
-                    logger.info(f"Completed {sim_num + 1}/{num_simulations} simulations")
+            # Run all simulations through the vectorized kernel
+            self.credit_migration.run_vectorized_simulation(
+                analysis_date=analysis_date,
+                collateral_pool=collateral_pool,
+                period=period_type,
+                num_sims=num_simulations,
+                num_workers=num_workers
+            )
+            logger.info(f"Completed {num_simulations} simulations")
             
             # Get comprehensive results
             simulation_results = self.credit_migration.get_simulation_results()
@@ -127,7 +137,12 @@ class CreditMigrationService:
         asset_allocations: Dict[str, float],
         num_simulations: int = 1000,
         analysis_date: Optional[date] = None,
-        period_type: str = "QUARTERLY"
+        period_type: str = "QUARTERLY",
+        seed: Optional[int] = None,
+        num_workers: int = 1,
+        retain_paths: bool = False,
+        correlation_model: str = "CHOLESKY",
+        sampling: str = "PSEUDO"
     ) -> Dict[str, Any]:
         """
         Run simulation for specific deal structure with asset allocations
@@ -138,6 +153,11 @@ class CreditMigrationService:
             num_simulations: Number of simulations
             analysis_date: Analysis start date
             period_type: Period frequency
+            seed: Root seed for reproducible results
+            num_workers: Number of worker processes for simulation chunks
+            retain_paths: Keep every simulated path instead of streaming statistics only
+            correlation_model: CHOLESKY (full pairwise matrix) or FACTOR (industry/issuer factors for large pools)
+            sampling: PSEUDO, SOBOL, ANTITHETIC or IMPORTANCE random numbers
             
         Returns:
             Simulation results dictionary
@@ -164,17 +184,22 @@ class CreditMigrationService:
             self.credit_migration.setup(
                 num_sims=num_simulations,
                 collateral_pool=collateral_pool,
-                period=period_type
+                period=period_type,
+                seed=seed,
+                retain_paths=retain_paths,
+                correlation_model=correlation_model,
+                sampling=sampling
             )
             
             # Run simulations with deal collateral
-            for sim_num in range(num_simulations):
-                self.credit_migration.run_rating_history(
-                    analysis_date=analysis_date,
-                    collateral_pool=collateral_pool,
-                    deal_collateral=asset_allocations,
-                    period=period_type
-                )
+            self.credit_migration.run_vectorized_simulation(
+                analysis_date=analysis_date,
+                collateral_pool=collateral_pool,
+                deal_collateral=asset_allocations,
+                period=period_type,
+                num_sims=num_simulations,
+                num_workers=num_workers
+            )
             
             # Get results
             simulation_results = self.credit_migration.get_simulation_results()
@@ -199,6 +224,103 @@ class CreditMigrationService:
         finally:
             self.credit_migration.cleanup()
     
+    def run_multi_deal_simulation(
+        self,
+        portfolio_id: str,
+        deal_allocations: Dict[str, Dict[str, float]],
+        num_simulations: int = 1000,
+        analysis_date: Optional[date] = None,
+        period_type: str = "QUARTERLY",
+        seed: Optional[int] = None,
+        num_workers: int = 1,
+        retain_paths: bool = False,
+        correlation_model: str = "CHOLESKY",
+        sampling: str = "PSEUDO"
+    ) -> Dict[str, Any]:
+        """
+        Run one simulation over the union of several deals' collateral
+        
+        Rating paths are drawn once and projected onto every deal, so shared
+        obligors migrate consistently across deals and the cost does not grow
+        with the number of deals the way repeated deal-specific runs do.
+        
+        Args:
+            portfolio_id: Base portfolio identifier
+            deal_allocations: Dict of deal_id -> (asset_id -> par_amount)
+            num_simulations: Number of simulations
+            analysis_date: Analysis start date
+            period_type: Period frequency
+            seed: Root seed for reproducible results
+            num_workers: Number of worker processes for simulation chunks
+            retain_paths: Keep every simulated path instead of streaming statistics only
+            correlation_model: CHOLESKY (full pairwise matrix) or FACTOR (industry/issuer factors for large pools)
+            sampling: PSEUDO, SOBOL, ANTITHETIC or IMPORTANCE random numbers
+            
+        Returns:
+            Simulation results dictionary keyed by deal
+        """
+        try:
+            logger.info(f"Starting multi-deal simulation for {len(deal_allocations)} deals")
+            
+            if not deal_allocations:
+                raise CLOValidationError("Deal allocations cannot be empty")
+            
+            for deal_id, asset_allocations in deal_allocations.items():
+                if not asset_allocations:
+                    raise CLOValidationError(f"Asset allocations for deal {deal_id} cannot be empty")
+                if sum(asset_allocations.values()) <= 0:
+                    raise CLOValidationError(f"Total asset allocation for deal {deal_id} must be positive")
+            
+            portfolio = self._get_portfolio(portfolio_id)
+            collateral_pool = self._create_collateral_pool(portfolio)
+            
+            if analysis_date is None:
+                analysis_date = date.today()
+            
+            self.credit_migration.setup(
+                num_sims=num_simulations,
+                collateral_pool=collateral_pool,
+                period=period_type,
+                seed=seed,
+                retain_paths=retain_paths,
+                correlation_model=correlation_model,
+                sampling=sampling
+            )
+            
+            deal_results = self.credit_migration.run_universe_simulation(
+                analysis_date=analysis_date,
+                collateral_pool=collateral_pool,
+                deal_holdings=deal_allocations,
+                period=period_type,
+                num_sims=num_simulations,
+                num_workers=num_workers
+            )
+            
+            results = {}
+            for deal_id, deal_engine in deal_results.items():
+                simulation_results = deal_engine.get_simulation_results()
+                simulation_results["asset_allocations"] = deal_allocations[deal_id]
+                simulation_results["total_par_amount"] = sum(deal_allocations[deal_id].values())
+                results[deal_id] = simulation_results
+            
+            logger.info(f"Multi-deal simulation completed for {len(results)} deals over {num_simulations} paths")
+            
+            return {
+                "portfolio_id": portfolio_id,
+                "analysis_date": analysis_date,
+                "num_simulations": num_simulations,
+                "period_type": period_type,
+                "deal_count": len(deal_allocations),
+                "asset_count": len(set().union(*(a.keys() for a in deal_allocations.values()))),
+                "results": results
+            }
+            
+        except Exception as e:
+            logger.error(f"Multi-deal simulation failed: {str(e)}")
+            raise CLOBusinessError(f"Multi-deal simulation failed: {str(e)}") from e
+        finally:
+            self.credit_migration.cleanup()
+    
     def export_simulation_results(
         self,
         format_type: str = "excel",
@@ -10,14 +10,22 @@ from decimal import Decimal
 import json
 from sqlalchemy import text, and_, or_
 from sqlalchemy.exc import IntegrityError
+import numpy as np
 
+from ..core.config import settings
 from ..core.database_config import get_db_session, get_redis
+from ..core.shared_arrays import shared_array_registry
 from ..models.asset import Asset
 from ..models.clo_deal import CLODeal, DealAsset
 from ..models.cash_flow import AssetCashFlow
+from ..models.correlation_matrix import (
+    CorrelationMatrixArtifact, DenseCorrelationMatrix, correlation_matrix_cache
+)
 
 logger = logging.getLogger(__name__)
 
+CORRELATION_MATRIX_KEY = 'correlation_matrix'
+
 class DataIntegrationService:
     """Service for integrating migrated data with operational database"""
     
@@ -155,7 +163,7 @@ class DataIntegrationService:
         existing_asset.updated_at = datetime.now()
     
     def cache_correlation_matrix(self) -> Dict[str, Any]:
-        """Cache correlation matrix in Redis for performance"""
+        """Cache the dense correlation matrix in Redis under a single key"""
         logger.info("Caching correlation matrix in Redis...")
         
         if not self.redis_client:
@@ -163,58 +171,121 @@ class DataIntegrationService:
             return {'success': False, 'error': 'Redis unavailable'}
         
         try:
-            # Read correlation matrix from migrated database
             with get_db_session('correlations') as session:
-                correlations = session.execute(text("""
-                    SELECT asset1_id, asset2_id, correlation_value 
-                    FROM asset_correlations 
-                    LIMIT 10000
-                """)).fetchall()
-                
-                logger.info(f"Caching {len(correlations)} correlation pairs...")
-                
-                # Cache individual correlation pairs
-                pipe = self.redis_client.pipeline()
-                for corr in correlations:
-                    key = f"corr:{corr[0]}:{corr[1]}"
-                    pipe.setex(key, 3600, str(corr[2]))  # 1 hour TTL
-                
-                pipe.execute()
-                
-                # Cache matrix metadata
-                matrix_info = {
-                    'size': '488x488',
-                    'total_pairs': len(correlations),
-                    'cached_at': datetime.now().isoformat()
-                }
-                self.redis_client.setex(
-                    'correlation_matrix_info', 
-                    3600, 
-                    json.dumps(matrix_info)
-                )
-                
-                logger.info("✅ Correlation matrix cached successfully")
-                return {'success': True, 'cached_pairs': len(correlations)}
+                matrix = CorrelationMatrixArtifact.load(session)
+            if matrix is None:
+                matrix = self.build_correlation_matrix_artifact()
+            
+            self._cache_matrix_in_redis(matrix)
+            matrix = self._share_matrix(matrix)
+            
+            logger.info(f"✅ Correlation matrix v{matrix.version} cached successfully")
+            return {'success': True, 'cached_pairs': matrix.pair_count, 'version': matrix.version}
         
         except Exception as e:
             error_msg = f"Error caching correlation matrix: {e}"
             logger.error(error_msg)
             return {'success': False, 'error': error_msg}
     
-    def get_correlation(self, asset1_id: str, asset2_id: str) -> Optional[Decimal]:
-        """Get correlation between two assets (from cache or database)"""
+    def build_correlation_matrix_artifact(self, dtype: str = 'float64') -> DenseCorrelationMatrix:
+        """Rebuild the dense matrix from asset_correlations and store it as a new version"""
+        with get_db_session('correlations') as session:
+            pairs = session.execute(text("""
+                SELECT asset1_id, asset2_id, correlation_value 
+                FROM asset_correlations
+            """)).fetchall()
+            
+            version = CorrelationMatrixArtifact.next_version(session)
+            matrix = DenseCorrelationMatrix.from_pairs(pairs, dtype=np.dtype(dtype), version=version)
+            session.add(CorrelationMatrixArtifact.from_matrix(matrix, source_rows=len(pairs)))
+        
+        logger.info(f"Built correlation matrix v{version}: {matrix.size}x{matrix.size} "
+                    f"{dtype} from {len(pairs)} pairs")
+        return self._share_matrix(matrix)
+    
+    def get_correlation_matrix(self) -> Optional[DenseCorrelationMatrix]:
+        """Current correlation matrix from shared memory, the in-process copy, Redis or PostgreSQL"""
+        shared = shared_array_registry.attach(CORRELATION_MATRIX_KEY)
+        matrix = correlation_matrix_cache.get()
+        if shared is not None:
+            if matrix is None or matrix.version != shared.version:
+                matrix = DenseCorrelationMatrix.from_shared(shared)
+                correlation_matrix_cache.put(matrix)
+            return matrix
+        if matrix is not None:
+            return matrix
         
-        # Try cache first
         if self.redis_client:
             try:
-                key = f"corr:{asset1_id}:{asset2_id}"
-                cached_value = self.redis_client.get(key)
-                if cached_value:
-                    return Decimal(cached_value.decode('utf-8'))
+                cached_data = self.redis_client.get(CORRELATION_MATRIX_KEY)
+                if cached_data:
+                    return self._share_matrix(DenseCorrelationMatrix.from_bytes(cached_data))
             except Exception as e:
-                logger.warning(f"Redis cache lookup failed: {e}")
+                logger.warning(f"Redis correlation matrix lookup failed: {e}")
         
-        # Fallback to database
+        try:
+            with get_db_session('correlations') as session:
+                matrix = CorrelationMatrixArtifact.load(session)
+            if matrix is None:
+                return self.build_correlation_matrix_artifact()
+        except Exception as e:
+            logger.error(f"Error loading correlation matrix: {e}")
+            return None
+        
+        if self.redis_client:
+            try:
+                self._cache_matrix_in_redis(matrix)
+            except Exception as e:
+                logger.warning(f"Redis correlation matrix cache failed: {e}")
+        return self._share_matrix(matrix)
+    
+    def _share_matrix(self, matrix: DenseCorrelationMatrix) -> DenseCorrelationMatrix:
+        """
+        Publish matrix to the other worker processes unless a newer version is live
+        
+        Returns the memory-mapped copy when sharing succeeds, so this process
+        does not keep a private copy as well.
+        """
+        try:
+            live_version = shared_array_registry.current_version(CORRELATION_MATRIX_KEY)
+            if live_version is None or live_version < matrix.version:
+                shared_array_registry.publish(CORRELATION_MATRIX_KEY, matrix.values, matrix.version,
+                                              {'asset_ids': matrix.asset_ids})
+            shared = shared_array_registry.attach(CORRELATION_MATRIX_KEY)
+            if shared is not None and shared.version >= matrix.version:
+                matrix = DenseCorrelationMatrix.from_shared(shared)
+        except Exception as e:
+            logger.warning(f"Sharing correlation matrix v{matrix.version} failed: {e}")
+        
+        correlation_matrix_cache.put(matrix)
+        return matrix
+    
+    def _cache_matrix_in_redis(self, matrix: DenseCorrelationMatrix):
+        """Store the serialized matrix and its metadata in Redis"""
+        pipe = self.redis_client.pipeline()
+        pipe.setex(CORRELATION_MATRIX_KEY, settings.correlation_cache_timeout, matrix.to_bytes())
+        pipe.setex(
+            'correlation_matrix_info',
+            settings.correlation_cache_timeout,
+            json.dumps({
+                'version': matrix.version,
+                'size': f"{matrix.size}x{matrix.size}",
+                'dtype': str(matrix.dtype),
+                'total_pairs': matrix.pair_count,
+                'cached_at': datetime.now().isoformat()
+            })
+        )
+        pipe.execute()
+    
+    def get_correlation(self, asset1_id: str, asset2_id: str) -> Optional[Decimal]:
+        """Get correlation between two assets from the dense correlation matrix"""
+        
+        matrix = self.get_correlation_matrix()
+        if matrix is not None:
+            value = matrix.get(asset1_id, asset2_id)
+            return Decimal(str(value)) if value is not None else None
+        
+        # Fallback to database when no matrix could be loaded
         try:
             with get_db_session('correlations') as session:
                 result = session.execute(text("""
@@ -0,0 +1,156 @@
+"""
+Fair Value Service
+
+Prices whole portfolios of assets against yield curves in one pass.
+Assets are grouped by discount curve and each group is discounted as an
+(assets x cash-flow dates) matrix with spread-adjusted discount factors,
+using the same convention as Asset.update_fair_value.
+"""
+
+from typing import Dict, List, Optional, Iterable
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from collections import defaultdict
+import logging
+import numpy as np
+from sqlalchemy import inspect, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models.asset import Asset
+from ..models.yield_curve import YieldCurveService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FairValueResult:
+    """Pricing outcome for one asset"""
+    blkrock_id: str
+    fair_value: Optional[Decimal] = None
+    discount_curve: Optional[str] = None
+    credit_spread_bps: Optional[int] = None
+    cash_flow_count: int = 0
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class FairValueService:
+    """Vectorized fair value pricing for portfolios of assets"""
+
+    def __init__(self, session: Session, yield_curve_service: Optional[YieldCurveService] = None):
+        self.session = session
+        self.yield_curve_service = yield_curve_service or YieldCurveService(session)
+
+    def price_assets(self, assets: Iterable[Asset], pricing_date: Optional[date] = None,
+                     curve_name: Optional[str] = None, credit_spread_bps: Optional[int] = None,
+                     write_back: bool = True) -> Dict[str, FairValueResult]:
+        """
+        Price assets and optionally write back their fair values
+
+        Curve and spread default per asset exactly as in update_fair_value.
+        Each curve is loaded once and every asset on it is discounted in a
+        single matrix operation. Failures are reported per asset in the
+        result instead of aborting the batch.
+
+        With write_back, priced assets get fair_value, fair_value_date,
+        discount_curve_name and pricing_spread_bps set, and persistent assets
+        are written in one bulk UPDATE. Committing is left to the caller.
+        """
+        pricing_date = pricing_date or date.today()
+        results: Dict[str, FairValueResult] = {}
+        groups: Dict[str, List[tuple]] = defaultdict(list)
+
+        for asset in assets:
+            result = FairValueResult(blkrock_id=asset.blkrock_id)
+            results[asset.blkrock_id] = result
+            try:
+                result.discount_curve = curve_name or asset._select_default_discount_curve()
+                result.credit_spread_bps = (credit_spread_bps if credit_spread_bps is not None
+                                            else asset._estimate_credit_spread())
+                cash_flows = [(cf_date, cf_amount) for cf_date, cf_amount
+                              in asset._generate_cash_flows(pricing_date) if cf_date > pricing_date]
+            except Exception as e:
+                result.error = f"Cash flow generation failed: {e}"
+                continue
+
+            if not cash_flows:
+                result.error = "No future cash flows"
+                continue
+            result.cash_flow_count = len(cash_flows)
+            groups[result.discount_curve].append((asset, result, cash_flows))
+
+        for group_curve, members in groups.items():
+            self._price_group(group_curve, members, pricing_date)
+
+        if write_back:
+            self._write_back(
+                [(asset, result) for members in groups.values() for asset, result, _ in members
+                 if result.success],
+                pricing_date
+            )
+
+        failures = sum(1 for result in results.values() if not result.success)
+        if failures:
+            logger.warning(f"Fair value pricing failed for {failures} of {len(results)} assets")
+        return results
+
+    def _price_group(self, curve_name: str, members: List[tuple], pricing_date: date) -> None:
+        """Discount every asset on one curve as an (assets x dates) matrix"""
+        try:
+            curve = self.yield_curve_service.load_yield_curve(curve_name, pricing_date)
+        except Exception as e:
+            curve, error = None, f"Discount curve {curve_name} failed to load: {e}"
+        else:
+            error = f"Discount curve {curve_name} not found"
+        if curve is None:
+            for _, result, _ in members:
+                result.error = error
+            return
+
+        cf_dates = sorted({cf_date for _, _, cash_flows in members for cf_date, _ in cash_flows})
+        date_index = {cf_date: k for k, cf_date in enumerate(cf_dates)}
+
+        amounts = np.zeros((len(members), len(cf_dates)))
+        for row, (_, _, cash_flows) in enumerate(members):
+            for cf_date, cf_amount in cash_flows:
+                amounts[row, date_index[cf_date]] += float(cf_amount)
+
+        spreads = np.array([result.credit_spread_bps / 10000 for _, result, _ in members])
+        years = np.array([(cf_date - pricing_date).days for cf_date in cf_dates]) / 365.25
+        zero_rates = curve.zero_rates(pricing_date, cf_dates)
+
+        discount_factors = (1 + zero_rates[None, :] + spreads[:, None]) ** -years[None, :]
+        present_values = np.einsum('ij,ij->i', amounts, discount_factors)
+
+        for (_, result, _), present_value in zip(members, present_values):
+            if np.isfinite(present_value):
+                result.fair_value = Decimal(str(float(present_value))).quantize(Decimal('0.01'))
+            else:
+                result.error = "Non-finite present value"
+
+    def _write_back(self, priced: List[tuple], pricing_date: date) -> None:
+        """Set fair values on the assets and bulk update the persistent ones"""
+        rows = []
+        for asset, result in priced:
+            values = {
+                'fair_value': result.fair_value,
+                'fair_value_date': pricing_date,
+                'discount_curve_name': result.discount_curve,
+                'pricing_spread_bps': result.credit_spread_bps,
+            }
+            if inspect(asset).persistent:
+                # Written by the bulk UPDATE below, so keep the instance clean
+                for name, value in values.items():
+                    set_committed_value(asset, name, value)
+                rows.append({'blkrock_id': asset.blkrock_id, **values})
+            else:
+                for name, value in values.items():
+                    setattr(asset, name, value)
+
+        if rows:
+            self.session.execute(update(Asset), rows)
@@ -21,6 +21,7 @@ from ..models.incentive_fee import (
     FeePaymentTransaction,
     IRRCalculationHistory
 )
+from ..utils.financial_utils import FinancialUtils
 
 
 class IncentiveFeeService:
@@ -133,6 +134,9 @@ class IncentiveFee:
         self.cls_irr: List[float] = []                     # clsIRR()
         self.cls_fee_paid: List[float] = []                # clsFeePaid()
         
+        # Period -> number of sub payments whose XIRR is still to be solved
+        self._pending_irr: Dict[int, int] = {}
+        
         # Additional tracking for database persistence
         self.fee_structure_id: Optional[int] = None
         self._is_setup: bool = False
@@ -326,6 +330,9 @@ class IncentiveFee:
         self.cls_cum_dicounted_sub_payments += discounted_current_payment
         
         # VBA: clsSubPaymentsDict.Add clsCurrDate, clsCurrSubPayments
+        if self.cls_curr_date in self.cls_sub_payments_dict:
+            # Overwriting a payment changes earlier histories, so settle them first
+            self._resolve_pending_irr()
         self.cls_sub_payments_dict[self.cls_curr_date] = self.cls_curr_sub_payments
         
         # VBA XIRR calculation
@@ -338,16 +345,10 @@ class IncentiveFee:
         # If VarType(lValue) = vbDouble Then
         #     clsIRR(clsPeriod) = CDbl(lValue)
         # End If
-        l_dates = list(self.cls_sub_payments_dict.keys())
-        l_values = list(self.cls_sub_payments_dict.values())
-        
-        try:
-            irr_value = self._calculate_xirr(l_values, l_dates)
-            if irr_value is not None and self.cls_period < len(self.cls_irr):
-                self.cls_irr[self.cls_period] = irr_value
-        except:
-            # If XIRR calculation fails, leave as 0
-            pass
+        # Deferred until cls_irr is read: the period only records how much of
+        # the payment history its XIRR covers (see _resolve_pending_irr)
+        if self.cls_period < len(self._cls_irr):
+            self._pending_irr[self.cls_period] = len(self.cls_sub_payments_dict)
         
         # VBA: clsPeriod = clsPeriod + 1
         self.cls_period += 1
@@ -357,6 +358,42 @@ class IncentiveFee:
         self.cls_curr_sub_payments = 0.0
         self.cls_curr_incetive_payments = 0.0
     
+    @property
+    def cls_irr(self) -> List[float]:
+        """clsIRR() by period; XIRRs of rolled-forward periods are solved on first access"""
+        self._resolve_pending_irr()
+        return self._cls_irr
+    
+    @cls_irr.setter
+    def cls_irr(self, values: List[float]) -> None:
+        self._cls_irr = values
+        self._pending_irr = {}
+    
+    def _resolve_pending_irr(self) -> None:
+        """
+        Solve the XIRR of every pending period in one batch
+        
+        Each period's XIRR covers the sub payments made up to its roll-forward,
+        i.e. a prefix of clsSubPaymentsDict. Periods without a solution keep 0,
+        as when Application.Xirr returns an error value.
+        """
+        if not self._pending_irr:
+            return
+        
+        pending, self._pending_irr = self._pending_irr, {}
+        l_dates = list(self.cls_sub_payments_dict.keys())
+        l_values = list(self.cls_sub_payments_dict.values())
+        
+        periods = list(pending.keys())
+        rates, converged = FinancialUtils.xirr_batch(
+            [l_values[:pending[period]] for period in periods],
+            [l_dates[:pending[period]] for period in periods],
+            tolerance=1e-10
+        )
+        for period, rate, ok in zip(periods, rates, converged):
+            if ok:
+                self._cls_irr[period] = float(rate)
+    
     def fee_paid(self) -> float:
         """
         VBA FeePaid() function equivalent
@@ -405,64 +442,15 @@ class IncentiveFee:
     
     def _calculate_xirr(self, cash_flows: List[float], dates: List[date], guess: float = 0.1) -> Optional[float]:
         """
-        Excel XIRR function equivalent using Newton-Raphson method
+        Excel XIRR function equivalent (actual/365 from the first date)
         
-        This implements the same XIRR calculation as Excel's Application.Xirr function
+        Returns None where Application.Xirr would return an error value.
         """
         if len(cash_flows) != len(dates) or len(cash_flows) < 2:
             return None
         
-        # Sort by dates
-        sorted_pairs = sorted(zip(dates, cash_flows))
-        dates = [pair[0] for pair in sorted_pairs]
-        cash_flows = [pair[1] for pair in sorted_pairs]
-        
-        # Calculate days from first date
-        base_date = dates[0]
-        days = [(d - base_date).days for d in dates]
-        
-        # Newton-Raphson method for XIRR
-        rate = guess
-        max_iterations = 100
-        tolerance = 1e-6
-        
-        for _ in range(max_iterations):
-            # Calculate NPV and its derivative
-            npv = 0.0
-            dnpv = 0.0
-            
-            for i, (cf, day) in enumerate(zip(cash_flows, days)):
-                if rate == -1:
-                    return None  # Division by zero
-                
-                factor = (1 + rate) ** (day / 365.0)
-                npv += cf / factor
-                
-                if day > 0:
-                    dnpv -= cf * day / (365.0 * factor * (1 + rate))
-            
-            # Check convergence
-            if abs(npv) < tolerance:
-                return rate
-            
-            # Newton-Raphson update
-            if abs(dnpv) < tolerance:
-                break
-            
-            new_rate = rate - npv / dnpv
-            
-            # Bounds checking to prevent unreasonable rates
-            if new_rate < -0.99:
-                new_rate = -0.99
-            elif new_rate > 10:
-                new_rate = 10
-            
-            if abs(new_rate - rate) < tolerance:
-                return new_rate
-            
-            rate = new_rate
-        
-        return None
+        rates, converged = FinancialUtils.xirr_batch([cash_flows], [dates], guess, tolerance=1e-10)
+        return float(rates[0]) if converged[0] else None
     
     def save_to_database(self, deal_id: str, fee_structure_name: str) -> int:
         """Save incentive fee data to database"""
@@ -9,11 +9,16 @@ from decimal import Decimal, ROUND_HALF_UP
 import logging
 import numpy as np
 from scipy import stats
-from scipy.linalg import eigvals
+from scipy.linalg import eigvalsh
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 import pandas as pd
 
 from sqlalchemy.orm import Session
+from ..core.config import settings
 from ..core.database_config import db_config
+from ..models.asset import AssetHistory
+from ..models.portfolio_var import PortfolioVaREngine, VaRPositions, VaRResult
 from ..services.data_integration import DataIntegrationService
 
 logger = logging.getLogger(__name__)
@@ -21,8 +26,18 @@ logger = logging.getLogger(__name__)
 class RiskAnalyticsService:
     """Service for risk analytics and portfolio risk calculations"""
     
-    def __init__(self):
+    CLUSTER_CORRELATION_THRESHOLD = 0.7
+    
+    # Loss distribution buckets as fractions of portfolio value
+    LOSS_BUCKETS = ['0-1%', '1-3%', '3-5%', '5%+']
+    LOSS_BUCKET_EDGES = [0.01, 0.03, 0.05]
+    
+    # AssetHistory property holding stored asset valuations
+    HISTORICAL_VALUE_PROPERTY = 'market_value'
+    
+    def __init__(self, db_session: Optional[Session] = None):
         self.integration_service = DataIntegrationService()
+        self.db = db_session
         
     def calculate_portfolio_risk_metrics(
         self,
@@ -101,29 +116,31 @@ class RiskAnalyticsService:
         logger.info(f"Building correlation matrix for {len(asset_ids)} assets")
         
         try:
-            # Build correlation matrix from migrated data
-            correlation_pairs = []
-            matrix = np.zeros((len(asset_ids), len(asset_ids)))
-            
-            for i, asset1 in enumerate(asset_ids):
-                for j, asset2 in enumerate(asset_ids):
-                    if i == j:
-                        matrix[i][j] = 1.0
-                    else:
-                        correlation = self.integration_service.get_correlation(asset1, asset2)
-                        matrix[i][j] = correlation if correlation is not None else 0.0
+            # Extract the requested assets from the cached dense matrix in one indexing step
+            dense = self.integration_service.get_correlation_matrix()
+            if dense is not None:
+                matrix = dense.submatrix(asset_ids, missing=0.0).astype(np.float64, copy=False)
+            else:
+                logger.warning("Correlation matrix unavailable, assuming uncorrelated assets")
+                matrix = np.eye(len(asset_ids))
+            
+            # Source pairs may differ by direction; average them so the matrix is symmetric
+            matrix = (matrix + matrix.T) / 2
             
             # Calculate matrix properties
-            eigenvalues = eigvals(matrix).real
-            condition_number = np.max(eigenvalues) / np.min(eigenvalues) if np.min(eigenvalues) > 0 else float('inf')
+            eigenvalues = eigvalsh(matrix)
+            condition_number = eigenvalues[-1] / eigenvalues[0] if len(eigenvalues) and eigenvalues[0] > 0 else float('inf')
             
             # Calculate statistics
             upper_triangle = matrix[np.triu_indices_from(matrix, k=1)]
-            avg_correlation = float(np.mean(upper_triangle))
-            max_correlation = float(np.max(upper_triangle))
-            min_correlation = float(np.min(upper_triangle))
+            if upper_triangle.size:
+                avg_correlation = float(np.mean(upper_triangle))
+                max_correlation = float(np.max(upper_triangle))
+                min_correlation = float(np.min(upper_triangle))
+            else:
+                avg_correlation = max_correlation = min_correlation = 0.0
             
-            # Identify correlation clusters (simplified)
+            # Identify clusters of highly correlated assets
             clusters = self._identify_correlation_clusters(matrix, asset_ids)
             
             return {
@@ -243,7 +260,7 @@ class RiskAnalyticsService:
                 'worst_case_loss': max(losses),
                 'best_case_loss': min(losses),
                 'median_loss': np.median(losses),
-                'loss_distribution': self._calculate_loss_distribution(losses)
+                'loss_distribution': self._calculate_loss_distribution(losses, base_portfolio_value)
             }
             
             # Rank scenarios by severity
@@ -656,9 +673,27 @@ class RiskAnalyticsService:
         return {'level': level, 'factors': risk_factors}
     
     def _identify_correlation_clusters(self, matrix: np.ndarray, asset_ids: List[str]) -> List[List[str]]:
-        """Identify correlation clusters (simplified)"""
-        # Simplified clustering - in reality would use proper clustering algorithms
-        return []
+        """
+        Identify correlation clusters
+        
+        Assets are linked when their pairwise correlation is at least
+        CLUSTER_CORRELATION_THRESHOLD; clusters are the connected groups of
+        two or more assets, largest first.
+        """
+        n = len(asset_ids)
+        if n < 2:
+            return []
+        
+        rows, cols = np.triu_indices(n, k=1)
+        linked = matrix[rows, cols] >= self.CLUSTER_CORRELATION_THRESHOLD
+        graph = coo_matrix((np.ones(int(linked.sum())), (rows[linked], cols[linked])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        
+        order = np.argsort(labels, kind='stable')
+        sizes = np.bincount(labels)
+        groups = np.split(np.asarray(asset_ids, dtype=object)[order], np.cumsum(sizes)[:-1])
+        clusters = [group.tolist() for group in groups if len(group) > 1]
+        return sorted(clusters, key=len, reverse=True)
     
     def _get_portfolio_value(self, deal_id: str) -> float:
         """Get total portfolio value"""
@@ -689,41 +724,116 @@ class RiskAnalyticsService:
             'sector_impacts': {}
         }
     
-    def _calculate_loss_distribution(self, losses: List[float]) -> Dict[str, int]:
-        """Calculate loss distribution buckets"""
-        buckets = {'0-1%': 0, '1-3%': 0, '3-5%': 0, '5%+': 0}
-        # Implementation would categorize losses into buckets
-        return buckets
+    def _calculate_loss_distribution(self, losses: Any, portfolio_value: Optional[float] = None) -> Dict[str, int]:
+        """
+        Count losses in percentage-of-portfolio buckets
+        
+        Losses are amounts when portfolio_value is given, otherwise fractions
+        of the portfolio. Gains fall into the lowest bucket.
+        """
+        fractions = np.asarray(losses, dtype=float)
+        if portfolio_value:
+            fractions = fractions / portfolio_value
+        counts = np.bincount(np.searchsorted(self.LOSS_BUCKET_EDGES, fractions, side='right'),
+                             minlength=len(self.LOSS_BUCKETS))
+        return dict(zip(self.LOSS_BUCKETS, counts.tolist()))
+    
+    def _build_var_engine(self, deal_id: str) -> PortfolioVaREngine:
+        """Loss model for the deal's positions, correlated through the cached correlation matrix"""
+        positions = VaRPositions.from_assets(self._get_portfolio_assets(deal_id))
+        dense = self.integration_service.get_correlation_matrix()
+        correlation = dense.submatrix(positions.asset_ids) if dense is not None else None
+        return PortfolioVaREngine(positions, correlation, seed=settings.var_random_seed)
     
-    def _calculate_monte_carlo_var(self, deal_id, confidence_level, time_horizon_days, portfolio_value):
-        """Calculate Monte Carlo VaR"""
-        # Mock Monte Carlo calculation
-        var_amount = portfolio_value * 0.025
+    def _var_output(self, result: VaRResult, portfolio_value: float, assumptions: List[str]) -> Dict[str, Any]:
+        details = result.details()
+        if result.losses is not None:
+            details['loss_distribution'] = self._calculate_loss_distribution(result.losses, portfolio_value)
         return {
-            'var': var_amount,
-            'expected_shortfall': var_amount * 1.4,
-            'details': {'simulations': 10000, 'distribution': 'normal'},
-            'assumptions': ['Normal distribution', 'Constant volatility']
+            'var': result.var,
+            'expected_shortfall': result.expected_shortfall,
+            'details': details,
+            'assumptions': assumptions
         }
     
+    def _calculate_monte_carlo_var(self, deal_id, confidence_level, time_horizon_days, portfolio_value):
+        """Calculate Monte Carlo VaR from correlated default and spread shocks"""
+        engine = self._build_var_engine(deal_id)
+        result = engine.monte_carlo(
+            confidence_level, time_horizon_days / 365.0, settings.var_simulation_paths,
+            batch_size=settings.var_batch_size, num_workers=settings.var_num_workers
+        )
+        return self._var_output(result, portfolio_value, [
+            'Gaussian copula over the asset correlation matrix',
+            'Rating-based default probabilities',
+            'Spread moves driven by the same latent factors as defaults'
+        ])
+    
     def _calculate_parametric_var(self, deal_id, confidence_level, time_horizon_days, portfolio_value):
-        """Calculate Parametric VaR"""
-        # Mock parametric calculation
-        var_amount = portfolio_value * 0.022
-        return {
-            'var': var_amount,
-            'expected_shortfall': var_amount * 1.3,
-            'details': {'volatility': 0.18, 'z_score': stats.norm.ppf(confidence_level)},
-            'assumptions': ['Normal distribution', 'Linear price sensitivity']
-        }
+        """Calculate Parametric VaR from the loss model's mean and covariance"""
+        engine = self._build_var_engine(deal_id)
+        result = engine.parametric(confidence_level, time_horizon_days / 365.0)
+        output = self._var_output(result, portfolio_value, [
+            'Normal distribution of portfolio losses',
+            'Asset loss dependence given by the asset correlation matrix'
+        ])
+        output['details']['z_score'] = float(stats.norm.ppf(confidence_level))
+        return output
     
     def _calculate_historical_var(self, deal_id, confidence_level, time_horizon_days, portfolio_value):
-        """Calculate Historical VaR"""
-        # Mock historical calculation
-        var_amount = portfolio_value * 0.028
-        return {
-            'var': var_amount,
-            'expected_shortfall': var_amount * 1.2,
-            'details': {'historical_periods': 252, 'data_source': 'historical_returns'},
-            'assumptions': ['Historical patterns repeat', 'No regime changes']
-        }
\ No newline at end of file
+        """Calculate Historical VaR from the deal's loss history"""
+        losses = self._get_historical_losses(deal_id, time_horizon_days)
+        if losses is None:
+            raise ValueError(f"Historical loss data unavailable for deal {deal_id}: every position "
+                             f"needs stored {self.HISTORICAL_VALUE_PROPERTY} history covering "
+                             f"{time_horizon_days} days")
+        
+        result = PortfolioVaREngine.from_losses(losses, confidence_level, portfolio_value)
+        return self._var_output(result, portfolio_value, ['Historical patterns repeat', 'No regime changes'])
+    
+    def _get_historical_losses(self, deal_id: str, time_horizon_days: int) -> Optional[np.ndarray]:
+        """
+        Losses of the current positions over past windows of time_horizon_days
+        
+        Each asset's stored market values give its value change over every
+        window; the changes are applied to the asset's current balance.
+        Returns None unless every position has a valuation history covering
+        at least one window.
+        """
+        assets = self._get_portfolio_assets(deal_id)
+        asset_ids = [str(asset['asset_id']) for asset in assets]
+        balances = np.array([float(asset['balance']) for asset in assets])
+        
+        if self.db is not None:
+            history = self._load_valuation_history(self.db, asset_ids)
+        else:
+            with db_config.get_db_session('postgresql') as session:
+                history = self._load_valuation_history(session, asset_ids)
+        
+        if history.empty or set(history.columns) != set(asset_ids):
+            return None
+        
+        # Daily calendar, carrying the last valuation over non-valuation days
+        values = history[asset_ids].resample('D').last().ffill().dropna()
+        returns = (values.shift(-time_horizon_days) / values - 1.0).dropna()
+        if returns.empty:
+            return None
+        return -(returns.to_numpy() @ balances)
+    
+    def _load_valuation_history(self, session: Session, asset_ids: List[str]) -> pd.DataFrame:
+        """Stored market values as a date x asset frame"""
+        rows = session.query(
+            AssetHistory.history_date, AssetHistory.blkrock_id, AssetHistory.property_value
+        ).filter(
+            AssetHistory.blkrock_id.in_(asset_ids),
+            AssetHistory.property_name == self.HISTORICAL_VALUE_PROPERTY
+        ).all()
+        
+        frame = pd.DataFrame(rows, columns=['history_date', 'asset_id', 'value'])
+        frame['value'] = pd.to_numeric(frame['value'], errors='coerce')
+        frame = frame.dropna()
+        frame = frame[frame['value'] > 0]
+        if frame.empty:
+            return pd.DataFrame()
+        frame['history_date'] = pd.to_datetime(frame['history_date'])
+        return frame.pivot_table(index='history_date', columns='asset_id', values='value', aggfunc='last')
@@ -12,14 +12,24 @@ import json
 from sqlalchemy.orm import Session
 from ..core.database_config import db_config
 from ..services.data_integration import DataIntegrationService
+from ..services.waterfall_service import WaterfallService
 
 logger = logging.getLogger(__name__)
 
 class ScenarioService:
     """Service for scenario analysis and management"""
     
+    # Tranche groups reported in waterfall impacts
+    WATERFALL_IMPACT_GROUPS = {
+        'senior_impact': ('A1', 'A2'),
+        'mezzanine_impact': ('B',),
+        'subordinate_impact': ('C',),
+        'equity_impact': ('EQ',)
+    }
+    
     def __init__(self):
         self.integration_service = DataIntegrationService()
+        self._waterfall_service: Optional[WaterfallService] = None
         
     def create_scenario(
         self,
@@ -503,18 +513,38 @@ class ScenarioService:
         deal_ids: List[str],
         scenario_params: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """Analyze waterfall impacts under scenario"""
-        # Mock waterfall analysis
-        return [
-            {
-                'deal_id': deal_id,
-                'senior_impact': 0,
-                'mezzanine_impact': -5.2,
-                'subordinate_impact': -15.8,
-                'equity_impact': -35.0
-            }
-            for deal_id in deal_ids
-        ]
+        """
+        Analyze waterfall impacts under scenario
+        
+        Runs the base and shocked available funds through each deal's
+        waterfall in one vectorized pass and reports the percentage change
+        in payments to each tranche group.
+        """
+        if self._waterfall_service is None:
+            self._waterfall_service = WaterfallService()
+        
+        shock_factor = self._calculate_scenario_shock_factor(scenario_params)
+        impacts = []
+        
+        for deal_id in deal_ids:
+            base_waterfall = self._waterfall_service._get_base_waterfall(deal_id)
+            if not base_waterfall['available']:
+                impacts.append({'deal_id': deal_id, 'base_waterfall_available': False,
+                                'message': base_waterfall['message']})
+                continue
+            base_funds = float(base_waterfall['total_available_funds'])
+            result = self._waterfall_service.calculate_waterfall_scenarios(
+                deal_id, [base_funds, base_funds * (1 - shock_factor)]
+            )
+            
+            impact = {'deal_id': deal_id, 'base_waterfall_available': True}
+            for group, tranche_ids in self.WATERFALL_IMPACT_GROUPS.items():
+                columns = [k for k, t in enumerate(result.tranche_ids) if t in tranche_ids]
+                base_paid, scenario_paid = result.tranche_paid[:, columns].sum(axis=1)
+                impact[group] = round(float((scenario_paid - base_paid) / base_paid * 100), 1) if base_paid else 0.0
+            impacts.append(impact)
+        
+        return impacts
     
     def _generate_key_findings(
         self,
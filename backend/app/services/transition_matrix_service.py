@@ -0,0 +1,196 @@
+"""
+Transition Matrix Service
+
+Derives rating transition matrices for any period length from one annual
+matrix. Whole years are powers of the annual matrix itself; fractions of a
+year come from the continuous-time generator (regularized matrix logarithm),
+computed once per annual matrix. Period matrices, cumulative simulation
+thresholds and multi-period rating distributions are cached on top of them.
+"""
+
+from typing import Dict, Optional, Union
+from collections import OrderedDict
+import threading
+import logging
+import numpy as np
+from scipy.linalg import expm, logm
+
+logger = logging.getLogger(__name__)
+
+
+class TransitionMatrixService:
+    """Cached period transition matrices derived from an annual matrix and its generator"""
+
+    MAX_SHARED_INSTANCES = 32
+
+    _instances: "OrderedDict[bytes, TransitionMatrixService]" = OrderedDict()
+    _instances_lock = threading.Lock()
+
+    def __init__(self, annual_matrix: np.ndarray):
+        matrix = np.array(annual_matrix, dtype=float)
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+            raise ValueError("Annual transition matrix must be square")
+        if np.any(matrix < 0) or not np.allclose(matrix.sum(axis=1), 1.0):
+            raise ValueError("Annual transition matrix rows must be probabilities summing to 1")
+
+        self.annual_matrix = matrix
+        self.annual_matrix.setflags(write=False)
+        self.num_ratings = matrix.shape[0]
+        self.generator = self._compute_generator(matrix)
+        self.generator.setflags(write=False)
+        self._period_matrices: Dict[int, np.ndarray] = {}
+        self._cumulative_matrices: Dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_matrix(cls, annual_matrix: np.ndarray) -> "TransitionMatrixService":
+        """
+        Return the shared service for an annual matrix
+
+        Instances are keyed by the matrix contents, so every engine using the
+        same annual matrix reuses one generator and its period caches. The
+        least recently used instances are dropped beyond MAX_SHARED_INSTANCES.
+        """
+        matrix = np.ascontiguousarray(annual_matrix, dtype=float)
+        key = matrix.shape[0].to_bytes(4, "little") + matrix.tobytes()
+
+        with cls._instances_lock:
+            service = cls._instances.get(key)
+            if service is not None:
+                cls._instances.move_to_end(key)
+                return service
+
+        service = cls(matrix)
+        with cls._instances_lock:
+            service = cls._instances.setdefault(key, service)
+            cls._instances.move_to_end(key)
+            while len(cls._instances) > cls.MAX_SHARED_INSTANCES:
+                cls._instances.popitem(last=False)
+        return service
+
+    @classmethod
+    def clear_shared_instances(cls) -> None:
+        """Drop all shared instances"""
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    @staticmethod
+    def _compute_generator(annual_matrix: np.ndarray) -> np.ndarray:
+        """
+        Annual generator via the matrix logarithm
+
+        The principal logarithm of an empirical matrix can have negative
+        off-diagonal rates. These are zeroed and the diagonal reset so each
+        row sums to zero (diagonal adjustment), which keeps every expm of the
+        generator a valid transition matrix.
+        """
+        generator = logm(annual_matrix)
+        if np.iscomplexobj(generator):
+            if np.max(np.abs(generator.imag)) > 1e-8:
+                raise ValueError("Annual transition matrix has no real generator")
+            generator = generator.real
+        if not np.all(np.isfinite(generator)):
+            raise ValueError("Annual transition matrix has no real generator")
+
+        generator = np.array(generator, dtype=float)
+        np.fill_diagonal(generator, 0.0)
+        negative = generator < 0
+        if np.any(negative):
+            logger.debug(f"Regularizing {int(negative.sum())} negative generator rates")
+        generator[negative] = 0.0
+        np.fill_diagonal(generator, -generator.sum(axis=1))
+        return generator
+
+    def get_period_matrix(self, month_step: int) -> np.ndarray:
+        """
+        Transition matrix over month_step months (read-only, cached)
+
+        Multiples of 12 months are integer powers of the annual matrix, so
+        annual steps use the input matrix exactly; other steps use the
+        regularized generator.
+        """
+        month_step = self._validate_months(month_step)
+        matrix = self._period_matrices.get(month_step)
+        if matrix is None:
+            with self._lock:
+                matrix = self._period_matrices.get(month_step)
+                if matrix is None:
+                    if month_step % 12 == 0:
+                        matrix = np.linalg.matrix_power(self.annual_matrix, month_step // 12).copy()
+                    else:
+                        matrix = self._transition_matrix(month_step / 12.0)
+                    matrix.setflags(write=False)
+                    self._period_matrices[month_step] = matrix
+        return matrix
+
+    def get_cumulative_matrix(self, month_step: int) -> np.ndarray:
+        """
+        Cumulative row thresholds of the month_step matrix (read-only, cached)
+
+        Rows are non-decreasing and end at exactly 1.0, so a uniform draw
+        always resolves to a rating.
+        """
+        month_step = self._validate_months(month_step)
+        cumulative = self._cumulative_matrices.get(month_step)
+        if cumulative is None:
+            cumulative = np.cumsum(self.get_period_matrix(month_step), axis=1)
+            cumulative = np.minimum(np.maximum.accumulate(cumulative, axis=1), 1.0)
+            cumulative[:, -1] = 1.0
+            cumulative.setflags(write=False)
+            with self._lock:
+                cumulative = self._cumulative_matrices.setdefault(month_step, cumulative)
+        return cumulative
+
+    def get_horizon_matrix(self, months: float) -> np.ndarray:
+        """Transition matrix over an arbitrary (possibly fractional) horizon in months"""
+        if months < 0:
+            raise ValueError("Horizon must be non-negative")
+        if float(months).is_integer() and months > 0:
+            return self.get_period_matrix(int(months))
+        return self._transition_matrix(months / 12.0)
+
+    def get_rating_distribution(self, initial: Union[int, np.ndarray], num_periods: int,
+                                month_step: int = 3) -> np.ndarray:
+        """
+        Rating distributions for periods 0..num_periods without path simulation
+
+        initial is a 0-based rating row or a distribution (or a matrix of
+        distributions, one per row). Returns (num_periods + 1) x ratings, or
+        (num_periods + 1) x rows x ratings for a matrix of initial distributions.
+        """
+        if num_periods < 0:
+            raise ValueError("num_periods must be non-negative")
+        if np.ndim(initial) == 0:
+            distribution = np.zeros(self.num_ratings)
+            distribution[int(initial)] = 1.0
+        else:
+            distribution = np.array(initial, dtype=float)
+            if distribution.shape[-1] != self.num_ratings:
+                raise ValueError(f"Distribution must have {self.num_ratings} ratings")
+
+        period_matrix = self.get_period_matrix(month_step)
+        result = np.empty((num_periods + 1,) + distribution.shape)
+        result[0] = distribution
+        for period in range(1, num_periods + 1):
+            result[period] = result[period - 1] @ period_matrix
+        return result
+
+    def get_default_probabilities(self, num_periods: int, month_step: int = 3,
+                                  default_index: Optional[int] = None) -> np.ndarray:
+        """Cumulative default probability by period for every starting rating (periods x ratings)"""
+        default_index = self.num_ratings - 1 if default_index is None else default_index
+        distributions = self.get_rating_distribution(np.eye(self.num_ratings), num_periods, month_step)
+        return distributions[:, :, default_index]
+
+    def _transition_matrix(self, years: float) -> np.ndarray:
+        """expm of the generator, cleaned of round-off negatives"""
+        matrix = expm(self.generator * years)
+        np.maximum(matrix, 0.0, out=matrix)
+        matrix /= matrix.sum(axis=1, keepdims=True)
+        return matrix
+
+    @staticmethod
+    def _validate_months(month_step: int) -> int:
+        if int(month_step) != month_step or month_step <= 0:
+            raise ValueError(f"Month step must be a positive whole number of months: {month_step}")
+        return int(month_step)
@@ -6,10 +6,13 @@ Manages trigger calculations and integration with payment waterfall logic
 from typing import Dict, List, Optional, Tuple, Any
 from decimal import Decimal
 from datetime import date
+from dataclasses import dataclass
+import numpy as np
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from ..models.oc_trigger import OCTrigger, OCTriggerCalculator
-from ..models.ic_trigger import ICTrigger, ICTriggerCalculator
+from ..models.oc_trigger import OCTrigger, OCTriggerCalculator, OCTriggerResult
+from ..models.ic_trigger import ICTrigger, ICTriggerCalculator, ICTriggerResult
 from ..models.clo_deal import CLODeal
 from ..models.liability import Liability
 from ..models.asset import Asset
@@ -28,6 +31,25 @@ class TriggerCalculationResult:
         self.total_ic_cure_needed: Decimal = Decimal('0')
 
 
+@dataclass
+class TriggerResultMatrix:
+    """Captured trigger results for a run as a period x trigger x field array"""
+    
+    trigger_type: str
+    periods: List[int]
+    tranche_names: List[str]
+    fields: Tuple[str, ...]
+    values: np.ndarray
+    
+    def field(self, name: str) -> np.ndarray:
+        """Period x trigger array for one result field (e.g. 'calculated_ratio')"""
+        return self.values[:, :, self.fields.index(name)]
+    
+    def pass_fail(self) -> np.ndarray:
+        """Period x trigger boolean pass/fail array"""
+        return self.field('pass_fail').astype(bool)
+
+
 class TriggerService:
     """
     Service class for managing OC/IC trigger calculations and waterfall integration
@@ -37,6 +59,13 @@ class TriggerService:
         self.session = session
         self.oc_calculators: Dict[str, OCTriggerCalculator] = {}  # By tranche name
         self.ic_calculators: Dict[str, ICTriggerCalculator] = {}  # By tranche name
+        
+        # Run-scoped mode: (period, calculator period) pairs captured so far and
+        # those whose database writes are deferred to end_run
+        self.run_deal_id: Optional[str] = None
+        self.persist_run: bool = True
+        self._captured_periods: List[Tuple[int, int]] = []
+        self._pending_periods: List[Tuple[int, int]] = []
     
     def setup_deal_triggers(self, deal_id: str, num_periods: int) -> None:
         """
@@ -51,6 +80,10 @@ class TriggerService:
         if not deal:
             raise ValueError(f"Deal {deal_id} not found")
         
+        # Captured periods index the previous calculators' period arrays
+        self._captured_periods = []
+        self._pending_periods = []
+        
         # Setup calculators for each tranche
         for tranche in deal.tranches:
             # OC Trigger setup (example thresholds - would come from deal configuration)
@@ -236,62 +269,173 @@ class TriggerService:
         for calculator in self.ic_calculators.values():
             calculator.rollforward()
     
+    def begin_run(self, deal_id: str, persist: bool = True) -> None:
+        """
+        Start a run-scoped calculation for a deal
+        
+        Until end_run, save_trigger_results_to_db only captures each period
+        into the calculators' period arrays; the rows are written in one
+        bulk insert at the end of the run, or never for what-if runs.
+        
+        Args:
+            deal_id: CLO deal identifier
+            persist: Write the captured periods to the database at end_run
+        """
+        self.run_deal_id = deal_id
+        self.persist_run = persist
+        self._captured_periods = []
+        self._pending_periods = []
+    
+    @property
+    def in_run(self) -> bool:
+        """True between begin_run and end_run"""
+        return self.run_deal_id is not None
+    
+    def end_run(self) -> int:
+        """
+        Finish the run, writing deferred trigger rows if the run persists
+        
+        Returns:
+            Number of trigger rows written
+        """
+        if not self.in_run:
+            return 0
+        
+        deal_id, pending = self.run_deal_id, self._pending_periods
+        self.run_deal_id = None
+        self._pending_periods = []
+        if not self.persist_run or not pending:
+            return 0
+        
+        oc_rows = [
+            self._oc_trigger_row(deal_id, tranche_name, calculator, period,
+                                 calculator.period_results.get(calc_period) or calculator.get_current_result())
+            for period, calc_period in pending
+            for tranche_name, calculator in self.oc_calculators.items()
+        ]
+        ic_rows = [
+            self._ic_trigger_row(deal_id, tranche_name, calculator, period,
+                                 calculator.period_results.get(calc_period) or calculator.get_current_result())
+            for period, calc_period in pending
+            for tranche_name, calculator in self.ic_calculators.items()
+        ]
+        
+        if oc_rows:
+            self.session.execute(insert(OCTrigger), oc_rows)
+        if ic_rows:
+            self.session.execute(insert(ICTrigger), ic_rows)
+        self.session.commit()
+        return len(oc_rows) + len(ic_rows)
+    
+    def get_result_matrix(self, trigger_type: str = 'oc') -> TriggerResultMatrix:
+        """
+        Get all captured periods as a period x trigger result matrix
+        
+        Args:
+            trigger_type: 'oc' or 'ic'
+            
+        Returns:
+            TriggerResultMatrix with one row per period saved during the
+            latest run and one column per tranche, in calculator order
+        """
+        if trigger_type == 'oc':
+            calculators, fields = self.oc_calculators, OCTriggerCalculator.ARRAY_FIELDS
+        elif trigger_type == 'ic':
+            calculators, fields = self.ic_calculators, ICTriggerCalculator.ARRAY_FIELDS
+        else:
+            raise ValueError(f"Unknown trigger type: {trigger_type}")
+        
+        rows = [calc_period - 1 for _, calc_period in self._captured_periods]
+        values = np.zeros((len(rows), len(calculators), len(fields)))
+        for column, calculator in enumerate(calculators.values()):
+            values[:, column, :] = calculator.period_array[rows]
+        
+        return TriggerResultMatrix(
+            trigger_type=trigger_type,
+            periods=[period for period, _ in self._captured_periods],
+            tranche_names=list(calculators),
+            fields=fields,
+            values=values
+        )
+    
     def save_trigger_results_to_db(self, deal_id: str, period: int) -> None:
         """
         Save current trigger calculation results to database
         
+        In run-scoped mode the current period is captured for
+        get_result_matrix and the database write is deferred to end_run.
+        
         Args:
             deal_id: CLO deal identifier
             period: Payment period number
         """
+        for calculator in self.oc_calculators.values():
+            calculator.capture_period()
+        for calculator in self.ic_calculators.values():
+            calculator.capture_period()
+        
+        calculators = list(self.oc_calculators.values()) + list(self.ic_calculators.values())
+        if self.in_run and deal_id == self.run_deal_id:
+            if calculators:
+                captured = (period, calculators[0].current_period)
+                self._captured_periods.append(captured)
+                self._pending_periods.append(captured)
+            return
+        
         # Save OC trigger results
         for tranche_name, calculator in self.oc_calculators.items():
-            current_result = calculator.get_current_result()
-            
-            oc_trigger = OCTrigger(
-                deal_id=deal_id,
-                tranche_name=tranche_name,
-                trigger_name=calculator.name,
-                oc_threshold=calculator.trigger_threshold,
-                period_number=period,
-                numerator=current_result.numerator,
-                denominator=current_result.denominator,
-                calculated_ratio=current_result.calculated_ratio,
-                pass_fail=current_result.pass_fail,
-                interest_cure_amount=current_result.interest_cure_amount,
-                principal_cure_amount=current_result.principal_cure_amount,
-                prior_interest_cure=current_result.prior_interest_cure,
-                prior_principal_cure=current_result.prior_principal_cure,
-                interest_cure_paid=current_result.interest_cure_paid,
-                principal_cure_paid=current_result.principal_cure_paid
-            )
-            
-            self.session.add(oc_trigger)
+            row = self._oc_trigger_row(deal_id, tranche_name, calculator, period,
+                                       calculator.get_current_result())
+            self.session.add(OCTrigger(**row))
         
         # Save IC trigger results
         for tranche_name, calculator in self.ic_calculators.items():
-            current_result = calculator.get_current_result()
-            
-            ic_trigger = ICTrigger(
-                deal_id=deal_id,
-                tranche_name=tranche_name,
-                trigger_name=calculator.name,
-                ic_threshold=calculator.trigger_threshold,
-                period_number=period,
-                numerator=current_result.numerator,
-                denominator=current_result.denominator,
-                liability_balance=current_result.liability_balance,
-                calculated_ratio=current_result.calculated_ratio,
-                pass_fail=current_result.pass_fail,
-                cure_amount=current_result.cure_amount,
-                prior_cure_payments=current_result.prior_cure_payments,
-                cure_amount_paid=current_result.cure_amount_paid
-            )
-            
-            self.session.add(ic_trigger)
+            row = self._ic_trigger_row(deal_id, tranche_name, calculator, period,
+                                       calculator.get_current_result())
+            self.session.add(ICTrigger(**row))
         
         self.session.commit()
     
+    def _oc_trigger_row(self, deal_id: str, tranche_name: str, calculator: OCTriggerCalculator,
+                        period: int, result: OCTriggerResult) -> Dict[str, Any]:
+        """Column values for one OCTrigger row"""
+        return {
+            'deal_id': deal_id,
+            'tranche_name': tranche_name,
+            'trigger_name': calculator.name,
+            'oc_threshold': calculator.trigger_threshold,
+            'period_number': period,
+            'numerator': result.numerator,
+            'denominator': result.denominator,
+            'calculated_ratio': result.calculated_ratio,
+            'pass_fail': result.pass_fail,
+            'interest_cure_amount': result.interest_cure_amount,
+            'principal_cure_amount': result.principal_cure_amount,
+            'prior_interest_cure': result.prior_interest_cure,
+            'prior_principal_cure': result.prior_principal_cure,
+            'interest_cure_paid': result.interest_cure_paid,
+            'principal_cure_paid': result.principal_cure_paid
+        }
+    
+    def _ic_trigger_row(self, deal_id: str, tranche_name: str, calculator: ICTriggerCalculator,
+                        period: int, result: ICTriggerResult) -> Dict[str, Any]:
+        """Column values for one ICTrigger row"""
+        return {
+            'deal_id': deal_id,
+            'tranche_name': tranche_name,
+            'trigger_name': calculator.name,
+            'ic_threshold': calculator.trigger_threshold,
+            'period_number': period,
+            'numerator': result.numerator,
+            'denominator': result.denominator,
+            'liability_balance': result.liability_balance,
+            'calculated_ratio': result.calculated_ratio,
+            'pass_fail': result.pass_fail,
+            'cure_amount': result.cure_amount,
+            'prior_cure_payments': result.prior_cure_payments,
+            'cure_amount_paid': result.cure_amount_paid
+        }
+    
     def load_trigger_results_from_db(self, deal_id: str, period: int) -> bool:
         """
         Load trigger results from database for a specific period
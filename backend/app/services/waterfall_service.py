@@ -3,22 +3,213 @@ Waterfall Calculation Service
 Implements sophisticated waterfall distribution calculations for CLO deals
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+from dataclasses import dataclass
 from datetime import date, datetime
 from decimal import Decimal, ROUND_HALF_UP
 import logging
+import numpy as np
 
 from sqlalchemy.orm import Session
-from ..core.database_config import db_config
+from ..core.database_config import db_config, get_db_session
+from ..models.waterfall import WaterfallExecution
 from ..services.data_integration import DataIntegrationService
 
 logger = logging.getLogger(__name__)
 
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    """Round non-negative amounts to cents, half up like Decimal.quantize"""
+    return np.floor(values * 100 + 0.5) / 100
+
+
+@dataclass
+class ScenarioWaterfallResult:
+    """
+    Payments of one waterfall sequence across N scenarios
+    
+    Step matrices are (scenarios x steps) in sequence order and tranche
+    matrices are (scenarios x tranches) in tranche_ids order.
+    """
+    steps: List[Dict[str, Any]]
+    tranche_ids: List[str]
+    target: np.ndarray
+    paid: np.ndarray
+    interest_paid: np.ndarray
+    principal_paid: np.ndarray
+    tranche_paid: np.ndarray
+    remaining_funds: np.ndarray
+    
+    @property
+    def num_scenarios(self) -> int:
+        return self.paid.shape[0]
+    
+    def total_paid(self, payment_type: Optional[str] = None) -> np.ndarray:
+        """Amount paid per scenario, optionally for one step type only"""
+        if payment_type is None:
+            return self.paid.sum(axis=1)
+        columns = [k for k, step in enumerate(self.steps) if step.get('type') == payment_type]
+        return self.paid[:, columns].sum(axis=1)
+    
+    def payment_steps(self, scenario: int) -> List[Dict[str, Any]]:
+        """Payment steps of one scenario in the calculate_waterfall format"""
+        remaining = self.paid[scenario].sum() + self.remaining_funds[scenario]
+        payment_steps = []
+        for k, step in enumerate(self.steps):
+            remaining -= self.paid[scenario, k]
+            payment_steps.append({
+                'step_number': step.get('step', 0),
+                'description': step.get('description', ''),
+                'payment_type': step.get('type', ''),
+                'target_amount': float(self.target[scenario, k]),
+                'actual_amount': float(self.paid[scenario, k]),
+                'remaining_funds': float(remaining),
+                'tranche_id': step.get('tranche_id'),
+                'priority': step.get('priority', 0)
+            })
+        return payment_steps
+
+
+class ScenarioWaterfallExecutor:
+    """
+    Applies one payment sequence to many scenarios at once
+    
+    Follows the step rules of WaterfallService.calculate_waterfall, with each
+    step's min(due, available) evaluated as array operations over scenarios,
+    so a grid of thousands of scenarios is a single pass over the sequence.
+    """
+    
+    def __init__(self, payment_sequence: List[Dict[str, Any]], tranches: List[Dict[str, Any]],
+                 fee_amounts: Dict[int, Decimal]):
+        """
+        Args:
+            payment_sequence: Steps as returned by WaterfallService._get_payment_sequence
+            tranches: Tranches as returned by WaterfallService._get_deal_tranches
+            fee_amounts: Amount due for each fee step, by step number
+        """
+        self.payment_sequence = payment_sequence
+        self.tranche_ids = [t['tranche_id'] for t in tranches]
+        self.tranche_index = {tranche_id: k for k, tranche_id in enumerate(self.tranche_ids)}
+        self.current_balances = np.array([float(t['current_balance']) for t in tranches])
+        self.coupon_rates = np.array([float(t.get('coupon_rate') or 0) for t in tranches])
+        self.fee_amounts = {step: float(amount) for step, amount in fee_amounts.items()}
+    
+    def run(self, interest_cash: Union[np.ndarray, List[float]],
+            principal_cash: Optional[Union[np.ndarray, List[float]]] = None,
+            tranche_balances: Optional[np.ndarray] = None,
+            trigger_states: Optional[Dict[int, Union[np.ndarray, bool]]] = None) -> ScenarioWaterfallResult:
+        """
+        Run the waterfall for every scenario
+        
+        Args:
+            interest_cash: Available interest proceeds per scenario
+            principal_cash: Available principal proceeds per scenario. When
+                given, principal steps are paid from principal proceeds only,
+                other steps from interest proceeds and equity takes what is
+                left of both. Omitted, all cash is one pool as in
+                calculate_waterfall
+            tranche_balances: (scenarios x tranches) current balances,
+                defaulting to the deal's balances
+            trigger_states: Per-scenario flags by step number; False blocks
+                the step, leaving its amount unpaid for lower steps
+        
+        Returns:
+            ScenarioWaterfallResult with per-scenario payment matrices
+        """
+        interest_remaining = np.array(interest_cash, dtype=float).ravel()
+        num_scenarios = interest_remaining.size
+        single_pool = principal_cash is None
+        principal_remaining = (np.zeros(num_scenarios) if single_pool
+                               else np.broadcast_to(np.array(principal_cash, dtype=float), (num_scenarios,)).copy())
+        
+        balances = (np.broadcast_to(self.current_balances, (num_scenarios, len(self.tranche_ids)))
+                    if tranche_balances is None else np.asarray(tranche_balances, dtype=float))
+        if balances.shape != (num_scenarios, len(self.tranche_ids)):
+            raise ValueError(f"tranche_balances must have shape {(num_scenarios, len(self.tranche_ids))}")
+        
+        trigger_states = trigger_states or {}
+        num_steps = len(self.payment_sequence)
+        target = np.zeros((num_scenarios, num_steps))
+        paid = np.zeros((num_scenarios, num_steps))
+        interest_paid = np.zeros((num_scenarios, len(self.tranche_ids)))
+        principal_paid = np.zeros_like(interest_paid)
+        tranche_paid = np.zeros_like(interest_paid)
+        
+        for k, step in enumerate(self.payment_sequence):
+            step_type = step.get('type')
+            if step_type == 'equity':
+                available = principal_remaining + interest_remaining
+            elif step_type == 'principal' and not single_pool:
+                available = principal_remaining
+            else:
+                available = interest_remaining
+            
+            tranche_columns = self._step_tranches(step)
+            if step_type == 'fees':
+                due = np.full(num_scenarios, self.fee_amounts.get(step.get('step'), 0.0))
+                if step.get('calculation_method') == 'administrative_fee':
+                    due = np.minimum(due, available)
+            elif step_type == 'interest':
+                due = (_round_cents(balances[:, tranche_columns[0]] * self.coupon_rates[tranche_columns[0]] / 12)
+                       if tranche_columns else np.zeros(num_scenarios))
+            elif step_type == 'principal':
+                tranche_due = balances[:, tranche_columns] * 0.02
+                due = _round_cents(tranche_due.sum(axis=1))
+            elif step_type == 'equity':
+                due = available.copy()
+            else:
+                due = np.zeros(num_scenarios)
+            
+            funded = available > 0
+            target[:, k] = np.where(funded, due, 0.0)
+            payment = np.where(funded, np.minimum(due, available), 0.0)
+            if step.get('step') in trigger_states:
+                payment = np.where(trigger_states[step.get('step')], payment, 0.0)
+            paid[:, k] = payment
+            
+            if step_type == 'equity' or (step_type == 'principal' and not single_pool):
+                from_principal = np.minimum(payment, principal_remaining)
+                principal_remaining -= from_principal
+                interest_remaining -= payment - from_principal
+            else:
+                interest_remaining -= payment
+            
+            if not tranche_columns:
+                continue
+            if step_type == 'principal':
+                # Multi-tranche principal steps are shared pro rata to amount due
+                due_total = tranche_due.sum(axis=1, keepdims=True)
+                shares = np.divide(tranche_due, due_total, out=np.zeros_like(tranche_due), where=due_total > 0)
+                allocated = payment[:, None] * shares
+                principal_paid[:, tranche_columns] += allocated
+                tranche_paid[:, tranche_columns] += allocated
+            else:
+                if step_type == 'interest':
+                    interest_paid[:, tranche_columns[0]] += payment
+                tranche_paid[:, tranche_columns[0]] += payment
+        
+        return ScenarioWaterfallResult(
+            steps=self.payment_sequence,
+            tranche_ids=self.tranche_ids,
+            target=target,
+            paid=paid,
+            interest_paid=interest_paid,
+            principal_paid=principal_paid,
+            tranche_paid=tranche_paid,
+            remaining_funds=interest_remaining + principal_remaining
+        )
+    
+    def _step_tranches(self, step: Dict[str, Any]) -> List[int]:
+        """Columns of the tranches a step pays"""
+        tranche_ids = step.get('tranches') or ([step['tranche_id']] if step.get('tranche_id') else [])
+        return [self.tranche_index[t] for t in tranche_ids if t in self.tranche_index]
+
+
 class WaterfallService:
     """Service for waterfall calculations and cash flow projections"""
     
-    def __init__(self):
+    def __init__(self, db_session: Optional[Session] = None):
         self.integration_service = DataIntegrationService()
+        self.db = db_session
         
     def calculate_waterfall(
         self, 
@@ -167,21 +358,28 @@ class WaterfallService:
         """
         logger.info(f"Running {len(scenarios)} stress test scenarios for deal {deal_id}")
         
-        results = []
-        
         try:
             base_waterfall = self._get_base_waterfall(deal_id)
+            if not base_waterfall['available']:
+                raise ValueError(base_waterfall['message'])
+            base_funds = float(base_waterfall['total_available_funds'])
             
-            for scenario in scenarios:
-                stress_result = self._run_single_stress_test(
-                    deal_id, 
-                    scenario, 
-                    base_waterfall
-                )
-                results.append(stress_result)
+            # Base case in row 0, every stress scenario in one pass after it
+            funds = np.array([base_funds] + [self._stressed_available_funds(scenario, base_funds)
+                                             for scenario in scenarios])
+            trigger_states = {}
+            for row, scenario in enumerate(scenarios, start=1):
+                for step_number in scenario.get('blocked_steps', []):
+                    trigger_states.setdefault(step_number, np.ones(len(funds), dtype=bool))[row] = False
             
-            # Sort results by severity (worst case first)
-            results.sort(key=lambda x: x.get('portfolio_loss', 0), reverse=True)
+            stressed = self.calculate_waterfall_scenarios(deal_id, funds, trigger_states=trigger_states)
+            results = [
+                self._stress_test_result(scenario, stressed, row)
+                for row, scenario in enumerate(scenarios, start=1)
+            ]
+            
+            # Sort results by severity (worst case first): debt impairment, then equity loss
+            results.sort(key=lambda x: (x['debt_shortfall'], x['equity_loss']), reverse=True)
             
             return results
             
@@ -189,6 +387,41 @@ class WaterfallService:
             logger.error(f"Stress testing failed for deal {deal_id}: {e}")
             raise
     
+    def calculate_waterfall_scenarios(
+        self,
+        deal_id: str,
+        interest_cash: Union[np.ndarray, List[float]],
+        principal_cash: Optional[Union[np.ndarray, List[float]]] = None,
+        tranche_balances: Optional[np.ndarray] = None,
+        trigger_states: Optional[Dict[int, Union[np.ndarray, bool]]] = None
+    ) -> ScenarioWaterfallResult:
+        """
+        Calculate the deal's waterfall for many scenarios in one pass
+        
+        Args:
+            deal_id: CLO deal identifier
+            interest_cash: Available interest proceeds per scenario
+            principal_cash: Available principal proceeds per scenario
+            tranche_balances: (scenarios x tranches) current balances
+            trigger_states: Per-scenario pass flags by step number
+            
+        Returns:
+            ScenarioWaterfallResult with per-scenario payment matrices
+        """
+        return self.get_scenario_executor(deal_id).run(
+            interest_cash, principal_cash, tranche_balances, trigger_states
+        )
+    
+    def get_scenario_executor(self, deal_id: str) -> ScenarioWaterfallExecutor:
+        """Build a vectorized executor for the deal's payment sequence"""
+        deal_config = self._get_deal_configuration(deal_id)
+        payment_sequence = self._get_payment_sequence(deal_id)
+        fee_amounts = {
+            step['step']: self._calculate_fee_payment(step, deal_config, Decimal('Infinity'))
+            for step in payment_sequence if step.get('type') == 'fees'
+        }
+        return ScenarioWaterfallExecutor(payment_sequence, self._get_deal_tranches(deal_id), fee_amounts)
+    
     def _get_deal_configuration(self, deal_id: str) -> Dict[str, Any]:
         """Get deal configuration from operational database"""
         # Implementation will query operational database
@@ -541,26 +774,87 @@ class WaterfallService:
         }
     
     def _get_base_waterfall(self, deal_id: str) -> Dict[str, Any]:
-        """Get base waterfall calculation for comparison"""
-        # Implementation would run base case waterfall
-        return {}
+        """
+        Get base waterfall calculation for comparison
+        
+        The base case is the deal's latest completed waterfall execution.
+        When the deal has none, available is False and message says why;
+        total_available_funds is then None.
+        """
+        if self.db is not None:
+            return self._latest_execution_summary(self.db, deal_id)
+        with get_db_session('postgresql') as session:
+            return self._latest_execution_summary(session, deal_id)
+    
+    @staticmethod
+    def _latest_execution_summary(session: Session, deal_id: str) -> Dict[str, Any]:
+        """Available funds of the deal's latest completed execution"""
+        execution = session.query(
+            WaterfallExecution.execution_id,
+            WaterfallExecution.payment_date,
+            WaterfallExecution.total_available
+        ).filter(
+            WaterfallExecution.deal_id == deal_id,
+            WaterfallExecution.execution_status == 'COMPLETED'
+        ).order_by(
+            WaterfallExecution.payment_date.desc(),
+            WaterfallExecution.execution_id.desc()
+        ).first()
+        
+        if execution is None:
+            return {
+                'deal_id': deal_id,
+                'available': False,
+                'execution_id': None,
+                'payment_date': None,
+                'total_available_funds': None,
+                'message': f"No base waterfall: deal {deal_id} has no completed waterfall execution"
+            }
+        return {
+            'deal_id': deal_id,
+            'available': True,
+            'execution_id': execution.execution_id,
+            'payment_date': execution.payment_date,
+            'total_available_funds': Decimal(execution.total_available),
+            'message': None
+        }
     
-    def _run_single_stress_test(
+    def _stressed_available_funds(self, scenario: Dict[str, Any], base_funds: float) -> float:
+        """Available funds under a stress scenario"""
+        if scenario.get('available_funds') is not None:
+            return float(scenario['available_funds'])
+        
+        # Collections lost to the shock, as a fraction of base funds
+        haircut = scenario.get('collection_haircut', scenario.get('default_rate_shock')) or 0
+        return base_funds * (1 - min(max(float(haircut), 0.0), 1.0))
+    
+    def _stress_test_result(
         self,
-        deal_id: str,
         scenario: Dict[str, Any],
-        base_waterfall: Dict[str, Any]
+        stressed: ScenarioWaterfallResult,
+        row: int
     ) -> Dict[str, Any]:
-        """Run a single stress test scenario"""
-        # Implementation would apply stress scenario and calculate impact
+        """
+        Summarize one stress scenario against the base case in row 0
+        
+        Residual cash goes to equity, so portfolio_loss is only the funds
+        haircut. Severity is measured by debt_shortfall, the payments debt
+        tranches lose (cash a blocked step passes to a junior tranche does
+        not offset a senior one's loss), and equity_loss.
+        """
+        base_paid = stressed.total_paid()[0]
+        portfolio_loss = base_paid - stressed.total_paid()[row]
+        tranche_shortfall = stressed.tranche_paid[0] - stressed.tranche_paid[row]
+        is_equity = np.array([tranche_id == 'EQ' for tranche_id in stressed.tranche_ids], dtype=bool)
+        
         return {
             'scenario_name': scenario.get('scenario_name', 'Unnamed'),
-            'portfolio_loss': 5000000,  # Mock loss amount
-            'loss_percentage': 1.1,  # Mock loss percentage
+            'portfolio_loss': float(portfolio_loss),
+            'loss_percentage': float(portfolio_loss / base_paid * 100) if base_paid else 0.0,
+            'debt_shortfall': float(np.maximum(tranche_shortfall[~is_equity], 0.0).sum()),
+            'equity_loss': float(np.maximum(tranche_shortfall[is_equity], 0.0).sum()),
             'tranche_impacts': {
-                'A1': 0,
-                'A2': 0,
-                'B': 2000000,
-                'C': 3000000
+                tranche_id: float(tranche_shortfall[k])
+                for k, tranche_id in enumerate(stressed.tranche_ids) if tranche_id != 'EQ'
             }
-        }
\ No newline at end of file
+        }
@@ -6,6 +6,7 @@ This package provides essential utility functions for:
 - Matrix operations and linear algebra
 - Date and time handling for financial calculations
 - Advanced financial computations (IRR, XIRR, spreads, etc.)
+- Streaming statistics for Monte Carlo outputs
 - String manipulation and formatting
 
 All utilities are converted from the original VBA codebase with enhanced
@@ -29,7 +30,8 @@ from .matrix_utils import (
     matrix_inverse,
     matrix_cholesky,
     matrix_sqrt,
-    regularize_correlation_matrix
+    regularize_correlation_matrix,
+    FactorCorrelationModel
 )
 
 from .date_utils import (
@@ -47,11 +49,14 @@ from .date_utils import (
 from .financial_utils import (
     FinancialUtils,
     xirr,
+    xirr_batch,
     irr,
     value_at_risk,
     sharpe_ratio
 )
 
+from .statistics_utils import StreamingStatistics, MonteCarloEstimator
+
 from .string_utils import (
     StringUtils,
     format_currency,
@@ -81,6 +86,7 @@ __all__ = [
     'matrix_cholesky',
     'matrix_sqrt',
     'regularize_correlation_matrix',
+    'FactorCorrelationModel',
     
     # Date utilities
     'DateUtils',
@@ -96,10 +102,15 @@ __all__ = [
     # Financial utilities
     'FinancialUtils',
     'xirr',
+    'xirr_batch',
     'irr',
     'value_at_risk',
     'sharpe_ratio',
     
+    # Statistics utilities
+    'StreamingStatistics',
+    'MonteCarloEstimator',
+    
     # String utilities
     'StringUtils',
     'format_currency',
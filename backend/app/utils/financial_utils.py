@@ -40,7 +40,8 @@ class FinancialUtils:
         Calculate XIRR (Extended Internal Rate of Return) for irregular cash flows
         
         This provides Excel Application.WorksheetFunction.Xirr compatibility
-        using Newton-Raphson method as implemented in VBA.
+        (actual/365 from the first date) via the bracketed Newton solver in
+        xirr_batch.
         
         Args:
             cashflows: List of cash flow amounts
@@ -58,54 +59,11 @@ class FinancialUtils:
         if len(cashflows) < 2:
             raise ValueError("Need at least 2 cashflows for XIRR calculation")
         
-        # Convert dates to Excel-style serial numbers for compatibility
-        base_date = dates[0]
-        days = [(d - base_date).days for d in dates]
-        
-        def xirr_function(rate: float) -> float:
-            """XIRR objective function"""
-            return sum(cf / (1 + rate) ** (day / 365.0) 
-                      for cf, day in zip(cashflows, days))
-        
-        def xirr_derivative(rate: float) -> float:
-            """Derivative of XIRR function for Newton-Raphson"""
-            return sum(-cf * (day / 365.0) / (1 + rate) ** ((day / 365.0) + 1)
-                      for cf, day in zip(cashflows, days))
-        
-        # Newton-Raphson iteration
-        rate = guess
-        
-        for iteration in range(max_iterations):
-            try:
-                fx = xirr_function(rate)
-                
-                if abs(fx) < tolerance:
-                    return rate
-                
-                fpx = xirr_derivative(rate)
-                
-                if abs(fpx) < 1e-15:
-                    # Derivative too small, try different starting point
-                    rate = guess * (1 + 0.01 * iteration)
-                    continue
-                
-                new_rate = rate - fx / fpx
-                
-                # Bounds checking to prevent unreasonable rates
-                if new_rate < -0.99:
-                    new_rate = -0.99 + 0.01 * iteration / max_iterations
-                elif new_rate > 10.0:
-                    new_rate = 10.0 - 0.01 * iteration / max_iterations
-                
-                if abs(new_rate - rate) < tolerance:
-                    return new_rate
-                
-                rate = new_rate
-                
-            except (ZeroDivisionError, OverflowError):
-                # Try different starting point
-                rate = guess * (1 + 0.1 * iteration / max_iterations)
-                continue
+        rates, converged = FinancialUtils.xirr_batch(
+            [cashflows], [dates], guess, max_iterations, tolerance
+        )
+        if converged[0]:
+            return float(rates[0])
         
         logger.warning(f"XIRR did not converge after {max_iterations} iterations")
         raise ValueError("XIRR calculation did not converge")
@@ -141,6 +99,209 @@ class FinancialUtils:
             logger.error(f"IRR calculation failed: {e}")
             raise ValueError("IRR calculation failed")
     
+    @staticmethod
+    def xirr_batch(cashflows: Union[np.ndarray, List[List[float]]],
+                   dates: Union[np.ndarray, List[date], List[List[date]]],
+                   guess: float = 0.1, max_iterations: int = 100,
+                   tolerance: float = 1e-10,
+                   days_per_year: float = 365.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Solve XIRR for many cash flow series at once
+
+        All series are solved together with a safeguarded Newton iteration:
+        each series first gets a sign-change bracket (the one nearest the
+        guess on a fixed rate grid), then Newton steps on log(1 + rate) are
+        taken and replaced by bisection whenever they leave the bracket.
+
+        Args:
+            cashflows: Series x flows array padded with NaN, or a ragged list
+                of cash flow lists
+            dates: One shared list of dates, one date list per series, or
+                year fractions (1-D shared or 2-D per series, NaN padded)
+            guess: Rate used to choose between multiple brackets
+            max_iterations: Maximum number of iterations
+            tolerance: Convergence tolerance on the rate step and on NPV
+                relative to the series' gross cash flows
+            days_per_year: Day basis for date inputs
+
+        Returns:
+            (rates, converged) arrays with one entry per series. Series
+            without a sign change or that did not converge get NaN.
+        """
+        amounts = FinancialUtils._pad_series(cashflows)
+        times = FinancialUtils._series_year_fractions(dates, amounts.shape, days_per_year)
+
+        if np.any(~np.isnan(amounts) & np.isnan(times)):
+            raise ValueError("Cashflows and dates must have same length")
+        present = ~np.isnan(amounts)
+        amounts = np.where(present, amounts, 0.0)
+        times = np.where(present, times, 0.0)
+        # Measure each series from its first flow so discount factors stay bounded
+        first = np.where(present, times, np.inf).min(axis=1, initial=np.inf)
+        times = np.where(present, times - np.where(np.isfinite(first), first, 0.0)[:, None], 0.0)
+
+        return FinancialUtils._solve_irr_batch(amounts, times, guess, max_iterations, tolerance)
+
+    @staticmethod
+    def irr_batch(cashflows: Union[np.ndarray, List[List[float]]], guess: float = 0.1,
+                  max_iterations: int = 100,
+                  tolerance: float = 1e-10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Solve periodic IRR for many cash flow series at once
+
+        Flows are one period apart; see xirr_batch for the method and outputs.
+        """
+        amounts = FinancialUtils._pad_series(cashflows)
+        periods = np.broadcast_to(np.arange(amounts.shape[1], dtype=float), amounts.shape)
+        return FinancialUtils.xirr_batch(amounts, np.where(np.isnan(amounts), np.nan, periods),
+                                         guess, max_iterations, tolerance)
+
+    # Rate grid (log(1 + rate) space) searched for a sign change before Newton
+    _IRR_BRACKET_GRID = np.log1p(np.array([
+        -0.99, -0.9, -0.75, -0.5, -0.25, -0.1, 0.0, 0.05, 0.1, 0.2,
+        0.35, 0.5, 0.75, 1.0, 2.0, 5.0, 10.0
+    ]))
+
+    @staticmethod
+    def _pad_series(series: Union[np.ndarray, List[List[float]]]) -> np.ndarray:
+        """Stack ragged series into a 2-D float array padded with NaN"""
+        if isinstance(series, np.ndarray):
+            padded = np.array(series, dtype=float)
+        else:
+            rows = [np.asarray(row, dtype=float).ravel() for row in series]
+            width = max((len(row) for row in rows), default=0)
+            padded = np.full((len(rows), width), np.nan)
+            for i, row in enumerate(rows):
+                padded[i, :len(row)] = row
+        if padded.ndim == 1:
+            padded = padded[None, :]
+        if padded.ndim != 2:
+            raise ValueError("Cashflows must be a list of series or a 2-D array")
+        return padded
+
+    @staticmethod
+    def _series_year_fractions(dates, shape: Tuple[int, int], days_per_year: float) -> np.ndarray:
+        """Year fractions for every flow, broadcast to the cash flow shape"""
+        def to_years(row) -> np.ndarray:
+            row = list(row)
+            if row and isinstance(row[0], date):
+                return np.array([d.toordinal() for d in row], dtype=float) / days_per_year
+            return np.asarray(row, dtype=float)
+
+        if isinstance(dates, np.ndarray):
+            times = dates.astype(float)
+        elif len(dates) and isinstance(dates[0], date):
+            times = to_years(dates)
+        else:
+            times = FinancialUtils._pad_series([to_years(row) for row in dates])
+
+        if times.ndim == 1:
+            times = times[None, :]
+        if times.shape[0] not in (1, shape[0]) or times.shape[1] < shape[1]:
+            raise ValueError("Need one date per cash flow, shared or per series")
+        return np.broadcast_to(times[:, :shape[1]], shape)
+
+    @staticmethod
+    def bracketed_newton(func: Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]],
+                         lo: np.ndarray, hi: np.ndarray, x0: Optional[np.ndarray] = None,
+                         f_tolerance: Union[float, np.ndarray] = 0.0, max_iterations: int = 100,
+                         tolerance: float = 1e-10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Safeguarded Newton iteration for many bracketed roots at once
+        
+        Args:
+            func: func(x, rows) returns (f, df) at x for the given row indices
+            lo, hi: Bracket per row; rows without a sign change are not solved
+            x0: Starting point per row (clipped into the bracket), default midpoint
+            f_tolerance: Per-row absolute tolerance on f
+            max_iterations: Maximum number of iterations
+            tolerance: Relative tolerance on the step
+            
+        Returns:
+            (roots, converged), NaN where no root was found
+        """
+        lo = np.array(lo, dtype=float)
+        hi = np.array(hi, dtype=float)
+        num_rows = lo.shape[0]
+        f_tolerance = np.broadcast_to(np.asarray(f_tolerance, dtype=float), (num_rows,))
+        roots = np.full(num_rows, np.nan)
+        converged = np.zeros(num_rows, dtype=bool)
+        
+        rows = np.arange(num_rows)
+        sign_lo = np.sign(func(lo, rows)[0])
+        sign_hi = np.sign(func(hi, rows)[0])
+        bracketed = (sign_lo * sign_hi <= 0) & ~(np.isnan(sign_lo) | np.isnan(sign_hi))
+        sign_lo = np.where(sign_lo != 0, sign_lo, -sign_hi)
+        
+        rows, lo, hi, sign_lo = rows[bracketed], lo[bracketed], hi[bracketed], sign_lo[bracketed]
+        x = 0.5 * (lo + hi) if x0 is None else np.clip(np.broadcast_to(x0, (num_rows,))[bracketed], lo, hi)
+        
+        for _ in range(max_iterations):
+            if rows.size == 0:
+                break
+            with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+                f, df = func(x, rows)
+                newton = x - f / df
+            
+            same_side = np.sign(f) == sign_lo
+            lo = np.where(same_side, x, lo)
+            hi = np.where(same_side, hi, x)
+            
+            safe = np.isfinite(newton) & (newton > lo) & (newton < hi)
+            next_x = np.where(safe, newton, 0.5 * (lo + hi))
+            
+            solved = np.abs(f) <= f_tolerance[rows]
+            stepped = ~solved & (np.abs(next_x - x) <= tolerance * (1.0 + np.abs(x)))
+            done = solved | stepped
+            if np.any(done):
+                roots[rows[done]] = np.where(solved, x, next_x)[done]
+                converged[rows[done]] = True
+            
+            keep = ~done
+            rows, x, lo, hi, sign_lo = rows[keep], next_x[keep], lo[keep], hi[keep], sign_lo[keep]
+        
+        if rows.size:
+            logger.warning(f"Root finding did not converge for {rows.size} rows after {max_iterations} iterations")
+        return roots, converged
+    
+    @staticmethod
+    def _solve_irr_batch(amounts: np.ndarray, times: np.ndarray, guess: float,
+                         max_iterations: int, tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Bracketed Newton on x = log(1 + rate) for NPV(x) = sum(cf * exp(-t * x))"""
+        num_series = amounts.shape[0]
+        rates = np.full(num_series, np.nan)
+        converged = np.zeros(num_series, dtype=bool)
+        
+        active = np.flatnonzero((amounts > 0).any(axis=1) & (amounts < 0).any(axis=1))
+        if active.size == 0:
+            return rates, converged
+        
+        # Bracket: the sign-change interval on the grid nearest the guess
+        grid = FinancialUtils._IRR_BRACKET_GRID
+        a, t = amounts[active], times[active]
+        with np.errstate(over='ignore', invalid='ignore'):
+            grid_npv = np.einsum('km,kgm->kg', a, np.exp(-t[:, None, :] * grid[None, :, None]))
+        sign = np.sign(grid_npv)
+        change = sign[:, :-1] * sign[:, 1:] <= 0
+        x0 = np.log1p(guess)
+        distance = np.maximum(np.maximum(grid[:-1] - x0, x0 - grid[1:]), 0.0)
+        distance = np.where(change, distance[None, :], np.inf)
+        interval = np.argmin(distance, axis=1)
+        
+        def npv(x: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            with np.errstate(over='ignore', invalid='ignore'):
+                discount = np.exp(-t[rows] * x[:, None])
+                return (np.einsum('km,km->k', a[rows], discount),
+                        -np.einsum('km,km->k', a[rows] * t[rows], discount))
+        
+        log_growth, solved = FinancialUtils.bracketed_newton(
+            npv, grid[interval], grid[interval + 1], x0,
+            np.abs(a).sum(axis=1) * tolerance, max_iterations, tolerance
+        )
+        rates[active] = np.expm1(log_growth)
+        converged[active] = solved
+        return rates, converged
+    
     # Advanced Yield and Spread Calculations
     @staticmethod
     def calc_yield_to_maturity(price: float, cashflows: List[float], 
@@ -600,6 +761,10 @@ def irr(cashflows: List[float], guess: float = 0.1) -> float:
     """Convenience function for IRR calculation"""
     return FinancialUtils.irr(cashflows, guess)
 
+def xirr_batch(cashflows, dates, guess: float = 0.1) -> Tuple[np.ndarray, np.ndarray]:
+    """Convenience function for batch XIRR calculation"""
+    return FinancialUtils.xirr_batch(cashflows, dates, guess)
+
 def value_at_risk(returns: List[float], confidence_level: float = 0.95) -> float:
     """Convenience function for VaR calculation"""
     return FinancialUtils.value_at_risk(returns, confidence_level)
@@ -0,0 +1,364 @@
+"""
+Streaming Statistics Utilities
+
+Provides bounded-memory summary statistics for Monte Carlo outputs:
+- Running mean and variance (Welford/Chan updates)
+- Exact minimum and maximum
+- Mergeable relative-accuracy quantile sketches (DDSketch-style log buckets)
+- Standard errors and effective sample sizes for variance-reduced estimates
+
+Each accumulator tracks a fixed grid of cells (e.g. periods x fields) and is
+updated with batches of observations, so memory depends on the grid size
+rather than on the number of simulations. Accumulators built on separate
+chunks or worker processes can be merged.
+"""
+
+from typing import Optional, Tuple
+import math
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingStatistics:
+    """Online mean/variance, min/max and quantile sketch over a grid of cells"""
+
+    def __init__(self, shape: Tuple[int, ...], relative_accuracy: float = 0.01,
+                 min_value: float = 1e-9):
+        """
+        Args:
+            shape: Shape of one observation (e.g. (num_periods, num_fields))
+            relative_accuracy: Relative error bound for quantile estimates
+            min_value: Magnitudes below this are counted as zero by the sketch
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must be between 0 and 1")
+
+        self.shape = tuple(shape)
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        num_cells = int(np.prod(self.shape)) if self.shape else 1
+        self.count = 0
+        self._mean = np.zeros(num_cells)
+        self._m2 = np.zeros(num_cells)
+        self._min = np.full(num_cells, np.inf)
+        self._max = np.full(num_cells, -np.inf)
+
+        # Sparse bucket store: sorted bucket codes (see _bucket_codes) and their
+        # counts, holding only the buckets each cell has actually populated
+        self._codes = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._zero = np.zeros(num_cells, dtype=np.int64)
+
+    @property
+    def num_cells(self) -> int:
+        return self._mean.size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the accumulator arrays"""
+        return sum(array.nbytes for array in (
+            self._mean, self._m2, self._min, self._max,
+            self._codes, self._counts, self._zero
+        ))
+
+    def update(self, values: np.ndarray) -> None:
+        """Add a batch of observations shaped (batch, *shape)"""
+        values = np.asarray(values, dtype=float).reshape(-1, self.num_cells)
+        batch_count = values.shape[0]
+        if batch_count == 0:
+            return
+
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        self._combine_moments(batch_count, batch_mean, batch_m2)
+
+        np.minimum(self._min, values.min(axis=0), out=self._min)
+        np.maximum(self._max, values.max(axis=0), out=self._max)
+
+        self._add_to_sketch(values)
+
+    def merge(self, other: "StreamingStatistics") -> None:
+        """Merge another accumulator over the same grid into this one"""
+        if other.shape != self.shape or other.gamma != self.gamma:
+            raise ValueError("Cannot merge accumulators with different shapes or accuracy")
+        if other.count == 0:
+            return
+
+        self._combine_moments(other.count, other._mean, other._m2)
+        np.minimum(self._min, other._min, out=self._min)
+        np.maximum(self._max, other._max, out=self._max)
+
+        self._add_buckets(other._codes, other._counts)
+        self._zero += other._zero
+
+    def _combine_moments(self, count: int, mean: np.ndarray, m2: np.ndarray) -> None:
+        """Chan et al. parallel update of running mean and sum of squared deviations"""
+        total = self.count + count
+        delta = mean - self._mean
+        self._mean = self._mean + delta * (count / total)
+        self._m2 = self._m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    def _keys(self, magnitudes: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    # Bucket codes sort by cell, then by bucket value: negative buckets
+    # (largest magnitude first), the zero bucket, positive buckets
+    _SEGMENT_BITS = 32
+    _ORDER_OFFSET = 1 << 31
+    _NEGATIVE, _ZERO, _POSITIVE = 0, 1, 2
+
+    def _bucket_codes(self, cells: np.ndarray, segments: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        order = np.where(segments == self._NEGATIVE, -keys, keys)
+        return ((cells * 3 + segments) << self._SEGMENT_BITS) + (order + self._ORDER_OFFSET)
+
+    def _add_buckets(self, codes: np.ndarray, counts: np.ndarray) -> None:
+        """Add counts for sorted, unique bucket codes to the sparse store"""
+        if codes.size == 0:
+            return
+        positions = np.searchsorted(self._codes, codes)
+        found = positions < self._codes.size
+        found[found] = self._codes[positions[found]] == codes[found]
+        self._counts[positions[found]] += counts[found]
+
+        new = ~found
+        if new.any():
+            self._codes = np.insert(self._codes, positions[new], codes[new])
+            self._counts = np.insert(self._counts, positions[new], counts[new])
+
+    def _add_to_sketch(self, values: np.ndarray) -> None:
+        magnitudes = np.abs(values)
+        is_zero = magnitudes < self.min_value
+        self._zero += is_zero.sum(axis=0)
+
+        non_zero = ~is_zero
+        if not non_zero.any():
+            return
+
+        cells = np.broadcast_to(np.arange(self.num_cells), values.shape)[non_zero]
+        segments = np.where(values[non_zero] < 0, self._NEGATIVE, self._POSITIVE)
+        codes, counts = np.unique(self._bucket_codes(cells, segments, self._keys(magnitudes[non_zero])),
+                                  return_counts=True)
+        self._add_buckets(codes, counts.astype(np.int64))
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._mean.reshape(self.shape)
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Population variance (ddof=0, matching np.var)"""
+        if self.count == 0:
+            return np.zeros(self.shape)
+        return (self._m2 / self.count).reshape(self.shape)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    @property
+    def minimum(self) -> np.ndarray:
+        return self._min.reshape(self.shape)
+
+    @property
+    def maximum(self) -> np.ndarray:
+        return self._max.reshape(self.shape)
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Estimate the q-quantile of every cell to within the relative accuracy"""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if self.count == 0:
+            return np.full(self.shape, np.nan)
+
+        # Zero buckets join the sparse buckets so every cell's buckets are
+        # contiguous and in ascending value order
+        cells = np.arange(self.num_cells)
+        zero_codes = self._bucket_codes(cells, np.full(self.num_cells, self._ZERO),
+                                        np.zeros(self.num_cells, dtype=np.int64))
+        codes = np.concatenate([self._codes, zero_codes])
+        counts = np.concatenate([self._counts, self._zero])
+        order = np.argsort(codes, kind='stable')
+        codes, counts = codes[order], counts[order]
+
+        segments = (codes >> self._SEGMENT_BITS) % 3
+        order = (codes & ((1 << self._SEGMENT_BITS) - 1)) - self._ORDER_OFFSET
+        keys = np.where(segments == self._NEGATIVE, -order, order)
+        magnitudes = 2 * self.gamma ** keys.astype(float) / (self.gamma + 1)
+        bucket_values = np.where(segments == self._POSITIVE, magnitudes,
+                                 np.where(segments == self._NEGATIVE, -magnitudes, 0.0))
+
+        # Every cell holds count observations, so cell i's buckets end at
+        # cumulative count (i + 1) * count
+        rank = q * (self.count - 1)
+        position = np.searchsorted(np.cumsum(counts), cells * self.count + rank, side='right')
+        estimate = np.clip(bucket_values[position], self._min, self._max)
+        return estimate.reshape(self.shape)
+
+    def median(self) -> np.ndarray:
+        return self.quantile(0.5)
+
+    def summary(self, index: Optional[Tuple[int, ...]] = None) -> dict:
+        """Min/max/mean/median/std summary for one cell (or the whole grid)"""
+        stats = {
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": self.mean,
+            "median": self.median(),
+            "std": self.std
+        }
+        if index is None:
+            return stats
+        return {name: values[index].item() for name, values in stats.items()}
+
+
+class MonteCarloEstimator:
+    """
+    Mean, standard error and effective sample size of a Monte Carlo estimate
+    
+    Path outcomes (optionally with likelihood-ratio weights) give the
+    per-path variance under the target measure; independent replicate
+    estimates (single paths, antithetic pair averages or randomized QMC
+    batch means) give the estimator and its standard error. The effective
+    sample size is the number of plain Monte Carlo paths with the same
+    standard error.
+    """
+
+    def __init__(self, shape: Tuple[int, ...]):
+        self.shape = tuple(shape)
+        num_cells = int(np.prod(self.shape)) if self.shape else 1
+
+        self.num_paths = 0
+        self.sum_weights = 0.0
+        self.sum_squared_weights = 0.0
+        self._path_mean = np.zeros(num_cells)
+        self._path_m2 = np.zeros(num_cells)
+
+        self.num_replicates = 0
+        self._replicate_mean = np.zeros(num_cells)
+        self._replicate_m2 = np.zeros(num_cells)
+
+    @property
+    def num_cells(self) -> int:
+        return self._path_mean.size
+
+    def update(self, values: np.ndarray, weights: Optional[np.ndarray] = None,
+               replicates: Optional[np.ndarray] = None) -> None:
+        """
+        Add path outcomes shaped (paths, *shape)
+        
+        Args:
+            values: Outcome of every path
+            weights: Likelihood ratio of every path (defaults to 1)
+            replicates: Independent replicate estimates shaped (replicates, *shape);
+                defaults to the weighted path outcomes
+        """
+        values = np.asarray(values, dtype=float).reshape(-1, self.num_cells)
+        num_paths = values.shape[0]
+        if num_paths == 0:
+            return
+        weights = np.ones(num_paths) if weights is None else np.asarray(weights, dtype=float)
+        if weights.shape != (num_paths,):
+            raise ValueError("Weights must have one entry per path")
+
+        if replicates is None:
+            replicates = values * weights[:, None]
+        replicates = np.asarray(replicates, dtype=float).reshape(-1, self.num_cells)
+
+        # Weighted path moments (Chan merge with weight totals)
+        batch_weight = weights.sum()
+        if batch_weight > 0:
+            batch_mean = weights @ values / batch_weight
+            batch_m2 = weights @ (values - batch_mean) ** 2
+            total_weight = self.sum_weights + batch_weight
+            delta = batch_mean - self._path_mean
+            self._path_mean = self._path_mean + delta * (batch_weight / total_weight)
+            self._path_m2 = (self._path_m2 + batch_m2
+                             + delta ** 2 * (self.sum_weights * batch_weight / total_weight))
+        self.num_paths += num_paths
+        self.sum_weights += batch_weight
+        self.sum_squared_weights += float(weights @ weights)
+
+        self._combine_replicates(replicates.shape[0], replicates.mean(axis=0),
+                                 ((replicates - replicates.mean(axis=0)) ** 2).sum(axis=0))
+
+    def merge(self, other: "MonteCarloEstimator") -> None:
+        """Merge an estimator built on independent paths over the same grid"""
+        if other.shape != self.shape:
+            raise ValueError("Cannot merge estimators with different shapes")
+        if other.num_paths == 0:
+            return
+
+        if other.sum_weights > 0:
+            total_weight = self.sum_weights + other.sum_weights
+            delta = other._path_mean - self._path_mean
+            self._path_mean = self._path_mean + delta * (other.sum_weights / total_weight)
+            self._path_m2 = (self._path_m2 + other._path_m2
+                             + delta ** 2 * (self.sum_weights * other.sum_weights / total_weight))
+        self.num_paths += other.num_paths
+        self.sum_weights += other.sum_weights
+        self.sum_squared_weights += other.sum_squared_weights
+
+        self._combine_replicates(other.num_replicates, other._replicate_mean, other._replicate_m2)
+
+    def _combine_replicates(self, count: int, mean: np.ndarray, m2: np.ndarray) -> None:
+        if count == 0:
+            return
+        total = self.num_replicates + count
+        delta = mean - self._replicate_mean
+        self._replicate_mean = self._replicate_mean + delta * (count / total)
+        self._replicate_m2 = self._replicate_m2 + m2 + delta ** 2 * (self.num_replicates * count / total)
+        self.num_replicates = total
+
+    @property
+    def mean(self) -> np.ndarray:
+        """Monte Carlo estimate of the expected outcome"""
+        return self._replicate_mean.reshape(self.shape)
+
+    @property
+    def standard_error(self) -> np.ndarray:
+        """Standard error of the estimate (NaN with fewer than two replicates)"""
+        if self.num_replicates < 2:
+            return np.full(self.shape, np.nan)
+        variance = self._replicate_m2 / (self.num_replicates - 1)
+        return np.sqrt(variance / self.num_replicates).reshape(self.shape)
+
+    @property
+    def path_variance(self) -> np.ndarray:
+        """Variance of a single path outcome under the target measure"""
+        if self.sum_weights <= 0:
+            return np.zeros(self.shape)
+        return (self._path_m2 / self.sum_weights).reshape(self.shape)
+
+    @property
+    def effective_sample_size(self) -> np.ndarray:
+        """Plain Monte Carlo paths needed for the same standard error"""
+        standard_error = self.standard_error
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ess = self.path_variance / standard_error ** 2
+        # A zero standard error is exact (infinite) unless the outcome itself never varies
+        exact = np.where(self.path_variance > 0, np.inf, float(self.num_paths))
+        return np.where(standard_error > 0, ess, exact)
+
+    @property
+    def weight_effective_sample_size(self) -> float:
+        """Kish effective sample size of the likelihood-ratio weights"""
+        if self.sum_squared_weights <= 0:
+            return 0.0
+        return self.sum_weights ** 2 / self.sum_squared_weights
+
+    def summary(self, index: Optional[Tuple[int, ...]] = None) -> dict:
+        """Mean/standard error/effective sample size for one cell (or the whole grid)"""
+        stats = {
+            "mean": self.mean,
+            "standard_error": self.standard_error,
+            "effective_sample_size": self.effective_sample_size
+        }
+        if index is None:
+            return stats
+        return {name: values[index].item() for name, values in stats.items()}
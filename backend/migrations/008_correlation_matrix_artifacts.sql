@@ -0,0 +1,20 @@
+-- ===============================================
+-- Dense Correlation Matrix Artifacts
+-- Migration 008: versioned correlation matrix blobs
+-- ===============================================
+
+-- One row per matrix version; matrix_data is the .npz blob holding the
+-- dense value array, the asset-id index and the version number.
+-- Built from asset_correlations by DataIntegrationService.build_correlation_matrix_artifact
+CREATE TABLE IF NOT EXISTS correlation_matrix_artifacts (
+    version INTEGER PRIMARY KEY,
+    asset_count INTEGER NOT NULL,
+    pair_count INTEGER NOT NULL,
+    dtype VARCHAR(10) NOT NULL,
+    asset_ids JSON NOT NULL,
+    matrix_data BYTEA NOT NULL,
+    source_rows INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE correlation_matrix_artifacts IS 'Versioned dense asset correlation matrix (488x488 from asset_correlations)';
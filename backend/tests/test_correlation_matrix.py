@@ -0,0 +1,92 @@
+"""
+Tests for the Dense Correlation Matrix
+
+Building the matrix from pair rows, lookups and sub-matrices, the
+serialized artifact and the in-process cache.
+"""
+
+import pytest
+import numpy as np
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.correlation_matrix import (
+    DenseCorrelationMatrix, CorrelationMatrixArtifact, CorrelationMatrixCache
+)
+
+PAIRS = [
+    ("A1", "A1", Decimal('1.0')),
+    ("A1", "A2", Decimal('0.25')),
+    ("A2", "A1", Decimal('0.25')),
+    ("A1", "A3", Decimal('0.40')),     # Stored in one direction only
+    ("A3", "A4", Decimal('-0.10')),
+    ("A4", "A3", Decimal('-0.12')),    # Asymmetric source rows keep their own direction
+]
+
+
+@pytest.fixture
+def matrix():
+    return DenseCorrelationMatrix.from_pairs(PAIRS, version=3)
+
+
+class TestDenseCorrelationMatrix:
+    """Test matrix construction and indexing"""
+
+    def test_from_pairs(self, matrix):
+        """Pairs are indexed by sorted asset id and mirrored when one-sided"""
+        assert matrix.asset_ids == ["A1", "A2", "A3", "A4"]
+        assert matrix.get("A1", "A2") == 0.25
+        assert matrix.get("A3", "A1") == pytest.approx(0.40)
+        assert matrix.get("A3", "A4") == pytest.approx(-0.10)
+        assert matrix.get("A4", "A3") == pytest.approx(-0.12)
+        assert matrix.get("A2", "A4") is None
+        assert matrix.get("A1", "UNKNOWN") is None
+        np.testing.assert_array_equal(np.diag(matrix.values), 1.0)
+        assert matrix.pair_count == 10
+        assert not matrix.values.flags.writeable
+
+    def test_submatrix(self, matrix):
+        """Sub-matrices follow the requested order and fill unknown entries"""
+        sub = matrix.submatrix(["A3", "A1", "X9"], missing=0.0)
+
+        np.testing.assert_allclose(sub, [[1.0, 0.40, 0.0],
+                                         [0.40, 1.0, 0.0],
+                                         [0.0, 0.0, 1.0]])
+        assert np.isnan(matrix.submatrix(["A2", "A4"])[0, 1])
+        # Extraction copies, leaving the shared matrix untouched
+        sub[0, 1] = 0.9
+        assert matrix.get("A3", "A1") == pytest.approx(0.40)
+
+    def test_artifact_round_trip(self, matrix):
+        """The blob keeps values, dtype, ids and version through the database"""
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        assert CorrelationMatrixArtifact.next_version(session) == 1
+        single = DenseCorrelationMatrix.from_pairs(PAIRS, dtype=np.float32, version=4)
+        session.add_all([CorrelationMatrixArtifact.from_matrix(matrix, source_rows=len(PAIRS)),
+                         CorrelationMatrixArtifact.from_matrix(single)])
+        session.commit()
+
+        assert CorrelationMatrixArtifact.next_version(session) == 5
+        latest = CorrelationMatrixArtifact.load(session)
+        assert (latest.version, latest.dtype) == (4, np.float32)
+        stored = CorrelationMatrixArtifact.load(session, version=3)
+        assert stored.asset_ids == matrix.asset_ids
+        np.testing.assert_array_equal(stored.values, matrix.values)
+        assert CorrelationMatrixArtifact.load(session, version=9) is None
+        session.close()
+
+    def test_cache_expiry(self, matrix):
+        """The in-process copy is served until it expires"""
+        cache = CorrelationMatrixCache(ttl=60)
+        assert cache.get() is None
+        cache.put(matrix)
+        assert cache.get() is matrix
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        cache.ttl = -1
+        assert cache.get() is None
@@ -8,6 +8,7 @@ Author: Claude
 Date: 2025-01-12
 """
 
+import warnings
 import pytest
 import numpy as np
 from datetime import date, timedelta
@@ -18,7 +19,9 @@ from app.models.credit_migration import (
     SPRating,
     RatingHist,
     RatingHistBal,
-    SimHistory
+    SimHistory,
+    HIST_FIELDS,
+    HIST_BAL_FIELDS
 )
 
 
@@ -416,6 +419,320 @@ class TestCreditMigration:
         assert next_rating in ["BBB-", "BB+", "BB", "BB-", "B+", "B", "B-", "CCC", "D"]
 
 
+class RecordingCollateralPool(MockCollateralPool):
+    """Mock pool that remembers simulated ratings like the real collateral pool"""
+    
+    def __init__(self):
+        super().__init__()
+        self.assets["ASSET_4"] = {
+            "sp_rating": "B-",
+            "maturity": date(2029, 6, 30),
+            "defaulted": False,
+            "issuer_id": "ISSUER_1",
+            "sp_industry": "TECHNOLOGY",
+            "balance": 750000.0
+        }
+        self.assets["ASSET_5"] = {
+            "sp_rating": "BB",
+            "maturity": date(2029, 6, 30),
+            "defaulted": True,
+            "issuer_id": "ISSUER_5",
+            "sp_industry": "RETAIL",
+            "balance": 250000.0
+        }
+        self.rating_history = {}
+    
+    def add_sp_rating(self, asset_id, date_val, rating):
+        self.rating_history.setdefault(asset_id, []).append((date_val, rating))
+    
+    def get_sp_rating(self, asset_id, date_val=None):
+        if date_val is None:
+            return self.assets[asset_id]["sp_rating"]
+        if self.assets[asset_id]["defaulted"]:
+            return "D"
+        history = [r for d, r in self.rating_history.get(asset_id, []) if d <= date_val]
+        return history[-1] if history else self.assets[asset_id]["sp_rating"]
+
+
+class TestVectorizedSimulation:
+    """Test vectorized simulation kernel against the single-path implementation"""
+    
+    @pytest.mark.parametrize("deal_collateral", [
+        None,
+        {"ASSET_1": 1000000.0, "ASSET_3": 500000.0, "ASSET_4": 700000.0}
+    ])
+    def test_matches_single_path_simulation(self, deal_collateral):
+        """Same random stream should give identical histories on both paths"""
+        analysis_date = date(2024, 1, 1)
+        
+        for seed in range(10):
+            cm = CreditMigration()
+            pool = RecordingCollateralPool()
+            cm.setup(num_sims=1, collateral_pool=pool, seed=seed)
+            
+            # A single chunk draws from the first stream spawned from the root seed
+            cm.rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+            cm.run_rating_history(analysis_date, pool, deal_collateral, "QUARTERLY")
+            expected_counts, expected_balances = cm._get_history_arrays()
+            
+            cm.run_vectorized_simulation(analysis_date, RecordingCollateralPool(), deal_collateral, "QUARTERLY")
+            
+            np.testing.assert_array_equal(cm.hist_counts, expected_counts)
+            np.testing.assert_allclose(cm.hist_balances, expected_balances)
+    
+    def test_next_rating_codes_match_scalar_lookup(self):
+        """searchsorted lookup should agree with the linear threshold scan"""
+        cm = CreditMigration()
+        cm._setup_transition_matrix("QUARTERLY")
+        
+        uniform_random = np.linspace(0.0005, 0.9995, 400)
+        for rating in ["AAA", "A-", "BBB", "B", "CCC", "D"]:
+            codes = np.full(uniform_random.shape, cm._convert_rating_to_enum(rating))
+            next_codes = cm._next_rating_codes(codes, uniform_random)
+            expected = [
+                cm._convert_rating_to_enum(cm._get_next_rating(rating, u)) for u in uniform_random
+            ]
+            np.testing.assert_array_equal(next_codes, expected)
+    
+    def test_batched_results(self):
+        """Batches fill every simulation and feed the statistics output"""
+        cm = CreditMigration()
+        pool = RecordingCollateralPool()
+        cm.setup(num_sims=250, collateral_pool=pool, debug_mode=True)
+        
+        cm.run_vectorized_simulation(date(2024, 1, 1), pool, batch_size=64)
+        
+        assert cm.sim_count == 250
+        assert cm.hist_counts.shape == (250, cm.num_periods + 1, len(HIST_FIELDS))
+        assert len(cm.rating_hist) == cm.num_periods + 1
+        
+        # Every included asset is accounted for at the start
+        rating_columns = [HIST_FIELDS.index(name) for name in HIST_FIELDS if name.startswith("num_")
+                          and name not in ("num_matures", "num_period_defaults")]
+        assert np.all(cm.hist_counts[:, 0, rating_columns].sum(axis=1) == 5)
+        
+        results = cm.get_simulation_results()
+        assert results["num_simulations"] == 250
+        assert results["num_periods"] == cm.num_periods + 1
+        assert isinstance(results["statistics"]["period_1"]["num_defaults"]["max"], int)
+        
+        df = cm.export_to_dataframe()
+        assert len(df) == 250 * (cm.num_periods + 1)
+    
+    def test_results_independent_of_worker_count(self):
+        """Same root seed gives identical results serially and on a process pool"""
+        pool = RecordingCollateralPool()
+        analysis_date = date(2024, 1, 1)
+        
+        serial = CreditMigration()
+        serial.setup(num_sims=40, collateral_pool=pool, seed=2024)
+        serial.run_vectorized_simulation(analysis_date, pool, batch_size=10)
+        
+        parallel = CreditMigration()
+        parallel.setup(num_sims=40, collateral_pool=pool, seed=2024)
+        parallel.run_vectorized_simulation(analysis_date, pool, batch_size=10, num_workers=2)
+        
+        np.testing.assert_array_equal(serial.hist_counts, parallel.hist_counts)
+        np.testing.assert_array_equal(serial.hist_balances, parallel.hist_balances)
+    
+    def test_debug_mode_does_not_touch_global_random_state(self):
+        """Debug seeding is held by the engine rather than the numpy global state"""
+        np.random.seed(7)
+        expected = np.random.random()
+        
+        np.random.seed(7)
+        cm = CreditMigration()
+        cm.setup(num_sims=1, collateral_pool=MockCollateralPool(), debug_mode=True)
+        
+        assert cm.seed == 12
+        assert np.random.random() == expected
+    
+    def test_streaming_statistics_without_paths(self):
+        """Streaming mode keeps no paths but reports the same summary statistics"""
+        pool = RecordingCollateralPool()
+        analysis_date = date(2024, 1, 1)
+        
+        retained = CreditMigration()
+        retained.setup(num_sims=300, collateral_pool=pool, seed=5)
+        retained.run_vectorized_simulation(analysis_date, pool, batch_size=100)
+        
+        streaming = CreditMigration()
+        streaming.setup(num_sims=300, collateral_pool=pool, seed=5, retain_paths=False)
+        streaming.run_vectorized_simulation(analysis_date, pool, batch_size=100)
+        
+        assert streaming.hist_counts is None
+        assert streaming.sim_hist == []
+        assert streaming.export_to_dataframe().empty
+        
+        exact = retained.get_simulation_results()["statistics"]
+        streamed = streaming.get_simulation_results()["statistics"]
+        for period_key, metrics in exact.items():
+            for metric, stats in metrics.items():
+                assert streamed[period_key][metric]["min"] == stats["min"]
+                assert streamed[period_key][metric]["max"] == stats["max"]
+                assert streamed[period_key][metric]["mean"] == pytest.approx(stats["mean"])
+                assert streamed[period_key][metric]["std"] == pytest.approx(stats["std"], abs=1e-9)
+    
+    def test_streaming_statistics_single_path_runs(self):
+        """run_rating_history feeds the streaming statistics as well"""
+        pool = MockCollateralPool()
+        cm = CreditMigration()
+        cm.setup(num_sims=3, collateral_pool=pool, seed=1, retain_paths=False)
+        
+        for _ in range(3):
+            cm.run_rating_history(date(2024, 1, 1), pool, period="QUARTERLY")
+        
+        assert cm.sim_count == 3
+        assert cm.statistics.count == 3
+        assert cm.get_simulation_results()["num_simulations"] == 3
+    
+    def test_requires_setup(self):
+        """Running before setup should raise"""
+        with pytest.raises(ValueError):
+            CreditMigration().run_vectorized_simulation(date(2024, 1, 1), MockCollateralPool())
+    
+    def test_universe_simulation_matches_per_deal_runs(self):
+        """Shared paths projected onto each deal should equal separate deal runs"""
+        analysis_date = date(2024, 1, 1)
+        deal_holdings = {
+            "DEAL_A": {"ASSET_1": 1000000.0, "ASSET_3": 500000.0, "ASSET_4": 700000.0},
+            "DEAL_B": {"ASSET_2": 2000000.0, "ASSET_3": 250000.0}
+        }
+        
+        cm = CreditMigration()
+        cm.setup(num_sims=30, collateral_pool=RecordingCollateralPool(), seed=11)
+        deal_results = cm.run_universe_simulation(
+            analysis_date, RecordingCollateralPool(), deal_holdings, num_sims=30, batch_size=8
+        )
+        assert set(deal_results) == set(deal_holdings)
+        
+        for deal_id, holdings in deal_holdings.items():
+            single = CreditMigration()
+            single.setup(num_sims=30, collateral_pool=RecordingCollateralPool(), seed=11)
+            single.run_vectorized_simulation(analysis_date, RecordingCollateralPool(), holdings,
+                                             num_sims=30, batch_size=8)
+            
+            np.testing.assert_array_equal(deal_results[deal_id].hist_counts, single.hist_counts)
+            np.testing.assert_allclose(deal_results[deal_id].hist_balances, single.hist_balances)
+            assert deal_results[deal_id].get_simulation_results()["num_periods"] == single.num_periods + 1
+    
+    def test_universe_simulation_requires_holdings(self):
+        """Empty deal lists or deals without holdings should raise"""
+        cm = CreditMigration()
+        cm.setup(num_sims=5, collateral_pool=RecordingCollateralPool(), seed=1)
+        
+        with pytest.raises(ValueError):
+            cm.run_universe_simulation(date(2024, 1, 1), RecordingCollateralPool(), {})
+        with pytest.raises(ValueError):
+            cm.run_universe_simulation(date(2024, 1, 1), RecordingCollateralPool(), {"DEAL_A": {}})
+    
+    def test_factor_model_from_pool(self):
+        """FACTOR mode should build pool factors instead of a Cholesky matrix"""
+        cm = CreditMigration()
+        pool = RecordingCollateralPool()
+        cm.setup(num_sims=20, collateral_pool=pool, seed=3, correlation_model="FACTOR")
+        
+        assert cm.corr_matrix is None
+        assert cm.factor_model is not None
+        assert cm.factor_model.num_assets == len(pool.get_asset_ids())
+        
+        cm.run_vectorized_simulation(date(2024, 1, 1), pool, period="QUARTERLY")
+        assert cm.hist_counts.shape[0] == 20
+        
+        # Same seed gives the same paths
+        repeat = CreditMigration()
+        repeat.setup(num_sims=20, collateral_pool=RecordingCollateralPool(), seed=3,
+                     correlation_model="FACTOR")
+        repeat.run_vectorized_simulation(date(2024, 1, 1), RecordingCollateralPool(), period="QUARTERLY")
+        np.testing.assert_array_equal(cm.hist_counts, repeat.hist_counts)
+    
+    def test_factor_model_low_rank_and_invalid_mode(self):
+        """num_factors should approximate the pairwise matrix; unknown modes raise"""
+        cm = CreditMigration()
+        cm.setup(num_sims=5, correlation_model="FACTOR", num_factors=1)
+        
+        expected = cm._create_default_correlation_matrix()
+        np.testing.assert_allclose(cm.factor_model.correlation_matrix(), expected, atol=1e-10)
+        assert cm._get_correlated_random().shape == (cm.num_assets,)
+        
+        with pytest.raises(ValueError):
+            CreditMigration().setup(num_sims=5, correlation_model="UNKNOWN")
+    
+    @pytest.mark.parametrize("sampling", ["PSEUDO", "SOBOL", "ANTITHETIC", "IMPORTANCE"])
+    def test_sampling_methods_report_diagnostics(self, sampling):
+        """Every sampling scheme runs reproducibly and reports standard errors"""
+        def run():
+            cm = CreditMigration()
+            cm.setup(num_sims=64, collateral_pool=RecordingCollateralPool(), seed=11,
+                     correlation_model="FACTOR", sampling=sampling, importance_shift=0.5)
+            cm.run_vectorized_simulation(date(2024, 1, 1), RecordingCollateralPool(),
+                                         period="QUARTERLY", batch_size=16)
+            return cm
+        
+        cm = run()
+        diagnostics = cm.get_sampling_diagnostics()
+        assert diagnostics["method"] == sampling
+        assert diagnostics["num_simulations"] == 64
+        
+        series = diagnostics["fields"]["bal_defaults"]
+        assert len(series["mean"]) == cm.hist_balances.shape[1]
+        assert all(se >= 0 for se in series["standard_error"])
+        assert cm.get_simulation_results()["sampling"]["method"] == sampling
+        np.testing.assert_array_equal(cm.hist_counts, run().hist_counts)
+        
+        if sampling != "IMPORTANCE":
+            # Unweighted schemes estimate the plain path average
+            assert diagnostics["weight_effective_sample_size"] == pytest.approx(64)
+            column = HIST_BAL_FIELDS.index("bal_defaults")
+            np.testing.assert_allclose(series["mean"], cm.hist_balances[:, :, column].mean(axis=0))
+    
+    def test_sobol_single_chunk_reports_finite_errors(self):
+        """A run in one chunk still draws balanced scrambles with a finite spread"""
+        cm = CreditMigration()
+        cm.setup(num_sims=96, collateral_pool=RecordingCollateralPool(), seed=3,
+                 correlation_model="FACTOR", sampling="SOBOL")
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            cm.run_vectorized_simulation(date(2024, 1, 1), RecordingCollateralPool(),
+                                         period="QUARTERLY", batch_size=1000)
+        
+        # 96 = 3 x 32: three scrambles of 32 points
+        assert cm.sobol_scramble_size == 32
+        assert cm.estimator.num_replicates == 3
+        series = cm.get_sampling_diagnostics()["fields"]["bal_defaults"]
+        assert np.all(np.isfinite(series["standard_error"]))
+        
+        with pytest.raises(ValueError):
+            CreditMigration._sobol_scramble_size(1, 1000)
+    
+    def test_importance_sampling_is_unbiased(self):
+        """Weighted tail sampling should agree with plain Monte Carlo"""
+        estimates = {}
+        for sampling in ("PSEUDO", "IMPORTANCE"):
+            cm = CreditMigration()
+            cm.setup(num_sims=2000, collateral_pool=RecordingCollateralPool(), seed=5,
+                     correlation_model="FACTOR", sampling=sampling, importance_shift=0.5)
+            cm.run_vectorized_simulation(date(2024, 1, 1), RecordingCollateralPool(),
+                                         period="QUARTERLY", batch_size=250)
+            series = cm.get_sampling_diagnostics()["fields"]["num_defaults"]
+            estimates[sampling] = (series["mean"][-1], series["standard_error"][-1])
+        
+        (plain, plain_se), (weighted, weighted_se) = estimates["PSEUDO"], estimates["IMPORTANCE"]
+        assert abs(plain - weighted) < 4 * np.hypot(plain_se, weighted_se)
+    
+    def test_sampling_validation(self):
+        """Unknown schemes, odd antithetic batches and scalar runs are rejected"""
+        with pytest.raises(ValueError):
+            CreditMigration().setup(num_sims=5, sampling="LATIN")
+        
+        cm = CreditMigration()
+        cm.setup(num_sims=6, collateral_pool=RecordingCollateralPool(), seed=1, sampling="ANTITHETIC")
+        with pytest.raises(ValueError):
+            cm.run_vectorized_simulation(date(2024, 1, 1), RecordingCollateralPool(), batch_size=3)
+        with pytest.raises(ValueError):
+            cm.run_rating_history(date(2024, 1, 1), RecordingCollateralPool())
+
+
 class TestEdgeCases:
     """Test edge cases and error conditions"""
     
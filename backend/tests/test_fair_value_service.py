@@ -0,0 +1,103 @@
+"""
+Tests for Fair Value Service
+
+Batch portfolio pricing against yield curves.
+"""
+
+import pytest
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.asset import Asset
+from app.models.yield_curve import YieldCurveService
+from app.services.fair_value_service import FairValueService
+
+PRICING_DATE = date(2025, 1, 10)
+
+
+@pytest.fixture
+def pricing_db():
+    """In-memory database with two curves and a small book"""
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    treasury_rates = {1: 0.045, 3: 0.0465, 12: 0.052, 60: 0.0625, 120: 0.0675, 360: 0.0715}
+    service = YieldCurveService(session)
+    service.create_yield_curve('USD_TREASURY', PRICING_DATE, treasury_rates)
+    service.create_yield_curve('USD_CREDIT_BBB', PRICING_DATE,
+                               {k: v + 0.015 for k, v in treasury_rates.items()})
+
+    assets = [
+        Asset(blkrock_id='BOND_001', issue_name='Bond', issuer_name='A Corp', par_amount=Decimal('5000000'),
+              bond_loan='BOND', sp_rating='BBB', maturity=date(2028, 6, 15), coupon=Decimal('0.055')),
+        Asset(blkrock_id='LOAN_002', issue_name='Loan', issuer_name='B Corp', par_amount=Decimal('3000000'),
+              bond_loan='LOAN', sp_rating='B+', seniority='SENIOR SECURED', maturity=date(2029, 12, 1),
+              coupon=Decimal('0.075')),
+        Asset(blkrock_id='GOVT_003', issue_name='Treasury', issuer_name='US Government',
+              par_amount=Decimal('1000000'), bond_loan='BOND', sp_rating='AAA',
+              maturity=date(2035, 5, 15), coupon=Decimal('0.045')),
+        Asset(blkrock_id='MATURED_004', issue_name='Matured', issuer_name='C Corp',
+              par_amount=Decimal('1000000'), bond_loan='BOND', sp_rating='BBB', maturity=date(2024, 1, 1),
+              coupon=Decimal('0.05')),
+    ]
+    session.add_all(assets)
+    session.commit()
+    return session, service, assets
+
+
+class TestFairValueService:
+    """Test vectorized portfolio pricing"""
+
+    def test_matches_single_asset_pricing(self, pricing_db):
+        """Batch prices agree with the per-asset discounting loop"""
+        session, service, assets = pricing_db
+        results = FairValueService(session, service).price_assets(
+            assets, PRICING_DATE, curve_name='USD_TREASURY', write_back=False)
+
+        for asset in assets[:3]:
+            cash_flows = asset._generate_cash_flows(PRICING_DATE)
+            curve = service.load_yield_curve('USD_TREASURY', PRICING_DATE)
+            expected = asset._calculate_fair_value_with_spread(
+                cash_flows, curve, results[asset.blkrock_id].credit_spread_bps, PRICING_DATE)
+
+            result = results[asset.blkrock_id]
+            assert result.success
+            assert result.cash_flow_count == len(cash_flows)
+            assert abs(result.fair_value - expected) <= Decimal('0.01')
+            assert asset.fair_value is None  # write_back=False leaves assets untouched
+
+    def test_write_back_is_one_bulk_update(self, pricing_db):
+        """Fair values are persisted without dirtying the instances"""
+        session, service, assets = pricing_db
+        results = FairValueService(session, service).price_assets(assets, PRICING_DATE)
+
+        assert not session.dirty
+        session.commit()
+        session.expire_all()
+
+        priced = session.get(Asset, 'LOAN_002')
+        assert priced.fair_value == results['LOAN_002'].fair_value
+        assert priced.fair_value_date == PRICING_DATE
+        assert priced.discount_curve_name == 'USD_CREDIT_BBB'
+        assert priced.pricing_spread_bps == results['LOAN_002'].credit_spread_bps
+        assert session.get(Asset, 'BOND_001').fair_value == results['BOND_001'].fair_value
+
+    def test_per_asset_errors(self, pricing_db):
+        """Missing curves and matured assets are reported, not raised"""
+        session, service, assets = pricing_db
+        results = FairValueService(session, service).price_assets(assets, PRICING_DATE)
+
+        # The AAA credit curve does not exist in this database
+        assert results['GOVT_003'].error == "Discount curve USD_CREDIT_AAA not found"
+        assert results['MATURED_004'].error == "No future cash flows"
+        assert results['BOND_001'].success
+        assert session.get(Asset, 'GOVT_003').fair_value is None
+
+        missing = FairValueService(session, service).price_assets(
+            assets[:2], PRICING_DATE, curve_name='USD_UNKNOWN')
+        assert all(not result.success and 'USD_UNKNOWN' in result.error for result in missing.values())
+        assert session.get(Asset, 'BOND_001').discount_curve_name != 'USD_UNKNOWN'
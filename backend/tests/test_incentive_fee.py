@@ -422,6 +422,28 @@ class TestIncentiveFeeXIRRCalculation:
         assert xirr is not None
         assert abs(xirr) < 0.01  # Should be approximately 0%
 
+    def test_period_irr_solved_on_demand(self):
+        """Rollforward defers XIRR; cls_irr matches a per-period XIRR of the history"""
+        incentive_fee = IncentiveFee()
+        incentive_fee.setup(0.08, 0.20, {date(2024, 1, 15): -4000000.0})
+        incentive_fee.deal_setup(12, date(2024, 1, 15), date(2024, 2, 1))
+
+        for period in range(1, 9):
+            incentive_fee.calc(date(2024, 1, 15) + relativedelta(months=3 * period))
+            incentive_fee.payment_to_sub_notholder(300000.0)
+            incentive_fee.pay_incentive_fee(300000.0)
+            incentive_fee.rollfoward()
+
+        assert len(incentive_fee._pending_irr) == 8
+
+        l_dates = list(incentive_fee.cls_sub_payments_dict.keys())
+        l_values = list(incentive_fee.cls_sub_payments_dict.values())
+        for period in range(1, 9):
+            expected = incentive_fee._calculate_xirr(l_values[:period + 1], l_dates[:period + 1])
+            assert incentive_fee.cls_irr[period] == pytest.approx(expected or 0.0, abs=1e-12)
+        assert not incentive_fee._pending_irr
+        assert incentive_fee.cls_irr[8] < 0.0  # Only 2.4M of 4M returned
+
 
 class TestIncentiveFeeDatabasePersistence:
     """Test database persistence functionality"""
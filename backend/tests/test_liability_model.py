@@ -4,17 +4,20 @@ Comprehensive testing of CLO liability/tranche calculations
 """
 
 import pytest
+import numpy as np
 from decimal import Decimal
 from datetime import date, datetime
+from dateutil.relativedelta import relativedelta
 from sqlalchemy.orm import sessionmaker
 
 import sys
 sys.path.append('..')
 
 from app.models.liability import (
-    Liability, LiabilityCashFlow, LiabilityCalculator,
+    Liability, LiabilityCashFlow, LiabilityCalculator, LiabilityRiskCalculator,
     DayCountConvention, CouponType, generate_output_report
 )
+from app.models.yield_curve import YieldCurve, YieldCurveShock
 from app.models.clo_deal import CLODeal
 
 
@@ -514,5 +517,81 @@ class TestOutputGeneration:
         assert "Def Int Paid" in headers
 
 
+class TestLiabilityRiskCalculator:
+    """Test batch risk measures across tranches and rate scenarios"""
+    
+    ANALYSIS_DATE = date(2023, 2, 15)
+    
+    @pytest.fixture
+    def curve(self):
+        return YieldCurve("TEST", self.ANALYSIS_DATE, {1: 0.045, 12: 0.05, 60: 0.055, 120: 0.06})
+    
+    @pytest.fixture
+    def tranche_cash_flows(self):
+        """Two amortizing tranches on a 10-year quarterly schedule"""
+        dates = [self.ANALYSIS_DATE + relativedelta(months=3 * i) for i in range(1, 41)]
+        balances = np.array([300e6, 50e6])
+        principal = np.repeat(balances[:, None] / 40, 40, axis=1)
+        outstanding = balances[:, None] - np.cumsum(principal, axis=1) + principal
+        coupons = np.array([0.045, 0.08])[:, None] / 4
+        return dates, principal + outstanding * coupons, principal, balances
+    
+    def test_measures_reprice_to_input_price(self, curve, tranche_cash_flows):
+        """Solved yields and DMs discount the cash flows back to the input price"""
+        dates, cash_flows, principal, balances = tranche_cash_flows
+        calculator = LiabilityRiskCalculator(self.ANALYSIS_DATE, dates)
+        zero_rates = calculator.zero_rates(curve)
+        prices = np.array([0.99, 0.95])
+        
+        measures = calculator.calculate(cash_flows, principal, balances, balances, zero_rates,
+                                        price=prices, discount_margin=[0.015, 0.04])
+        
+        years = calculator.years
+        yields = measures['calculated_yield']
+        np.testing.assert_allclose((cash_flows * (1 + yields[:, None] / 4) ** (-4 * years)).sum(axis=1),
+                                   prices * balances, rtol=1e-8)
+        margins = measures['calculated_dm']
+        np.testing.assert_allclose(
+            (cash_flows * (1 + (zero_rates + margins[:, None]) / 4) ** (-4 * years)).sum(axis=1),
+            prices * balances, rtol=1e-10)
+        np.testing.assert_allclose(
+            measures['calculated_price'][0],
+            (cash_flows[0] * (1 + (zero_rates + 0.015) / 4) ** (-4 * years)).sum() / balances[0])
+        
+        # Straight-line amortization over 10 years: WAL = average days to payment / 365
+        np.testing.assert_allclose(measures['weighted_average_life'], calculator.days.mean() / 365)
+        assert np.all(measures['modified_duration'] < measures['macaulay_duration'])
+        assert np.all(measures['macaulay_duration'] < measures['weighted_average_life'])
+    
+    def test_rate_scenarios(self, curve, tranche_cash_flows):
+        """Scenario zero rates add a leading axis and match single-curve runs"""
+        dates, cash_flows, principal, balances = tranche_cash_flows
+        calculator = LiabilityRiskCalculator(self.ANALYSIS_DATE, dates)
+        scenarios = curve.apply_shocks([YieldCurveShock("PARALLEL", 0, name="base"),
+                                        YieldCurveShock("PARALLEL", 100, name="up")])
+        
+        measures = calculator.calculate(cash_flows, principal, balances, balances,
+                                        calculator.zero_rates(scenarios), discount_margin=0.02)
+        
+        assert measures['calculated_price'].shape == (2, 2)
+        assert np.all(measures['calculated_price'][1] < measures['calculated_price'][0])
+        
+        shocked = calculator.calculate(cash_flows, principal, balances, balances,
+                                       calculator.zero_rates(scenarios.scenario_curve(1)), discount_margin=0.02)
+        for name, values in shocked.items():
+            np.testing.assert_allclose(measures[name][1], values, rtol=1e-10)
+    
+    def test_unsolvable_yield(self, curve, tranche_cash_flows):
+        """Rows without a solution are NaN and report as 0"""
+        dates, cash_flows, principal, balances = tranche_cash_flows
+        calculator = LiabilityRiskCalculator(self.ANALYSIS_DATE, dates)
+        
+        measures = calculator.calculate(np.zeros_like(cash_flows), np.zeros_like(principal), balances, balances,
+                                        calculator.zero_rates(curve))
+        
+        assert np.all(np.isnan(measures['calculated_yield']))
+        assert LiabilityRiskCalculator.to_decimals(measures, 0)['calculated_yield'] == Decimal('0')
+
+
 if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
\ No newline at end of file
+    pytest.main([__file__, "-v"])
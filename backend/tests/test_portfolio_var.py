@@ -0,0 +1,162 @@
+"""
+Tests for the Portfolio VaR Engine
+
+Chunked correlated loss simulation, Monte Carlo and parametric VaR /
+expected shortfall and the risk service methods built on them.
+"""
+
+import pytest
+import numpy as np
+from datetime import date, timedelta
+from scipy.stats import norm
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.shared_arrays import SharedArrayRegistry
+from app.models.asset import AssetHistory
+from app.models.correlation_matrix import DenseCorrelationMatrix, correlation_matrix_cache
+from app.models.portfolio_var import PortfolioVaREngine, VaRPositions
+from app.services import data_integration
+from app.services.risk_service import RiskAnalyticsService
+
+ASSETS = [
+    {'asset_id': 'L1', 'balance': 4000000, 'rating': 'B'},
+    {'asset_id': 'L2', 'balance': 3000000, 'rating': 'BB-', 'recovery_rate': 0.7},
+    {'asset_id': 'L3', 'balance': 2000000, 'rating': 'CCC', 'spread_duration': 4.0},
+    {'asset_id': 'L4', 'balance': 1000000, 'rating': None},
+]
+CORRELATION = np.array([[1.0, 0.5, 0.3, np.nan],
+                        [0.5, 1.0, 0.4, 0.2],
+                        [0.3, 0.4, 1.0, 0.1],
+                        [np.nan, 0.2, 0.1, 1.0]])
+
+
+@pytest.fixture
+def engine():
+    return PortfolioVaREngine(VaRPositions.from_assets(ASSETS), CORRELATION, seed=11)
+
+
+class TestPortfolioVaREngine:
+    """Test loss simulation and VaR estimates"""
+
+    def test_positions(self, engine):
+        """Rating-based inputs with per-asset overrides; missing pairs use the base correlation"""
+        positions = engine.positions
+        np.testing.assert_allclose(positions.default_probabilities, [0.04, 0.013, 0.27, 0.04])
+        np.testing.assert_allclose(positions.recovery_rates, [0.45, 0.7, 0.45, 0.45])
+        assert positions.portfolio_value == 10000000
+        assert engine.correlation[0, 3] == engine.correlation[3, 0] == 0.2
+
+    def test_chunks_independent_of_workers(self, engine):
+        """Losses depend on the seed and batch size only"""
+        single = engine.simulate_losses(1.0, 3000, batch_size=1000)
+        pooled = engine.simulate_losses(1.0, 3000, batch_size=1000, num_workers=2)
+        np.testing.assert_array_equal(single, pooled)
+        assert single.shape == (3000,)
+
+    def test_default_rates(self, engine):
+        """Simulated default frequencies match the horizon default probabilities"""
+        positions = VaRPositions.from_assets([{**ASSETS[2], 'spread_volatility': 0.0}])
+        losses = PortfolioVaREngine(positions, seed=3).simulate_losses(0.5, 20000, batch_size=4000)
+
+        default_rate = np.mean(losses > 0)
+        assert default_rate == pytest.approx(1 - (1 - 0.27) ** 0.5, abs=0.01)
+        assert losses.max() == pytest.approx(2000000 * 0.55)
+
+    def test_monte_carlo_matches_parametric_for_spread_risk(self):
+        """Without defaults the loss is normal, so both methods agree"""
+        assets = [{**asset, 'default_probability': 0.0} for asset in ASSETS]
+        engine = PortfolioVaREngine(VaRPositions.from_assets(assets), CORRELATION, seed=5)
+
+        simulated = engine.monte_carlo(0.99, 1.0, 40000, batch_size=7000)
+        parametric = engine.parametric(0.99, 1.0)
+
+        assert simulated.var == pytest.approx(parametric.var, abs=4 * simulated.var_standard_error)
+        assert simulated.expected_shortfall == pytest.approx(parametric.expected_shortfall,
+                                                             abs=4 * simulated.es_standard_error)
+        assert parametric.expected_loss == pytest.approx(0.0, abs=1e-3)
+        assert parametric.expected_shortfall == pytest.approx(
+            parametric.loss_volatility * norm.pdf(norm.ppf(0.99)) / 0.01)
+        assert sum(simulated.histogram_counts) == 40000
+
+    def test_from_losses(self):
+        """Empirical VaR is the loss quantile and ES the mean loss beyond it"""
+        losses = np.arange(1000.0)
+        result = PortfolioVaREngine.from_losses(losses, 0.95, 100000.0)
+
+        assert result.var == pytest.approx(np.quantile(losses, 0.95))
+        assert result.expected_shortfall == pytest.approx(losses[losses >= result.var].mean())
+        assert result.var_standard_error > 0 and result.es_standard_error > 0
+        with pytest.raises(ValueError, match="Confidence level"):
+            PortfolioVaREngine.from_losses(losses, 1.0, 100000.0)
+
+
+class TestRiskServiceVaR:
+    """Test VaR methods of the risk analytics service"""
+
+    @pytest.fixture
+    def session(self):
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def service(self, session, tmp_path, monkeypatch):
+        monkeypatch.setattr(data_integration, 'shared_array_registry', SharedArrayRegistry(str(tmp_path)))
+        correlation_matrix_cache.clear()
+        correlation_matrix_cache.put(DenseCorrelationMatrix.from_pairs(
+            [("ASSET001", "ASSET002", 0.35)], version=1))
+        yield RiskAnalyticsService(session)
+        correlation_matrix_cache.clear()
+
+    def test_calculate_var(self, service):
+        """Model-based methods return VaR below ES with method details"""
+        for method in ("monte_carlo", "parametric"):
+            result = service.calculate_var("DEAL", confidence_level=0.99, time_horizon_days=90, method=method)
+            assert 0 < result['var'] <= result['expected_shortfall']
+            assert result['portfolio_value'] == 8000000
+
+        details = service.calculate_var("DEAL", 0.99, 90, "monte_carlo")['calculation_details']
+        assert details['simulations'] == 10000
+        assert sum(details['loss_distribution'].values()) == 10000
+        assert details['var_standard_error'] > 0
+
+    def test_historical_var(self, service, session):
+        """Historical VaR applies stored valuation changes to the current balances"""
+        with pytest.raises(ValueError, match="Historical loss data unavailable"):
+            service.calculate_var("DEAL", 0.99, 30, "historical")
+        
+        start = date(2023, 1, 1)
+        days = np.arange(200)
+        prices = 100 * (1 - 0.001 * days)
+        session.add_all(AssetHistory(blkrock_id="ASSET001", history_date=start + timedelta(days=int(d)),
+                                     property_name="market_value", property_value=str(price))
+                        for d, price in zip(days, prices))
+        session.commit()
+        # Only one position has a valuation history
+        with pytest.raises(ValueError, match="Historical loss data unavailable"):
+            service.calculate_var("DEAL", 0.99, 30, "historical")
+        
+        # Weekly valuations are carried forward between observations
+        session.add_all(AssetHistory(blkrock_id="ASSET002", history_date=start + timedelta(days=d),
+                                     property_name="market_value", property_value="98.5")
+                        for d in range(0, 200, 7))
+        session.commit()
+        
+        losses = service._get_historical_losses("DEAL", 30)
+        expected = 5000000 * (1 - prices[30:] / prices[:-30])
+        np.testing.assert_allclose(losses, expected)
+        assert len(losses) == 200 - 30
+        
+        result = service.calculate_var("DEAL", 0.99, 30, "historical")
+        assert result['var'] == pytest.approx(np.quantile(losses, 0.99))
+        assert result['var'] <= result['expected_shortfall']
+        assert 'Historical patterns repeat' in result['assumptions']
+    
+    def test_loss_distribution(self, service):
+        """Losses are bucketed as percentages of the portfolio value"""
+        buckets = service._calculate_loss_distribution([-50, 50, 100, 200, 400, 600], 10000)
+        assert buckets == {'0-1%': 2, '1-3%': 2, '3-5%': 1, '5%+': 1}
@@ -655,6 +655,66 @@ class TestRatingMigrationItem:
         median_defaults = migration_item.get_statistic_data("MEDIAN", "NUMDEF", test_date)
         assert median_defaults == Decimal('3')
 
+    def test_statistic_series_matches_per_date_statistics(self, in_memory_db):
+        """Test array statistics agree with GeStatData for every payment date"""
+        migration_item = RatingMigrationItem(
+            deal_name="TEST_DEAL",
+            analysis_date=date(2025, 1, 1),
+            maturity_date=date(2026, 1, 1),
+            num_simulations=4,
+            period_frequency=PeriodFrequency.QUARTERLY,
+            session=in_memory_db
+        )
+
+        for sim in range(1, 5):
+            for period_index, payment_date in enumerate(migration_item.payment_dates):
+                migration_item.add_rating_and_balance(
+                    sim, payment_date, "BB", Decimal(str(100000 * sim + 1000 * period_index))
+                )
+
+        assert migration_item.counts.shape[:2] == (4, len(migration_item.payment_dates))
+        assert migration_item.get_field_array("BALBB").shape == (4, len(migration_item.payment_dates))
+
+        for statistic in ["MIN", "MAX", "AVERAGE", "MEDIAN", "STDDEV"]:
+            series = migration_item.get_statistic_series(statistic, "BALBB")
+            for period_index, payment_date in enumerate(migration_item.payment_dates):
+                expected = migration_item.get_statistic_data(statistic, "BALBB", payment_date)
+                assert abs(Decimal(str(series[period_index])) - expected) < Decimal('0.0001')
+
+        time_series = migration_item.get_simulation_time_series(2, "BALBB")
+        assert time_series[0] == Decimal('200000.0')
+        assert time_series[1] == Decimal('201000.0')
+
+    def test_save_to_database_bulk_rows(self, in_memory_db):
+        """Test SaveToDatabase writes one stats row per simulation/date and non-empty buckets"""
+        migration_item = RatingMigrationItem(
+            deal_name="TEST_DEAL",
+            analysis_date=date(2025, 1, 1),
+            maturity_date=date(2025, 7, 1),
+            num_simulations=2,
+            period_frequency=PeriodFrequency.QUARTERLY,
+            session=in_memory_db
+        )
+
+        dates = migration_item.payment_dates
+        migration_item.add_rating_and_balance(1, dates[0], "BBB", Decimal('1000000'))
+        migration_item.add_rating_and_balance(2, dates[0], "A", Decimal('500000'))
+        migration_item.add_rating_and_balance(2, dates[1], "D", Decimal('500000'))
+        migration_item.update_defaults(2)
+
+        migration_item.save_to_database()
+
+        stats = in_memory_db.query(PortfolioMigrationStats).filter_by(deal_id="TEST_DEAL").all()
+        assert len(stats) == 2 * len(dates)
+
+        distributions = in_memory_db.query(RatingDistributionHistory).filter_by(deal_id="TEST_DEAL").all()
+        buckets = {(row.simulation_number, row.calculation_date, row.rating_bucket) for row in distributions}
+        assert (1, dates[0], "BBB") in buckets
+        assert (2, dates[0], "A") in buckets
+        assert (2, dates[1], "D") in buckets
+        assert (2, dates[2], "D") in buckets  # Cumulative defaults carried forward
+        assert len(distributions) == 4
+
 
 class TestRatingMigrationOutput:
     """Test VBA RatingMigrationOutput.cls functionality"""
@@ -12,6 +12,7 @@ Tests the complete VBA Reinvest.cls conversion including:
 
 import pytest
 import json
+import numpy as np
 from datetime import date, datetime
 from decimal import Decimal
 from dateutil.relativedelta import relativedelta
@@ -26,6 +27,7 @@ from app.models.reinvestment import (
     ReinvestInfo,
     PaymentDates,
     SimpleCashflow,
+    ReinvestmentBook,
     ReinvestmentPeriodModel,
     ReinvestmentInfoModel,
     ReinvestmentCashFlowModel
@@ -766,4 +768,149 @@ class TestVBAComparisonAccuracy:
         # Check that liquidation works correctly
         proceeds = reinvest.liquidate(0.80)
         assert proceeds > 0
-        assert reinvest.last_period == reinvest.period  # VBA: clsLastperiod = clsPeriod
\ No newline at end of file
+        assert reinvest.last_period == reinvest.period  # VBA: clsLastperiod = clsPeriod
+
+class TestArrayBackedCashflow:
+    """Test the array-backed SimpleCashflow and vectorized AddReinvestment"""
+    
+    @pytest.fixture
+    def long_reinvest(self, reinvestment_db, sample_reinvest_info, mock_yield_curve):
+        """Reinvest with a schedule long enough to reach the reinvestment maturity"""
+        base_date = date(2025, 1, 15)
+        payment_dates = [None] + [
+            PaymentDates(base_date + relativedelta(months=i*3),
+                         base_date + relativedelta(months=(i-1)*3),
+                         base_date + relativedelta(months=i*3) - relativedelta(days=1))
+            for i in range(1, 31)
+        ]
+        reinvest = Reinvest(reinvestment_db)
+        reinvest.deal_setup(payment_dates, sample_reinvest_info, 3, mock_yield_curve)
+        return reinvest
+    
+    def test_columns_are_views(self):
+        """Property setters and column arrays share storage"""
+        cf = SimpleCashflow(10)
+        cf.Interest(3, Decimal('1250.50'))
+        assert cf.column('interest')[3] == 1250.50
+        
+        cf.column('recoveries')[4] = 300.0
+        assert cf.Recoveries(4) == Decimal('300.0')
+        assert cf.Recoveries(50) == Decimal('0')
+        
+        cf.PaymentDate(2, date(2025, 4, 15))
+        assert list(cf.payment_date_parts[:, 2]) == [date(2025, 4, 15).toordinal(), 2025, 4, 15]
+    
+    def test_reinvestment_runs_to_maturity(self, long_reinvest):
+        """Principal, defaults and recoveries reconcile over the full term"""
+        reinvest = long_reinvest
+        reinvest.add_reinvestment(5000000.0)
+        
+        # 60 month maturity paid quarterly from period 1
+        assert reinvest.last_period == 21
+        window = slice(2, 22)
+        cf = reinvest.deal_cf
+        
+        principal = cf.column('sched_principal')[window] + cf.column('unsched_principal')[window]
+        defaults = cf.column('default')[window]
+        assert principal.sum() + defaults.sum() == pytest.approx(5000000.0)
+        assert cf.column('sched_principal')[21] > 0
+        assert cf.column('sched_principal')[2:21].sum() == 0
+        
+        # Recoveries lag defaults by two quarters; remaining defaults are written off at maturity
+        np.testing.assert_allclose(cf.column('recoveries')[4:22], 0.6 * defaults[:-2])
+        assert cf.column('recoveries')[2:4].sum() == 0
+        assert cf.column('recoveries')[window].sum() + cf.column('net_loss')[window].sum() == \
+            pytest.approx(defaults.sum())
+        
+        # Beginning default balance carries unrecovered defaults forward
+        assert cf.column('default_bal')[4] == pytest.approx(defaults[0] + defaults[1])
+        assert cf.column('default_bal')[5] == pytest.approx(defaults[1] + defaults[2])
+    
+    def test_proceeds_and_collat_cf_read_arrays(self, long_reinvest):
+        """GetProceeds and GetCollatCF are slices of the cash flow arrays"""
+        reinvest = long_reinvest
+        reinvest.add_reinvestment(2000000.0)
+        reinvest.add_reinvestment(1000000.0)
+        reinvest.roll_forward()
+        reinvest.roll_forward()
+        
+        cf = reinvest.deal_cf
+        assert reinvest.get_proceeds("INTEREST") == pytest.approx(cf.column('interest')[3])
+        assert reinvest.get_proceeds("PRINCIPAL") == pytest.approx(
+            cf.column('sched_principal')[3] + cf.column('unsched_principal')[3] + cf.column('recoveries')[3])
+        
+        output = reinvest.get_collat_cf()
+        assert len(output) == reinvest.last_period + 1
+        assert output[5][0] == pytest.approx(float(cf.BegBalance(5)))
+        assert output[5][5] == pytest.approx(float(cf.Interest(5)))
+        assert output[2][0] == pytest.approx(3000000.0)
+
+
+class TestReinvestmentBook:
+    """Test the aggregated (vintage x period) reinvestment book"""
+    
+    @staticmethod
+    def _vintage(period, amount, sample_reinvest_info, mock_yield_curve):
+        """Reinvest made in a deal period, with dates running to deal period 20"""
+        deal_date = lambda t: date(2025, 1, 15) + relativedelta(months=3*t)
+        payment_dates = [None] + [
+            PaymentDates(deal_date(period + i), deal_date(period + i - 1),
+                         deal_date(period + i) - relativedelta(days=1))
+            for i in range(1, 21 - period)
+        ]
+        reinvest = Reinvest()
+        reinvest.deal_setup(payment_dates, sample_reinvest_info, 3, mock_yield_curve)
+        reinvest.add_reinvestment(amount)
+        return reinvest
+    
+    def test_matches_individual_reinvestments(self, sample_reinvest_info, mock_yield_curve):
+        """Proceeds, liquidation and balances agree with per-vintage Reinvest objects"""
+        vintages = {}
+        book = ReinvestmentBook()
+        
+        for period in range(1, 13):
+            interest = principal = 0.0
+            for reinvest in vintages.values():
+                interest += reinvest.get_proceeds("INTEREST")
+                principal += reinvest.get_proceeds("PRINCIPAL")
+                reinvest.roll_forward()
+            
+            proceeds = book.proceeds(period)
+            book.roll_forward(period)
+            assert proceeds["INTEREST"] == pytest.approx(interest)
+            assert proceeds["PRINCIPAL"] == pytest.approx(principal)
+            
+            if period % 2 == 1:
+                amount = 1000000.0 + 100000.0 * period
+                vintages[period] = self._vintage(period, amount, sample_reinvest_info, mock_yield_curve)
+                book.add_vintage(period, self._vintage(period, amount, sample_reinvest_info, mock_yield_curve))
+        
+        assert book.count == 6
+        assert book.field('interest').shape[0] == 6
+        
+        expected = sum(reinvest.liquidate(0.8) for reinvest in vintages.values())
+        assert book.liquidate(0.8) == pytest.approx(expected)
+        # Nothing is left to collect after the liquidation period
+        book.roll_forward()
+        assert book.proceeds() == {"INTEREST": 0.0, "PRINCIPAL": 0.0}
+        for reinvest in vintages.values():
+            reinvest.roll_forward()
+        
+        balances = book.current_balances()
+        reinvested = book.reinvested_amounts()
+        for period, reinvest in vintages.items():
+            row = book.vintage_rows[period]
+            assert book.last_periods[row] == reinvest.last_period
+            assert balances['performing'][row] == pytest.approx(reinvest.prin_ball_ex_defaults())
+            assert reinvested[row] == pytest.approx(sum(row_cf[0] for row_cf in reinvest.get_collat_cf()[1:]))
+    
+    def test_replacing_a_vintage(self, sample_reinvest_info, mock_yield_curve):
+        """A second reinvestment in the same period replaces the first"""
+        book = ReinvestmentBook(vintage_capacity=1)
+        book.add_vintage(2, self._vintage(2, 1000000.0, sample_reinvest_info, mock_yield_curve))
+        book.add_vintage(4, self._vintage(4, 1000000.0, sample_reinvest_info, mock_yield_curve))
+        book.add_vintage(2, self._vintage(2, 500000.0, sample_reinvest_info, mock_yield_curve))
+        
+        assert book.count == 2
+        assert book.field('beg_balance')[book.vintage_rows[2], 4] == pytest.approx(500000.0)
+        assert book.field('beg_balance')[:, 3].sum() == 0.0
@@ -0,0 +1,76 @@
+"""
+Tests for the risk analytics correlation matrix
+
+Sub-matrix extraction from the cached dense correlation matrix, the
+spectral statistics and correlation clustering.
+"""
+
+import time
+import pytest
+import numpy as np
+
+from app.core.shared_arrays import SharedArrayRegistry
+from app.models.correlation_matrix import DenseCorrelationMatrix, correlation_matrix_cache
+from app.services import data_integration
+from app.services.risk_service import RiskAnalyticsService
+
+PAIRS = [
+    ("A1", "A2", 0.8), ("A2", "A1", 0.8),
+    ("A1", "A3", 0.2),
+    ("A2", "A3", 0.75),
+    ("A3", "A4", 0.1),
+    ("A4", "A5", 0.9), ("A5", "A4", 0.7),   # Asymmetric source rows
+]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_integration, 'shared_array_registry', SharedArrayRegistry(str(tmp_path)))
+    correlation_matrix_cache.clear()
+    correlation_matrix_cache.put(DenseCorrelationMatrix.from_pairs(PAIRS, version=1))
+    yield RiskAnalyticsService()
+    correlation_matrix_cache.clear()
+
+
+class TestBuildCorrelationMatrix:
+    """Test correlation matrix analysis for a set of assets"""
+
+    def test_submatrix_and_statistics(self, service):
+        """Requested assets are extracted in order; unknown pairs are uncorrelated"""
+        result = service.build_correlation_matrix(["A3", "A1", "A2", "UNKNOWN"])
+        matrix = np.array(result['correlation_matrix'])
+
+        np.testing.assert_allclose(matrix, [[1.0, 0.2, 0.75, 0.0],
+                                            [0.2, 1.0, 0.8, 0.0],
+                                            [0.75, 0.8, 1.0, 0.0],
+                                            [0.0, 0.0, 0.0, 1.0]])
+        np.testing.assert_allclose(result['eigenvalues'], np.linalg.eigvalsh(matrix))
+        assert result['average_correlation'] == pytest.approx((0.2 + 0.75 + 0.8) / 6)
+        assert result['max_correlation'] == pytest.approx(0.8)
+        assert result['min_correlation'] == 0.0
+        assert result['correlation_clusters'] == [["A3", "A1", "A2"]]
+
+    def test_asymmetric_pairs_and_clusters(self, service):
+        """Direction-specific source values are averaged before clustering"""
+        result = service.build_correlation_matrix(["A1", "A2", "A4", "A5"])
+
+        assert result['correlation_matrix'][2][3] == pytest.approx(0.8)
+        assert result['correlation_matrix'][3][2] == pytest.approx(0.8)
+        assert result['correlation_clusters'] == [["A1", "A2"], ["A4", "A5"]]
+        assert result['condition_number'] == pytest.approx(1.8 / 0.2)
+
+    def test_large_request(self, service):
+        """Hundreds of assets are handled without per-pair lookups"""
+        rng = np.random.default_rng(7)
+        factors = rng.standard_normal((488, 4))
+        values = np.corrcoef(factors @ rng.standard_normal((4, 60)) + rng.standard_normal((488, 60)))
+        asset_ids = [f"ASSET{i:03d}" for i in range(488)]
+        correlation_matrix_cache.put(DenseCorrelationMatrix(asset_ids, values, version=2))
+
+        start = time.perf_counter()
+        result = service.build_correlation_matrix(asset_ids[:400])
+        elapsed = time.perf_counter() - start
+
+        assert result['asset_count'] == 400
+        np.testing.assert_allclose(result['correlation_matrix'], values[:400, :400])
+        assert elapsed < 5.0
@@ -0,0 +1,129 @@
+"""
+Tests for the vectorized scenario waterfall
+
+Checks the array executor against the per-scenario WaterfallService
+calculation and the stress test summaries built on it.
+"""
+
+import pytest
+import numpy as np
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.waterfall import WaterfallExecution
+from app.services.waterfall_service import WaterfallService
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def service(session):
+    return WaterfallService(session)
+
+
+class TestScenarioWaterfall:
+    """Test waterfall payments across many scenarios"""
+
+    def test_matches_single_scenario_calculation(self, service):
+        """Every scenario row reproduces calculate_waterfall"""
+        funds = [Decimal('0'), Decimal('500000'), Decimal('1500000'), Decimal('10000000'), Decimal('50000000')]
+        result = service.calculate_waterfall_scenarios("TEST", [float(f) for f in funds])
+
+        assert result.paid.shape == (5, 10)
+        for row, available in enumerate(funds):
+            expected = service.calculate_waterfall("TEST", date(2024, 1, 15), available)
+            for expected_step, step in zip(expected['payment_steps'], result.payment_steps(row)):
+                assert step['step_number'] == expected_step['step_number']
+                assert step['target_amount'] == pytest.approx(expected_step['target_amount'])
+                assert step['actual_amount'] == pytest.approx(expected_step['actual_amount'])
+                assert step['remaining_funds'] == pytest.approx(expected_step['remaining_funds'], abs=1e-6)
+            assert result.total_paid('interest')[row] == pytest.approx(expected['total_interest_paid'])
+            assert result.remaining_funds[row] == pytest.approx(expected['remaining_funds'], abs=1e-6)
+
+    def test_cash_buckets_balances_and_triggers(self, service):
+        """Principal proceeds fund principal steps; blocked steps pass cash down"""
+        executor = service.get_scenario_executor("TEST")
+        balances = np.tile(executor.current_balances, (2, 1))
+        balances[1, executor.tranche_index['B']] = 0.0
+
+        result = executor.run([2000000.0, 2000000.0], principal_cash=[9000000.0, 9000000.0],
+                              tranche_balances=balances, trigger_states={9: np.array([True, False])})
+
+        b = executor.tranche_index['B']
+        assert result.interest_paid[0, b] == pytest.approx(68000000 * 0.075 / 12)
+        assert result.interest_paid[1, b] == 0.0
+        # Class A principal is shared pro rata between A-1 and A-2
+        a1, a2 = executor.tranche_index['A1'], executor.tranche_index['A2']
+        assert result.principal_paid[0, a1] / result.principal_paid[0, a2] == pytest.approx(180 / 135)
+        # Step 9 (Class C principal) is blocked in the second scenario only
+        c = executor.tranche_index['C']
+        assert result.principal_paid[0, c] == pytest.approx(900000)
+        assert result.principal_paid[1, c] == 0.0
+        np.testing.assert_allclose(result.total_paid() + result.remaining_funds, 11000000.0)
+        assert result.principal_paid[1].sum() == pytest.approx(6300000)
+
+    def test_stress_tests(self, service, session):
+        """Stress scenarios are summarized against the base case"""
+        session.add_all([
+            WaterfallExecution(deal_id="TEST", payment_date=date(2024, 1, 15), collection_amount=Decimal('9000000'),
+                               total_available=Decimal('9000000'), execution_status='COMPLETED'),
+            WaterfallExecution(deal_id="TEST", payment_date=date(2024, 4, 15), collection_amount=Decimal('10000000'),
+                               total_available=Decimal('10000000'), execution_status='COMPLETED'),
+            WaterfallExecution(deal_id="TEST", payment_date=date(2024, 7, 15), collection_amount=Decimal('1'),
+                               total_available=Decimal('1'), execution_status='FAILED'),
+        ])
+        session.commit()
+        base = service._get_base_waterfall("TEST")
+        assert base['available'] and base['total_available_funds'] == Decimal('10000000')
+        assert base['payment_date'] == date(2024, 4, 15)
+
+        results = service.run_stress_tests("TEST", [
+            {'scenario_name': 'mild', 'collection_haircut': 0.2},
+            {'scenario_name': 'severe', 'default_rate_shock': 0.6},
+            {'scenario_name': 'flat', 'available_funds': 10000000},
+        ])
+
+        assert [r['scenario_name'] for r in results] == ['severe', 'mild', 'flat']
+        assert results[0]['loss_percentage'] == pytest.approx(60.0)
+        assert results[1]['tranche_impacts']['A1'] == 0.0
+        assert results[1]['tranche_impacts']['C'] > 0
+        assert results[2]['portfolio_loss'] == 0.0
+
+    def test_stress_tests_rank_by_debt_shortfall(self, service, session):
+        """Scenarios are ranked by what debt tranches lose, not the funds haircut"""
+        session.add(WaterfallExecution(deal_id="TEST", payment_date=date(2024, 4, 15),
+                                       collection_amount=Decimal('10000000'),
+                                       total_available=Decimal('10000000'), execution_status='COMPLETED'))
+        session.commit()
+
+        results = service.run_stress_tests("TEST", [
+            {'scenario_name': 'trim', 'collection_haircut': 0.01},
+            {'scenario_name': 'a1_blocked', 'available_funds': 10000000, 'blocked_steps': [3]},
+        ])
+
+        # Blocking Class A-1 interest loses no funds but impairs A-1 more than the haircut impairs C
+        assert [r['scenario_name'] for r in results] == ['a1_blocked', 'trim']
+        assert results[0]['portfolio_loss'] == 0.0
+        assert results[0]['debt_shortfall'] == pytest.approx(675000)
+        assert results[1]['portfolio_loss'] == pytest.approx(100000)
+        assert results[1]['debt_shortfall'] == pytest.approx(100000)
+        assert results[1]['equity_loss'] == 0.0
+
+    def test_stress_tests_without_base_waterfall(self, service):
+        """Deals without a completed execution have no base case to stress"""
+        base = service._get_base_waterfall("TEST")
+        assert not base['available'] and base['total_available_funds'] is None
+        assert "no completed waterfall execution" in base['message']
+
+        with pytest.raises(ValueError, match="No base waterfall"):
+            service.run_stress_tests("TEST", [{'scenario_name': 'mild', 'collection_haircut': 0.2}])
@@ -0,0 +1,75 @@
+"""
+Tests for Shared Reference Arrays
+
+Publishing versioned arrays, attaching them as read-only memory maps from
+separate registries (standing in for worker processes) and version swaps.
+"""
+
+import pytest
+import numpy as np
+
+from app.core.shared_arrays import SharedArrayRegistry
+from app.models.correlation_matrix import DenseCorrelationMatrix
+
+
+@pytest.fixture
+def registries(tmp_path):
+    """Publisher and worker registries sharing one directory"""
+    return SharedArrayRegistry(str(tmp_path)), SharedArrayRegistry(str(tmp_path))
+
+
+class TestSharedArrayRegistry:
+    """Test publishing and attaching shared arrays"""
+
+    def test_publish_and_attach(self, registries):
+        """Workers map the published array read-only and reuse the mapping"""
+        publisher, worker = registries
+        assert worker.attach("ratings") is None
+
+        version = publisher.publish("ratings", np.arange(6.0).reshape(2, 3), metadata={'scale': 'moodys'})
+        shared = worker.attach("ratings")
+
+        assert version == 1 and shared.version == 1
+        np.testing.assert_array_equal(shared.array, [[0, 1, 2], [3, 4, 5]])
+        assert shared.metadata == {'scale': 'moodys'}
+        assert not shared.array.flags.writeable
+        assert worker.attach("ratings") is shared
+        assert worker.names() == ["ratings"]
+
+    def test_version_swap(self, registries):
+        """A new version replaces the live array; old mappings stay valid"""
+        publisher, worker = registries
+        publisher.publish("matrix", np.zeros(3))
+        old = worker.attach("matrix")
+
+        publisher.publish("matrix", np.ones(3))
+        new = worker.attach("matrix")
+
+        assert (old.version, new.version) == (1, 2)
+        np.testing.assert_array_equal(old.array, 0.0)
+        np.testing.assert_array_equal(new.array, 1.0)
+        with pytest.raises(ValueError, match="not newer"):
+            publisher.publish("matrix", np.ones(3), version=2)
+        with pytest.raises(ValueError, match="Invalid shared array name"):
+            publisher.publish("../matrix", np.ones(3))
+
+    def test_old_versions_pruned(self, registries, tmp_path):
+        """Only the newest keep_versions files are retained"""
+        publisher, _ = registries
+        for version in (1, 2, 5):
+            publisher.publish("matrix", np.full(2, version), version=version)
+
+        assert sorted(path.name for path in (tmp_path / "matrix").glob("v*.npy")) == ["v2.npy", "v5.npy"]
+        assert publisher.current_version("matrix") == 5
+
+    def test_shared_correlation_matrix(self, registries):
+        """A correlation matrix published with its asset ids attaches zero-copy"""
+        publisher, worker = registries
+        matrix = DenseCorrelationMatrix.from_pairs([("A1", "A2", 0.3), ("A2", "A3", 0.6)], version=7)
+        publisher.publish("correlation_matrix", matrix.values, matrix.version, {'asset_ids': matrix.asset_ids})
+
+        shared = DenseCorrelationMatrix.from_shared(worker.attach("correlation_matrix"))
+
+        assert shared.version == 7
+        assert shared.get("A3", "A2") == pytest.approx(0.6)
+        np.testing.assert_allclose(shared.submatrix(["A2", "A1"]), [[1.0, 0.3], [0.3, 1.0]])
@@ -0,0 +1,115 @@
+"""
+Tests for Transition Matrix Service
+
+Generator-based period matrices, cached thresholds and analytic
+multi-period rating distributions.
+"""
+
+import pytest
+import numpy as np
+
+from app.models.credit_migration import CreditMigration
+from app.services.transition_matrix_service import TransitionMatrixService
+
+
+@pytest.fixture
+def annual_matrix():
+    return CreditMigration()._get_default_annual_transition_matrix()
+
+
+@pytest.fixture
+def service(annual_matrix):
+    return TransitionMatrixService(annual_matrix)
+
+
+class TestTransitionMatrixService:
+    """Test period matrices derived from the annual generator"""
+
+    def test_generator_is_valid(self, service):
+        """Off-diagonal rates are non-negative and rows sum to zero"""
+        off_diagonal = service.generator - np.diag(np.diag(service.generator))
+        assert np.all(off_diagonal >= 0)
+        np.testing.assert_allclose(service.generator.sum(axis=1), 0.0, atol=1e-12)
+        # Default stays absorbing
+        np.testing.assert_allclose(service.generator[-1], 0.0, atol=1e-12)
+
+    def test_period_matrices_compose(self, service, annual_matrix):
+        """Shorter steps compound to the (regularized) annual matrix"""
+        quarterly = service.get_period_matrix(3)
+        monthly = service.get_period_matrix(1)
+
+        np.testing.assert_allclose(np.linalg.matrix_power(monthly, 3), quarterly, atol=1e-12)
+        np.testing.assert_allclose(np.linalg.matrix_power(monthly, 6), service.get_period_matrix(6),
+                                   atol=1e-12)
+        np.testing.assert_allclose(np.linalg.matrix_power(quarterly, 4), annual_matrix, atol=1e-2)
+        assert np.all(quarterly >= 0)
+        np.testing.assert_allclose(quarterly.sum(axis=1), 1.0)
+
+    def test_whole_years_use_annual_matrix(self, service, annual_matrix):
+        """12-month steps return the input matrix, multi-year steps its powers"""
+        np.testing.assert_array_equal(service.get_period_matrix(12), annual_matrix)
+        np.testing.assert_allclose(service.get_period_matrix(24), annual_matrix @ annual_matrix, atol=1e-15)
+        np.testing.assert_array_equal(service.get_horizon_matrix(12), annual_matrix)
+        assert not service.get_period_matrix(12).flags.writeable
+
+    def test_matrices_are_cached(self, service):
+        """Repeated requests return the same read-only arrays"""
+        assert service.get_period_matrix(6) is service.get_period_matrix(6)
+        cumulative = service.get_cumulative_matrix(6)
+        assert cumulative is service.get_cumulative_matrix(6)
+        assert not cumulative.flags.writeable
+
+    def test_cumulative_thresholds(self, service):
+        """Cumulative rows are non-decreasing and end at exactly 1"""
+        cumulative = service.get_cumulative_matrix(3)
+        assert np.all(np.diff(cumulative, axis=1) >= 0)
+        assert np.all(cumulative[:, -1] == 1.0)
+        np.testing.assert_allclose(np.diff(cumulative, axis=1), service.get_period_matrix(3)[:, 1:],
+                                   atol=1e-12)
+
+    def test_rating_distribution(self, service):
+        """k-period distributions equal matrix powers"""
+        distributions = service.get_rating_distribution(8, num_periods=5, month_step=3)
+
+        assert distributions.shape == (6, service.num_ratings)
+        assert distributions[0, 8] == 1.0
+        np.testing.assert_allclose(distributions[5],
+                                   np.linalg.matrix_power(service.get_period_matrix(3), 5)[8])
+        np.testing.assert_allclose(distributions[2], service.get_horizon_matrix(6)[8], atol=1e-12)
+
+        defaults = service.get_default_probabilities(num_periods=4)
+        assert np.all(np.diff(defaults, axis=0) >= 0)
+        np.testing.assert_allclose(defaults[:, -1], 1.0)
+
+    def test_shared_instances(self, annual_matrix):
+        """Engines with the same annual matrix share one service"""
+        TransitionMatrixService.clear_shared_instances()
+        first = TransitionMatrixService.for_matrix(annual_matrix)
+        assert TransitionMatrixService.for_matrix(annual_matrix.copy()) is first
+
+        other = annual_matrix.copy()
+        other[0, :2] = [other[0, 0] - 0.01, other[0, 1] + 0.01]
+        assert TransitionMatrixService.for_matrix(other) is not first
+
+    def test_invalid_input(self, service):
+        """Non-stochastic matrices and bad month steps raise"""
+        with pytest.raises(ValueError):
+            TransitionMatrixService(np.ones((3, 3)))
+        with pytest.raises(ValueError):
+            TransitionMatrixService(np.eye(3)[:2])
+        with pytest.raises(ValueError):
+            service.get_period_matrix(0)
+        with pytest.raises(ValueError):
+            service.get_period_matrix(1.5)
+
+    def test_credit_migration_uses_month_step(self):
+        """Monthly setups get the one-month matrix; engines expose analytic forecasts"""
+        cm = CreditMigration()
+        cm.setup(num_sims=1, period="MONTHLY")
+
+        np.testing.assert_array_equal(cm.tran_matrix, cm.transition_service.get_cumulative_matrix(1))
+
+        forecast = cm.get_rating_distribution(["BBB", "BBB", "B"], num_periods=12)
+        assert forecast.shape == (13, 18)
+        np.testing.assert_allclose(forecast.sum(axis=1), 3.0)
+        assert forecast[0, 8] == 2.0
@@ -4,6 +4,7 @@ Tests complete end-to-end functionality including waterfall integration
 """
 
 import pytest
+import numpy as np
 from decimal import Decimal
 from datetime import date
 from sqlalchemy.orm import Session
@@ -404,4 +405,106 @@ class TestTriggerIntegration:
         trigger_service = TriggerService(session)
         
         with pytest.raises(ValueError, match="Deal .* not found"):
-            trigger_service.setup_deal_triggers("INVALID_DEAL", 48)
\ No newline at end of file
+            trigger_service.setup_deal_triggers("INVALID_DEAL", 48)
+
+class TestRunScopedTriggers:
+    """Run-scoped trigger calculations with deferred persistence"""
+    
+    @pytest.fixture
+    def trigger_service(self):
+        """Trigger service on an in-memory database with a two-tranche deal"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        
+        test_engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(test_engine)
+        session = sessionmaker(bind=test_engine)()
+        session.add(CLODeal(deal_id="RUN_DEAL", deal_name="Run Scoped Deal"))
+        for tranche_name, balance, seniority in [("Class A", Decimal('300000000'), 1),
+                                                 ("Class B", Decimal('100000000'), 2)]:
+            session.add(CLOTranche(tranche_id=f"RUN_DEAL_{tranche_name}", deal_id="RUN_DEAL",
+                                   tranche_name=tranche_name, initial_balance=balance,
+                                   current_balance=balance, seniority_level=seniority))
+        session.commit()
+        
+        trigger_service = TriggerService(session)
+        trigger_service.setup_deal_triggers("RUN_DEAL", 4)
+        yield trigger_service
+        session.close()
+    
+    def _run_periods(self, trigger_service, collateral_balances):
+        """Calculate, save and roll forward one period per collateral balance"""
+        for period, collateral in enumerate(collateral_balances, start=1):
+            trigger_service.calculate_triggers(
+                deal_id="RUN_DEAL",
+                period=period,
+                collateral_balance=collateral,
+                liability_balances={"Class A": Decimal('300000000'), "Class B": Decimal('100000000')},
+                interest_collections=Decimal('6000000'),
+                interest_due_by_tranche={"Class A": Decimal('4000000'), "Class B": Decimal('1500000')}
+            )
+            trigger_service.save_trigger_results_to_db("RUN_DEAL", period)
+            trigger_service.rollforward_all_triggers()
+    
+    def test_writes_are_deferred_to_end_of_run(self, trigger_service):
+        """Periods are written in one batch when the run ends"""
+        from app.models.oc_trigger import OCTrigger
+        from app.models.ic_trigger import ICTrigger
+        
+        trigger_service.begin_run("RUN_DEAL")
+        self._run_periods(trigger_service, [Decimal('400000000')] * 3)
+        assert trigger_service.session.query(OCTrigger).count() == 0
+        
+        assert trigger_service.end_run() == 12
+        assert not trigger_service.in_run
+        periods = trigger_service.session.query(OCTrigger.period_number)\
+            .filter_by(tranche_name="Class B").order_by(OCTrigger.period_number).all()
+        assert [period for (period,) in periods] == [1, 2, 3]
+        assert trigger_service.session.query(ICTrigger).count() == 6
+    
+    def test_what_if_run_is_not_persisted(self, trigger_service):
+        """Non-persisting runs keep results in memory only"""
+        from app.models.oc_trigger import OCTrigger
+        
+        trigger_service.begin_run("RUN_DEAL", persist=False)
+        self._run_periods(trigger_service, [Decimal('400000000')] * 2)
+        assert trigger_service.end_run() == 0
+        assert trigger_service.session.query(OCTrigger).count() == 0
+        assert trigger_service.get_result_matrix('oc').periods == [1, 2]
+    
+    def test_result_matrix(self, trigger_service):
+        """Period x trigger matrices hold every captured period, growing past setup"""
+        trigger_service.begin_run("RUN_DEAL", persist=False)
+        collateral = [Decimal('480000000'), Decimal('440000000'), Decimal('420000000'),
+                      Decimal('400000000'), Decimal('340000000')]
+        self._run_periods(trigger_service, collateral)
+        trigger_service.end_run()
+        
+        oc = trigger_service.get_result_matrix('oc')
+        assert oc.tranche_names == ["Class A", "Class B"]
+        assert oc.values.shape == (5, 2, len(oc.fields))
+        expected_ratios = [[float(c / Decimal('300000000')), float(c / Decimal('100000000'))]
+                           for c in collateral]
+        np.testing.assert_allclose(oc.field('calculated_ratio'), expected_ratios, atol=1e-6)
+        # Class A (120% threshold) fails only in the last period
+        assert oc.pass_fail()[:, 0].tolist() == [True, True, True, True, False]
+        assert oc.field('principal_cure_amount')[4, 0] > 0
+        
+        ic = trigger_service.get_result_matrix('ic')
+        np.testing.assert_allclose(ic.field('calculated_ratio')[:, 1], 4.0)
+        
+        with pytest.raises(ValueError, match="Unknown trigger type"):
+            trigger_service.get_result_matrix('cc')
+    
+    def test_periods_are_captured_only_during_runs(self, trigger_service):
+        """Saves outside a run are not captured, and setup starts a new capture"""
+        self._run_periods(trigger_service, [Decimal('400000000')] * 2)
+        assert trigger_service.get_result_matrix('oc').periods == []
+        
+        trigger_service.begin_run("RUN_DEAL", persist=False)
+        self._run_periods(trigger_service, [Decimal('400000000')] * 2)
+        trigger_service.end_run()
+        assert trigger_service.get_result_matrix('oc').periods == [1, 2]
+        
+        trigger_service.setup_deal_triggers("RUN_DEAL", 4)
+        assert trigger_service.get_result_matrix('oc').values.shape[0] == 0
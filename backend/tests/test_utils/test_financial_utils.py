@@ -9,6 +9,7 @@ import pytest
 from datetime import date, timedelta
 import numpy as np
 from decimal import Decimal
+from scipy.optimize import brentq
 
 from app.utils.financial_utils import FinancialUtils
 from app.utils.math_utils import DayCount
@@ -429,4 +430,73 @@ class TestFinancialUtils:
         
         # Test that duration is reasonable - don't do manual calculation due to complexity
         # of day count conventions and compounding frequency differences
-        assert 0 < duration < 3.0  # Should be reasonable for a 1.5 year bond
\ No newline at end of file
+        assert 0 < duration < 3.0  # Should be reasonable for a 1.5 year bond
+
+class TestXirrBatch:
+    """Test simultaneous XIRR/IRR solving across many cash flow series"""
+    
+    def test_matches_reference_root(self):
+        """Ragged series with their own dates agree with a bracketed NPV root (actual/365)"""
+        cashflows = [
+            [-1000, 500, 600],
+            [-1000, 100, 200, 300, 400],
+            [-1000, 1100],
+        ]
+        dates = [
+            [date(2024, 1, 1), date(2024, 6, 15), date(2024, 12, 31)],
+            [date(2024, 1, 1), date(2024, 3, 1), date(2024, 6, 1), date(2024, 9, 1), date(2024, 12, 1)],
+            [date(2024, 1, 1), date(2025, 1, 1)],
+        ]
+        
+        rates, converged = FinancialUtils.xirr_batch(cashflows, dates)
+        
+        assert converged.all()
+        for rate, series, series_dates in zip(rates, cashflows, dates):
+            years = np.array([(d - series_dates[0]).days / 365.0 for d in series_dates])
+            expected = brentq(lambda r: np.sum(np.array(series) * (1 + r) ** -years), -0.99, 10.0,
+                              xtol=1e-14)
+            assert abs(rate - expected) < 1e-10
+        # One year of 366 days: 10% return over 366/365 years
+        assert abs(rates[2] - (1.1 ** (365 / 366) - 1)) < 1e-10
+    
+    def test_shared_schedule_for_simulated_paths(self):
+        """Thousands of paths on one quarterly schedule solve in a single call"""
+        rng = np.random.default_rng(7)
+        num_paths, num_periods = 5000, 32
+        cashflows = rng.normal(3.0, 2.0, (num_paths, num_periods + 1))
+        cashflows[:, 0] = -100.0
+        cashflows[:, -1] += 100.0
+        times = np.arange(num_periods + 1) * 0.25
+        
+        rates, converged = FinancialUtils.xirr_batch(cashflows, times)
+        
+        assert converged.all()
+        npv = (cashflows * (1 + rates[:, None]) ** -times).sum(axis=1)
+        assert np.abs(npv).max() < 1e-6
+    
+    def test_padding_and_convergence_flags(self):
+        """NaN padding means no flow; series without a sign change are flagged"""
+        schedule = [date(2024, 1, 1), date(2025, 1, 1), date(2026, 1, 1)]
+        cashflows = np.array([
+            [-1000.0, 1100.0, np.nan],
+            [100.0, 200.0, 300.0],
+            [-1000.0, 0.0, 1000.0],
+        ])
+        
+        rates, converged = FinancialUtils.xirr_batch(cashflows, schedule)
+        
+        assert converged.tolist() == [True, False, True]
+        assert abs(rates[0] - (1100 / 1000) ** (365 / 366) + 1) < 1e-10
+        assert np.isnan(rates[1])
+        assert abs(rates[2]) < 1e-10
+        
+        with pytest.raises(ValueError):
+            FinancialUtils.xirr_batch([[-1000, 500, 600]], [[date(2024, 1, 1), date(2025, 1, 1)]])
+    
+    def test_irr_batch(self):
+        """Periodic IRR agrees with the scalar solver"""
+        rates, converged = FinancialUtils.irr_batch([[-1000, 300, 400, 500], [-1000, 1100]])
+        
+        assert converged.all()
+        assert abs(rates[0] - FinancialUtils.irr([-1000, 300, 400, 500])) < 1e-8
+        assert abs(rates[1] - 0.10) < 1e-10
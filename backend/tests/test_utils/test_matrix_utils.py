@@ -8,7 +8,7 @@ import pytest
 import numpy as np
 from numpy.testing import assert_array_almost_equal, assert_array_equal
 
-from app.utils.matrix_utils import MatrixUtils
+from app.utils.matrix_utils import MatrixUtils, FactorCorrelationModel
 
 
 class TestMatrixUtils:
@@ -384,4 +384,45 @@ class TestMatrixUtils:
         # Test operations requiring square matrices with non-square input
         non_square = [[1, 2, 3], [4, 5, 6]]
         with pytest.raises(ValueError):
-            MatrixUtils.matrix_inverse(non_square)
\ No newline at end of file
+            MatrixUtils.matrix_inverse(non_square)
+
+class TestFactorCorrelationModel:
+    """Test multi-factor copula correlation structure"""
+    
+    def test_from_groups_reproduces_block_correlations(self):
+        """Nested industry/issuer groups should give the tiered pairwise levels"""
+        industries = ["TECH", "TECH", "ENERGY", "ENERGY", "RETAIL"]
+        issuers = ["I1", "I1", "I2", "I3", "I4"]
+        model = FactorCorrelationModel.from_groups([industries, issuers], 0.2, [0.4, 0.7])
+        
+        corr = model.correlation_matrix()
+        assert corr[0, 1] == pytest.approx(0.7)  # Same issuer
+        assert corr[2, 3] == pytest.approx(0.4)  # Same industry
+        assert corr[0, 4] == pytest.approx(0.2)  # Unrelated
+        assert_array_almost_equal(np.diag(corr), np.ones(5))
+        assert model.num_factors == 1 + 3 + 4
+    
+    def test_sample_matches_implied_correlation(self):
+        """Sampled normals should have unit variance and the implied correlation"""
+        model = FactorCorrelationModel.from_groups([["A", "A", "B", "B"]], 0.1, [0.5])
+        samples = model.sample(np.random.default_rng(7), 200000)
+        
+        assert samples.shape == (200000, 4)
+        assert_array_almost_equal(samples.std(axis=0), np.ones(4), decimal=2)
+        assert_array_almost_equal(np.corrcoef(samples.T), model.correlation_matrix(), decimal=2)
+    
+    def test_low_rank_approximation(self):
+        """One factor should recover a constant-correlation matrix exactly"""
+        corr = np.full((6, 6), 0.3)
+        np.fill_diagonal(corr, 1.0)
+        
+        model = FactorCorrelationModel.from_correlation_matrix(corr, num_factors=1)
+        assert model.loadings.shape == (6, 1)
+        assert_array_almost_equal(model.correlation_matrix(), corr)
+    
+    def test_invalid_structures(self):
+        """Loadings above unit variance and decreasing levels should be rejected"""
+        with pytest.raises(ValueError):
+            FactorCorrelationModel(np.array([[0.9, 0.9]]))
+        with pytest.raises(ValueError):
+            FactorCorrelationModel.from_groups([["A", "B"]], 0.5, [0.3])
@@ -0,0 +1,162 @@
+"""
+Test suite for statistics_utils module
+
+Tests streaming mean/variance, min/max and quantile sketch accumulation
+"""
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+from app.utils.statistics_utils import StreamingStatistics, MonteCarloEstimator
+
+
+class TestStreamingStatistics:
+    """Test streaming statistics accumulator"""
+    
+    @pytest.fixture
+    def samples(self):
+        rng = np.random.default_rng(42)
+        values = rng.lognormal(mean=10, sigma=1.5, size=(5000, 4, 3))
+        values[:, 0, 0] = rng.integers(0, 25, size=5000)  # Integer counts with zeros
+        values[:, 1, 1] = rng.normal(0, 100, size=5000)  # Mixed signs
+        return values
+    
+    def test_moments_and_extremes(self, samples):
+        """Batch updates match full-sample numpy statistics"""
+        stats = StreamingStatistics((4, 3))
+        for batch in np.array_split(samples, 7):
+            stats.update(batch)
+        
+        assert stats.count == 5000
+        assert_allclose(stats.mean, samples.mean(axis=0))
+        assert_allclose(stats.std, samples.std(axis=0))
+        assert_array_equal(stats.minimum, samples.min(axis=0))
+        assert_array_equal(stats.maximum, samples.max(axis=0))
+    
+    def test_quantiles_within_relative_accuracy(self, samples):
+        """Sketch quantiles are within the configured relative error"""
+        stats = StreamingStatistics((4, 3), relative_accuracy=0.01)
+        stats.update(samples)
+        
+        for q in (0.05, 0.5, 0.95):
+            estimate = stats.quantile(q)
+            exact = np.quantile(samples, q, axis=0, method="lower")
+            positive = exact > 0
+            assert np.all(np.abs(estimate - exact)[positive] <= 0.0101 * exact[positive])
+        
+        # Small integer counts round back to the exact value
+        assert np.round(stats.median()[0, 0]) == np.quantile(samples[:, 0, 0], 0.5, method="lower")
+    
+    def test_merge_matches_single_accumulator(self, samples):
+        """Accumulators built on separate chunks merge to the combined result"""
+        combined = StreamingStatistics((4, 3))
+        combined.update(samples)
+        
+        merged = StreamingStatistics((4, 3))
+        for batch in np.array_split(samples, 3):
+            part = StreamingStatistics((4, 3))
+            part.update(batch)
+            merged.merge(part)
+        
+        assert merged.count == combined.count
+        assert_allclose(merged.mean, combined.mean)
+        assert_allclose(merged.variance, combined.variance)
+        assert_array_equal(merged.minimum, combined.minimum)
+        assert_array_equal(merged.median(), combined.median())
+    
+    def test_memory_is_bounded(self):
+        """Memory does not grow with the number of observations"""
+        rng = np.random.default_rng(1)
+        stats = StreamingStatistics((10, 5))
+        # Populate every bucket between 1 and 1000
+        first_batch = np.broadcast_to(np.geomspace(1, 1000, 1000)[:, None, None], (1000, 10, 5))
+        stats.update(first_batch)
+        size_after_first = stats.nbytes
+        
+        for _ in range(20):
+            stats.update(rng.uniform(1, 1000, size=(1000, 10, 5)))
+        
+        assert stats.count == 21000
+        assert stats.nbytes == size_after_first
+    
+    def test_memory_does_not_grow_with_value_spread(self):
+        """Only populated buckets are stored, however wide the value range"""
+        stats = StreamingStatistics((100,))
+        stats.update(np.array([[1e-6] * 100, [1e12] * 100, [-1e9] * 100]))
+        
+        assert stats.nbytes < 20000
+        assert_allclose(stats.quantile(0.0), -1e9, rtol=0.01)
+        assert_allclose(stats.median(), 1e-6, rtol=0.01)
+        assert_allclose(stats.quantile(1.0), 1e12, rtol=0.01)
+    
+    def test_invalid_inputs(self):
+        """Invalid accuracy, quantile and merge shapes raise"""
+        with pytest.raises(ValueError):
+            StreamingStatistics((2,), relative_accuracy=1.5)
+        
+        stats = StreamingStatistics((2,))
+        with pytest.raises(ValueError):
+            stats.quantile(1.5)
+        with pytest.raises(ValueError):
+            stats.merge(StreamingStatistics((3,)))
+        
+        assert np.all(np.isnan(stats.median()))
+
+
+class TestMonteCarloEstimator:
+    """Test standard errors and effective sample sizes"""
+    
+    def test_plain_monte_carlo(self):
+        """Independent paths give the sample mean, std/sqrt(n) and ESS of n"""
+        values = np.random.default_rng(1).normal(5.0, 2.0, size=(4000, 2))
+        estimator = MonteCarloEstimator((2,))
+        for batch in np.array_split(values, 5):
+            estimator.update(batch)
+        
+        assert_allclose(estimator.mean, values.mean(axis=0))
+        assert_allclose(estimator.standard_error, values.std(axis=0, ddof=1) / np.sqrt(4000))
+        assert_allclose(estimator.effective_sample_size, np.full(2, 4000.0), rtol=1e-3)
+        assert estimator.weight_effective_sample_size == pytest.approx(4000.0)
+    
+    def test_merge_matches_single_update(self):
+        """Merging chunk estimators equals one update over all paths"""
+        values = np.random.default_rng(2).lognormal(size=(1000, 3))
+        whole = MonteCarloEstimator((3,))
+        whole.update(values)
+        
+        merged = MonteCarloEstimator((3,))
+        for batch in np.array_split(values, 4):
+            part = MonteCarloEstimator((3,))
+            part.update(batch)
+            merged.merge(part)
+        
+        assert_allclose(merged.mean, whole.mean)
+        assert_allclose(merged.standard_error, whole.standard_error)
+        assert_allclose(merged.path_variance, whole.path_variance)
+    
+    def test_importance_weights(self):
+        """Likelihood-ratio weights recover target-measure expectations"""
+        rng = np.random.default_rng(3)
+        shift = 1.0
+        draws = rng.normal(shift, 1.0, size=200000)  # Proposal N(1, 1) for target N(0, 1)
+        weights = np.exp(shift * shift / 2 - shift * draws)
+        
+        estimator = MonteCarloEstimator(())
+        estimator.update((draws > 2.0).astype(float)[:, None], weights=weights)
+        
+        assert estimator.mean.item() == pytest.approx(0.02275, rel=0.03)  # P(Z > 2)
+        assert estimator.weight_effective_sample_size < 200000
+        assert estimator.effective_sample_size.item() > 200000  # Beats plain sampling in the tail
+    
+    def test_antithetic_replicates(self):
+        """Mirrored pairs of a linear outcome have zero estimator variance"""
+        half = np.random.default_rng(4).normal(size=(500, 1))
+        values = np.concatenate([half, -half]) + 3.0
+        
+        estimator = MonteCarloEstimator((1,))
+        estimator.update(values, replicates=(values[:500] + values[500:]) / 2)
+        
+        assert_allclose(estimator.mean, [3.0])
+        assert_allclose(estimator.standard_error, [0.0], atol=1e-12)
+        assert np.isinf(estimator.effective_sample_size[0])
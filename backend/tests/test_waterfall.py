@@ -11,7 +11,7 @@ from sqlalchemy.orm import sessionmaker
 
 from app.models.waterfall import (
     WaterfallConfiguration, WaterfallExecution, WaterfallCalculator,
-    WaterfallStep, PaymentPriority
+    WaterfallStep, PaymentPriority, WaterfallLedger, WaterfallPayment
 )
 from app.models.clo_deal import CLODeal, CLOTranche, DealAsset
 from app.models.asset import Asset
@@ -325,6 +325,75 @@ class TestWaterfallCalculator:
         assert "accelerated" in class_a_principal[0].payment_notes.lower()
 
 
+class TestInMemoryExecution:
+    """Test ledger-backed executions and deferred persistence"""
+    
+    def test_ledger_matches_orm_payments(self, session, sample_deal):
+        """In-memory runs record the same payments without saving anything"""
+        
+        calculator = WaterfallCalculator(sample_deal.deal_id, date(2023, 9, 15), session, in_memory=True)
+        execution = calculator.execute_waterfall(Decimal('30000000'))
+        ledger = calculator.ledger
+        
+        assert execution.execution_status == 'COMPLETED'
+        assert execution.execution_id is None
+        assert len(execution.payments) == 0
+        assert ledger.total('amount_paid') == Decimal('30000000')
+        rows = ledger.to_rows(None, calculator._get_payment_priority)
+        session.rollback()
+        
+        expected = WaterfallCalculator(sample_deal.deal_id, date(2023, 9, 15), session).execute_waterfall(
+            Decimal('30000000'))
+        assert [(p.payment_step, p.amount_due, p.amount_paid, p.amount_deferred, p.target_tranche_id,
+                 p.step_sequence, p.payment_priority) for p in expected.payments] == \
+            [(r['payment_step'], r['amount_due'], r['amount_paid'], r['amount_deferred'],
+              r['target_tranche_id'], r['step_sequence'], r['payment_priority']) for r in rows]
+    
+    def test_persist_execution(self, session, sample_deal):
+        """Persisting bulk inserts the ledger rows under the execution"""
+        
+        calculator = WaterfallCalculator(sample_deal.deal_id, date(2023, 9, 15), session, in_memory=True)
+        execution = calculator.execute_waterfall(Decimal('5000000'))
+        assert session.query(WaterfallExecution).count() == 0
+        
+        calculator.persist_execution(execution)
+        
+        payments = session.query(WaterfallPayment).order_by(WaterfallPayment.step_sequence).all()
+        assert len(payments) == len(calculator.ledger)
+        assert all(p.execution_id == execution.execution_id for p in payments)
+        assert payments[0].payment_step == WaterfallStep.TRUSTEE_FEES.value
+        assert sum(p.amount_paid for p in payments) == Decimal('5000000')
+        assert sum(calculator.ledger.paid_by_step().values()) == Decimal('5000000')
+    
+    def test_persist_replaced_execution(self, session, sample_deal):
+        """An earlier execution cannot be persisted with a later run's ledger"""
+        
+        calculator = WaterfallCalculator(sample_deal.deal_id, date(2023, 9, 15), session, in_memory=True)
+        first = calculator.execute_waterfall(Decimal('5000000'))
+        second = calculator.execute_waterfall(Decimal('30000000'))
+        
+        with pytest.raises(ValueError):
+            calculator.persist_execution(first)
+        assert session.query(WaterfallPayment).count() == 0
+        
+        calculator.persist_execution(second)
+        assert sum(p.amount_paid for p in session.query(WaterfallPayment)) == Decimal('30000000')
+    
+    def test_ledger_columns(self):
+        """Rows are recorded column by column and cleared together"""
+        
+        ledger = WaterfallLedger()
+        for i in range(5):
+            ledger.record(WaterfallStep.CLASS_A_INTEREST, Decimal(i), Decimal(i), Decimal('0'), "A")
+        
+        assert len(ledger) == 5
+        assert list(ledger.column('amount_paid')) == [Decimal(i) for i in range(5)]
+        assert ledger.column('payment_step')[0] == 'CLASS_A_INTEREST'
+        
+        ledger.clear()
+        assert len(ledger) == 0 and ledger.total('amount_due') == Decimal('0')
+
+
 class TestWaterfallConfiguration:
     """Test waterfall configuration management"""
     
@@ -0,0 +1,202 @@
+"""
+Tests for Compiled Waterfall Programs
+
+Structure and mapping compilation, the process-wide program cache and
+execution of the compiled step program.
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import Base
+from app.models.clo_deal import CLODeal, CLOTranche
+from app.models.dynamic_waterfall import (
+    TrancheMapping, WaterfallStructure, DynamicWaterfallStrategy, TrancheType, PaymentCategory
+)
+from app.models.waterfall import WaterfallExecution, WaterfallStep
+from app.models.waterfall_types import EnhancedWaterfallCalculator
+from app.models.waterfall_program import (
+    TriggerRef, AmountFormula, compile_waterfall_program, waterfall_program_cache
+)
+
+DEAL_ID = "PROGRAM-TEST"
+
+
+@pytest.fixture
+def session():
+    """In-memory database with a three-tranche deal, structure and mappings"""
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    waterfall_program_cache.clear()
+
+    session.add(CLODeal(deal_id=DEAL_ID, deal_name="Program Test", effective_date=date(2023, 6, 15),
+                        deal_status="ACTIVE"))
+    session.add_all([
+        CLOTranche(tranche_id="PT-A", deal_id=DEAL_ID, tranche_name="Class A Notes",
+                   initial_balance=Decimal('300000000'), current_balance=Decimal('300000000'),
+                   coupon_rate=Decimal('0.04'), seniority_level=1),
+        CLOTranche(tranche_id="PT-B", deal_id=DEAL_ID, tranche_name="Class B Notes",
+                   initial_balance=Decimal('50000000'), current_balance=Decimal('50000000'),
+                   coupon_rate=Decimal('0.08'), seniority_level=2),
+        CLOTranche(tranche_id="PT-E", deal_id=DEAL_ID, tranche_name="Class E Notes",
+                   initial_balance=Decimal('25000000'), current_balance=Decimal('25000000'),
+                   coupon_rate=Decimal('0.12'), seniority_level=3),
+    ])
+    session.add(WaterfallStructure(
+        structure_name="PROGRAM_TEST",
+        min_tranches=3, max_tranches=3, typical_tranches=3,
+        payment_sequence=[
+            PaymentCategory.EXPENSES.value,
+            PaymentCategory.SENIOR_INTEREST.value,
+            PaymentCategory.SUBORDINATED_INTEREST.value,
+            PaymentCategory.SENIOR_PRINCIPAL.value,
+            PaymentCategory.RESIDUAL.value
+        ],
+        category_rules={PaymentCategory.SUBORDINATED_INTEREST.value: {"interest_cap": 500000}}
+    ))
+    session.add_all([
+        TrancheMapping(deal_id=DEAL_ID, tranche_id="PT-A", tranche_type=TrancheType.SENIOR_AAA.value,
+                       payment_category=PaymentCategory.SENIOR_INTEREST.value, category_rank=1,
+                       interest_step="CLASS_A_INTEREST", principal_step="CLASS_A_PRINCIPAL",
+                       effective_date=date(2023, 6, 15)),
+        TrancheMapping(deal_id=DEAL_ID, tranche_id="PT-B", tranche_type=TrancheType.SENIOR_AA.value,
+                       payment_category=PaymentCategory.SENIOR_INTEREST.value, category_rank=2,
+                       interest_step="CLASS_B_INTEREST", principal_step="CLASS_B_PRINCIPAL",
+                       effective_date=date(2023, 6, 15), expiration_date=date(2024, 6, 30)),
+        TrancheMapping(deal_id=DEAL_ID, tranche_id="PT-E", tranche_type=TrancheType.SUBORDINATED.value,
+                       payment_category=PaymentCategory.SUBORDINATED_INTEREST.value, category_rank=1,
+                       interest_step="CLASS_E_INTEREST", is_deferrable=True,
+                       effective_date=date(2023, 6, 15)),
+    ])
+    session.commit()
+    yield session
+    session.close()
+    waterfall_program_cache.clear()
+
+
+def _count_queries(session):
+    """List that collects every statement executed on the session's engine"""
+    statements = []
+    event.listen(session.get_bind(), 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+class TestWaterfallProgram:
+    """Test compiled programs and their cache"""
+
+    def test_compiled_steps(self, session):
+        """Steps, tranches, triggers and amount formulas are resolved at compile time"""
+        program = compile_waterfall_program(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15))
+
+        assert program.sequence == [
+            WaterfallStep.TRUSTEE_FEES, WaterfallStep.ADMIN_FEES, WaterfallStep.SENIOR_MGMT_FEES,
+            WaterfallStep.CLASS_A_INTEREST, WaterfallStep.CLASS_B_INTEREST, WaterfallStep.CLASS_E_INTEREST,
+            WaterfallStep.RESIDUAL_EQUITY
+        ]
+        interest_a = program.step_index[WaterfallStep.CLASS_A_INTEREST]
+        assert (interest_a.tranche_id, interest_a.trigger, interest_a.amount) == \
+            ("PT-A", TriggerRef.NOT_IN_DEFAULT, AmountFormula.INTEREST)
+        assert program.step_index[WaterfallStep.CLASS_E_INTEREST].trigger == TriggerRef.DEFERRAL
+        assert program.step_index[WaterfallStep.TRUSTEE_FEES].amount == AmountFormula.NON_TRANCHE
+        assert program.mappings["PT-E"].rules == {"interest_cap": 500000}
+
+        # Window runs from the mappings' effective date to the day after PT-B expires
+        assert (program.valid_from, program.valid_to) == (date(2023, 6, 15), date(2024, 7, 1))
+        assert program.covers(date(2024, 6, 30)) and not program.covers(date(2024, 7, 1))
+
+        later = compile_waterfall_program(session, DEAL_ID, "PROGRAM_TEST", date(2024, 9, 15))
+        assert WaterfallStep.CLASS_B_INTEREST not in later.sequence
+        assert later.step_index.get(WaterfallStep.CLASS_B_INTEREST) is None
+        assert (later.valid_from, later.valid_to) == (date(2024, 7, 1), None)
+
+    def test_programs_are_shared_without_queries(self, session):
+        """Strategies in the same window reuse the program and issue no queries"""
+        first = DynamicWaterfallStrategy(
+            EnhancedWaterfallCalculator(DEAL_ID, date(2023, 9, 15), session), "PROGRAM_TEST")
+        calculator = EnhancedWaterfallCalculator(DEAL_ID, date(2023, 12, 15), session)
+
+        statements = _count_queries(session)
+        second = DynamicWaterfallStrategy(calculator, "PROGRAM_TEST")
+
+        assert second.program is first.program
+        assert statements == []
+        assert second.tranche_mappings["PT-B"].payment_category == PaymentCategory.SENIOR_INTEREST.value
+
+        # A different window compiles its own program
+        third = DynamicWaterfallStrategy(
+            EnhancedWaterfallCalculator(DEAL_ID, date(2024, 9, 15), session), "PROGRAM_TEST")
+        assert third.program is not first.program
+        assert "PT-B" not in third.tranche_mappings
+
+    def test_mapping_changes_invalidate(self, session):
+        """Writing mappings drops the deal's cached programs; balance updates do not"""
+        program = waterfall_program_cache.get_program(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15))
+
+        session.get(CLOTranche, "PT-A").current_balance = Decimal('250000000')
+        session.commit()
+        assert waterfall_program_cache.get(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15)) is program
+
+        mapping = session.query(TrancheMapping).filter_by(tranche_id="PT-E").one()
+        mapping.is_deferrable = False
+        session.commit()
+        assert waterfall_program_cache.get(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15)) is None
+
+        recompiled = waterfall_program_cache.get_program(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15))
+        assert recompiled.mappings["PT-E"].trigger == TriggerRef.ALWAYS
+
+    def test_connection_bound_session_invalidates(self, session):
+        """Sessions bound to a Connection share and invalidate the engine's programs"""
+        connection = session.get_bind().connect()
+        bound = Session(bind=connection)
+        program = waterfall_program_cache.get_program(bound, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15))
+        assert waterfall_program_cache.get(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15)) is program
+
+        bound.query(TrancheMapping).filter_by(tranche_id="PT-E").one().is_deferrable = False
+        bound.commit()
+        recompiled = waterfall_program_cache.get_program(bound, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15))
+        assert recompiled is not program
+        assert recompiled.mappings["PT-E"].trigger == TriggerRef.ALWAYS
+        bound.close()
+        connection.close()
+
+    def test_uncommitted_changes_are_not_cached(self, session):
+        """Programs compiled from flushed changes stay private until commit; rollback keeps the cache"""
+        program = waterfall_program_cache.get_program(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15))
+
+        mapping = session.query(TrancheMapping).filter_by(tranche_id="PT-E").one()
+        mapping.is_deferrable = False
+        session.flush()
+        uncommitted = waterfall_program_cache.get_program(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15))
+        assert uncommitted.mappings["PT-E"].trigger == TriggerRef.ALWAYS
+
+        session.rollback()
+        cached = waterfall_program_cache.get_program(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15))
+        assert cached.mappings["PT-E"].trigger == TriggerRef.DEFERRAL
+        assert cached.deal_id == program.deal_id
+        assert waterfall_program_cache.get(session, DEAL_ID, "PROGRAM_TEST", date(2023, 9, 15)) is cached
+
+    def test_process_waterfall(self, session):
+        """The interpreter loop pays the compiled steps in order"""
+        calculator = EnhancedWaterfallCalculator(DEAL_ID, date(2023, 9, 15), session)
+        strategy = DynamicWaterfallStrategy(calculator, "PROGRAM_TEST")
+        session.get(CLOTranche, "PT-A")  # Loaded into the identity map
+
+        calculator.available_cash = Decimal('4000000')
+        execution = WaterfallExecution(deal_id=DEAL_ID, payment_date=date(2023, 9, 15))
+        strategy.process_waterfall(execution)
+
+        payments = {payment.payment_step: payment for payment in execution.payments}
+        assert [payment.payment_step for payment in execution.payments] == \
+            [step.value for step in strategy.get_payment_sequence()]
+        assert payments["CLASS_A_INTEREST"].amount_paid == Decimal('3000000.00')
+        assert payments["CLASS_A_INTEREST"].target_tranche_id == "PT-A"
+        assert payments["CLASS_B_INTEREST"].amount_paid == Decimal('1000000.00')
+        # Interest cap from the category rules, unpaid once cash runs out
+        assert payments["CLASS_E_INTEREST"].amount_due == Decimal('500000')
+        assert payments["CLASS_E_INTEREST"].amount_deferred == Decimal('500000')
+        assert calculator.available_cash == Decimal('0')
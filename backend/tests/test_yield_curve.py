@@ -12,9 +12,11 @@ Tests the complete VBA YieldCurve.cls conversion including:
 
 import pytest
 import math
+import numpy as np
 from datetime import date, datetime
 from decimal import Decimal
 from dateutil.relativedelta import relativedelta
+from unittest.mock import patch
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -22,6 +24,9 @@ from app.core.database import Base
 from app.models.yield_curve import (
     YieldCurve,
     YieldCurveService,
+    YieldCurveCache,
+    YieldCurveShock,
+    yield_curve_cache,
     YieldCurveModel,
     YieldCurveRateModel,
     ForwardRateModel
@@ -295,6 +300,149 @@ class TestYieldCurveZeroRate:
         assert abs(zero_rate - expected_rate) < 1e-10
 
 
+def _reference_spot_rate(curve, i_date, i_month):
+    """Month-by-month VBA SpotRate loop with linear forward interpolation"""
+    forward_dates = sorted(curve.forward_dict)
+    forward_values = [curve.forward_dict[key] for key in forward_dates]
+    l_rate = 1.0
+    current_date = i_date
+    for _ in range(max(i_month, 0)):
+        l_rate *= 1 + np.interp(current_date.toordinal(), forward_dates, forward_values)
+        current_date = current_date + relativedelta(months=1)
+    return l_rate ** (1.0 / i_month) - 1 if i_month > 0 else 0.0
+
+
+class TestYieldCurveLookupTables:
+    """Test table-based and vectorized rate lookups"""
+    
+    @pytest.mark.parametrize("start_date", [
+        date(2025, 1, 10), date(2025, 1, 31), date(2024, 1, 29), date(2023, 8, 30), date(2024, 6, 15)
+    ])
+    def test_spot_rate_matches_monthly_loop(self, test_yield_curve, start_date):
+        """Table lookups reproduce the monthly compounding loop, including month-end clipping"""
+        for months in (0, 1, 2, 7, 13, 49, 400):
+            expected = _reference_spot_rate(test_yield_curve, start_date, months)
+            assert test_yield_curve.spot_rate(start_date, months) == pytest.approx(expected, abs=1e-14)
+        
+        # Dates before and beyond the curve use flat extrapolation
+        early = start_date - relativedelta(years=3)
+        assert test_yield_curve.spot_rate(early, 60) == pytest.approx(
+            _reference_spot_rate(test_yield_curve, early, 60), abs=1e-14)
+    
+    def test_vectorized_rates_match_scalar(self, test_yield_curve):
+        """Array variants agree with the scalar methods"""
+        curve = test_yield_curve
+        start = curve.analysis_date
+        end_dates = [start + relativedelta(days=37 * k) for k in range(1, 120)]
+        
+        zero_rates = curve.zero_rates(start, end_dates)
+        assert zero_rates.shape == (119,)
+        for end_date, rate in zip(end_dates, zero_rates):
+            assert rate == pytest.approx(curve.zero_rate(start, end_date), abs=1e-15)
+        
+        spot_rates = curve.spot_rates(end_dates, np.arange(1, 120))
+        for k, (end_date, rate) in enumerate(zip(end_dates, spot_rates), start=1):
+            assert rate == pytest.approx(curve.spot_rate(end_date, k), abs=1e-15)
+    
+    def test_discount_factors(self, test_yield_curve):
+        """Discount factors use the zero rate and actual/365.25 years"""
+        curve = test_yield_curve
+        start = curve.analysis_date
+        end_dates = [start + relativedelta(months=6), start + relativedelta(years=5, days=3)]
+        
+        factors = curve.discount_factors(start, end_dates, spread=0.02)
+        for end_date, factor in zip(end_dates, factors):
+            years = (end_date - start).days / 365.25
+            expected = (1 + curve.zero_rate(start, end_date) + 0.02) ** -years
+            assert factor == pytest.approx(expected, rel=1e-14)
+        assert curve.discount_factor(start, end_dates[0]) > factors[0]
+
+
+class TestYieldCurveScenarios:
+    """Test batched yield curve shocks"""
+    
+    def test_shock_shapes(self, test_yield_curve):
+        """Parallel, twist, butterfly and key rate shifts by maturity"""
+        curve = test_yield_curve
+        scenarios = curve.apply_shocks([
+            YieldCurveShock("PARALLEL", 100),
+            YieldCurveShock("TWIST", 50, pivot_month=24),
+            YieldCurveShock("BUTTERFLY", 25, pivot_month=60),
+            YieldCurveShock("KEY_RATE", 10, pivot_month=12),
+        ])
+        base = np.array([curve._spot_rates[month] for month in scenarios.months])
+        shifts = (scenarios.spot_rates - base) * 10000
+        
+        assert scenarios.spot_rates.shape == (4, 360)
+        assert scenarios.forward_rates.shape == scenarios.discount_grid.shape == (4, 360)
+        np.testing.assert_allclose(shifts[0], 100)
+        np.testing.assert_allclose(shifts[1][[23, 359]], [0, 50], atol=1e-9)
+        np.testing.assert_allclose(shifts[2][[0, 59, 359]], [-25, 25, -25], atol=1e-9)
+        np.testing.assert_allclose(shifts[3][[5, 11, 17, 23]], [0, 10, 5, 0], atol=1e-9)
+        assert scenarios.scenario_names[3] == "KEY_RATE_12M_+10BP"
+    
+    @pytest.mark.parametrize("analysis_date", [date(2025, 1, 10), date(2025, 1, 31)])
+    def test_rows_price_like_shocked_curves(self, sample_rate_dict, analysis_date):
+        """Each row matches a YieldCurve set up from its shocked spot rates"""
+        curve = YieldCurve("SCENARIO_TEST", analysis_date, sample_rate_dict)
+        scenarios = curve.apply_shocks([YieldCurveShock("PARALLEL", 0), YieldCurveShock("TWIST", -40)])
+        dates = [analysis_date + relativedelta(days=23 * k) for k in range(-3, 700)]
+        
+        np.testing.assert_allclose(scenarios.zero_rates(dates)[0], curve.zero_rates(analysis_date, dates),
+                                   atol=1e-13)
+        shocked = scenarios.scenario_curve(1)
+        np.testing.assert_allclose(scenarios.zero_rates(dates)[1], shocked.zero_rates(analysis_date, dates),
+                                   atol=1e-13)
+        np.testing.assert_allclose(scenarios.forward_rates[1],
+                                   [shocked.forward_dict[key] for key in sorted(shocked.forward_dict)],
+                                   atol=1e-13)
+        np.testing.assert_allclose(scenarios.discount_grid[1],
+                                   shocked.discount_factors(analysis_date, scenarios.dates), rtol=1e-12)
+    
+    def test_key_rate_shock_bumps_input_rate(self, sample_rate_dict):
+        """A key rate shock equals bumping that input rate before interpolation"""
+        analysis_date = date(2025, 1, 10)
+        scenarios = YieldCurve("KRD", analysis_date, sample_rate_dict).apply_shocks(
+            [YieldCurveShock("KEY_RATE", 10, pivot_month=36)])
+        
+        bumped_rates = dict(sample_rate_dict)
+        bumped_rates[36] += 0.001
+        bumped = YieldCurve("KRD", analysis_date, bumped_rates)
+        np.testing.assert_allclose(scenarios.spot_rates[0],
+                                   [bumped._spot_rates[month] for month in scenarios.months], atol=1e-15)
+    
+    def test_key_rate_durations(self, yield_curve_db, sample_rate_dict):
+        """Key rate durations add up to the parallel effective duration"""
+        service = YieldCurveService(yield_curve_db)
+        analysis_date = date(2025, 1, 10)
+        service.create_yield_curve("KRD_TEST", analysis_date, sample_rate_dict)
+        cash_flows = [(analysis_date + relativedelta(months=6 * k), Decimal('25000')) for k in range(1, 21)]
+        cash_flows.append((analysis_date + relativedelta(years=10), Decimal('1000000')))
+        
+        durations = service.key_rate_durations(cash_flows, "KRD_TEST", analysis_date)
+        assert set(durations) == set(sample_rate_dict)
+        assert durations[360] == pytest.approx(0.0, abs=1e-9)
+        
+        scenarios = service.generate_scenarios("KRD_TEST", analysis_date, [
+            YieldCurveShock("PARALLEL", 0), YieldCurveShock("PARALLEL", 1), YieldCurveShock("PARALLEL", -1)
+        ])
+        values = scenarios.present_values([cf_date for cf_date, _ in cash_flows],
+                                          [float(amount) for _, amount in cash_flows])
+        effective_duration = (values[2] - values[1]) / (2 * values[0] * 0.0001)
+        assert sum(durations.values()) == pytest.approx(effective_duration, rel=1e-6)
+    
+    def test_invalid_shocks(self, test_yield_curve):
+        """Unknown shift types and key rates off the input maturities raise"""
+        with pytest.raises(ValueError):
+            YieldCurveShock("ROTATE", 10)
+        with pytest.raises(ValueError):
+            YieldCurveShock("KEY_RATE", 10)
+        with pytest.raises(ValueError):
+            test_yield_curve.apply_shocks([YieldCurveShock("KEY_RATE", 10, pivot_month=7)])
+        with pytest.raises(ValueError):
+            test_yield_curve.apply_shocks([])
+
+
 class TestYieldCurveDatabasePersistence:
     """Test database persistence functionality"""
     
@@ -401,6 +549,75 @@ class TestYieldCurveDatabasePersistence:
         assert pv > Decimal('0')
 
 
+class TestYieldCurveCache:
+    """Test the process-wide yield curve cache"""
+    
+    def test_load_uses_cache(self, yield_curve_db, sample_rate_dict):
+        """Repeated loads return the same curve without querying the database"""
+        service = YieldCurveService(yield_curve_db)
+        analysis_date = date(2025, 1, 10)
+        service.create_yield_curve("CACHE_TEST", analysis_date, sample_rate_dict)
+        
+        first = service.load_yield_curve("CACHE_TEST", analysis_date)
+        with patch.object(yield_curve_db, "query", side_effect=AssertionError("database hit")):
+            second = YieldCurveService(yield_curve_db).load_yield_curve("CACHE_TEST", analysis_date)
+        
+        assert second is first
+        assert first.session is None  # Shared curves are detached from the loading session
+    
+    def test_save_invalidates_cached_curve(self, yield_curve_db, sample_rate_dict):
+        """Writing a curve drops the stale cached copy"""
+        service = YieldCurveService(yield_curve_db)
+        analysis_date = date(2025, 1, 10)
+        service.create_yield_curve("CACHE_TEST", analysis_date, sample_rate_dict)
+        stale = service.load_yield_curve("CACHE_TEST", analysis_date)
+        
+        yield_curve_db.query(YieldCurveModel).filter_by(curve_name="CACHE_TEST").update({"is_active": False})
+        shifted = {month: rate + 0.01 for month, rate in sample_rate_dict.items()}
+        service.create_yield_curve("CACHE_TEST", analysis_date, shifted)
+        
+        fresh = service.load_yield_curve("CACHE_TEST", analysis_date)
+        assert fresh is not stale
+        assert fresh.spot_rate(analysis_date, 12) == pytest.approx(stale.spot_rate(analysis_date, 12) + 0.01,
+                                                                   abs=1e-6)
+    
+    def test_databases_do_not_share_entries(self, yield_curve_db, sample_rate_dict):
+        """A curve cached for one database is not visible from another"""
+        analysis_date = date(2025, 1, 10)
+        YieldCurveService(yield_curve_db).create_yield_curve("CACHE_TEST", analysis_date, sample_rate_dict)
+        assert YieldCurveService(yield_curve_db).load_yield_curve("CACHE_TEST", analysis_date) is not None
+        
+        engine = create_engine("sqlite:///:memory:", echo=False)
+        Base.metadata.create_all(engine)
+        other_session = sessionmaker(bind=engine)()
+        assert YieldCurveService(other_session).load_yield_curve("CACHE_TEST", analysis_date) is None
+    
+    def test_warm_cache_loads_latest_active_curves(self, yield_curve_db, sample_rate_dict):
+        """Warm-up loads the most recent analysis date of each active curve"""
+        service = YieldCurveService(yield_curve_db)
+        service.create_yield_curve("WARM_A", date(2025, 1, 10), sample_rate_dict)
+        service.create_yield_curve("WARM_A", date(2025, 2, 10), sample_rate_dict)
+        service.create_yield_curve("WARM_B", date(2025, 1, 10), sample_rate_dict)
+        
+        assert service.warm_cache() == 2
+        
+        assert yield_curve_cache.get(yield_curve_db, "WARM_A", date(2025, 2, 10)) is not None
+        assert yield_curve_cache.get(yield_curve_db, "WARM_A", date(2025, 1, 10)) is None
+    
+    def test_lru_eviction(self, yield_curve_db, sample_rate_dict):
+        """The least recently used curve is evicted beyond max_size"""
+        cache = YieldCurveCache(max_size=2)
+        curves = [YieldCurve(f"LRU_{k}", date(2025, 1, 10), sample_rate_dict) for k in range(3)]
+        cache.put(yield_curve_db, curves[0])
+        cache.put(yield_curve_db, curves[1])
+        cache.get(yield_curve_db, "LRU_0", date(2025, 1, 10))
+        cache.put(yield_curve_db, curves[2])
+        
+        assert cache.get(yield_curve_db, "LRU_0", date(2025, 1, 10)) is curves[0]
+        assert cache.get(yield_curve_db, "LRU_1", date(2025, 1, 10)) is None
+        assert cache.hits == 2 and cache.misses == 1
+
+
 class TestYieldCurveEdgeCases:
     """Test edge cases and error handling"""
     